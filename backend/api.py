@@ -35,6 +35,7 @@ from backend.models.models import Resource, EnhancedModule, Submodule, QuizQuest
 from backend.utils.auth import decode_access_token
 # Import Progress Orchestrator
 from backend.core.progress.orchestrator import ProgressOrchestrator
+from backend.core.generation_profile import get_task_profile
 
 # Import rate limiter and backend
 from backend.utils.auth_middleware import get_optional_user, get_current_user
@@ -55,13 +56,13 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
 try:
     # Import the backend functionality - try both approaches
     try:
-        from main import generate_learning_path
+        from main import generate_learning_path, resume_learning_path
         from services.services import validate_google_key, validate_brave_key
         from services.key_management import ApiKeyManager
         from services.key_provider import GoogleKeyProvider, PerplexityKeyProvider, BraveKeyProvider
     except ImportError:
         # If that fails, try with backend prefix (when run as a package)
-        from backend.main import generate_learning_path
+        from backend.main import generate_learning_path, resume_learning_path
         from backend.services.services import validate_google_key, validate_brave_key
         from backend.services.key_management import ApiKeyManager
         from backend.services.key_provider import GoogleKeyProvider, PerplexityKeyProvider, BraveKeyProvider
@@ -169,6 +170,73 @@ async def startup_db_and_limiter():
         logger.warning("Rate limiting will be DISABLED")
         # La aplicación seguirá funcionando, pero sin rate limiting
 
+@app.on_event("startup")
+async def warm_up_generation_graph():
+    """Compile the generation graph and preload prompts/parsers before the first request needs them."""
+    from backend.core.graph_builder import GRAPH_WARMUP_ENABLED, warm_up_graph
+    if not GRAPH_WARMUP_ENABLED:
+        return
+    try:
+        await asyncio.to_thread(warm_up_graph)
+    except Exception as e:
+        # The graph is compiled on first use anyway; a failed warm-up only costs latency
+        logger.error(f"Graph warm-up failed: {e}")
+
+@app.on_event("startup")
+async def resume_interrupted_generations():
+    """
+    Prune expired generation checkpoints and resume the tasks a restart left RUNNING.
+
+    The API runs as a single process (see Procfile), so a task still RUNNING at
+    startup is not running anywhere; it resumes from its last checkpoint.
+    """
+    from backend.core.checkpointing import (
+        GENERATION_CHECKPOINTS_ENABLED, GENERATION_RESUME_ON_STARTUP, has_checkpoint, prune_checkpoints,
+    )
+    if not GENERATION_CHECKPOINTS_ENABLED:
+        return
+    try:
+        await asyncio.to_thread(prune_checkpoints)
+    except Exception as e:
+        logger.error(f"Failed to prune generation checkpoints: {e}")
+    if not GENERATION_RESUME_ON_STARTUP:
+        return
+
+    db = SessionLocal()
+    try:
+        interrupted = [
+            (task.task_id, task.request_topic, task.user_id)
+            for task in db.query(GenerationTask).filter(GenerationTask.status == GenerationTaskStatus.RUNNING).all()
+        ]
+    except Exception as e:
+        logger.error(f"Failed to look up interrupted generation tasks: {e}")
+        return
+    finally:
+        db.close()
+
+    for task_id, topic, user_id in interrupted:
+        try:
+            if not await asyncio.to_thread(has_checkpoint, task_id):
+                logger.warning(f"Task {task_id} was interrupted before its first checkpoint and cannot be resumed")
+                continue
+            await start_resumed_generation(task_id, topic, user_id)
+        except Exception as e:
+            logger.error(f"Failed to resume task {task_id}: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_scraping_resources():
+    """Release process pools, pooled HTTP clients and other long-lived scraping resources."""
+    from backend.services.extraction import shutdown_extraction_engine
+    from backend.services.http_clients import close_http_clients
+    try:
+        shutdown_extraction_engine()
+    except Exception as e:
+        logger.error(f"Error shutting down extraction engine: {e}")
+    try:
+        await close_http_clients()
+    except Exception as e:
+        logger.error(f"Error closing shared HTTP clients: {e}")
+
 # --- Add X-Frame-Options Middleware ---
 @app.middleware("http")
 async def add_security_headers(request: Request, call_next):
@@ -635,17 +703,21 @@ async def generate_learning_path_task(
     desiredSubmoduleCount: Optional[int] = None,
     explanation_style: str = "standard",
     language: str = "en",
-    user_id: Optional[int] = None
+    user_id: Optional[int] = None,
+    resume: bool = False
 ):
     """
     Execute the course generation task with comprehensive error handling.
     Handles credit charging and potential refunds atomically.
     Ensures all exceptions are caught, logged, and reported through progress updates.
+    With resume=True the task's interrupted run continues from its last checkpoint;
+    its credit was charged by the interrupted run (and is refunded if the resumed run fails).
     """
     db = SessionLocal() # Create a dedicated session for this background task
     credit_service = CreditService(db=db) # Instantiate credit service with the task's session
     charge_successful = False
     error_occurred_after_charge = False
+    interrupted = False # Cancelled after a checkpoint: left RUNNING so it can be resumed
     final_status = GenerationTaskStatus.FAILED # Default
     error_msg_to_save = None
     history_entry_id_to_link = None
@@ -775,10 +847,10 @@ async def generate_learning_path_task(
         
         try:
             # Use db from this task's scope
-            stmt = update(GenerationTask).where(GenerationTask.task_id == task_id).values(
-                status=GenerationTaskStatus.RUNNING,
-                started_at=datetime.utcnow()
-            )
+            running_values = {"status": GenerationTaskStatus.RUNNING}
+            if not resume:
+                running_values["started_at"] = datetime.utcnow()
+            stmt = update(GenerationTask).where(GenerationTask.task_id == task_id).values(**running_values)
             db.execute(stmt)
             db.commit()
             logger.info(f"Updated GenerationTask {task_id} status to RUNNING")
@@ -788,9 +860,10 @@ async def generate_learning_path_task(
             # If we can't even mark as running, fail early
             raise LearningPathGenerationError("Failed to initialize generation task state in database.")
 
-        logging.info(f"Starting course generation for: {topic} in language: {language}")
+        start_verb = "Resuming" if resume else "Starting"
+        logging.info(f"{start_verb} course generation for: {topic} in language: {language}")
         await enhanced_progress_callback(
-            f"Starting course generation for: {topic} in language: {language}",
+            f"{start_verb} course generation for: {topic} in language: {language}",
             phase="initialization",
             phase_progress=0.0,
             overall_progress=0.0,
@@ -814,23 +887,16 @@ async def generate_learning_path_task(
             logger.error(f"Failed to fetch user information for task {task_id}: {user_fetch_err}")
             raise LearningPathGenerationError("Failed to fetch user information for model selection.")
              
-        charge_error = None
-        try:
-            # Check if db session is already in a transaction
-            if db.in_transaction():
-                logger.debug(f"Database session already in transaction for charge, using existing transaction")
-                notes = f"Generate course for topic: {topic}"
-                await credit_service.charge_credits(
-                    user_id=user_id,
-                    amount=1,
-                    transaction_type=TransactionType.GENERATION_USE,
-                    notes=notes
-                )
-                # Commit the charge in the existing transaction
-                db.commit()
-            else:
-                # Start new transaction for charge
-                with db.begin(): 
+        if resume:
+            # Charged by the interrupted run; a failure of the resumed run still refunds it
+            charge_successful = True
+            logger.info(f"Resuming task {task_id} without a new credit charge.")
+        else:
+            charge_error = None
+            try:
+                # Check if db session is already in a transaction
+                if db.in_transaction():
+                    logger.debug(f"Database session already in transaction for charge, using existing transaction")
                     notes = f"Generate course for topic: {topic}"
                     await credit_service.charge_credits(
                         user_id=user_id,
@@ -838,23 +904,35 @@ async def generate_learning_path_task(
                         transaction_type=TransactionType.GENERATION_USE,
                         notes=notes
                     )
-            charge_successful = True 
-            logger.info(f"Credit charge successful for user {user_id}, task {task_id}.")
-            await enhanced_progress_callback(
-                "Credit charged successfully.",
-                phase="initialization",
-                phase_progress=0.5, 
-                overall_progress=0.05,
-                action="processing"
-            )
-        except InsufficientCreditsError as ice:
-            logger.warning(f"Credit charge failed for task {task_id}: Insufficient credits for user {user_id}. Detail: {ice.detail}")
-            charge_error = ice 
-            raise 
-        except Exception as charge_exc:
-            logger.exception(f"Credit charge failed unexpectedly for task {task_id}, user {user_id}: {charge_exc}")
-            charge_error = charge_exc 
-            raise 
+                    # Commit the charge in the existing transaction
+                    db.commit()
+                else:
+                    # Start new transaction for charge
+                    with db.begin(): 
+                        notes = f"Generate course for topic: {topic}"
+                        await credit_service.charge_credits(
+                            user_id=user_id,
+                            amount=1,
+                            transaction_type=TransactionType.GENERATION_USE,
+                            notes=notes
+                        )
+                charge_successful = True 
+                logger.info(f"Credit charge successful for user {user_id}, task {task_id}.")
+                await enhanced_progress_callback(
+                    "Credit charged successfully.",
+                    phase="initialization",
+                    phase_progress=0.5, 
+                    overall_progress=0.05,
+                    action="processing"
+                )
+            except InsufficientCreditsError as ice:
+                logger.warning(f"Credit charge failed for task {task_id}: Insufficient credits for user {user_id}. Detail: {ice.detail}")
+                charge_error = ice 
+                raise 
+            except Exception as charge_exc:
+                logger.exception(f"Credit charge failed unexpectedly for task {task_id}, user {user_id}: {charge_exc}")
+                charge_error = charge_exc 
+                raise 
         # --- End Credit Charge ---
 
         # --- Execute Core Generation Logic --- 
@@ -870,20 +948,30 @@ async def generate_learning_path_task(
         )
 
         # The main generation call happens *after* successful credit charge
-        result = await generate_learning_path(
-            topic,
-            parallel_count=parallelCount,
-            search_parallel_count=searchParallelCount,
-            submodule_parallel_count=submoduleParallelCount,
-            progress_callback=enhanced_progress_callback, # Pass the simplified logger callback
-            google_key_provider=googleKeyProvider,
-            brave_key_provider=braveKeyProvider,
-            desired_module_count=desiredModuleCount,
-            desired_submodule_count=desiredSubmoduleCount,
-            explanation_style=explanation_style,
-            language=language,
-            user=user_for_model
-        )
+        if resume:
+            result = await resume_learning_path(
+                task_id,
+                progress_callback=enhanced_progress_callback,
+                google_key_provider=googleKeyProvider,
+                brave_key_provider=braveKeyProvider,
+                user=user_for_model
+            )
+        else:
+            result = await generate_learning_path(
+                topic,
+                parallel_count=parallelCount,
+                search_parallel_count=searchParallelCount,
+                submodule_parallel_count=submoduleParallelCount,
+                progress_callback=enhanced_progress_callback, # Pass the simplified logger callback
+                google_key_provider=googleKeyProvider,
+                brave_key_provider=braveKeyProvider,
+                desired_module_count=desiredModuleCount,
+                desired_submodule_count=desiredSubmoduleCount,
+                explanation_style=explanation_style,
+                language=language,
+                user=user_for_model,
+                task_id=task_id
+            )
         # --- End Core Generation Logic --- 
 
         final_status = GenerationTaskStatus.COMPLETED
@@ -932,6 +1020,19 @@ async def generate_learning_path_task(
                      ).model_dump())
             raise LearningPathGenerationError("Failed to save course result.") from save_err 
 
+    except asyncio.CancelledError:
+        # CancelledError is not an Exception: without this a cancelled run (e.g. a graceful shutdown)
+        # would be finalised as FAILED without a refund, even when it could be resumed
+        from backend.core.checkpointing import cancelled_task_outcome
+        cancelled_status, cancelled_error = cancelled_task_outcome(task_id)
+        if cancelled_status is None:
+            interrupted = True
+        else:
+            final_status = cancelled_status
+            error_occurred_after_charge = charge_successful
+            error_msg_to_save = cancelled_error
+        raise
+
     except Exception as task_exception:
         final_status = GenerationTaskStatus.FAILED
         error_occurred_after_charge = charge_successful 
@@ -1037,24 +1138,17 @@ async def generate_learning_path_task(
                 logger.error(f"Error closing database session for task {task_id} after exception: {db_close_err}")
 
     finally:
-        if error_occurred_after_charge and user_id is not None:
-            logger.warning(f"Task {task_id} failed after successful charge. Attempting refund for user {user_id}.")
-            try:
-                # Check if db session is already in a transaction
-                if db.in_transaction():
-                    logger.debug(f"Database session already in transaction for refund, using existing transaction")
-                    refund_notes = f"Refund for failed generation task {task_id} (topic: {topic}). Error: {error_msg_to_save[:150] if error_msg_to_save else 'N/A'}"
-                    await credit_service.grant_credits(
-                        user_id=user_id,
-                        amount=1,
-                        transaction_type=TransactionType.REFUND,
-                        notes=refund_notes
-                    )
-                    # Commit the refund in the existing transaction
-                    db.commit()
-                else:
-                    # Start new transaction for refund
-                    with db.begin():
+        if interrupted:
+            # The DB row is the source of truth until the task is resumed
+            async with active_generations_lock:
+                active_generations.pop(task_id, None)
+        else:
+            if error_occurred_after_charge and user_id is not None:
+                logger.warning(f"Task {task_id} failed after successful charge. Attempting refund for user {user_id}.")
+                try:
+                    # Check if db session is already in a transaction
+                    if db.in_transaction():
+                        logger.debug(f"Database session already in transaction for refund, using existing transaction")
                         refund_notes = f"Refund for failed generation task {task_id} (topic: {topic}). Error: {error_msg_to_save[:150] if error_msg_to_save else 'N/A'}"
                         await credit_service.grant_credits(
                             user_id=user_id,
@@ -1062,63 +1156,83 @@ async def generate_learning_path_task(
                             transaction_type=TransactionType.REFUND,
                             notes=refund_notes
                         )
-                logger.info(f"Successfully refunded 1 credit to user {user_id} for failed task {task_id}.")
-            except Exception as refund_exc:
-                logger.error(f"CRITICAL FAILURE: Failed to refund credit to user {user_id} for failed task {task_id}: {refund_exc}")
+                        # Commit the refund in the existing transaction
+                        db.commit()
+                    else:
+                        # Start new transaction for refund
+                        with db.begin():
+                            refund_notes = f"Refund for failed generation task {task_id} (topic: {topic}). Error: {error_msg_to_save[:150] if error_msg_to_save else 'N/A'}"
+                            await credit_service.grant_credits(
+                                user_id=user_id,
+                                amount=1,
+                                transaction_type=TransactionType.REFUND,
+                                notes=refund_notes
+                            )
+                    logger.info(f"Successfully refunded 1 credit to user {user_id} for failed task {task_id}.")
+                except Exception as refund_exc:
+                    logger.error(f"CRITICAL FAILURE: Failed to refund credit to user {user_id} for failed task {task_id}: {refund_exc}")
         
-        try:
-            stmt = update(GenerationTask).where(GenerationTask.task_id == task_id).values(
-                status=final_status,
-                ended_at=datetime.utcnow(),
-                error_message=error_msg_to_save,
-                history_entry_id=history_entry_id_to_link
-            ).execution_options(synchronize_session=False) 
-            db.execute(stmt)
-            db.commit()
-            logger.info(f"Updated GenerationTask {task_id} final status to {final_status} in DB.")
-        except Exception as db_final_err:
-            logger.exception(f"DB error updating final status for GenerationTask {task_id}: {db_final_err}")
-            db.rollback()
+            try:
+                stmt = update(GenerationTask).where(GenerationTask.task_id == task_id).values(
+                    status=final_status,
+                    ended_at=datetime.utcnow(),
+                    error_message=error_msg_to_save,
+                    history_entry_id=history_entry_id_to_link,
+                    profile=get_task_profile(task_id)
+                ).execution_options(synchronize_session=False) 
+                db.execute(stmt)
+                db.commit()
+                logger.info(f"Updated GenerationTask {task_id} final status to {final_status} in DB.")
+            except Exception as db_final_err:
+                logger.exception(f"DB error updating final status for GenerationTask {task_id}: {db_final_err}")
+                db.rollback()
+
+            try:
+                # Checkpoints are kept for the retention period; expire older ones as generations finish
+                from backend.core.checkpointing import prune_checkpoints
+                await asyncio.to_thread(prune_checkpoints)
+            except Exception as prune_err:
+                logger.error(f"Failed to prune generation checkpoints: {prune_err}")
         
-        async with active_generations_lock:
-            if task_id in active_generations:
-                active_generations[task_id]["status"] = final_status.lower() 
-                if final_status == GenerationTaskStatus.COMPLETED:
-                     # Ensure the result stored in memory is already serializable
-                     active_generations[task_id]["result"] = make_path_data_serializable(result) 
-                     active_generations[task_id]["progress_stream"].append(ProgressUpdate(
-                        message="Course generated successfully!",
-                        timestamp=datetime.now().isoformat(),
-                        phase="completion",
-                        overall_progress=1.0,
-                        action="completed",
-                        # Optionally include final preview data if available from result
-                        preview_data={"type": "COURSE_COMPLETED", "data": {"module_count": len(result.get("modules",[])) if result else 0}}
-                     ).model_dump())
-                elif error_msg_to_save:
-                     try:
-                         error_data = json.loads(error_msg_to_save)
-                         active_generations[task_id]["error"] = error_data
+            async with active_generations_lock:
+                if task_id in active_generations:
+                    active_generations[task_id]["status"] = final_status.lower() 
+                    if final_status == GenerationTaskStatus.COMPLETED:
+                         # Ensure the result stored in memory is already serializable
+                         active_generations[task_id]["result"] = make_path_data_serializable(result) 
                          active_generations[task_id]["progress_stream"].append(ProgressUpdate(
-                            message=error_data.get("message", "Task failed."),
+                            message="Course generated successfully!",
                             timestamp=datetime.now().isoformat(),
-                            phase="error",
-                            overall_progress=current_overall_progress, # Use last known progress
-                            action="error",
-                            preview_data={"type": "TASK_FAILED_EVENT", "data": error_data}
+                            phase="completion",
+                            overall_progress=1.0,
+                            action="completed",
+                            # Optionally include final preview data if available from result
+                            preview_data={"type": "COURSE_COMPLETED", "data": {"module_count": len(result.get("modules",[])) if result else 0}}
                          ).model_dump())
-                     except (json.JSONDecodeError, TypeError):
-                          active_generations[task_id]["error"] = {"message": error_msg_to_save}
-                          active_generations[task_id]["progress_stream"].append(ProgressUpdate(
-                            message=error_msg_to_save,
-                            timestamp=datetime.now().isoformat(),
-                            phase="error",
-                            overall_progress=current_overall_progress,
-                            action="error",
-                            preview_data={"type": "TASK_FAILED_EVENT", "data": {"message": error_msg_to_save}}
-                         ).model_dump())
-            else:
-                 logger.warning(f"Task {task_id} not found in active_generations during finalization.")
+                    elif error_msg_to_save:
+                         try:
+                             error_data = json.loads(error_msg_to_save)
+                             active_generations[task_id]["error"] = error_data
+                             active_generations[task_id]["progress_stream"].append(ProgressUpdate(
+                                message=error_data.get("message", "Task failed."),
+                                timestamp=datetime.now().isoformat(),
+                                phase="error",
+                                overall_progress=current_overall_progress, # Use last known progress
+                                action="error",
+                                preview_data={"type": "TASK_FAILED_EVENT", "data": error_data}
+                             ).model_dump())
+                         except (json.JSONDecodeError, TypeError):
+                              active_generations[task_id]["error"] = {"message": error_msg_to_save}
+                              active_generations[task_id]["progress_stream"].append(ProgressUpdate(
+                                message=error_msg_to_save,
+                                timestamp=datetime.now().isoformat(),
+                                phase="error",
+                                overall_progress=current_overall_progress,
+                                action="error",
+                                preview_data={"type": "TASK_FAILED_EVENT", "data": {"message": error_msg_to_save}}
+                             ).model_dump())
+                else:
+                     logger.warning(f"Task {task_id} not found in active_generations during finalization.")
         
         if db:
             try:
@@ -1127,6 +1241,49 @@ async def generate_learning_path_task(
             except Exception as db_close_err:
                  logger.error(f"Error closing database session for task {task_id}: {db_close_err}")
 
+# Resumed generations run outside a request; keep references so the tasks are not garbage collected
+_resumed_generation_tasks = set()
+
+async def start_resumed_generation(task_id: str, topic: str, user_id: int) -> bool:
+    """
+    Start resuming an interrupted task in the background.
+
+    Returns:
+        False if the task is already running in this process
+    """
+    from backend.core.checkpointing import get_checkpoint_values
+
+    async with active_generations_lock:
+        task_info = active_generations.get(task_id)
+        if task_info and task_info.get("status") in ("pending", "running"):
+            return False
+        active_generations[task_id] = {
+            "status": "pending",
+            "result": None,
+            "user_id": user_id,
+            "progress_stream": (task_info or {}).get("progress_stream", []),
+            "error": None,
+            "last_event_id": (task_info or {}).get("last_event_id", 0)
+        }
+
+    checkpoint = await asyncio.to_thread(get_checkpoint_values, task_id, ("language",))
+    language = ((checkpoint or {}).get("values") or {}).get("language") or "en"
+    google_provider = GoogleKeyProvider(user_id=user_id).set_operation("generate_learning_path")
+    brave_provider = BraveKeyProvider(user_id=user_id).set_operation("generate_learning_path")
+    task = asyncio.create_task(generate_learning_path_task(
+        task_id=task_id,
+        topic=topic,
+        googleKeyProvider=google_provider,
+        braveKeyProvider=brave_provider,
+        language=language,
+        user_id=user_id,
+        resume=True
+    ))
+    _resumed_generation_tasks.add(task)
+    task.add_done_callback(_resumed_generation_tasks.discard)
+    logger.info(f"Resuming interrupted generation task {task_id} for user {user_id}")
+    return True
+
 @app.post("/api/validate-api-keys")
 async def validate_api_keys(request: ApiKeyValidationRequest):
     """
@@ -1290,6 +1447,55 @@ async def get_learning_path_status(task_id: str):
     finally:
         db.close()
 
+@app.get("/api/learning-path/{task_id}/profile")
+async def get_learning_path_profile(task_id: str):
+    """
+    Get the generation profile (per-node and per-chain timeline) of a task.
+    Running and recently finished tasks are served from memory, older ones from the database.
+    """
+    profile = get_task_profile(task_id)
+    if profile is not None:
+        return profile
+
+    db = SessionLocal()
+    try:
+        task_record = db.query(GenerationTask).filter(GenerationTask.task_id == task_id).first()
+        if not task_record:
+            raise HTTPException(status_code=404, detail="Learning path task not found.")
+        if not task_record.profile:
+            raise HTTPException(status_code=404, detail="No profile recorded for this task.")
+        return task_record.profile
+    finally:
+        db.close()
+
+@app.post("/api/learning-path/{task_id}/resume")
+async def resume_learning_path_task(task_id: str, req: Request):
+    """
+    Resume a generation interrupted by a restart from its last checkpoint.
+    Only the task's owner (or an admin) can resume it, and no new credit is charged.
+    """
+    from backend.core.checkpointing import GENERATION_CHECKPOINTS_ENABLED, has_checkpoint
+
+    db = SessionLocal()
+    try:
+        user = await get_optional_user(request=req, db=db)
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required to resume courses.")
+        task_record = db.query(GenerationTask).filter(GenerationTask.task_id == task_id).first()
+        if not task_record or (task_record.user_id != user.id and not user.is_admin):
+            raise HTTPException(status_code=404, detail="Learning path task not found.")
+        task_status, topic, user_id = task_record.status, task_record.request_topic, task_record.user_id
+    finally:
+        db.close()
+
+    if task_status != GenerationTaskStatus.RUNNING:
+        raise HTTPException(status_code=409, detail=f"Only interrupted generations can be resumed (task is {task_status}).")
+    if not GENERATION_CHECKPOINTS_ENABLED or not await asyncio.to_thread(has_checkpoint, task_id):
+        raise HTTPException(status_code=409, detail="No checkpoint is available to resume this task.")
+    if not await start_resumed_generation(task_id, topic, user_id):
+        raise HTTPException(status_code=409, detail="This task is already running.")
+    return {"task_id": task_id, "status": "pending", "resumed": True}
+
 @app.delete("/api/learning-path/{task_id}")
 async def delete_learning_path(task_id: str):
     """
@@ -0,0 +1,255 @@
+"""
+Offline stand-in for the Gemini chat models.
+
+``FakeGeminiChatModel`` subclasses ``ChatGoogleGenerativeAI`` and only replaces
+the network call, so everything around it (run_chain retries, the LLM governor,
+structured output, the response cache) behaves as with the real model.
+
+Responses are derived from the request:
+
+- Structured output calls pass the JSON schema as ``response_json_schema``;
+  prompts using a ``PydanticOutputParser`` embed it in the format instructions.
+  Either way a JSON instance that validates against the schema is returned.
+- Other prompts get canned markdown prose of ``text_words`` words.
+
+Latency is time-to-first-token (log-normal around ``latency_ms``) plus output
+tokens at ``tokens_per_second``. ``rate_limit_rate`` raises 429-style errors
+and ``malformed_rate`` truncates JSON responses to exercise the parse retries.
+Random draws are seeded from ``seed``, the prompt and how often that prompt was
+sent before, so a run is reproducible and a retried prompt can succeed.
+
+Provides:
+- FakeLLMProfile: latency, error and size settings
+- FakeGeminiChatModel: the stand-in chat model
+- fake_chat_model_factory: factory for services.set_chat_model_override
+- instance_from_schema: schema-valid JSON value for a JSON schema
+"""
+from __future__ import annotations
+
+import json
+import math
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import PrivateAttr
+
+_SCHEMA_MARKER = "Here is the output schema:"
+_WORDS = (
+    "concept model system learning practice example structure method principle pattern data process "
+    "design analysis theory application context detail approach framework component technique step "
+    "result problem solution feature strategy insight performance quality foundation advanced basic"
+).split()
+
+
+@dataclass
+class FakeLLMProfile:
+    """Behaviour of the fake model."""
+    latency_ms: float = 800.0
+    latency_sigma: float = 0.35
+    tokens_per_second: float = 150.0
+    rate_limit_rate: float = 0.0
+    malformed_rate: float = 0.0
+    list_length: int = 3
+    text_words: int = 600
+    true_rate: float = 0.8
+    seed: int = 0
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(count))
+
+
+def _resolve(schema: Dict[str, Any], root: Dict[str, Any]) -> Dict[str, Any]:
+    ref = schema.get("$ref")
+    if not ref:
+        return schema
+    target: Any = root
+    for part in ref.lstrip("#/").split("/"):
+        target = target.get(part, {})
+    return _resolve(target, root)
+
+
+def instance_from_schema(schema: Dict[str, Any], rng: random.Random, profile: FakeLLMProfile,
+                         root: Optional[Dict[str, Any]] = None, name: str = "", index: int = 0) -> Any:
+    """
+    Build a value that validates against ``schema``.
+
+    Handles objects (all properties, so optional fields are exercised too), arrays
+    within minItems/maxItems, enums, consts, $ref/$defs, anyOf/oneOf/allOf and
+    numeric bounds. String values take a hint from the property name.
+    """
+    root = root if root is not None else schema
+    schema = _resolve(schema, root)
+    if "const" in schema:
+        return schema["const"]
+    if schema.get("enum"):
+        return rng.choice(schema["enum"])
+    for key in ("anyOf", "oneOf"):
+        if schema.get(key):
+            options = [_resolve(option, root) for option in schema[key]]
+            non_null = [option for option in options if option.get("type") != "null"]
+            return instance_from_schema((non_null or options)[0], rng, profile, root, name, index)
+    if schema.get("allOf"):
+        merged: Dict[str, Any] = {}
+        for part in schema["allOf"]:
+            merged.update(_resolve(part, root))
+        return instance_from_schema(merged, rng, profile, root, name, index)
+
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind is None:
+        kind = "object" if "properties" in schema else "string"
+
+    if kind == "object":
+        value = {
+            prop: instance_from_schema(sub, rng, profile, root, prop, index)
+            for prop, sub in schema.get("properties", {}).items()
+        }
+        extra = schema.get("additionalProperties")
+        if not schema.get("properties") and isinstance(extra, dict):
+            for i in range(profile.list_length):
+                value[f"{_words(rng, 1)}_{i + 1}"] = instance_from_schema(extra, rng, profile, root, name, i)
+        return value
+    if kind == "array":
+        low = schema.get("minItems", 0)
+        high = schema.get("maxItems", max(low, profile.list_length))
+        count = min(max(profile.list_length, low), high)
+        items = schema.get("items", {"type": "string"})
+        return [instance_from_schema(items, rng, profile, root, name, i) for i in range(count)]
+    if kind == "boolean":
+        return rng.random() < profile.true_rate
+    if kind in ("integer", "number"):
+        low = schema.get("minimum", schema.get("exclusiveMinimum", 0))
+        high = schema.get("maximum", schema.get("exclusiveMaximum", low + 10))
+        if kind == "integer":
+            # Positions and ids follow the item's place in its list; "*_index" fields stay at the minimum
+            wanted = low if name.lower().endswith("index") else index + 1
+            return int(min(max(wanted, math.ceil(low)), math.floor(high)))
+        return round(rng.uniform(low, high), 2)
+    if kind == "null":
+        return None
+
+    lowered = name.lower()
+    if "url" in lowered or schema.get("format") == "uri":
+        return f"https://example.org/{_words(rng, 2).replace(' ', '-')}"
+    if lowered in ("title", "keywords", "query", "text", "type", "category") or lowered.endswith("_level"):
+        text = _words(rng, 4).capitalize()
+    else:
+        text = f"{_words(rng, 18).capitalize()}."
+    return text[: schema.get("maxLength", len(text))]
+
+
+def _prompt_schema(prompt: str) -> Optional[Dict[str, Any]]:
+    """The JSON schema embedded by PydanticOutputParser format instructions, if any."""
+    marker = prompt.rfind(_SCHEMA_MARKER)
+    if marker < 0:
+        return None
+    start = prompt.find("```", marker)
+    end = prompt.find("```", start + 3) if start >= 0 else -1
+    if end < 0:
+        return None
+    try:
+        return json.loads(prompt[start + 3:end])
+    except json.JSONDecodeError:
+        return None
+
+
+def _markdown(rng: random.Random, words: int) -> str:
+    sections = []
+    remaining = words
+    number = 1
+    while remaining > 0:
+        size = min(remaining, rng.randint(60, 140))
+        sections.append(f"## {_words(rng, 3).title()} {number}\n\n{_words(rng, size).capitalize()}.")
+        remaining -= size
+        number += 1
+    return "\n\n".join(sections)
+
+
+class FakeGeminiChatModel(ChatGoogleGenerativeAI):
+    """ChatGoogleGenerativeAI whose responses are generated locally (see module docstring)."""
+
+    profile: FakeLLMProfile = FakeLLMProfile()
+
+    _attempts: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _calls: int = PrivateAttr(default=0)
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    def _plan(self, messages: List[BaseMessage], kwargs: Dict[str, Any]):
+        """Return (delay_seconds, text_or_exception) for one request."""
+        prompt = "\n".join(str(message.content) for message in messages)
+        digest = hashlib.sha256(f"{self.model}\n{prompt}".encode("utf-8")).hexdigest()
+        with self._lock:
+            attempt = self._attempts.get(digest, 0)
+            self._attempts[digest] = attempt + 1
+            self._calls += 1
+        rng = random.Random(f"{self.profile.seed}:{digest}:{attempt}")
+        profile = self.profile
+        first_token = rng.lognormvariate(math.log(max(profile.latency_ms, 1.0) / 1000.0), profile.latency_sigma)
+        if rng.random() < profile.rate_limit_rate:
+            return first_token, Exception("429 RESOURCE_EXHAUSTED: simulated quota exceeded (fake model)")
+
+        schema = kwargs.get("response_json_schema") or _prompt_schema(prompt)
+        if schema is not None:
+            text = json.dumps(instance_from_schema(schema, rng, profile))
+            if rng.random() < profile.malformed_rate:
+                text = text[: max(1, len(text) // 2)]
+            elif "response_json_schema" not in kwargs:
+                text = f"```json\n{text}\n```"
+        else:
+            text = _markdown(rng, profile.text_words)
+        output_tokens = len(text) / 4
+        return first_token + output_tokens / max(profile.tokens_per_second, 1.0), text
+
+    def _result(self, text: str) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        delay, outcome = self._plan(messages, kwargs)
+        time.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return self._result(outcome)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        delay, outcome = self._plan(messages, kwargs)
+        await asyncio.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return self._result(outcome)
+
+
+def fake_chat_model_factory(profile: FakeLLMProfile) -> Callable[[str, float], FakeGeminiChatModel]:
+    """
+    Factory for ``services.set_chat_model_override`` serving one fake model per
+    (model, temperature), like the client pool does for real models.
+    """
+    models: Dict[Any, FakeGeminiChatModel] = {}
+    lock = threading.Lock()
+
+    def factory(model: str, temperature: float) -> FakeGeminiChatModel:
+        with lock:
+            key = (model, temperature)
+            if key not in models:
+                models[key] = FakeGeminiChatModel(
+                    model=model, temperature=temperature, google_api_key="offline-benchmark", profile=profile
+                )
+            return models[key]
+
+    factory.models = models
+    return factory
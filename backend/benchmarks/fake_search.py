@@ -0,0 +1,149 @@
+"""
+Local stand-in for Brave Search and the web pages it returns.
+
+``FakeSearchServer`` is an aiohttp application speaking the subset of the Brave
+web search API used by ``services._brave_web_search`` and serving the result
+pages as HTML fixtures. Pointing BRAVE_SEARCH_ENDPOINT at ``endpoint`` routes
+``execute_search_with_router`` through it, so the real rate limiter, search and
+scrape caches, streaming scraper, extraction and domain health all run.
+
+Fixtures are generated from a fixed page pool: queries are mapped onto pages by
+hash, so related searches overlap like real ones do. Every ``mirror_every``-th
+page is a near copy of its predecessor, ``page_error_rate`` of the pages answer
+403/503, and pages are spread over several loopback addresses (127.0.0.2, ...)
+so per-host connection limits apply as with real hosts. Where extra loopback
+addresses cannot be bound (macOS), all pages are served from 127.0.0.1.
+
+Provides:
+- FakeSearchProfile: latency, size and error settings
+- FakeSearchServer: the local server (``start`` / ``stop`` / ``stats``)
+"""
+from __future__ import annotations
+
+import html
+import random
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+_WORDS = (
+    "learning course module lesson concept principle example practice exercise tutorial guide overview "
+    "introduction reference method technique pattern model system process structure analysis design data "
+    "theory application approach framework tool workflow project skill knowledge foundation advanced"
+).split()
+
+
+@dataclass
+class FakeSearchProfile:
+    """Behaviour of the fake search API and fixture pages."""
+    search_latency_ms: float = 300.0
+    page_latency_ms: float = 150.0
+    page_words: int = 1500
+    page_pool: int = 500
+    page_error_rate: float = 0.05
+    mirror_every: int = 10
+    hosts: int = 8
+    seed: int = 0
+
+
+class FakeSearchServer:
+    """Fake Brave API plus fixture pages on loopback addresses."""
+
+    def __init__(self, profile: Optional[FakeSearchProfile] = None):
+        self.profile = profile or FakeSearchProfile()
+        self._runner: Optional[web.AppRunner] = None
+        self._hosts: List[str] = []
+        self._port: Optional[int] = None
+        self._stats = {"searches": 0, "pages": 0, "page_errors": 0}
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self._port}/res/v1/web/search"
+
+    async def start(self) -> str:
+        """Start serving and return the search endpoint URL."""
+        app = web.Application()
+        app.router.add_get("/res/v1/web/search", self._search)
+        app.router.add_get("/pages/{page}.html", self._page)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        self._port = self._runner.addresses[0][1]
+        self._hosts = ["127.0.0.1"]
+        for i in range(2, self.profile.hosts + 1):
+            host = f"127.0.0.{i}"
+            try:
+                await web.TCPSite(self._runner, host, self._port).start()
+            except OSError as e:
+                logger.warning(f"Cannot bind {host} ({e}); serving remaining fixture pages from 127.0.0.1")
+                break
+            self._hosts.append(host)
+        logger.info(f"Fake search server listening on port {self._port} ({len(self._hosts)} hosts)")
+        return self.endpoint
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats, hosts=len(self._hosts))
+
+    def _rng(self, *parts: Any) -> random.Random:
+        return random.Random(":".join(str(part) for part in (self.profile.seed,) + parts))
+
+    def _page_url(self, page: int) -> str:
+        return f"http://{self._hosts[page % len(self._hosts)]}:{self._port}/pages/{page}.html"
+
+    def _title(self, page: int) -> str:
+        return self._rng("title", page).choice(_WORDS).title() + f" {_WORDS[page % len(_WORDS)]} guide #{page}"
+
+    async def _search(self, request: web.Request) -> web.Response:
+        query = request.query.get("q", "")
+        count = int(request.query.get("count", "5"))
+        self._stats["searches"] += 1
+        rng = self._rng("search", query)
+        await asyncio.sleep(rng.expovariate(1000.0 / max(self.profile.search_latency_ms, 1.0)))
+        start = int(hashlib.sha256(query.lower().encode("utf-8")).hexdigest(), 16) % self.profile.page_pool
+        pages = [(start + rng.randint(0, 3) + 7 * i) % self.profile.page_pool for i in range(count)]
+        results = [
+            {
+                "title": self._title(page),
+                "url": self._page_url(page),
+                "description": f"{query}: " + " ".join(self._rng("snippet", page).choice(_WORDS) for _ in range(25)),
+            }
+            for page in dict.fromkeys(pages)
+        ]
+        return web.json_response({"query": {"original": query}, "web": {"results": results}})
+
+    async def _page(self, request: web.Request) -> web.Response:
+        page = int(request.match_info["page"])
+        rng = self._rng("page", page)
+        await asyncio.sleep(rng.expovariate(1000.0 / max(self.profile.page_latency_ms, 1.0)))
+        if rng.random() < self.profile.page_error_rate:
+            self._stats["page_errors"] += 1
+            return web.Response(status=rng.choice((403, 503)), text="Unavailable")
+        self._stats["pages"] += 1
+        # Mirrors reuse their predecessor's body so near-duplicate detection has work to do
+        source = page - 1 if self.profile.mirror_every and page % self.profile.mirror_every == 0 and page else page
+        body_rng = self._rng("body", source)
+        paragraphs = []
+        remaining = self.profile.page_words
+        while remaining > 0:
+            size = min(remaining, body_rng.randint(60, 160))
+            paragraphs.append(" ".join(body_rng.choice(_WORDS) for _ in range(size)).capitalize() + ".")
+            remaining -= size
+        title = html.escape(self._title(page))
+        body = "\n".join(f"<p>{html.escape(p)}</p>" for p in paragraphs)
+        document = (
+            f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{title}</title></head>"
+            f"<body><nav><a href=\"/\">Home</a></nav><article><h1>{title}</h1>\n{body}\n</article>"
+            f"<footer>Fixture page {page}</footer></body></html>"
+        )
+        return web.Response(text=document, content_type="text/html")
@@ -0,0 +1,362 @@
+"""
+Generation-scoped, content-addressed store for scraped page text.
+
+Search results accumulate in ``LearningPathState`` (``operator.add`` lists that
+live for the whole run), are copied into ``SubmoduleContent.search_results``
+and are written to every checkpoint. Scraped pages are up to 100 KB each, so
+``execute_search_with_router`` moves their text into the generation's
+``ContentBlobStore`` and the state keeps only a ``content_ref`` handle
+("sha256:<hex>") on each ``ScrapedResult``. Identical pages returned by
+different queries are stored once.
+
+Blobs are kept in memory up to CONTENT_BLOB_STORE_MEMORY_MB; least recently
+used blobs beyond that are spilled to ``<CONTENT_BLOB_STORE_DIR>/<task_id>``.
+When generation checkpoints are enabled every blob is also written through to
+that directory, so a generation resumed in a new process can resolve the
+handles stored in its checkpoint. The directory is deleted when the generation
+finishes or fails; only a run that was interrupted (process exit or
+cancellation) leaves it for the resume, and ``prune_checkpoints`` removes it
+with the task's checkpoints if the task is never resumed.
+
+Disk writes and reads run in worker threads, off the event loop:
+``externalize_search_result`` stores a result's pages in one ``asyncio.to_thread``
+call, async code resolves handles with ``aresolve_content`` /
+``ScrapedResult.aget_content()``, and ``preload_contents`` reads spilled blobs
+back into memory before synchronous helpers call ``get_content()``. The store's
+lock is never held during file I/O, so a memory hit does not wait for a write.
+
+Outside a generation (or with CONTENT_BLOB_STORE_ENABLED=false) results are left
+untouched, and ``ScrapedResult.get_content()`` works for both forms.
+
+Provides:
+- ContentBlobStore: per-generation blob store with spill-to-disk
+- get_content_blob_store: store of the active generation
+- externalize_search_result: replace scraped text with handles
+- resolve_content / aresolve_content: text for a handle
+- preload_contents: read spilled blobs of search results back into memory
+- delete_content_blobs: remove a task's blob directory
+- content_blob_totals: process-wide counters from finished generations
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import asyncio
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from backend.core.generation_context import get_generation_context
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CONTENT_BLOB_STORE_ENABLED = os.environ.get("CONTENT_BLOB_STORE_ENABLED", "true").lower() == "true"
+# Scraped text kept in memory per generation before blobs spill to disk
+CONTENT_BLOB_STORE_MEMORY_MB = float(os.environ.get("CONTENT_BLOB_STORE_MEMORY_MB", "32"))
+CONTENT_BLOB_STORE_DIR = os.environ.get(
+    "CONTENT_BLOB_STORE_DIR", os.path.join(tempfile.gettempdir(), "learning_path_blobs")
+)
+# Shorter texts stay inline; a handle would save next to nothing
+CONTENT_BLOB_MIN_CHARS = int(os.environ.get("CONTENT_BLOB_MIN_CHARS", "2000"))
+
+_RESOURCE_NAME = "content_blob_store"
+_REF_PREFIX = "sha256:"
+
+
+def content_ref(text: str) -> str:
+    """Handle of ``text``: its SHA-256 digest."""
+    return _REF_PREFIX + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ContentBlobStore:
+    """Scraped texts of one generation, keyed by content hash."""
+
+    def __init__(self, directory: str, memory_budget_chars: int, write_through: bool = False):
+        self.directory = directory
+        self.memory_budget_chars = memory_budget_chars
+        self.write_through = write_through
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_chars = 0
+        self._on_disk: set = set()
+        self._spilling: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "puts": 0,
+            "blobs": 0,
+            "dedup_hits": 0,
+            "chars_stored": 0,
+            "chars_deduplicated": 0,
+            "spilled": 0,
+            "disk_reads": 0,
+            "peak_memory_chars": 0,
+        }
+
+    def _path(self, ref: str) -> str:
+        return os.path.join(self.directory, ref[len(_REF_PREFIX):] + ".txt")
+
+    def _write_file(self, ref: str, text: str) -> None:
+        # Called without the lock; the rename makes concurrent writes of the same blob safe
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(ref)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def _remember(self, ref: str, text: str) -> List[Tuple[str, str]]:
+        """Keep ``text`` in memory; returns the evicted blobs that still have to be written (lock held)."""
+        self._memory[ref] = text
+        self._memory_chars += len(text)
+        evicted = []
+        while self._memory_chars > self.memory_budget_chars and len(self._memory) > 1:
+            old_ref, old_text = self._memory.popitem(last=False)
+            self._memory_chars -= len(old_text)
+            if old_ref not in self._on_disk:
+                # Readable from _spilling until the file exists
+                self._spilling[old_ref] = old_text
+                evicted.append((old_ref, old_text))
+        self._stats["peak_memory_chars"] = max(self._stats["peak_memory_chars"], self._memory_chars)
+        return evicted
+
+    def _spill(self, evicted: List[Tuple[str, str]]) -> None:
+        for ref, text in evicted:
+            try:
+                self._write_file(ref, text)
+            except OSError as e:
+                logger.warning(f"Could not spill content blob {ref} to disk; keeping it in memory: {e}")
+                with self._lock:
+                    self._spilling.pop(ref, None)
+                    self._memory[ref] = text
+                    self._memory_chars += len(text)
+                continue
+            with self._lock:
+                self._spilling.pop(ref, None)
+                self._on_disk.add(ref)
+                self._stats["spilled"] += 1
+
+    def _dedup_hit(self, text: str) -> None:
+        self._stats["dedup_hits"] += 1
+        self._stats["chars_deduplicated"] += len(text)
+
+    def put(self, text: str) -> str:
+        """Store ``text`` (once per distinct content) and return its handle. Blocks on disk I/O."""
+        ref = content_ref(text)
+        with self._lock:
+            self._stats["puts"] += 1
+            if ref in self._memory:
+                self._memory.move_to_end(ref)
+                self._dedup_hit(text)
+                return ref
+            if ref in self._on_disk or ref in self._spilling:
+                self._dedup_hit(text)
+                return ref
+        if self.write_through:
+            if os.path.exists(self._path(ref)):
+                with self._lock:
+                    self._on_disk.add(ref)
+                    self._dedup_hit(text)
+                return ref
+            self._write_file(ref, text)
+        with self._lock:
+            if self.write_through:
+                self._on_disk.add(ref)
+            if ref in self._memory:
+                # Stored by a concurrent put of the same text
+                self._dedup_hit(text)
+                return ref
+            self._stats["blobs"] += 1
+            self._stats["chars_stored"] += len(text)
+            evicted = self._remember(ref, text)
+        self._spill(evicted)
+        return ref
+
+    def cached(self, ref: str) -> Optional[str]:
+        """Text for ``ref`` if it is in memory; never touches the disk."""
+        with self._lock:
+            text = self._memory.get(ref)
+            if text is not None:
+                self._memory.move_to_end(ref)
+                return text
+            return self._spilling.get(ref)
+
+    def get(self, ref: str) -> Optional[str]:
+        """Text for ``ref``, or None if this store never saw it. Blocks on disk I/O for spilled blobs."""
+        text = self.cached(ref)
+        if text is not None:
+            return text
+        try:
+            with open(self._path(ref), "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            self._on_disk.add(ref)
+            self._stats["disk_reads"] += 1
+            evicted = self._remember(ref, text) if ref not in self._memory else []
+        self._spill(evicted)
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "memory_chars": self._memory_chars}
+
+    def close(self, remove_files: bool) -> None:
+        """Drop in-memory blobs and, if ``remove_files``, the spill directory."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_chars = 0
+            self._on_disk.clear()
+            self._spilling.clear()
+        if remove_files:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+_totals = {"generations": 0, "puts": 0, "blobs": 0, "dedup_hits": 0, "chars_stored": 0, "chars_deduplicated": 0, "spilled": 0}
+_totals_lock = threading.Lock()
+
+
+def _close_store(task_id: str, store: ContentBlobStore, interrupted: bool) -> None:
+    stats = store.stats()
+    with _totals_lock:
+        _totals["generations"] += 1
+        for name in ("puts", "blobs", "dedup_hits", "chars_stored", "chars_deduplicated", "spilled"):
+            _totals[name] += stats[name]
+    if stats["puts"]:
+        logger.info(
+            f"Generation {task_id}: stored {stats['blobs']} content blobs ({stats['chars_stored']} chars), "
+            f"{stats['dedup_hits']} duplicates, {stats['spilled']} spilled to disk, "
+            f"peak {stats['peak_memory_chars']} chars in memory"
+        )
+    # An interrupted run can be resumed from its checkpoint, which needs the blobs
+    store.close(remove_files=not (store.write_through and interrupted))
+
+
+def _task_directory(task_id: str) -> str:
+    return os.path.join(CONTENT_BLOB_STORE_DIR, task_id)
+
+
+def get_content_blob_store() -> Optional[ContentBlobStore]:
+    """Return the store of the active generation, creating it on first use."""
+    if not CONTENT_BLOB_STORE_ENABLED:
+        return None
+    context = get_generation_context()
+    if context is None:
+        return None
+
+    def factory() -> ContentBlobStore:
+        from backend.core.checkpointing import get_checkpointer
+
+        store = ContentBlobStore(
+            _task_directory(context.task_id),
+            memory_budget_chars=int(CONTENT_BLOB_STORE_MEMORY_MB * 1024 * 1024),
+            write_through=get_checkpointer() is not None,
+        )
+        context.add_close_callback(lambda: _close_store(context.task_id, store, context.interrupted))
+        return store
+
+    return context.get_or_create(_RESOURCE_NAME, factory)
+
+
+def _externalize(store: ContentBlobStore, result: Any) -> Any:
+    items = []
+    changed = False
+    for item in result.results:
+        content = item.scraped_content
+        if content and len(content) >= CONTENT_BLOB_MIN_CHARS:
+            try:
+                ref = store.put(content)
+            except OSError as e:
+                logger.warning(f"Could not store content of {item.url} in the blob store: {e}")
+                items.append(item)
+                continue
+            items.append(item.model_copy(update={"scraped_content": None, "content_ref": ref}))
+            changed = True
+        else:
+            items.append(item)
+    return result.model_copy(update={"results": items}) if changed else result
+
+
+async def externalize_search_result(result: Any) -> Any:
+    """
+    Move the scraped text of ``result``'s pages into the generation's store.
+
+    Returns a copy of the ``SearchServiceResult`` whose ``ScrapedResult`` items
+    carry ``content_ref`` instead of ``scraped_content`` (texts shorter than
+    CONTENT_BLOB_MIN_CHARS stay inline). The input is not modified, since search
+    results may be shared with caches. Outside a generation it is returned as is.
+    The pages are stored in a worker thread, since writes may hit the disk.
+    """
+    store = get_content_blob_store()
+    if store is None or not getattr(result, "results", None):
+        return result
+    if not any(item.scraped_content and len(item.scraped_content) >= CONTENT_BLOB_MIN_CHARS for item in result.results):
+        return result
+    return await asyncio.to_thread(_externalize, store, result)
+
+
+def resolve_content(ref: str) -> Optional[str]:
+    """
+    Text for a handle created in the active generation (or an earlier run of its task).
+
+    May read the disk; async code uses ``aresolve_content`` instead.
+    """
+    store = get_content_blob_store()
+    text = store.get(ref) if store is not None else None
+    if text is None:
+        logger.warning(f"Content blob {ref} could not be resolved")
+    return text
+
+
+async def aresolve_content(ref: str) -> Optional[str]:
+    """``resolve_content`` that reads spilled blobs in a worker thread."""
+    store = get_content_blob_store()
+    text = None
+    if store is not None:
+        text = store.cached(ref)
+        if text is None:
+            text = await asyncio.to_thread(store.get, ref)
+    if text is None:
+        logger.warning(f"Content blob {ref} could not be resolved")
+    return text
+
+
+def _content_refs(results: Iterable[Any]) -> Iterable[str]:
+    for result in results:
+        for item in getattr(result, "results", None) or [result]:
+            if isinstance(item, dict):
+                ref = None if item.get("scraped_content") else item.get("content_ref")
+            else:
+                ref = None if getattr(item, "scraped_content", None) else getattr(item, "content_ref", None)
+            if ref:
+                yield ref
+
+
+async def preload_contents(results: Iterable[Any]) -> None:
+    """
+    Read the spilled blobs of ``results`` back into memory in a worker thread.
+
+    ``results`` holds SearchServiceResult or ScrapedResult items (or their dicts).
+    Synchronous helpers that call ``get_content()`` right after then find the
+    text in memory instead of reading it on the event loop.
+    """
+    store = get_content_blob_store()
+    if store is None:
+        return
+    missing = [ref for ref in dict.fromkeys(_content_refs(results)) if store.cached(ref) is None]
+    if missing:
+        await asyncio.to_thread(lambda: [store.get(ref) for ref in missing])
+
+
+def delete_content_blobs(task_id: str) -> None:
+    """Remove the blobs a task left on disk (used when its checkpoints are deleted)."""
+    shutil.rmtree(_task_directory(task_id), ignore_errors=True)
+
+
+def content_blob_totals() -> Dict[str, Any]:
+    """Counters summed over all finished generations in this process."""
+    with _totals_lock:
+        return dict(_totals)
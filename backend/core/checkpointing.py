@@ -0,0 +1,600 @@
+"""
+Durable checkpoints for the generation graph.
+
+The compiled graphs run with ``SQLAlchemyCheckpointSaver``, which stores every
+super-step in the application database (the generation_checkpoint* tables),
+keyed by thread_id = GenerationTask.task_id. A generation interrupted by a
+restart resumes from its last completed node instead of starting over: the
+graph is re-invoked with ``None`` as input and the same thread_id.
+
+Channel values are stored once per (channel, version), so a checkpoint only
+adds the state keys its node changed. Runtime objects in the state (the
+progress callback, the API key providers and the ORM user) cannot be
+serialized and are never stored; the run that resumes a generation provides
+fresh ones through ``runtime_state`` and they are injected on load.
+
+Checkpoint threads older than GENERATION_CHECKPOINT_RETENTION_HOURS are deleted
+by ``prune_checkpoints``, together with the scraped-content blobs their state
+refers to (see blob_store). Failures to store a checkpoint are logged and do not
+fail the generation; they only cost resumability.
+
+A node that runs many independent items in one step (the streaming submodule
+pool, the pipelined planning/development node) records each finished item with ``save_progress``; a resumed run reads
+them back with ``load_progress`` and only redoes the items that were still
+running. Progress records are deleted together with the thread's checkpoints.
+
+Provides:
+- SQLAlchemyCheckpointSaver: LangGraph checkpoint saver backed by SQLAlchemy sessions
+- get_checkpointer: shared saver instance (None when checkpointing is disabled)
+- runtime_state: context manager providing the runtime state values for a run
+- has_checkpoint / get_checkpoint_values: inspect a thread's latest checkpoint
+- cancelled_task_outcome: final status of a generation task that was cancelled
+- save_progress / load_progress: per-item results of a node that is still running
+- delete_checkpoints / prune_checkpoints: remove one thread / expired threads
+"""
+import os
+import json
+import asyncio
+import inspect
+import logging
+import random
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy import func
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from backend.config.database import SessionLocal
+from backend.models.auth_models import (
+    GenerationCheckpoint, GenerationCheckpointBlob, GenerationCheckpointWrite, GenerationTaskStatus,
+)
+from backend.core.blob_store import delete_content_blobs
+
+logger = logging.getLogger("learning_path.checkpointing")
+
+# Persist graph state after every node so interrupted generations can resume
+GENERATION_CHECKPOINTS_ENABLED = os.environ.get("GENERATION_CHECKPOINTS_ENABLED", "true").lower() == "true"
+# Checkpoint threads (finished or not) older than this are deleted by prune_checkpoints
+GENERATION_CHECKPOINT_RETENTION_HOURS = float(os.environ.get("GENERATION_CHECKPOINT_RETENTION_HOURS", "24"))
+# Resume RUNNING generation tasks that have a checkpoint when the API starts
+GENERATION_RESUME_ON_STARTUP = os.environ.get("GENERATION_RESUME_ON_STARTUP", "true").lower() == "true"
+
+# State keys holding per-process objects; provided by the run instead of the checkpoint
+RUNTIME_STATE_KEYS = ("progress_callback", "google_key_provider", "brave_key_provider", "user")
+
+# Namespace prefix of progress records in the checkpoint blob table (never used by graph checkpoints)
+_PROGRESS_NS_PREFIX = "progress:"
+
+_runtime_values: ContextVar[Dict[str, Any]] = ContextVar("generation_runtime_values", default={})
+
+
+@contextmanager
+def runtime_state(values: Dict[str, Any]):
+    """Provide the runtime state values injected into checkpoints loaded in this context."""
+    token = _runtime_values.set({key: values.get(key) for key in RUNTIME_STATE_KEYS})
+    try:
+        yield
+    finally:
+        _runtime_values.reset(token)
+
+
+def _strip_runtime(value: Any) -> Any:
+    """Drop runtime keys from a state dict (e.g. the graph input)."""
+    if isinstance(value, dict) and any(key in value for key in RUNTIME_STATE_KEYS):
+        return {k: v for k, v in value.items() if k not in RUNTIME_STATE_KEYS}
+    return value
+
+
+def _state_models() -> list:
+    """Pydantic models of the graph state, allowed when deserializing checkpoints."""
+    from backend.models import models
+    return [
+        obj for obj in vars(models).values()
+        if inspect.isclass(obj) and issubclass(obj, BaseModel) and obj.__module__ == models.__name__
+    ]
+
+
+class SQLAlchemyCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    Checkpoint saver storing checkpoints, channel blobs and pending writes through SQLAlchemy.
+
+    The async methods run the synchronous ones in a worker thread so database
+    round trips never block the event loop.
+    """
+
+    def __init__(self, session_factory=None, serde=None):
+        super().__init__(serde=serde or JsonPlusSerializer(allowed_msgpack_modules=_state_models()))
+        self.session_factory = session_factory or SessionLocal
+
+    # --- Serialization helpers ---
+
+    def _dump(self, value: Any) -> Tuple[str, Optional[bytes]]:
+        return self.serde.dumps_typed(value)
+
+    def _load(self, type_: str, data: Optional[bytes]) -> Any:
+        return self.serde.loads_typed((type_, data or b""))
+
+    def _load_channel_values(self, db, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> Dict[str, Any]:
+        stored = {}
+        if versions:
+            rows = db.query(GenerationCheckpointBlob).filter(
+                GenerationCheckpointBlob.thread_id == thread_id,
+                GenerationCheckpointBlob.checkpoint_ns == checkpoint_ns,
+                GenerationCheckpointBlob.channel.in_(list(versions)),
+            ).all()
+            stored = {(row.channel, row.version): row for row in rows}
+
+        values: Dict[str, Any] = {}
+        runtime = _runtime_values.get()
+        for channel, version in versions.items():
+            if channel in RUNTIME_STATE_KEYS:
+                if runtime.get(channel) is not None:
+                    values[channel] = runtime[channel]
+                continue
+            row = stored.get((channel, str(version)))
+            if row is None or row.value_type == "empty":
+                continue
+            values[channel] = self._load(row.value_type, row.value)
+        return values
+
+    def _to_tuple(self, db, row: GenerationCheckpoint) -> CheckpointTuple:
+        checkpoint = self._load(row.checkpoint_type, row.checkpoint)
+        writes = db.query(GenerationCheckpointWrite).filter(
+            GenerationCheckpointWrite.thread_id == row.thread_id,
+            GenerationCheckpointWrite.checkpoint_ns == row.checkpoint_ns,
+            GenerationCheckpointWrite.checkpoint_id == row.checkpoint_id,
+        ).all()
+        writes.sort(key=lambda w: writes_sort_key(w.task_path, w.task_id, w.idx))
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": row.thread_id,
+                    "checkpoint_ns": row.checkpoint_ns,
+                    "checkpoint_id": row.checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_channel_values(
+                    db, row.thread_id, row.checkpoint_ns, checkpoint["channel_versions"]
+                ),
+            },
+            metadata=self._load(row.metadata_type, row.checkpoint_metadata),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": row.thread_id,
+                        "checkpoint_ns": row.checkpoint_ns,
+                        "checkpoint_id": row.parent_checkpoint_id,
+                    }
+                }
+                if row.parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[(w.task_id, w.channel, self._load(w.value_type, w.value)) for w in writes],
+        )
+
+    # --- Sync API ---
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        db = self.session_factory()
+        try:
+            query = db.query(GenerationCheckpoint).filter(
+                GenerationCheckpoint.thread_id == thread_id,
+                GenerationCheckpoint.checkpoint_ns == checkpoint_ns,
+            )
+            if checkpoint_id:
+                query = query.filter(GenerationCheckpoint.checkpoint_id == checkpoint_id)
+            row = query.order_by(GenerationCheckpoint.checkpoint_id.desc()).first()
+            return self._to_tuple(db, row) if row else None
+        except Exception as e:
+            # An unreadable checkpoint store must not block generations; they start from scratch
+            logger.error(f"Failed to load checkpoint of thread {thread_id}: {e}")
+            return None
+        finally:
+            db.close()
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        db = self.session_factory()
+        try:
+            query = db.query(GenerationCheckpoint)
+            if config:
+                query = query.filter(GenerationCheckpoint.thread_id == config["configurable"]["thread_id"])
+                checkpoint_ns = config["configurable"].get("checkpoint_ns")
+                if checkpoint_ns is not None:
+                    query = query.filter(GenerationCheckpoint.checkpoint_ns == checkpoint_ns)
+                checkpoint_id = get_checkpoint_id(config)
+                if checkpoint_id:
+                    query = query.filter(GenerationCheckpoint.checkpoint_id == checkpoint_id)
+            if before and get_checkpoint_id(before):
+                query = query.filter(GenerationCheckpoint.checkpoint_id < get_checkpoint_id(before))
+            rows = query.order_by(GenerationCheckpoint.checkpoint_id.desc()).all()
+
+            results = []
+            for row in rows:
+                if limit is not None and len(results) >= limit:
+                    break
+                if filter:
+                    metadata = self._load(row.metadata_type, row.checkpoint_metadata)
+                    if not all(metadata.get(key) == value for key, value in filter.items()):
+                        continue
+                results.append(self._to_tuple(db, row))
+        finally:
+            db.close()
+        return iter(results)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        next_config = {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+        db = self.session_factory()
+        try:
+            for channel, version in new_versions.items():
+                if channel in RUNTIME_STATE_KEYS:
+                    continue
+                if channel in values:
+                    value_type, value = self._dump(_strip_runtime(values[channel]))
+                else:
+                    value_type, value = "empty", None
+                exists = db.query(GenerationCheckpointBlob.id).filter(
+                    GenerationCheckpointBlob.thread_id == thread_id,
+                    GenerationCheckpointBlob.checkpoint_ns == checkpoint_ns,
+                    GenerationCheckpointBlob.channel == channel,
+                    GenerationCheckpointBlob.version == str(version),
+                ).first()
+                if exists is None:
+                    db.add(GenerationCheckpointBlob(
+                        thread_id=thread_id, checkpoint_ns=checkpoint_ns, channel=channel,
+                        version=str(version), value_type=value_type, value=value,
+                    ))
+
+            checkpoint_type, checkpoint_data = self._dump(stored)
+            metadata_type, metadata_data = self._dump(get_checkpoint_metadata(config, metadata))
+            row = db.query(GenerationCheckpoint).filter(
+                GenerationCheckpoint.thread_id == thread_id,
+                GenerationCheckpoint.checkpoint_ns == checkpoint_ns,
+                GenerationCheckpoint.checkpoint_id == checkpoint["id"],
+            ).first()
+            if row is None:
+                row = GenerationCheckpoint(thread_id=thread_id, checkpoint_ns=checkpoint_ns, checkpoint_id=checkpoint["id"])
+                db.add(row)
+            row.parent_checkpoint_id = config["configurable"].get("checkpoint_id")
+            row.checkpoint_type = checkpoint_type
+            row.checkpoint = checkpoint_data
+            row.metadata_type = metadata_type
+            row.checkpoint_metadata = metadata_data
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to store checkpoint {checkpoint['id']} of thread {thread_id}: {e}")
+        finally:
+            db.close()
+        return next_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        db = self.session_factory()
+        try:
+            existing = {
+                row.idx: row
+                for row in db.query(GenerationCheckpointWrite).filter(
+                    GenerationCheckpointWrite.thread_id == thread_id,
+                    GenerationCheckpointWrite.checkpoint_ns == checkpoint_ns,
+                    GenerationCheckpointWrite.checkpoint_id == checkpoint_id,
+                    GenerationCheckpointWrite.task_id == task_id,
+                ).all()
+            }
+            for position, (channel, value) in enumerate(writes):
+                if channel in RUNTIME_STATE_KEYS:
+                    continue
+                idx = WRITES_IDX_MAP.get(channel, position)
+                row = existing.get(idx)
+                # Regular writes are stored once; special writes (errors, interrupts) replace earlier ones
+                if row is not None and idx >= 0:
+                    continue
+                if row is None:
+                    row = GenerationCheckpointWrite(
+                        thread_id=thread_id, checkpoint_ns=checkpoint_ns, checkpoint_id=checkpoint_id,
+                        task_id=task_id, idx=idx,
+                    )
+                    db.add(row)
+                row.task_path = task_path
+                row.channel = channel
+                row.value_type, row.value = self._dump(_strip_runtime(value))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to store pending writes of thread {thread_id}: {e}")
+        finally:
+            db.close()
+
+    def delete_thread(self, thread_id: str) -> None:
+        db = self.session_factory()
+        try:
+            for model in (GenerationCheckpointWrite, GenerationCheckpointBlob, GenerationCheckpoint):
+                db.query(model).filter(model.thread_id == thread_id).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def put_progress(self, thread_id: str, scope: str, key: str, value: Any) -> None:
+        """Store (or replace) the result of item ``key`` of ``scope`` for the thread."""
+        checkpoint_ns = _PROGRESS_NS_PREFIX + scope
+        db = self.session_factory()
+        try:
+            value_type, data = self._dump(_strip_runtime(value))
+            row = db.query(GenerationCheckpointBlob).filter(
+                GenerationCheckpointBlob.thread_id == thread_id,
+                GenerationCheckpointBlob.checkpoint_ns == checkpoint_ns,
+                GenerationCheckpointBlob.channel == key,
+            ).first()
+            if row is None:
+                row = GenerationCheckpointBlob(thread_id=thread_id, checkpoint_ns=checkpoint_ns, channel=key, version="1")
+                db.add(row)
+            row.value_type = value_type
+            row.value = data
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to store {scope} progress of thread {thread_id}: {e}")
+        finally:
+            db.close()
+
+    def get_progress(self, thread_id: str, scope: str) -> Dict[str, Any]:
+        """Item results of ``scope`` stored for the thread, by key."""
+        db = self.session_factory()
+        try:
+            rows = db.query(GenerationCheckpointBlob).filter(
+                GenerationCheckpointBlob.thread_id == thread_id,
+                GenerationCheckpointBlob.checkpoint_ns == _PROGRESS_NS_PREFIX + scope,
+            ).all()
+            return {row.channel: self._load(row.value_type, row.value) for row in rows}
+        except Exception as e:
+            logger.error(f"Failed to load {scope} progress of thread {thread_id}: {e}")
+            return {}
+        finally:
+            db.close()
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        # Zero-padded so versions (and checkpoint ordering) compare correctly as strings
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # --- Async API ---
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        # to_thread copies the context, so the runtime values reach get_tuple
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        results = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in results:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+_checkpointer: Optional[SQLAlchemyCheckpointSaver] = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> Optional[SQLAlchemyCheckpointSaver]:
+    """Return the shared checkpoint saver, or None when GENERATION_CHECKPOINTS_ENABLED is false."""
+    global _checkpointer
+    if not GENERATION_CHECKPOINTS_ENABLED:
+        return None
+    if _checkpointer is None:
+        with _checkpointer_lock:
+            if _checkpointer is None:
+                _checkpointer = SQLAlchemyCheckpointSaver()
+    return _checkpointer
+
+
+def has_checkpoint(thread_id: str, saver: Optional[SQLAlchemyCheckpointSaver] = None) -> bool:
+    """Whether the thread has at least one stored checkpoint."""
+    saver = saver or get_checkpointer()
+    if saver is None:
+        return False
+    db = saver.session_factory()
+    try:
+        return db.query(GenerationCheckpoint.id).filter(GenerationCheckpoint.thread_id == thread_id).first() is not None
+    finally:
+        db.close()
+
+
+def cancelled_task_outcome(task_id: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Final status and error message of a generation task whose run was cancelled
+    (e.g. by a graceful shutdown).
+
+    Returns:
+        (None, None) when the task has a checkpoint: it is left RUNNING, still charged,
+        for startup or the resume endpoint to continue. Otherwise FAILED and the error
+        message to store; the caller refunds the charge as for any failure.
+    """
+    try:
+        # Queried synchronously: the caller handles a cancellation and awaiting could be cancelled again
+        resumable = has_checkpoint(task_id)
+    except Exception as e:
+        logger.error(f"Failed to look up checkpoint for cancelled task {task_id}: {e}")
+        resumable = False
+    if resumable:
+        logger.warning(f"Task {task_id} was cancelled; leaving it RUNNING to resume from its last checkpoint.")
+        return None, None
+    logger.warning(f"Task {task_id} was cancelled before its first checkpoint.")
+    error = json.dumps({"message": "Course generation was cancelled. Please try again.", "type": "cancelled"})
+    return GenerationTaskStatus.FAILED, error
+
+
+def get_checkpoint_values(
+    thread_id: str,
+    channels: Optional[Iterable[str]] = None,
+    saver: Optional[SQLAlchemyCheckpointSaver] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    State values and metadata of the thread's latest checkpoint.
+
+    Returns:
+        {"values": {...}, "metadata": {...}} restricted to ``channels`` if given,
+        or None if the thread has no checkpoint
+    """
+    saver = saver or get_checkpointer()
+    if saver is None:
+        return None
+    db = saver.session_factory()
+    try:
+        row = db.query(GenerationCheckpoint).filter(
+            GenerationCheckpoint.thread_id == thread_id,
+            GenerationCheckpoint.checkpoint_ns == "",
+        ).order_by(GenerationCheckpoint.checkpoint_id.desc()).first()
+        if row is None:
+            return None
+        versions = saver._load(row.checkpoint_type, row.checkpoint)["channel_versions"]
+        if channels is not None:
+            wanted = set(channels)
+            versions = {k: v for k, v in versions.items() if k in wanted}
+        return {
+            "values": saver._load_channel_values(db, thread_id, "", versions),
+            "metadata": saver._load(row.metadata_type, row.checkpoint_metadata),
+        }
+    finally:
+        db.close()
+
+
+async def save_progress(thread_id: str, scope: str, key: str, value: Any) -> None:
+    """Record a finished item of a running node; no-op when checkpointing is disabled."""
+    saver = get_checkpointer()
+    if saver is not None:
+        await asyncio.to_thread(saver.put_progress, thread_id, scope, key, value)
+
+
+async def load_progress(thread_id: str, scope: str) -> Dict[str, Any]:
+    """Items recorded with ``save_progress`` for the thread (empty when checkpointing is disabled)."""
+    saver = get_checkpointer()
+    if saver is None:
+        return {}
+    return await asyncio.to_thread(saver.get_progress, thread_id, scope)
+
+
+def delete_checkpoints(thread_id: str, saver: Optional[SQLAlchemyCheckpointSaver] = None) -> None:
+    """Delete every checkpoint of the thread and its content blobs."""
+    saver = saver or get_checkpointer()
+    if saver is not None:
+        saver.delete_thread(thread_id)
+    delete_content_blobs(thread_id)
+
+
+def prune_checkpoints(
+    retention_hours: Optional[float] = None,
+    saver: Optional[SQLAlchemyCheckpointSaver] = None,
+) -> int:
+    """
+    Delete checkpoint threads whose latest checkpoint is older than the retention period.
+
+    Returns:
+        Number of threads deleted
+    """
+    saver = saver or get_checkpointer()
+    if saver is None:
+        return 0
+    retention_hours = GENERATION_CHECKPOINT_RETENTION_HOURS if retention_hours is None else retention_hours
+    cutoff = datetime.utcnow() - timedelta(hours=retention_hours)
+    db = saver.session_factory()
+    try:
+        expired = [
+            thread_id
+            for thread_id, in db.query(GenerationCheckpoint.thread_id)
+            .group_by(GenerationCheckpoint.thread_id)
+            .having(func.max(GenerationCheckpoint.created_at) < cutoff)
+            .all()
+        ]
+    finally:
+        db.close()
+    for thread_id in expired:
+        saver.delete_thread(thread_id)
+        delete_content_blobs(thread_id)
+    if expired:
+        logger.info(f"Pruned checkpoints of {len(expired)} generation(s) older than {retention_hours}h")
+    return len(expired)
@@ -0,0 +1,91 @@
+"""
+Generation-scoped context for a single course generation run.
+
+The graph state is passed between nodes, but helpers deep in the call stack
+(scraping, caches, profiling) have no access to it. ``generation_scope`` binds a
+``GenerationContext`` to a ``ContextVar`` for the duration of one run so any
+coroutine spawned by the graph can reach per-generation resources without
+threading them through every function signature.
+
+Provides:
+- GenerationContext: per-run task id and resource registry
+- generation_scope: async context manager that activates a context
+- get_generation_context: the active context, or None outside a generation
+"""
+from __future__ import annotations
+
+import time
+import uuid
+import inspect
+import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationContext:
+    """Per-generation task id plus lazily created resources shared by the run."""
+
+    def __init__(self, task_id: Optional[str] = None):
+        self.task_id = task_id or str(uuid.uuid4())
+        self.started_at = time.monotonic()
+        self.resources: Dict[str, Any] = {}
+        # Set when the run was cancelled (e.g. by a shutdown) rather than finishing or failing;
+        # such a run may still be resumed from its checkpoint
+        self.interrupted = False
+        self._close_callbacks: List[Callable[[], Any]] = []
+
+    def get_or_create(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Return the resource registered under ``name``, creating it with ``factory`` on first use."""
+        resource = self.resources.get(name)
+        if resource is None:
+            resource = factory()
+            self.resources[name] = resource
+        return resource
+
+    def add_close_callback(self, callback: Callable[[], Any]) -> None:
+        """Register a (sync or async) callback to run when the generation ends."""
+        self._close_callbacks.append(callback)
+
+    async def close(self) -> None:
+        """Run close callbacks in reverse registration order. Errors are logged, not raised."""
+        while self._close_callbacks:
+            callback = self._close_callbacks.pop()
+            try:
+                result = callback()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Generation {self.task_id}: close callback failed: {e}")
+        self.resources.clear()
+
+
+_current_generation: ContextVar[Optional[GenerationContext]] = ContextVar("current_generation", default=None)
+
+
+def get_generation_context() -> Optional[GenerationContext]:
+    """Return the context of the generation running in this task, if any."""
+    return _current_generation.get()
+
+
+@asynccontextmanager
+async def generation_scope(task_id: Optional[str] = None) -> AsyncIterator[GenerationContext]:
+    """
+    Activate a fresh ``GenerationContext`` for the enclosed block.
+
+    Tasks created inside the block inherit the context (asyncio copies context
+    variables into new tasks), so per-generation resources are visible to every
+    graph node and the coroutines they spawn.
+    """
+    context = GenerationContext(task_id)
+    token = _current_generation.set(context)
+    try:
+        yield context
+    except BaseException as e:
+        context.interrupted = not isinstance(e, Exception)
+        raise
+    finally:
+        _current_generation.reset(token)
+        await context.close()
@@ -0,0 +1,345 @@
+"""
+Per-generation timeline of graph nodes and LLM chains.
+
+A ``GenerationProfile`` lives in the active ``GenerationContext``. Every graph
+node registered in ``build_graph`` runs inside a "node" span and every
+``run_chain`` call inside a "chain" span. Spans are held in a context variable,
+so LLM calls, searches and scraped bytes are credited to all enclosing spans,
+including those in tasks spawned by a node.
+
+LLM calls are observed through ``ProfilingCallbackHandler``, which ``run_graph``
+adds to the graph config; LangChain hands it down to every chat model invoked
+inside a node, whether or not the call goes through ``run_chain``.
+
+When a generation ends its profile is kept in a bounded in-process registry,
+from which the API persists it on the ``GenerationTask`` row.
+
+Provides:
+- GenerationProfile: spans and totals of one generation
+- get_generation_profile: profile of the active generation (None when disabled)
+- profile_span: context manager timing a node or chain
+- profiled_node: wrap a graph node function in a node span
+- ProfilingCallbackHandler / profiling_config: LLM call accounting for a graph run
+- record_search / record_scrape_bytes: counters called by the search service
+- get_task_profile: live or recently finished profile of a task
+- summarize_profiles: p50/p95 per node across profiles
+"""
+from __future__ import annotations
+
+import os
+import time
+import logging
+import functools
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from backend.core.generation_context import get_generation_context
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+GENERATION_PROFILING_ENABLED = os.environ.get("GENERATION_PROFILING_ENABLED", "true").lower() == "true"
+# Chain spans kept per profile (node spans are always kept); further chains only count in the totals
+GENERATION_PROFILE_MAX_CHAINS = int(os.environ.get("GENERATION_PROFILE_MAX_CHAINS", "1000"))
+# Finished profiles kept in memory for the profile endpoint
+GENERATION_PROFILE_RECENT = int(os.environ.get("GENERATION_PROFILE_RECENT", "200"))
+
+_RESOURCE_NAME = "generation_profile"
+_COUNTERS = ("llm_calls", "llm_errors", "prompt_chars", "completion_chars", "input_tokens", "output_tokens",
+             "searches", "scrape_bytes")
+
+
+@dataclass
+class Span:
+    """One node execution or run_chain call; times are seconds since the generation started."""
+    kind: str
+    name: str
+    node: Optional[str]
+    start: float
+    end: Optional[float] = None
+    status: str = "running"
+    counters: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(_COUNTERS, 0))
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        end = self.end if self.end is not None else now
+        data = {
+            "kind": self.kind,
+            "name": self.name,
+            "start": round(self.start, 3),
+            "end": round(end, 3),
+            "duration": round(end - self.start, 3),
+            "status": self.status,
+            **self.counters,
+        }
+        if self.kind == "chain":
+            data["node"] = self.node
+        return data
+
+
+class GenerationProfile:
+    """Node and chain spans plus totals for one generation."""
+
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self.started_at = datetime.now(timezone.utc)
+        self._origin = time.monotonic()
+        self._ended: Optional[float] = None
+        self.nodes: List[Span] = []
+        self.chains: List[Span] = []
+        self.chains_dropped = 0
+        self.totals: Dict[str, int] = dict.fromkeys(_COUNTERS, 0)
+        self._lock = threading.Lock()
+
+    def now(self) -> float:
+        return time.monotonic() - self._origin
+
+    def open_span(self, kind: str, name: str, node: Optional[str]) -> Span:
+        span = Span(kind=kind, name=name, node=node, start=self.now())
+        with self._lock:
+            if kind == "node":
+                self.nodes.append(span)
+            elif len(self.chains) < GENERATION_PROFILE_MAX_CHAINS:
+                self.chains.append(span)
+            else:
+                self.chains_dropped += 1
+        return span
+
+    def add(self, spans: Iterable[Span], **counts: int) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                self.totals[name] += value
+                for span in spans:
+                    span.counters[name] += value
+
+    def finish(self) -> None:
+        self._ended = self.now()
+
+    def to_dict(self) -> Dict[str, Any]:
+        now = self._ended if self._ended is not None else self.now()
+        with self._lock:
+            nodes = [span.to_dict(now) for span in self.nodes]
+            chains = [span.to_dict(now) for span in self.chains]
+            totals = dict(self.totals)
+        return {
+            "task_id": self.task_id,
+            "started_at": self.started_at.isoformat(),
+            "finished": self._ended is not None,
+            "duration_seconds": round(now, 3),
+            "totals": dict(totals, nodes=len(nodes), chains=len(chains) + self.chains_dropped),
+            "nodes": nodes,
+            "chains": chains,
+            "chains_dropped": self.chains_dropped,
+        }
+
+
+_active_spans: ContextVar[Tuple[Span, ...]] = ContextVar("generation_profile_spans", default=())
+_registry_lock = threading.Lock()
+_running: Dict[str, GenerationProfile] = {}
+_finished: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def _finish_profile(profile: GenerationProfile) -> None:
+    profile.finish()
+    data = profile.to_dict()
+    with _registry_lock:
+        _running.pop(profile.task_id, None)
+        _finished[profile.task_id] = data
+        _finished.move_to_end(profile.task_id)
+        while len(_finished) > GENERATION_PROFILE_RECENT:
+            _finished.popitem(last=False)
+    logger.info(
+        f"Generation {profile.task_id} profile: {data['duration_seconds']:.1f}s, {len(data['nodes'])} node runs, "
+        f"{data['totals']['llm_calls']} LLM calls, {data['totals']['searches']} searches"
+    )
+
+
+def get_generation_profile() -> Optional[GenerationProfile]:
+    """Return the profile of the active generation, creating it on first use."""
+    if not GENERATION_PROFILING_ENABLED:
+        return None
+    context = get_generation_context()
+    if context is None:
+        return None
+
+    def factory() -> GenerationProfile:
+        profile = GenerationProfile(context.task_id)
+        with _registry_lock:
+            _running[context.task_id] = profile
+        context.add_close_callback(lambda: _finish_profile(profile))
+        return profile
+
+    return context.get_or_create(_RESOURCE_NAME, factory)
+
+
+@contextmanager
+def profile_span(kind: str, name: str) -> Iterator[Optional[Span]]:
+    """Time the enclosed block as a ``kind`` ("node" or "chain") span of the active generation."""
+    profile = get_generation_profile()
+    if profile is None:
+        yield None
+        return
+    enclosing = _active_spans.get()
+    node = next((span.name for span in reversed(enclosing) if span.kind == "node"), None)
+    span = profile.open_span(kind, name, node)
+    token = _active_spans.set(enclosing + (span,))
+    try:
+        yield span
+        span.status = "ok"
+    except BaseException:
+        span.status = "error"
+        raise
+    finally:
+        span.end = profile.now()
+        _active_spans.reset(token)
+
+
+def profiled_node(name: str, func):
+    """Wrap the async graph node ``func`` so each execution is recorded as a node span."""
+    @functools.wraps(func)
+    async def wrapper(state):
+        with profile_span("node", name):
+            return await func(state)
+    return wrapper
+
+
+def _record(**counts: int) -> None:
+    profile = get_generation_profile()
+    if profile is not None:
+        profile.add(_active_spans.get(), **counts)
+
+
+def record_search() -> None:
+    """Count one search request against the active spans."""
+    _record(searches=1)
+
+
+def record_scrape_bytes(size: int) -> None:
+    """Count downloaded page bytes against the active spans."""
+    if size:
+        _record(scrape_bytes=size)
+
+
+def _text_size(content: Any) -> int:
+    """Characters in message content (a string or a list of text / content blocks)."""
+    if isinstance(content, str):
+        return len(content)
+    size = 0
+    for part in content if isinstance(content, list) else ():
+        if isinstance(part, str):
+            size += len(part)
+        elif isinstance(part, dict):
+            size += len(str(part.get("text", "")))
+    return size
+
+
+class ProfilingCallbackHandler(BaseCallbackHandler):
+    """Credits chat model calls (sizes and token usage) to the spans active when they start."""
+
+    run_inline = True
+
+    def __init__(self, profile: GenerationProfile):
+        self.profile = profile
+        self._calls: Dict[Any, Tuple[Span, ...]] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        spans = _active_spans.get()
+        self._calls[run_id] = spans
+        prompt_chars = sum(_text_size(message.content) for batch in messages for message in batch)
+        self.profile.add(spans, llm_calls=1, prompt_chars=prompt_chars)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        spans = self._calls.pop(run_id, ())
+        completion_chars = input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                completion_chars += len(generation.text or "")
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0) or 0
+                output_tokens += usage.get("output_tokens", 0) or 0
+        self.profile.add(spans, completion_chars=completion_chars, input_tokens=input_tokens, output_tokens=output_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self.profile.add(self._calls.pop(run_id, ()), llm_errors=1)
+
+
+def profiling_config(config: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """Add the active generation's ProfilingCallbackHandler to a graph run ``config``."""
+    profile = get_generation_profile()
+    if profile is None:
+        return config
+    config = dict(config or {})
+    callbacks = config.get("callbacks") or []
+    if not isinstance(callbacks, list):
+        # A callback manager was passed; leave it alone rather than guess how to extend it
+        return config
+    config["callbacks"] = callbacks + [ProfilingCallbackHandler(profile)]
+    return config
+
+
+def get_task_profile(task_id: str) -> Optional[Dict[str, Any]]:
+    """Snapshot of a running generation's profile, or the kept profile of a finished one."""
+    with _registry_lock:
+        running = _running.get(task_id)
+        finished = _finished.get(task_id)
+    if running is not None:
+        return running.to_dict()
+    return finished
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(fraction * (len(ordered) - 1))] if ordered else 0.0
+
+
+def summarize_profiles(profiles: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Per-node statistics across generation profiles.
+
+    A node that ran several times in one generation (e.g. submodule batches)
+    contributes the sum of its runs, so percentiles are per generation.
+    """
+    per_node: Dict[str, Dict[str, List[float]]] = {}
+    durations: List[float] = []
+    count = 0
+    for profile in profiles:
+        if not profile:
+            continue
+        count += 1
+        durations.append(profile.get("duration_seconds", 0.0))
+        task_nodes: Dict[str, Dict[str, float]] = {}
+        for span in profile.get("nodes", []):
+            entry = task_nodes.setdefault(span["name"], {"seconds": 0.0, "runs": 0, "llm_calls": 0, "tokens": 0})
+            entry["seconds"] += span.get("duration", 0.0)
+            entry["runs"] += 1
+            entry["llm_calls"] += span.get("llm_calls", 0)
+            entry["tokens"] += span.get("input_tokens", 0) + span.get("output_tokens", 0)
+        for name, entry in task_nodes.items():
+            series = per_node.setdefault(name, {"seconds": [], "runs": [], "llm_calls": [], "tokens": []})
+            for key, value in entry.items():
+                series[key].append(value)
+
+    nodes = {
+        name: {
+            "tasks": len(series["seconds"]),
+            "p50_seconds": round(_percentile(series["seconds"], 0.5), 3),
+            "p95_seconds": round(_percentile(series["seconds"], 0.95), 3),
+            "max_seconds": round(max(series["seconds"]), 3),
+            "avg_runs": round(sum(series["runs"]) / len(series["runs"]), 2),
+            "avg_llm_calls": round(sum(series["llm_calls"]) / len(series["llm_calls"]), 2),
+            "avg_tokens": round(sum(series["tokens"]) / len(series["tokens"]), 1),
+        }
+        for name, series in sorted(per_node.items(), key=lambda item: -_percentile(item[1]["seconds"], 0.5))
+    }
+    return {
+        "tasks": count,
+        "p50_seconds": round(_percentile(durations, 0.5), 3),
+        "p95_seconds": round(_percentile(durations, 0.95), 3),
+        "nodes": nodes,
+    }
@@ -1,4 +1,9 @@
+import os
+import time
 import logging
+import importlib
+import threading
+from typing import Any, Dict, Iterable, Optional
 from langgraph.graph import StateGraph, START, END
 from backend.models.models import LearningPathState
 from backend.core.graph_nodes import (
@@ -17,43 +22,66 @@ from backend.core.graph_nodes import (
     evaluate_research_sufficiency,
     generate_refinement_queries,
     execute_refinement_searches,
-    check_research_adequacy
+    check_research_adequacy,
+    plan_and_develop_submodules,
+    lookup_research_cache,
+    route_after_research_cache,
+    store_research_cache,
 )
+from backend.core.generation_profile import profiled_node
 
-def build_graph():
+# Compile the graph(s) and preload prompts/parsers when the API starts instead of on the first request
+GRAPH_WARMUP_ENABLED = os.environ.get("GRAPH_WARMUP_ENABLED", "true").lower() == "true"
+# Graph run by generations: "default" (phased) or "pipelined" (submodules developed as modules are planned)
+GENERATION_GRAPH_VARIANT = os.environ.get("GENERATION_GRAPH_VARIANT", "default").lower()
+
+# Modules the nodes import lazily on first use
+_LAZY_NODE_MODULES = (
+    "backend.core.submodules.planning_research",
+    "backend.core.submodules.context_builders",
+    "backend.core.submodules.content_enrichment",
+    "backend.core.graph_nodes.resources",
+    "backend.utils.language_utils",
+)
+_PROMPT_MODULES = ("backend.prompts.learning_path_prompts",)
+
+def _add_node(graph: StateGraph, name: str, func) -> None:
+    """Add a node wrapped so its runs are recorded in the generation profile."""
+    graph.add_node(name, profiled_node(name, func))
+
+
+def _add_research_flow(graph: StateGraph) -> None:
     """
-    Constructs and returns the LangGraph with hierarchical submodule processing, resource generation,
-    and research evaluation loop following the Google pattern for iterative research refinement.
+    Initial research with the evaluation/refinement loop, ending at create_learning_path.
+    Research cached for the topic is reused (fresh) or refined once (stale) instead.
     """
-    logging.info("Building graph with research evaluation loop, hierarchical submodule processing and resource generation")
-    graph = StateGraph(LearningPathState)
-    
+    # Cross-user research cache
+    _add_node(graph, "lookup_research_cache", lookup_research_cache)
+    _add_node(graph, "store_research_cache", store_research_cache)
+
     # Initial course generation nodes
-    graph.add_node("generate_search_queries", generate_search_queries)
-    graph.add_node("execute_web_searches", execute_web_searches)
+    _add_node(graph, "generate_search_queries", generate_search_queries)
+    _add_node(graph, "execute_web_searches", execute_web_searches)
     
     # Research evaluation and refinement nodes (following Google pattern)
-    graph.add_node("evaluate_research_sufficiency", evaluate_research_sufficiency)
-    graph.add_node("generate_refinement_queries", generate_refinement_queries)
-    graph.add_node("execute_refinement_searches", execute_refinement_searches)
+    _add_node(graph, "evaluate_research_sufficiency", evaluate_research_sufficiency)
+    _add_node(graph, "generate_refinement_queries", generate_refinement_queries)
+    _add_node(graph, "execute_refinement_searches", execute_refinement_searches)
     
     # Course creation (after research is sufficient)
-    graph.add_node("create_learning_path", create_learning_path)
-    
-    # Submodule planning and development nodes
-    graph.add_node("plan_submodules", plan_submodules)
-    graph.add_node("initialize_submodule_processing", initialize_submodule_processing)
-    graph.add_node("process_submodule_batch", process_submodule_batch)
-    graph.add_node("finalize_enhanced_learning_path", finalize_enhanced_learning_path)
-    
-    # Resource generation nodes
-    graph.add_node("initialize_resource_generation", initialize_resource_generation)
-    graph.add_node("generate_topic_resources", generate_topic_resources)
-    graph.add_node("process_module_resources", process_module_resources)
-    graph.add_node("add_resources_to_final_learning_path", add_resources_to_final_learning_path)
+    _add_node(graph, "create_learning_path", create_learning_path)
     
     # Connect initial research flow with evaluation loop (following Google pattern)
-    graph.add_edge(START, "generate_search_queries")
+    graph.add_edge(START, "lookup_research_cache")
+    graph.add_conditional_edges(
+        "lookup_research_cache",
+        route_after_research_cache,
+        {
+            "generate_search_queries": "generate_search_queries",  # Miss: full research
+            "generate_refinement_queries": "generate_refinement_queries",  # Stale hit: one refinement pass
+            "create_learning_path": "create_learning_path",  # Fresh hit
+        }
+    )
     graph.add_edge("generate_search_queries", "execute_web_searches")
     
     # Research evaluation loop (Google pattern implementation)
@@ -62,14 +90,46 @@ def build_graph():
         "evaluate_research_sufficiency",
         check_research_adequacy,
         {
-            "create_learning_path": "create_learning_path",  # Research sufficient or max loops reached
+            "create_learning_path": "store_research_cache",  # Research sufficient or max loops reached
             "generate_refinement_queries": "generate_refinement_queries"  # Need more research
         }
     )
+    graph.add_edge("store_research_cache", "create_learning_path")
     
     # Research refinement cycle
     graph.add_edge("generate_refinement_queries", "execute_refinement_searches")
     graph.add_edge("execute_refinement_searches", "evaluate_research_sufficiency")  # Loop back to evaluation
+
+
+def _add_final_assembly(graph: StateGraph) -> None:
+    """Module resources and final assembly, starting at process_module_resources."""
+    _add_node(graph, "process_module_resources", process_module_resources)
+    _add_node(graph, "finalize_enhanced_learning_path", finalize_enhanced_learning_path)
+    _add_node(graph, "add_resources_to_final_learning_path", add_resources_to_final_learning_path)
+    graph.add_edge("process_module_resources", "finalize_enhanced_learning_path")  # Then finalize the path
+    graph.add_edge("finalize_enhanced_learning_path", "add_resources_to_final_learning_path")  # Add resources to final path
+    graph.add_edge("add_resources_to_final_learning_path", END)
+
+
+def build_graph(checkpointer=None):
+    """
+    Constructs and returns the LangGraph with hierarchical submodule processing, resource generation,
+    and research evaluation loop following the Google pattern for iterative research refinement.
+    Every node is wrapped so its runs are recorded in the generation profile; with a checkpointer,
+    the state is saved after every node.
+    """
+    logging.info("Building graph with research evaluation loop, hierarchical submodule processing and resource generation")
+    graph = StateGraph(LearningPathState)
+    _add_research_flow(graph)
+    
+    # Submodule planning and development nodes
+    _add_node(graph, "plan_submodules", plan_submodules)
+    _add_node(graph, "initialize_submodule_processing", initialize_submodule_processing)
+    _add_node(graph, "process_submodule_batch", process_submodule_batch)
+    
+    # Resource generation nodes
+    _add_node(graph, "initialize_resource_generation", initialize_resource_generation)
+    _add_node(graph, "generate_topic_resources", generate_topic_resources)
     
     # Connect submodule flow with resource generation
     graph.add_edge("create_learning_path", "plan_submodules")
@@ -85,7 +145,120 @@ def build_graph():
             "continue_processing": "process_submodule_batch"
         }
     )
-    graph.add_edge("process_module_resources", "finalize_enhanced_learning_path")  # Then finalize the path
-    graph.add_edge("finalize_enhanced_learning_path", "add_resources_to_final_learning_path")  # Add resources to final path
-    graph.add_edge("add_resources_to_final_learning_path", END)
-    return graph.compile()
+    _add_final_assembly(graph)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def build_pipelined_graph(checkpointer=None):
+    """
+    Constructs the pipelined variant: the same research flow and final assembly, with submodule
+    planning, topic resources and submodule development overlapped in plan_and_develop_submodules
+    (each module's submodules are developed as soon as that module is planned).
+    """
+    logging.info("Building pipelined graph with overlapping submodule planning and development")
+    graph = StateGraph(LearningPathState)
+    _add_research_flow(graph)
+    _add_node(graph, "plan_and_develop_submodules", plan_and_develop_submodules)
+    graph.add_edge("create_learning_path", "plan_and_develop_submodules")
+    graph.add_edge("plan_and_develop_submodules", "process_module_resources")
+    _add_final_assembly(graph)
+    return graph.compile(checkpointer=checkpointer)
+
+
+# Graph variants by name; each is compiled once per process and shared by all generations
+_GRAPH_BUILDERS = {
+    "default": build_graph,
+    "pipelined": build_pipelined_graph,
+}
+_compiled_graphs: Dict[str, Any] = {}
+_compiled_graphs_lock = threading.Lock()
+
+
+def get_compiled_graph(variant: Optional[str] = None):
+    """
+    Return the compiled graph for ``variant`` (GENERATION_GRAPH_VARIANT by default), building it on first use.
+
+    A compiled graph holds no per-run state (the state is passed to ``ainvoke``),
+    so one instance safely serves concurrent generations. Graphs are compiled with the
+    shared checkpoint saver when GENERATION_CHECKPOINTS_ENABLED is set.
+    """
+    from backend.core.checkpointing import get_checkpointer
+    variant = variant or GENERATION_GRAPH_VARIANT
+    builder = _GRAPH_BUILDERS.get(variant)
+    if builder is None:
+        raise ValueError(f"Unknown graph variant '{variant}'. Available: {', '.join(_GRAPH_BUILDERS)}")
+    with _compiled_graphs_lock:
+        graph = _compiled_graphs.get(variant)
+        if graph is None:
+            started = time.perf_counter()
+            graph = builder(checkpointer=get_checkpointer())
+            _compiled_graphs[variant] = graph
+            logging.info(f"Compiled graph variant '{variant}' in {time.perf_counter() - started:.3f}s")
+    return graph
+
+
+def _preload_prompts() -> int:
+    """Parse the static prompt templates once so the template machinery is loaded."""
+    from langchain_core.prompts import ChatPromptTemplate
+
+    count = 0
+    for module_name in _PROMPT_MODULES:
+        module = importlib.import_module(module_name)
+        for name, value in vars(module).items():
+            if not name.isupper() or not isinstance(value, str):
+                continue
+            try:
+                ChatPromptTemplate.from_template(value)
+                count += 1
+            except ValueError:
+                # Some constants are fragments completed at call time, not full templates
+                continue
+    return count
+
+
+def _preload_parsers() -> int:
+    """Build the JSON schemas and format instructions of the output models once."""
+    from pydantic import BaseModel
+    from langchain_core.output_parsers import PydanticOutputParser
+    from backend.models import models
+
+    count = 0
+    for value in vars(models).values():
+        if not (isinstance(value, type) and issubclass(value, BaseModel) and value.__module__ == models.__name__):
+            continue
+        try:
+            PydanticOutputParser(pydantic_object=value).get_format_instructions()
+            count += 1
+        except Exception as e:
+            logging.debug(f"Skipping parser warm-up for {value.__name__}: {e}")
+    return count
+
+
+def warm_up_graph(variants: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Compile the graph variants and preload what the first generation would otherwise pay for:
+    lazily imported node modules, prompt templates and Pydantic parser schemas.
+    Returns the time spent per step.
+    """
+    timings: Dict[str, Any] = {}
+    started = time.perf_counter()
+    for variant in variants or _GRAPH_BUILDERS:
+        get_compiled_graph(variant)
+    timings["graphs_seconds"] = round(time.perf_counter() - started, 3)
+
+    step = time.perf_counter()
+    for module_name in _LAZY_NODE_MODULES:
+        importlib.import_module(module_name)
+    timings["imports_seconds"] = round(time.perf_counter() - step, 3)
+
+    step = time.perf_counter()
+    timings["prompts"] = _preload_prompts()
+    timings["parsers"] = _preload_parsers()
+    timings["templates_seconds"] = round(time.perf_counter() - step, 3)
+
+    timings["total_seconds"] = round(time.perf_counter() - started, 3)
+    logging.info(
+        f"Graph warm-up finished in {timings['total_seconds']:.3f}s "
+        f"({timings['prompts']} prompts, {timings['parsers']} parsers)"
+    )
+    return timings
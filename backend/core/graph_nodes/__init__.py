@@ -20,6 +20,7 @@ from .submodules import (
     develop_submodule_specific_content,
     finalize_enhanced_learning_path,
     check_submodule_batch_processing,
+    plan_and_develop_submodules,
     # Legacy content refinement functions (no longer used in default flow)
     evaluate_content_sufficiency,
     check_content_adequacy,
@@ -43,3 +44,8 @@ from .research_evaluation import (
     execute_refinement_searches,
     check_research_adequacy
 )
+from .research_reuse import (
+    lookup_research_cache,
+    route_after_research_cache,
+    store_research_cache,
+)
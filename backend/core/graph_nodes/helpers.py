@@ -1,13 +1,33 @@
 import asyncio
+import contextlib
 from typing import List, Any, Dict, Optional, Union, Callable, TypeVar
 import logging
-import re
+import sys
 import time
 import json
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import BaseOutputParser, StrOutputParser
+from langchain_core.output_parsers import BaseOutputParser, StrOutputParser, PydanticOutputParser
 from langchain_google_genai import ChatGoogleGenerativeAI
 from backend.services.services import GroundedGeminiWrapper
+from backend.utils.json_extract import extract_json_from_markdown
+from backend.services.llm_cache import (
+    LLM_CACHE_TTL_SECONDS,
+    call_site_enabled,
+    get_llm_response_cache,
+    llm_cache_key,
+    record_llm_cache_event,
+)
+from backend.services.llm_governor import get_llm_governor, is_rate_limit_error
+from backend.services.llm_metrics import record_llm_call_event
+from backend.core.generation_profile import profile_span
+from backend.services.structured_output import (
+    SchemaRejectedError,
+    is_schema_rejection,
+    mark_schema_failure,
+    mark_schema_success,
+    schema_supported,
+    structured_output_enabled,
+)
 
 logger = logging.getLogger("learning_path.helpers")
 
@@ -34,47 +54,6 @@ def escape_curly_braces(text: str) -> str:
     # Duplicar todas las llaves para escaparlas
     return text.replace('{', '{{').replace('}', '}}')
 
-def extract_json_from_markdown(text: str) -> Optional[Dict[str, Any]]:
-    """
-    Extract JSON from text that might be formatted as markdown code blocks.
-    
-    Args:
-        text: The text that may contain markdown-formatted JSON
-        
-    Returns:
-        Parsed JSON object or None if extraction failed
-    """
-    # First try to parse directly as JSON (in case it's already valid JSON)
-    try:
-        return json.loads(text.strip())
-    except json.JSONDecodeError:
-        pass
-    
-    # Try to extract JSON from markdown code blocks
-    code_block_pattern = r'```(?:json)?\s*([\s\S]*?)\s*```'
-    matches = re.findall(code_block_pattern, text)
-    
-    # If we found code blocks, try each one
-    for match in matches:
-        try:
-            return json.loads(match.strip())
-        except json.JSONDecodeError:
-            continue
-    
-    # If no code blocks or none contained valid JSON, try a more lenient approach
-    # Look for text that appears to be JSON (starting with { and ending with })
-    json_object_pattern = r'(\{[\s\S]*\})'
-    object_matches = re.findall(json_object_pattern, text)
-    
-    for match in object_matches:
-        try:
-            return json.loads(match.strip())
-        except json.JSONDecodeError:
-            continue
-    
-    # If we couldn't extract JSON, return None
-    return None
-
 def batch_items(items: List[Any], batch_size: int) -> List[List[Any]]:
     """
     Splits a list of items into batches of a specified size.
@@ -135,9 +114,66 @@ Please provide the corrected response as pure JSON:"""
     # Create a simple prompt template
     return ChatPromptTemplate.from_messages([("user", retry_template)])
 
+def _caller_site() -> str:
+    """"<module>.<function>" of the coroutine that awaited run_chain."""
+    frame = sys._getframe(2)
+    module = frame.f_globals.get("__name__", "unknown").rsplit(".", 1)[-1]
+    return f"{module}.{frame.f_code.co_name}"
+
+def _response_cache_key(prompt, llm, parser, escaped_params: Dict[str, Any]) -> Optional[str]:
+    """
+    Cache key for a run_chain call, or None when the call cannot be cached.
+
+    Only plain Gemini chat models are cached; search-grounded responses depend on live
+    search results and are always fetched.
+    """
+    if not isinstance(llm, ChatGoogleGenerativeAI):
+        return None
+    try:
+        messages = prompt.format_prompt(**escaped_params).to_messages()
+    except Exception as e:
+        logger.debug(f"Could not render prompt for LLM cache key: {e}")
+        return None
+    return llm_cache_key(llm.model, getattr(llm, "temperature", None), messages, parser)
+
+def _llm_slot(llm, call_site: str):
+    """Concurrency slot for ``llm`` from the process-wide LLM governor (no-op when disabled)."""
+    governor = get_llm_governor()
+    if governor is None:
+        return contextlib.nullcontext()
+    return governor.slot(getattr(llm, "model", None) or type(llm).__name__, call_site=call_site)
+
+def _uses_structured_output(llm, parser, call_site: str) -> bool:
+    """Native structured output applies to Pydantic parsers on plain (non-grounded) Gemini models."""
+    return (
+        isinstance(parser, PydanticOutputParser)
+        and isinstance(llm, ChatGoogleGenerativeAI)
+        and structured_output_enabled(call_site)
+        and schema_supported(parser.pydantic_object.__name__)
+    )
+
+async def _invoke_structured(prompt, llm, parser: PydanticOutputParser, escaped_params: Dict[str, Any], call_site: str):
+    """
+    Run the prompt with the parser's schema as Gemini's response schema.
+
+    Returns (parsed, raw_text). ``parsed`` is None when the response did not validate;
+    ``raw_text`` then still holds the model output for the text-parsing fallback.
+    Raises SchemaRejectedError when the structured model cannot be built for the schema.
+    """
+    try:
+        structured_llm = llm.with_structured_output(parser.pydantic_object, method="json_schema", include_raw=True)
+    except Exception as e:
+        raise SchemaRejectedError(str(e)) from e
+    async with _llm_slot(llm, call_site):
+        output = await (prompt | structured_llm).ainvoke(escaped_params)
+    raw_message = output.get("raw")
+    raw_text = StrOutputParser().invoke(raw_message) if raw_message is not None else None
+    return output.get("parsed"), raw_text
+
 async def run_chain(prompt, llm_getter, parser: BaseOutputParser[T], params: Dict[str, Any], 
                    max_retries: int = 3, initial_retry_delay: float = 1.0,
-                   retry_parsing_errors: bool = True, max_parsing_retries: int = 2) -> T:
+                   retry_parsing_errors: bool = True, max_parsing_retries: int = 2,
+                   call_site: Optional[str] = None) -> T:
     """
     Enhanced run_chain with improved JSON extraction and error handling.
     
@@ -150,10 +186,26 @@ async def run_chain(prompt, llm_getter, parser: BaseOutputParser[T], params: Dic
         initial_retry_delay: Base delay in seconds before first retry, doubles for each attempt (default: 1.0).
         retry_parsing_errors: Whether to retry when parsing errors occur (default: True).
         max_parsing_retries: Maximum number of retries specifically for parsing errors (default: 2).
+        call_site: Name used for per-call-site LLM cache / structured-output flags and counters
+            (default: "<module>.<function>" of the caller).
+
+    Pydantic parsers on Gemini models first use native structured output (JSON-schema
+    response mode); the text-parsing path with its format-fix retries is the fallback.
         
     Returns:
         The parsed result from the LLM chain.
+
+    Each call is recorded as a "chain" span in the generation profile.
     """
+    call_site = call_site or _caller_site()
+    with profile_span("chain", call_site):
+        return await _run_chain(prompt, llm_getter, parser, params, max_retries, initial_retry_delay,
+                                retry_parsing_errors, max_parsing_retries, call_site)
+
+async def _run_chain(prompt, llm_getter, parser: BaseOutputParser[T], params: Dict[str, Any],
+                     max_retries: int, initial_retry_delay: float,
+                     retry_parsing_errors: bool, max_parsing_retries: int, call_site: str) -> T:
+    """Body of run_chain; ``call_site`` is already resolved."""
     # Handle both async and sync llm_getter functions
     llm_or_coroutine = llm_getter()
     if asyncio.iscoroutine(llm_or_coroutine):
@@ -180,8 +232,54 @@ async def run_chain(prompt, llm_getter, parser: BaseOutputParser[T], params: Dic
     # Check if this is a StrOutputParser - for these we skip JSON parsing logic
     is_string_parser = isinstance(parser, StrOutputParser)
     
+    # Opt-in response cache: a hit replaces the first LLM call, but still goes through parsing
+    response_cache = get_llm_response_cache() if call_site_enabled(call_site) else None
+    cache_key = _response_cache_key(prompt, llm, parser, escaped_params) if response_cache else None
+    cached_response = None
+    if cache_key:
+        cached_response = await response_cache.get(cache_key)
+        record_llm_cache_event(call_site, "hits" if isinstance(cached_response, str) else "misses")
+        if not isinstance(cached_response, str):
+            cached_response = None
+    
+    async def remember(text: str) -> None:
+        if cache_key and text and text.strip():
+            await response_cache.set(cache_key, text, LLM_CACHE_TTL_SECONDS)
+            record_llm_cache_event(call_site, "stores")
+    
+    # Native structured output: the response is validated against the schema without parse retries
+    record_llm_call_event(call_site, "calls")
+    prefetched_response = None
+    use_structured = cached_response is None and _uses_structured_output(llm, parser, call_site)
+    
     while True:
         try:
+            if use_structured:
+                schema_name = parser.pydantic_object.__name__
+                try:
+                    structured_result, prefetched_response = await _invoke_structured(
+                        prompt, llm, parser, escaped_params, call_site
+                    )
+                except Exception as e:
+                    # Transient errors go through the retry handling below and try structured output again
+                    if not is_schema_rejection(e):
+                        raise
+                    use_structured = False
+                    mark_schema_failure(schema_name, e)
+                    record_llm_call_event(call_site, "structured_fallbacks")
+                    logger.warning(f"Structured output rejected for {call_site} ({schema_name}); using text parsing: {e}")
+                    continue
+                use_structured = False
+                if structured_result is not None:
+                    mark_schema_success(schema_name)
+                    record_llm_call_event(call_site, "structured")
+                    await remember(structured_result.model_dump_json())
+                    return structured_result
+                mark_schema_failure(schema_name, ValueError("structured response did not validate"))
+                record_llm_call_event(call_site, "structured_fallbacks")
+                if prefetched_response:
+                    logger.info(f"Structured output for {call_site} did not validate; parsing the raw response instead")
+
             # If we're retrying after a parsing error, try JSON extraction first (only for non-string parsers)
             if parsing_retry_start_time and retry_parsing_errors and last_raw_response and not is_string_parser:
                 logger.info(f"Attempting JSON extraction from previous response (attempt {parsing_retries}/{max_parsing_retries})")
@@ -195,6 +293,7 @@ async def run_chain(prompt, llm_getter, parser: BaseOutputParser[T], params: Dic
                         if hasattr(parser, "parse"):
                             result = parser.parse(json.dumps(extracted_json))
                             logger.info(f"Successfully extracted and parsed JSON on retry attempt {parsing_retries}")
+                            await remember(last_raw_response)
                             return result
                     except Exception as parse_error:
                         logger.warning(f"Extracted JSON but failed to parse: {str(parse_error)}")
@@ -212,7 +311,9 @@ async def run_chain(prompt, llm_getter, parser: BaseOutputParser[T], params: Dic
                     raw_chain = retry_prompt | llm | StrOutputParser()
                     
                     logger.info(f"Retrying with formatting fix prompt (attempt {parsing_retries}/{max_parsing_retries})")
-                    retry_response = await raw_chain.ainvoke({})  # Empty params for retry prompt
+                    record_llm_call_event(call_site, "parse_retries")
+                    async with _llm_slot(llm, call_site):
+                        retry_response = await raw_chain.ainvoke({})  # Empty params for retry prompt
                     
                     # Try to extract and parse JSON from retry response
                     retry_extracted_json = extract_json_from_markdown(retry_response)
@@ -222,6 +323,7 @@ async def run_chain(prompt, llm_getter, parser: BaseOutputParser[T], params: Dic
                             if hasattr(parser, "parse"):
                                 result = parser.parse(json.dumps(retry_extracted_json))
                                 logger.info(f"Successfully parsed retry response with JSON extraction")
+                                await remember(retry_response)
                                 return result
                         except Exception as retry_parse_error:
                             logger.warning(f"Retry response JSON extraction failed: {str(retry_parse_error)}")
@@ -235,6 +337,7 @@ async def run_chain(prompt, llm_getter, parser: BaseOutputParser[T], params: Dic
                 # If we still can't parse after max retries, give up
                 if parsing_retries >= max_parsing_retries:
                     logger.error(f"Failed to parse response after {parsing_retries} parsing retries")
+                    record_llm_call_event(call_site, "parse_failures")
                     raise Exception(f"Failed to parse JSON after {parsing_retries} retry attempts")
                 
                 # Increment retries and try again
@@ -249,9 +352,26 @@ async def run_chain(prompt, llm_getter, parser: BaseOutputParser[T], params: Dic
             if api_retry_start_time:
                 logger.info(f"Retrying API call (attempt {api_retries}/{max_retries})")
             
-            # Execute the chain and store raw response
-            chain = prompt | llm | StrOutputParser()
-            raw_response = await chain.ainvoke(escaped_params)
+            # Execute the chain (or take the cached response) and store raw response
+            if cached_response is not None:
+                raw_response, cached_response = cached_response, None
+                try:
+                    if is_string_parser:
+                        return raw_response
+                    return parser.parse(json.dumps(extract_json_from_markdown(raw_response)))
+                except Exception as cache_parse_error:
+                    # Entry no longer matches the parser (e.g. the schema changed); make a fresh call
+                    logger.warning(f"Discarding cached LLM response for {call_site}: {cache_parse_error}")
+                    record_llm_cache_event(call_site, "rejected")
+                    continue
+            
+            if prefetched_response:
+                # Raw text from a structured call that did not validate; parse it without a new call
+                raw_response, prefetched_response = prefetched_response, None
+            else:
+                chain = prompt | llm | StrOutputParser()
+                async with _llm_slot(llm, call_site):
+                    raw_response = await chain.ainvoke(escaped_params)
             last_raw_response = raw_response
             
             # For StrOutputParser, skip JSON parsing logic and return the raw response directly
@@ -275,6 +395,7 @@ async def run_chain(prompt, llm_getter, parser: BaseOutputParser[T], params: Dic
                 if api_retry_start_time and not is_empty:
                     logger.info(f"Successfully got content from Gemini after {api_retries} retries")
                 
+                await remember(raw_response)
                 return raw_response
             
             # For other parsers, try to extract JSON first
@@ -313,6 +434,8 @@ async def run_chain(prompt, llm_getter, parser: BaseOutputParser[T], params: Dic
                     if api_retry_start_time and not is_empty:
                         logger.info(f"Successfully got content from Gemini after {api_retries} retries")
                     
+                    if not is_empty:
+                        await remember(raw_response)
                     return result
                     
                 except Exception as parse_error:
@@ -326,6 +449,7 @@ async def run_chain(prompt, llm_getter, parser: BaseOutputParser[T], params: Dic
                         continue
                     else:
                         logger.error(f"Failed to parse extracted JSON after {parsing_retries} attempts")
+                        record_llm_call_event(call_site, "parse_failures")
                         raise parse_error
             else:
                 # No JSON could be extracted
@@ -338,6 +462,7 @@ async def run_chain(prompt, llm_getter, parser: BaseOutputParser[T], params: Dic
                     continue
                 else:
                     logger.error(f"Could not extract valid JSON from response after {parsing_retries} attempts")
+                    record_llm_call_event(call_site, "parse_failures")
                     raise Exception(f"No valid JSON found in response: {raw_response[:200]}...")
             
         except Exception as e:
@@ -369,15 +494,10 @@ async def run_chain(prompt, llm_getter, parser: BaseOutputParser[T], params: Dic
                 continue
             
             # Handle API call errors, including rate limits
-            is_rate_limit_error = (
-                "429" in error_str or
-                "RESOURCE_EXHAUSTED" in error_str or
-                "quota" in error_str.lower()
-            )
             if is_gemini and api_retries < max_retries and (
                 "api" in error_str.lower() or
                 "400" in error_str or
-                is_rate_limit_error
+                is_rate_limit_error(e)
             ):
                 if not api_retry_start_time:
                     api_retry_start_time = time.time()
@@ -16,6 +16,7 @@ from backend.prompts.learning_path_prompts import (
     INITIAL_FLOW_PROMPT, REGENERATE_SEARCH_QUERY_PROMPT, TOPIC_RESOURCE_SEARCH_PROMPT, REGENERATE_RESOURCE_QUERY_PROMPT, CURIOSITY_TIPS_PROMPT, ENGAGEMENT_QUESTIONS_PROMPT
 )
 from backend.core.graph_nodes.research_evaluation import format_search_results_for_evaluation
+from backend.core.blob_store import preload_contents
 
 logger = logging.getLogger("learning_path.initial_flow")
 
@@ -636,8 +637,9 @@ async def create_learning_path(state: LearningPathState) -> Dict[str, Any]:
                 url = res.url # URLs are usually safe
                 context_parts.append(f"### Result from: {url} (Title: {title})")
 
-                if res.scraped_content:
-                    content = escape_curly_braces(res.scraped_content)
+                scraped_content = await res.aget_content()
+                if scraped_content:
+                    content = escape_curly_braces(scraped_content)
                     truncated_content = content[:MAX_CHARS_PER_SCRAPED_RESULT_CONTEXT]
                     if len(content) > MAX_CHARS_PER_SCRAPED_RESULT_CONTEXT:
                         truncated_content += "... (truncated)"
@@ -1049,10 +1051,11 @@ async def synthesize_initial_flow_from_search(
         else:
             # For traditional search, include scraped content
             for j, scraped_result in enumerate(result.results[:3], 1):  # Limit to top 3 per query
-                if scraped_result.scraped_content:
+                scraped_content = await scraped_result.aget_content()
+                if scraped_content:
                     search_context += f"\nSource {j}: {scraped_result.title or 'No title'}\n"
                     search_context += f"URL: {scraped_result.url}\n"
-                    search_context += f"Content: {scraped_result.scraped_content[:1000]}...\n"
+                    search_context += f"Content: {scraped_content[:1000]}...\n"
                     total_sources += 1
     
     # Build synthesis prompt
@@ -1253,6 +1256,7 @@ async def _generate_curiosity_items_parallel(state: LearningPathState, search_se
     """
     try:
         # Build concise research summary context (reusing evaluation formatter)
+        await preload_contents(search_service_results)
         summary = format_search_results_for_evaluation(search_service_results)
         # Cap overall summary length to keep prompt efficient
         max_chars = int(os.environ.get("CURIOSITY_CONTEXT_MAX_CHARS", 30000))
@@ -1336,6 +1340,7 @@ async def _generate_engagement_questions_parallel(state: LearningPathState, sear
     """
     try:
         # Build concise research summary context (reusing evaluation formatter)
+        await preload_contents(search_service_results)
         summary = format_search_results_for_evaluation(search_service_results)
         # Cap overall summary length to keep prompt efficient
         max_chars = int(os.environ.get("CURIOSITY_CONTEXT_MAX_CHARS", 30000))
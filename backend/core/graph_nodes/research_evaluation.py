@@ -20,6 +20,8 @@ from backend.models.models import (
 )
 from backend.parsers.parsers import research_evaluation_parser, refinement_query_parser
 from backend.services.services import get_llm, get_llm_for_evaluation, execute_search_with_router
+from backend.services.near_duplicates import collapse_near_duplicates
+from backend.core.blob_store import preload_contents
 from langchain_core.prompts import ChatPromptTemplate
 from backend.core.graph_nodes.helpers import run_chain, escape_curly_braces, MAX_CHARS_PER_SCRAPED_RESULT_CONTEXT
 from backend.core.graph_nodes.search_utils import execute_search_with_llm_retry
@@ -394,6 +396,7 @@ async def analyze_research_completeness(state: LearningPathState) -> ResearchEva
     """
     # Prepare context from search results
     search_results = state.get('search_results', [])
+    await preload_contents(search_results)
     search_context = format_search_results_for_evaluation(search_results)
     
     # Get language settings
@@ -545,6 +548,8 @@ def format_search_results_for_evaluation(search_results: List[SearchServiceResul
     if not search_results:
         return "No search results available for evaluation."
     
+    # Mirrored / syndicated copies of the same page add nothing for the evaluator
+    search_results = collapse_near_duplicates(search_results)
     context_parts = []
     
     for i, result in enumerate(search_results, 1):
@@ -570,8 +575,9 @@ def format_search_results_for_evaluation(search_results: List[SearchServiceResul
             context_parts.append(f"### Result {results_included + 1}: {title}")
             context_parts.append(f"**URL**: {url}")
             
-            if res.scraped_content:
-                content = escape_curly_braces(res.scraped_content)
+            scraped_content = res.get_content()
+            if scraped_content:
+                content = escape_curly_braces(scraped_content)
                 # Use a reasonable limit for evaluation context
                 truncated_content = content[:MAX_CHARS_PER_SCRAPED_RESULT_CONTEXT]  # Use constant
                 if len(content) > MAX_CHARS_PER_SCRAPED_RESULT_CONTEXT:
@@ -0,0 +1,162 @@
+"""
+Graph nodes that reuse cached research for topics generated before.
+
+``lookup_research_cache`` is the entry node of the research flow. On a fresh
+hit it loads the cached queries, results and evaluation into the state and
+``route_after_research_cache`` continues at ``create_learning_path``; a stale
+hit continues at ``generate_refinement_queries`` for one incremental pass; a
+miss runs the normal research flow. ``store_research_cache`` runs once the
+research loop is done and stores the research set if it was judged sufficient.
+"""
+
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from backend.models.models import LearningPathState
+from backend.services.services import SearchServiceRouter
+from backend.services.research_cache import (
+    RESEARCH_CACHE_REFRESH_HOURS,
+    RESEARCH_CACHE_TTL_HOURS,
+    build_research_entry,
+    entry_age_hours,
+    get_research_cache,
+    load_research_entry,
+    record_research_cache_event,
+    research_cache_key,
+)
+from backend.core.blob_store import externalize_search_result, preload_contents
+
+logger = logging.getLogger("learning_path.research_reuse")
+
+
+async def lookup_research_cache(state: LearningPathState) -> Dict[str, Any]:
+    """
+    Look up research for the topic in the cross-user research cache.
+
+    Returns:
+        Dictionary with the cache status and, on a hit, the cached research set
+        and evaluation (set up for one refinement pass when the entry is stale)
+    """
+    started_at = time.time()
+    cache = get_research_cache()
+    if cache is None:
+        return {"research_cache": {"status": "disabled", "started_at": started_at}}
+
+    key = research_cache_key(
+        state["user_topic"],
+        state.get("language"),
+        state.get("search_language"),
+        SearchServiceRouter.get_search_service_type(state.get("user")),
+    )
+    miss = {"research_cache": {"status": "miss", "key": key, "started_at": started_at}}
+    entry = await cache.get(key)
+    if not entry:
+        record_research_cache_event("misses")
+        return miss
+    try:
+        research = load_research_entry(entry)
+    except Exception as e:
+        logger.warning(f"Discarding unreadable research cache entry for '{state['user_topic']}': {e}")
+        record_research_cache_event("errors")
+        record_research_cache_event("misses")
+        return miss
+    if not research["search_results"]:
+        record_research_cache_event("misses")
+        return miss
+
+    age_hours = entry_age_hours(entry)
+    stale = age_hours >= RESEARCH_CACHE_REFRESH_HOURS
+    max_loops = state.get("max_research_loops") or 3
+    knowledge_gaps = list(entry.get("research_knowledge_gaps") or [])
+    if stale and not knowledge_gaps:
+        stored_on = datetime.fromtimestamp(entry["stored_at"], timezone.utc).strftime("%Y-%m-%d")
+        knowledge_gaps = [f"Recent developments and updated sources on {state['user_topic']} since {stored_on}"]
+    search_results = [await externalize_search_result(result) for result in research["search_results"]]
+
+    if stale:
+        record_research_cache_event("stale_hits")
+        status_message = f"Reusing research on '{state['user_topic']}' from {age_hours:.0f}h ago with one refinement pass"
+    else:
+        record_research_cache_event("hits", time_saved_seconds=entry.get("research_seconds", 0.0) - (time.time() - started_at))
+        status_message = f"Reusing research on '{state['user_topic']}' from {age_hours:.1f}h ago"
+    logger.info(f"{status_message} ({len(search_results)} searches)")
+
+    progress_callback = state.get("progress_callback")
+    if progress_callback:
+        await progress_callback(
+            status_message,
+            phase="search_queries",
+            phase_progress=1.0,
+            overall_progress=0.38 if not stale else 0.25,
+            preview_data={
+                "type": "search_queries_generated",
+                "data": {"queries": [query.keywords for query in research["search_queries"]]},
+            },
+            action="completed",
+        )
+
+    return {
+        "search_queries": research["search_queries"],
+        "search_results": search_results,
+        # A stale entry gets exactly one more evaluation after its refinement searches
+        "research_loop_count": max_loops - 1 if stale else 1,
+        "max_research_loops": max_loops,
+        "is_research_sufficient": not stale,
+        "research_knowledge_gaps": knowledge_gaps,
+        "research_confidence_score": entry.get("research_confidence_score", 0.0),
+        "refinement_queries": [],
+        "research_cache": {
+            "status": "stale" if stale else "hit",
+            "key": key,
+            "started_at": started_at,
+            "age_hours": round(age_hours, 2),
+            "cached_research_seconds": entry.get("research_seconds", 0.0),
+        },
+        "steps": [f"{status_message} ({len(search_results)} searches)"],
+    }
+
+
+def route_after_research_cache(state: LearningPathState) -> str:
+    """Next node after the cache lookup: course creation, one refinement pass, or full research."""
+    status = (state.get("research_cache") or {}).get("status")
+    if status == "hit":
+        return "create_learning_path"
+    if status == "stale":
+        return "generate_refinement_queries"
+    return "generate_search_queries"
+
+
+async def store_research_cache(state: LearningPathState) -> Dict[str, Any]:
+    """
+    Store the finished research set if it was judged sufficient.
+
+    Runs after the research loop (never after a fresh hit). A refreshed stale entry is
+    stored again with its original research time, which is what a later hit saves.
+    """
+    info = state.get("research_cache") or {}
+    cache = get_research_cache()
+    if cache is None or not info.get("key"):
+        return {}
+
+    elapsed = time.time() - info.get("started_at", time.time())
+    if info.get("status") == "stale":
+        research_seconds = info.get("cached_research_seconds", 0.0)
+        record_research_cache_event("refreshes", time_saved_seconds=research_seconds - elapsed)
+    else:
+        research_seconds = elapsed
+
+    if not state.get("is_research_sufficient"):
+        logger.info(f"Research on '{state['user_topic']}' not sufficient; not caching it")
+        return {}
+    try:
+        await preload_contents(state.get("search_results") or [])
+        entry = build_research_entry(state, research_seconds)
+    except Exception as e:
+        logger.warning(f"Could not build research cache entry for '{state['user_topic']}': {e}")
+        record_research_cache_event("errors")
+        return {}
+    await cache.set(info["key"], entry, ttl_seconds=int(RESEARCH_CACHE_TTL_HOURS * 3600))
+    record_research_cache_event("stores")
+    return {"steps": [f"Cached research on '{state['user_topic']}' ({len(entry['search_results'])} searches)"]}
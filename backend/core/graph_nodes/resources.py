@@ -23,6 +23,8 @@ from backend.models.models import (
 )
 from backend.parsers.parsers import resource_selection_parser, resource_query_parser
 from backend.services.services import get_llm, execute_search_with_router
+from backend.services.near_duplicates import collapse_near_duplicates
+from backend.core.blob_store import preload_contents
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
@@ -175,8 +177,9 @@ async def generate_topic_resources(state: LearningPathState) -> Dict[str, Any]:
              source_table_lines.append(f"{idx}. {title} - {url}")
              if results_included_llm < max_context_per_query_llm:
                  scraped_context_parts.append(f"### Source {idx}: {url} (Title: {title})")
-                 if res.scraped_content:
-                     content = escape_curly_braces(res.scraped_content)
+                 scraped_content = await res.aget_content()
+                 if scraped_content:
+                     content = escape_curly_braces(scraped_content)
                      truncated_content = content[:MAX_CHARS_PER_SCRAPED_RESULT_CONTEXT]
                      if len(content) > MAX_CHARS_PER_SCRAPED_RESULT_CONTEXT:
                           truncated_content += "... (truncated)"
@@ -406,8 +409,9 @@ async def generate_module_resources(state: LearningPathState, module_id: int, mo
              source_table_lines.append(f"{idx}. {title} - {url}")
              if results_included_llm < max_context_per_query_llm:
                  scraped_context_parts.append(f"### Source {idx}: {url} (Title: {title})")
-                 if res.scraped_content:
-                     content = escape_curly_braces(res.scraped_content)
+                 scraped_content = await res.aget_content()
+                 if scraped_content:
+                     content = escape_curly_braces(scraped_content)
                      truncated_content = content[:MAX_CHARS_PER_SCRAPED_RESULT_CONTEXT]
                      if len(content) > MAX_CHARS_PER_SCRAPED_RESULT_CONTEXT:
                           truncated_content += "... (truncated)"
@@ -659,7 +663,9 @@ async def integrate_resources_with_submodule_processing(
                 action="processing"
             )
 
-        # Prepare context from the existing search results and build source table
+        # Prepare context from the existing search results (near-duplicate pages collapsed) and build source table
+        await preload_contents(submodule_search_results)
+        submodule_search_results = collapse_near_duplicates(submodule_search_results)
         scraped_context_parts = []
         source_table_lines: List[str] = []
         id_to_result: Dict[int, ScrapedResult] = {}
@@ -678,8 +684,9 @@ async def integrate_resources_with_submodule_processing(
                 source_table_lines.append(f"{current_id}. {title} - {url}")
                 scraped_context_parts.append(f"### Source {current_id}: {url} (Title: {title})")
 
-                if res.scraped_content:
-                    content = escape_curly_braces(res.scraped_content)
+                scraped_content = await res.aget_content()
+                if scraped_content:
+                    content = escape_curly_braces(scraped_content)
                     truncated_content = content[:MAX_CHARS_PER_SCRAPED_RESULT_CONTEXT]
                     if len(content) > MAX_CHARS_PER_SCRAPED_RESULT_CONTEXT:
                         truncated_content += "... (truncated)"
@@ -20,6 +20,9 @@ from backend.core.submodules.pipeline import (
     check_submodule_batch_processing,
 )
 
+# Pipelined planning + development (pipelined graph variant)
+from backend.core.submodules.pipelined import plan_and_develop_submodules
+
 # Research and search execution for submodules
 from backend.core.submodules.research import (
     generate_submodule_specific_queries,
@@ -75,6 +78,8 @@ __all__ = [
     "process_single_submodule",
     "finalize_enhanced_learning_path",
     "check_submodule_batch_processing",
+    # Pipelined variant
+    "plan_and_develop_submodules",
     # Research
     "generate_submodule_specific_queries",
     "execute_submodule_specific_searches",
@@ -12,6 +12,7 @@ from backend.models.models import (
     SearchServiceResult,
 )
 from backend.services.services import get_llm_with_search, get_llm_for_evaluation
+from backend.core.blob_store import preload_contents
 from backend.core.graph_nodes.helpers import run_chain, escape_curly_braces, MAX_CHARS_PER_SCRAPED_RESULT_CONTEXT
 from backend.core.submodules.context_builders import (
     build_learning_path_context,
@@ -69,7 +70,8 @@ async def develop_submodule_specific_content(
     module_context = build_module_context(module, sub_id)
     adjacent_context = build_adjacent_context(module, sub_id)
 
-    search_results_context = build_enhanced_search_context(sub_search_results)
+    await preload_contents(sub_search_results)
+    search_results_context = build_enhanced_search_context(sub_search_results, focus=submodule)
 
     from backend.prompts.learning_path_prompts import (
         ENHANCED_SUBMODULE_CONTENT_DEVELOPMENT_PROMPT,
@@ -1,7 +1,13 @@
-from typing import List
+from typing import Any, List, Optional
 import logging
 from backend.models.models import LearningPathState, EnhancedModule, SearchServiceResult
 from backend.core.graph_nodes.helpers import escape_curly_braces, MAX_CHARS_PER_SCRAPED_RESULT_CONTEXT
+from backend.services.near_duplicates import collapse_near_duplicates
+from backend.core.submodules.context_packer import (
+    CONTEXT_PACKING_ENABLED,
+    CONTEXT_PACK_TOKEN_BUDGET,
+    pack_search_results,
+)
 
 
 def build_learning_path_context(state: LearningPathState, current_module_id: int) -> str:
@@ -132,11 +138,74 @@ def build_adjacent_context(module: EnhancedModule, current_sub_id: int) -> str:
         return f"Error building adjacent context: {str(e)}"
 
 
-def build_enhanced_search_context(search_results: List[SearchServiceResult]) -> str:
+def _build_packed_search_context(search_results: List[SearchServiceResult], focus: Any, token_budget: int) -> str:
+    packed = pack_search_results(search_results, focus=focus, token_budget=token_budget)
+
+    context_parts = []
+    total_sources = 0
+    for group in packed.groups:
+        query = escape_curly_braces(group.query)
+        context_parts.append(f"\n## Research Query: \"{query}\"")
+        context_parts.append(f"*This search aimed to gather information relevant to the submodule development.*")
+        context_parts.append("")
+
+        shown = 0
+        for source in group.sources:
+            if not source.passages:
+                continue
+            shown += 1
+            total_sources += 1
+            context_parts.append(f"### Source {shown}: {escape_curly_braces(source.title)}")
+            context_parts.append(f"**URL**: {source.url}")
+            if source.from_snippet:
+                error_info = ""
+                if source.scrape_error:
+                    error_info = f" *(Note: Full content scraping failed - {escape_curly_braces(source.scrape_error)})*"
+                context_parts.append(f"**Search Snippet**:{error_info}")
+            else:
+                context_parts.append(f"**Most Relevant Excerpts**:")
+            context_parts.append("\n\n[...]\n\n".join(escape_curly_braces(p) for p in source.passages))
+            context_parts.append("")
+
+        if shown == 0:
+            context_parts.append("*No usable content was found for this research query.*")
+        else:
+            context_parts.append(f"*Found {shown} relevant sources for this query.*")
+        context_parts.append("")
+
+    summary_header = [
+        f"# COMPREHENSIVE RESEARCH MATERIALS",
+        f"*The following {total_sources} sources provide research context and information to enhance submodule content development. "
+        f"Only the passages most relevant to this topic are included.*",
+        ""
+    ]
+
+    return "\n".join(summary_header + context_parts)
+
+
+def build_enhanced_search_context(
+    search_results: List[SearchServiceResult],
+    focus: Optional[Any] = None,
+    token_budget: Optional[int] = None,
+) -> str:
+    """
+    Render research results for a prompt.
+
+    With a ``focus`` (the submodule or module the prompt is about) and context packing
+    enabled, only the passages most relevant to it are kept, within ``token_budget``
+    (default CONTEXT_PACK_TOKEN_BUDGET). Without one, every source is included up to the
+    per-source character limit.
+    """
     try:
         if not search_results:
             return "No research materials available for this submodule."
 
+        # Keep only the best-ranked copy of mirrored or syndicated pages
+        search_results = collapse_near_duplicates(search_results)
+
+        if CONTEXT_PACKING_ENABLED and focus is not None:
+            return _build_packed_search_context(search_results, focus, token_budget or CONTEXT_PACK_TOKEN_BUDGET)
+
         context_parts = []
         total_sources = 0
         max_results_per_query = 4
@@ -156,7 +225,8 @@ def build_enhanced_search_context(search_results: List[SearchServiceResult]) ->
                 if valid_results >= max_results_per_query:
                     break
 
-                has_content = bool(result_item.scraped_content or result_item.search_snippet)
+                scraped_content = result_item.get_content()
+                has_content = bool(scraped_content or result_item.search_snippet)
                 if not has_content:
                     continue
 
@@ -169,8 +239,8 @@ def build_enhanced_search_context(search_results: List[SearchServiceResult]) ->
                 context_parts.append(f"### Source {valid_results}: {title}")
                 context_parts.append(f"**URL**: {url}")
 
-                if result_item.scraped_content:
-                    content = escape_curly_braces(result_item.scraped_content)
+                if scraped_content:
+                    content = escape_curly_braces(scraped_content)
                     truncated_content = content[:MAX_CHARS_PER_SCRAPED_RESULT_CONTEXT * 2]
                     if len(content) > MAX_CHARS_PER_SCRAPED_RESULT_CONTEXT * 2:
                         truncated_content += "\n\n*(Content truncated for brevity)*"
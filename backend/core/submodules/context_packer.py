@@ -0,0 +1,301 @@
+"""
+Token-budgeted packing of scraped research into prompt context.
+
+``build_enhanced_search_context`` used to paste up to 200,000 characters per
+source into prompts. The packer instead splits every source into passages,
+ranks them against what the prompt is about (submodule title, description, key
+components, ...) with BM25, drops duplicates, and keeps the best passages
+across all sources until a token budget is full.
+
+Provides:
+- split_passages: paragraph-aligned passages of roughly equal size
+- BM25: Okapi BM25 scorer over a fixed passage collection
+- focus_terms: weighted query terms for a module or submodule
+- pack_search_results: selected passages per query/source plus token accounting
+- context_packing_stats: process-wide totals of tokens offered and kept
+"""
+from __future__ import annotations
+
+import os
+import re
+import math
+import hashlib
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("learning_path.context_packer")
+
+# Configuration
+CONTEXT_PACKING_ENABLED = os.environ.get("CONTEXT_PACKING_ENABLED", "true").lower() == "true"
+# Token budget for the research section of a prompt
+CONTEXT_PACK_TOKEN_BUDGET = int(os.environ.get("CONTEXT_PACK_TOKEN_BUDGET", "24000"))
+# Target passage size; paragraphs are merged or split to get close to it
+CONTEXT_PACK_PASSAGE_CHARS = int(os.environ.get("CONTEXT_PACK_PASSAGE_CHARS", "1200"))
+# Rough characters per token used for budgeting (no tokenizer call per passage)
+CONTEXT_PACK_CHARS_PER_TOKEN = float(os.environ.get("CONTEXT_PACK_CHARS_PER_TOKEN", "4"))
+# Passages sharing this fraction of their terms with an already selected passage are dropped
+CONTEXT_PACK_DUPLICATE_OVERLAP = float(os.environ.get("CONTEXT_PACK_DUPLICATE_OVERLAP", "0.8"))
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    return int(math.ceil(len(text) / CONTEXT_PACK_CHARS_PER_TOKEN)) if text else 0
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word terms; single characters and digits-only terms are ignored."""
+    return [t for t in _TERM_RE.findall(text.lower()) if len(t) > 1 and not t.isdigit()]
+
+
+def split_passages(text: str, target_chars: int = CONTEXT_PACK_PASSAGE_CHARS) -> List[str]:
+    """
+    Split ``text`` into passages of about ``target_chars``.
+
+    Short paragraphs are merged; paragraphs longer than twice the target are split
+    at sentence boundaries (or hard-cut when a sentence alone is too long).
+    """
+    passages: List[str] = []
+    current: List[str] = []
+    current_len = 0
+
+    def flush():
+        nonlocal current, current_len
+        if current:
+            passages.append("\n\n".join(current))
+        current, current_len = [], 0
+
+    for paragraph in _PARAGRAPH_RE.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) > target_chars * 2:
+            flush()
+            piece = ""
+            for sentence in _SENTENCE_RE.split(paragraph):
+                while len(sentence) > target_chars * 2:
+                    if piece:
+                        passages.append(piece)
+                        piece = ""
+                    passages.append(sentence[:target_chars])
+                    sentence = sentence[target_chars:]
+                if piece and len(piece) + len(sentence) + 1 > target_chars:
+                    passages.append(piece)
+                    piece = ""
+                piece = f"{piece} {sentence}" if piece else sentence
+            if piece:
+                passages.append(piece)
+            continue
+        if current and current_len + len(paragraph) > target_chars:
+            flush()
+        current.append(paragraph)
+        current_len += len(paragraph)
+    flush()
+    return passages
+
+
+class BM25:
+    """Okapi BM25 over a fixed collection of tokenized passages."""
+
+    def __init__(self, documents: Sequence[Sequence[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(doc) for doc in documents]
+        self.lengths = [len(doc) for doc in documents]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if documents else 0.0
+        doc_freq: Counter = Counter()
+        for freqs in self.term_freqs:
+            doc_freq.update(freqs.keys())
+        n = len(documents)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    def score(self, index: int, query: Dict[str, float]) -> float:
+        freqs = self.term_freqs[index]
+        norm = self.k1 * (1 - self.b + self.b * self.lengths[index] / (self.avg_length or 1.0))
+        total = 0.0
+        for term, weight in query.items():
+            tf = freqs.get(term)
+            if tf:
+                total += weight * self.idf.get(term, 0.0) * tf * (self.k1 + 1) / (tf + norm)
+        return total
+
+
+def focus_terms(focus: Any, extra: Iterable[str] = ()) -> Dict[str, float]:
+    """
+    Weighted query terms describing what the prompt is about.
+
+    Title and key components count double; description, core concept, learning
+    objective and ``extra`` text (e.g. the search queries) count once.
+    """
+    weights: Counter = Counter()
+    weighted_fields = (("title", 2.0), ("key_components", 2.0), ("description", 1.0),
+                       ("core_concept", 1.0), ("learning_objective", 1.0))
+    for name, weight in weighted_fields:
+        value = getattr(focus, name, None) if focus is not None else None
+        if not value:
+            continue
+        text = " ".join(value) if isinstance(value, (list, tuple)) else str(value)
+        for term in set(tokenize(text)):
+            weights[term] += weight
+    for text in extra:
+        for term in set(tokenize(text or "")):
+            weights[term] += 0.5
+    return dict(weights)
+
+
+@dataclass
+class Passage:
+    group: int
+    source: int
+    order: int
+    text: str
+    terms: List[str]
+    tokens: int
+    score: float = 0.0
+
+
+@dataclass
+class PackedSource:
+    title: str
+    url: str
+    passages: List[str] = field(default_factory=list)
+    from_snippet: bool = False
+    scrape_error: Optional[str] = None
+
+
+@dataclass
+class PackedGroup:
+    query: str
+    sources: List[PackedSource] = field(default_factory=list)
+
+
+@dataclass
+class PackedContext:
+    groups: List[PackedGroup]
+    tokens_available: int
+    tokens_used: int
+    passages_total: int
+    passages_selected: int
+    duplicates_dropped: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.tokens_available - self.tokens_used)
+
+
+_stats = {"packs": 0, "tokens_available": 0, "tokens_used": 0, "duplicates_dropped": 0}
+_stats_lock = threading.Lock()
+
+
+def context_packing_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["tokens_saved"] = stats["tokens_available"] - stats["tokens_used"]
+    stats["enabled"] = CONTEXT_PACKING_ENABLED
+    stats["token_budget"] = CONTEXT_PACK_TOKEN_BUDGET
+    return stats
+
+
+def _is_duplicate(terms: List[str], fingerprint: str, seen_fingerprints: set, selected_sets: List[set]) -> bool:
+    if fingerprint in seen_fingerprints:
+        return True
+    term_set = set(terms)
+    if not term_set:
+        return True
+    for other in selected_sets:
+        if len(term_set & other) / min(len(term_set), len(other)) >= CONTEXT_PACK_DUPLICATE_OVERLAP:
+            return True
+    return False
+
+
+def pack_search_results(
+    search_results: Sequence[Any],
+    focus: Any = None,
+    token_budget: int = CONTEXT_PACK_TOKEN_BUDGET,
+    max_results_per_query: int = 4,
+) -> PackedContext:
+    """
+    Select the most relevant passages from ``search_results`` within ``token_budget``.
+
+    Sources are taken as in the unpacked context (successful queries, up to
+    ``max_results_per_query`` results with content). Passages are ranked across
+    all sources, near-duplicates are dropped, and the selection is returned
+    grouped by query and source in document order.
+    """
+    groups: List[PackedGroup] = []
+    passages: List[Passage] = []
+    queries: List[str] = []
+    for result_group in search_results:
+        if getattr(result_group, "search_provider_error", None):
+            continue
+        group = PackedGroup(query=result_group.query)
+        queries.append(result_group.query)
+        for item in result_group.results:
+            if len(group.sources) >= max_results_per_query:
+                break
+            scraped_content = item.get_content()
+            text = scraped_content or item.search_snippet
+            if not text:
+                continue
+            source = PackedSource(
+                title=item.title or "Untitled Source",
+                url=item.url or "No URL",
+                from_snippet=not scraped_content,
+                scrape_error=item.scrape_error,
+            )
+            for order, passage in enumerate(split_passages(text)):
+                passages.append(Passage(len(groups), len(group.sources), order, passage, tokenize(passage), estimate_tokens(passage)))
+            group.sources.append(source)
+        groups.append(group)
+
+    tokens_available = sum(p.tokens for p in passages)
+    if passages:
+        index = BM25([p.terms for p in passages])
+        query = focus_terms(focus, queries)
+        for i, passage in enumerate(passages):
+            passage.score = index.score(i, query)
+
+    selected: List[Passage] = []
+    seen_fingerprints: set = set()
+    selected_sets: List[set] = []
+    used = 0
+    duplicates = 0
+    # Highest score first; earlier passages win ties (introductions tend to define terms)
+    for passage in sorted(passages, key=lambda p: (-p.score, p.order)):
+        if used + passage.tokens > token_budget:
+            continue
+        fingerprint = hashlib.sha1(" ".join(passage.terms).encode("utf-8")).hexdigest()
+        if _is_duplicate(passage.terms, fingerprint, seen_fingerprints, selected_sets):
+            duplicates += 1
+            continue
+        seen_fingerprints.add(fingerprint)
+        selected_sets.append(set(passage.terms))
+        selected.append(passage)
+        used += passage.tokens
+
+    for passage in sorted(selected, key=lambda p: (p.group, p.source, p.order)):
+        groups[passage.group].sources[passage.source].passages.append(passage.text)
+
+    packed = PackedContext(
+        groups=groups,
+        tokens_available=tokens_available,
+        tokens_used=used,
+        passages_total=len(passages),
+        passages_selected=len(selected),
+        duplicates_dropped=duplicates,
+    )
+    with _stats_lock:
+        _stats["packs"] += 1
+        _stats["tokens_available"] += tokens_available
+        _stats["tokens_used"] += used
+        _stats["duplicates_dropped"] += duplicates
+    logger.info(
+        f"Packed research context: {packed.passages_selected}/{packed.passages_total} passages, "
+        f"~{used} of ~{tokens_available} tokens (saved ~{packed.tokens_saved}, {duplicates} duplicates dropped)"
+    )
+    return packed
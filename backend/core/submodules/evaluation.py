@@ -4,6 +4,7 @@ from typing import Any, List
 from langchain_core.prompts import ChatPromptTemplate
 
 from backend.models.models import LearningPathState, EnhancedModule, Submodule, SearchServiceResult, SearchQuery
+from backend.core.blob_store import preload_contents
 from backend.services.services import get_llm_for_evaluation
 from backend.core.graph_nodes.helpers import run_chain, escape_curly_braces
 from backend.prompts.learning_path_prompts import CONTENT_EVALUATION_PROMPT, SUBMODULE_RESEARCH_EVALUATION_PROMPT, CONTENT_REFINEMENT_QUERY_GENERATION_PROMPT
@@ -122,7 +123,8 @@ async def evaluate_submodule_research_sufficiency(
 
     from backend.core.submodules.context_builders import build_enhanced_search_context
 
-    search_summary = build_enhanced_search_context(search_results)
+    await preload_contents(search_results)
+    search_summary = build_enhanced_search_context(search_results, focus=submodule)
     output_language = get_full_language_name(state.get("language", "en"))
 
     prompt = ChatPromptTemplate.from_template(SUBMODULE_RESEARCH_EVALUATION_PROMPT)
@@ -299,7 +301,8 @@ async def evaluate_module_planning_sufficiency(
     # Reuse the same summary builder as submodule eval for consistency
     from backend.core.submodules.context_builders import build_enhanced_search_context
 
-    search_summary = build_enhanced_search_context(planning_search_results)
+    await preload_contents(planning_search_results)
+    search_summary = build_enhanced_search_context(planning_search_results, focus=module)
     output_language = get_full_language_name(state.get("language", "en"))
 
     prompt = ChatPromptTemplate.from_template(MODULE_PLANNING_RESEARCH_EVALUATION_PROMPT)
@@ -11,6 +11,7 @@ from backend.models.models import (
     SearchServiceResult,
 )
 from backend.core.graph_nodes.helpers import batch_items, escape_curly_braces, MAX_CHARS_PER_SCRAPED_RESULT_CONTEXT
+from backend.core.blob_store import aresolve_content
 from backend.core.submodules.research import (
     generate_submodule_specific_queries,
     execute_submodule_specific_searches,
@@ -19,6 +20,19 @@ from backend.core.submodules.content import develop_submodule_specific_content
 from backend.core.submodules.quiz import generate_submodule_quiz
 from backend.core.submodules.refinement import gather_research_until_sufficient
 
+# "streaming": a pool of submodule_parallel_count workers takes the next submodule as soon as a slot frees;
+# "batch": fixed batches of submodule_parallel_count submodules run in lockstep, one graph step per batch
+SUBMODULE_SCHEDULER = os.environ.get("SUBMODULE_SCHEDULER", "streaming").lower()
+
+# Scope of the per-submodule progress records the streaming pool keeps while its graph step runs
+_PROGRESS_SCOPE = "submodules"
+
+
+def submodule_priority(module_id: int, sub_id: int, total_submodules: int) -> tuple:
+    """Processing order of a submodule: the first submodules of every module go first, spreading work across modules."""
+    relative_position = sub_id / max(1, total_submodules)
+    return (relative_position, module_id)
+
 
 async def initialize_submodule_processing(state: LearningPathState) -> Dict[str, Any]:
     logging.info(
@@ -82,9 +96,7 @@ async def initialize_submodule_processing(state: LearningPathState) -> Dict[str,
         }
 
     def distribution_key(item):
-        relative_position = item["sub_id"] / max(1, item["total_submodules"])
-        module_id = item["module_id"]
-        return (relative_position, module_id)
+        return submodule_priority(item["module_id"], item["sub_id"], item["total_submodules"])
 
     all_submodules.sort(key=distribution_key)
 
@@ -124,8 +136,12 @@ async def initialize_submodule_processing(state: LearningPathState) -> Dict[str,
         quiz_info = (
             "with quiz generation enabled" if quiz_generation_enabled else "without quiz generation"
         )
+        if SUBMODULE_SCHEDULER == "streaming":
+            plan_message = f"Preparing to process {total_submodules} submodules with up to {submodule_parallel_count} in parallel ({quiz_info})"
+        else:
+            plan_message = f"Preparing to process {total_submodules} submodules in {total_batches} batches with {submodule_parallel_count} submodules in parallel ({quiz_info})"
         await progress_callback(
-            f"Preparing to process {total_submodules} submodules in {total_batches} batches with {submodule_parallel_count} submodules in parallel ({quiz_info})",
+            plan_message,
             phase="submodule_research",
             phase_progress=0.1,
             overall_progress=0.6,
@@ -444,11 +460,182 @@ async def process_single_submodule(
         return {"status": "error", "module_id": module_id, "sub_id": sub_id, "error": str(e)}
 
 
+def build_developed_submodule(
+    enhanced_modules: List[EnhancedModule],
+    module_id: int,
+    sub_id: int,
+    submodules_in_process: Dict[str, Any],
+) -> Any:
+    """SubmoduleContent for a completed submodule, or None if it did not complete."""
+    data = submodules_in_process.get(f"{module_id}:{sub_id}", {})
+    if data.get("status") != "completed" or module_id >= len(enhanced_modules):
+        return None
+    module = enhanced_modules[module_id]
+    if sub_id >= len(module.submodules):
+        return None
+
+    search_results_raw = data.get("search_results", [])
+    search_results_dicts: List[Dict[str, Any]] = []
+    if isinstance(search_results_raw, list):
+        for res in search_results_raw:
+            if hasattr(res, "model_dump"):
+                search_results_dicts.append(res.model_dump())
+            elif isinstance(res, dict):
+                search_results_dicts.append(res)
+    elif search_results_raw:
+        if hasattr(search_results_raw, "model_dump"):
+            search_results_dicts.append(search_results_raw.model_dump())
+        elif isinstance(search_results_raw, dict):
+            search_results_dicts.append(search_results_raw)
+
+    return SubmoduleContent(
+        module_id=module_id,
+        submodule_id=sub_id,
+        title=module.submodules[sub_id].title,
+        description=module.submodules[sub_id].description,
+        search_queries=data.get("search_queries", []),
+        search_results=search_results_dicts,
+        content=data.get("content", ""),
+        quiz_questions=data.get("quiz_questions", None),
+        resources=data.get("resources", []),
+    )
+
+
+async def _process_submodules_streaming(state: LearningPathState) -> Dict[str, Any]:
+    """
+    Process every remaining submodule with a bounded worker pool.
+
+    Workers take submodules in the order initialize_submodule_processing planned them
+    (distribution_key), so that order is the priority, but a slow submodule only holds
+    its own slot instead of the whole batch. The remaining batches are consumed in one
+    graph step; each result is recorded with save_progress as it finishes, so a
+    resumed generation only redoes the submodules that were still running.
+    """
+    import time
+    from backend.core.checkpointing import load_progress, save_progress
+    from backend.core.generation_context import get_generation_context
+
+    submodule_parallel_count = max(1, state.get("submodule_parallel_count", 2) or 1)
+    progress_callback = state.get("progress_callback")
+    sub_batches = state.get("submodule_batches") or []
+    current_index = state.get("current_submodule_batch_index", 0)
+    enhanced_modules = state.get("enhanced_modules", [])
+    submodules_in_process = state.get("submodules_in_process", {}) or {}
+
+    if current_index >= len(sub_batches):
+        logging.info("All submodule batches processed")
+        return {"steps": ["All submodule batches processed"]}
+    if not enhanced_modules:
+        logging.error("No enhanced modules found in state")
+        return {"steps": ["Error: No enhanced modules found"]}
+
+    context = get_generation_context()
+    thread_id = context.task_id if context is not None else None
+    restored = await load_progress(thread_id, _PROGRESS_SCOPE) if thread_id else {}
+    for key, result in restored.items():
+        if submodules_in_process.get(key, {}).get("status") not in ["completed", "error"]:
+            submodules_in_process[key] = result
+    if restored:
+        logging.info(f"Restored {len(restored)} finished submodules of an interrupted run")
+
+    queued_pairs = [pair for batch in sub_batches[current_index:] for pair in batch]
+    work = []
+    for module_id, sub_id in queued_pairs:
+        if module_id < len(enhanced_modules) and sub_id < len(enhanced_modules[module_id].submodules):
+            key = f"{module_id}:{sub_id}"
+            if submodules_in_process.get(key, {}).get("status") not in ["completed", "error"]:
+                submodules_in_process[key] = {"status": "processing"}
+                work.append((module_id, sub_id))
+
+    total = len(work)
+    workers = min(submodule_parallel_count, total)
+    logging.info(f"Processing {total} submodules with a streaming pool of {workers} workers")
+
+    counts = {"done": 0, "success": 0, "error": 0}
+    start_time = time.time()
+    pending = iter(work)
+
+    async def worker() -> None:
+        # The shared iterator hands each submodule to exactly one worker, in priority order
+        for module_id, sub_id in pending:
+            module = enhanced_modules[module_id]
+            submodule = module.submodules[sub_id]
+            try:
+                result = await process_single_submodule(state, module_id, sub_id, module, submodule)
+            except Exception as e:
+                logging.error(f"Task error: {str(e)}")
+                result = {"status": "error", "module_id": module_id, "sub_id": sub_id, "error": str(e)}
+
+            submodules_in_process[f"{module_id}:{sub_id}"] = result
+            if thread_id:
+                await save_progress(thread_id, _PROGRESS_SCOPE, f"{module_id}:{sub_id}", result)
+            counts["done"] += 1
+            if result.get("status") == "completed":
+                counts["success"] += 1
+            else:
+                counts["error"] += 1
+
+            if progress_callback:
+                fraction = counts["done"] / max(1, total)
+                await progress_callback(
+                    f"Completed {counts['done']}/{total} submodules: {counts['success']} successful, {counts['error']} failed",
+                    phase="content_development",
+                    phase_progress=fraction,
+                    overall_progress=0.7 + (fraction * 0.25),
+                    preview_data={
+                        "processed_submodules": [
+                            {
+                                "module_title": module.title,
+                                "submodule_title": submodule.title,
+                                "status": result.get("status"),
+                            }
+                        ]
+                    },
+                    action="processing",
+                )
+
+    if workers:
+        await asyncio.gather(*(worker() for _ in range(workers)))
+    elapsed_time = time.time() - start_time
+
+    logging.info(
+        f"Streaming submodule processing: {counts['success']} successful, {counts['error']} failed in {elapsed_time:.2f}s"
+    )
+
+    developed_submodules = state.get("developed_submodules", [])
+    for module_id, sub_id in queued_pairs:
+        developed = build_developed_submodule(enhanced_modules, module_id, sub_id, submodules_in_process)
+        if developed is not None:
+            developed_submodules.append(developed)
+
+    if progress_callback:
+        await progress_callback(
+            f"Completed all {total} submodules in {elapsed_time:.2f} seconds ({counts['error']} failed)",
+            phase="content_development",
+            phase_progress=1.0,
+            overall_progress=0.95,
+            action="completed",
+        )
+
+    return {
+        "current_submodule_batch_index": len(sub_batches),
+        "submodules_in_process": submodules_in_process,
+        "developed_submodules": developed_submodules,
+        "steps": [
+            f"Processed {total} submodules with a streaming pool of {workers} workers"
+        ],
+    }
+
+
 async def process_submodule_batch(state: LearningPathState) -> Dict[str, Any]:
+    if SUBMODULE_SCHEDULER == "streaming":
+        return await _process_submodules_streaming(state)
+
     submodule_parallel_count = state.get("submodule_parallel_count", 2)
     progress_callback = state.get("progress_callback")
     sub_batches = state.get("submodule_batches") or []
     current_index = state.get("current_submodule_batch_index", 0)
+    total_batches = len(sub_batches)
     batch_progress = 0
     overall_progress = 0.6
 
@@ -457,7 +644,6 @@ async def process_submodule_batch(state: LearningPathState) -> Dict[str, Any]:
     )
 
     if progress_callback:
-        total_batches = len(sub_batches)
         batch_progress = current_index / max(1, total_batches)
         overall_progress = 0.6 + (batch_progress * 0.1)
 
@@ -586,39 +772,9 @@ async def process_submodule_batch(state: LearningPathState) -> Dict[str, Any]:
     developed_submodules = state.get("developed_submodules", [])
 
     for module_id, sub_id in current_batch:
-        key = f"{module_id}:{sub_id}"
-        data = submodules_in_process.get(key, {})
-
-        if data.get("status") == "completed" and module_id < len(enhanced_modules):
-            module = enhanced_modules[module_id]
-            if sub_id < len(module.submodules):
-                search_results_raw = data.get("search_results", [])
-                search_results_dicts: List[Dict[str, Any]] = []
-                if isinstance(search_results_raw, list):
-                    for res in search_results_raw:
-                        if hasattr(res, "model_dump"):
-                            search_results_dicts.append(res.model_dump())
-                        elif isinstance(res, dict):
-                            search_results_dicts.append(res)
-                elif search_results_raw:
-                    if hasattr(search_results_raw, "model_dump"):
-                        search_results_dicts.append(search_results_raw.model_dump())
-                    elif isinstance(search_results_raw, dict):
-                        search_results_dicts.append(search_results_raw)
-
-                developed_submodules.append(
-                    SubmoduleContent(
-                        module_id=module_id,
-                        submodule_id=sub_id,
-                        title=module.submodules[sub_id].title,
-                        description=module.submodules[sub_id].description,
-                        search_queries=data.get("search_queries", []),
-                        search_results=search_results_dicts,
-                        content=data.get("content", ""),
-                        quiz_questions=data.get("quiz_questions", None),
-                        resources=data.get("resources", []),
-                    )
-                )
+        developed = build_developed_submodule(enhanced_modules, module_id, sub_id, submodules_in_process)
+        if developed is not None:
+            developed_submodules.append(developed)
 
     if progress_callback:
         processed_count = current_index + 1
@@ -724,8 +880,11 @@ async def finalize_enhanced_learning_path(state: LearningPathState) -> Dict[str,
                 research_parts: List[str] = []
                 for res in getattr(sub, "search_results", []):
                     if isinstance(res, dict):
+                        scraped_content = res.get("scraped_content")
+                        if not scraped_content and res.get("content_ref"):
+                            scraped_content = await aresolve_content(res["content_ref"])
                         text = (
-                            res.get("scraped_content")
+                            scraped_content
                             or res.get("search_snippet")
                             or ""
                         )
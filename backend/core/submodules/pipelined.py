@@ -0,0 +1,285 @@
+"""
+Pipelined submodule planning and development.
+
+The phased graph plans every module (plan_submodules) before topic resources and
+submodule development start. ``plan_and_develop_submodules`` runs these phases
+as one overlapping node for the "pipelined" graph variant:
+
+- modules are planned with ``parallel_count`` concurrent planners, as in
+  plan_submodules;
+- the submodules of a module enter the development queue the moment its
+  planning returns, and ``submodule_parallel_count`` workers take them in
+  ``submodule_priority`` order among the submodules planned so far;
+- topic resources are generated in the background from the module outline.
+
+The node returns the same state keys as the phased nodes it replaces, with
+modules and developed submodules in course order, so process_module_resources
+and the finalization nodes run unchanged. While planning is still going on,
+submodules see the course structure planned so far in their prompts.
+
+Because the whole pipeline is one graph node, each planned module and each
+finished submodule is recorded with save_progress as it completes; a resumed
+generation reloads them and only plans and develops what was still missing.
+
+Provides:
+- plan_and_develop_submodules: graph node of the pipelined variant
+"""
+import math
+import time
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+from backend.models.models import LearningPathState, EnhancedModule
+from backend.core.checkpointing import load_progress, save_progress
+from backend.core.generation_context import get_generation_context
+from backend.core.graph_nodes.helpers import batch_items
+from backend.core.submodules.planning import (
+    plan_and_research_module_submodules,
+    planned_module_or_fallback,
+    planned_modules_preview,
+)
+from backend.core.submodules.pipeline import (
+    build_developed_submodule,
+    process_single_submodule,
+    submodule_priority,
+)
+
+logger = logging.getLogger("learning_path.pipelined")
+
+# Queue entry that sorts after every submodule and tells a worker to stop
+_STOP = (math.inf, math.inf, -1)
+
+# save_progress scopes of planned modules (by index) and finished submodules ("module:sub")
+_MODULES_SCOPE = "pipelined_modules"
+_SUBMODULES_SCOPE = "pipelined_submodules"
+
+
+def _outline_module(idx: int, basic_module) -> EnhancedModule:
+    """Not yet planned module: title and description only."""
+    if isinstance(basic_module, EnhancedModule):
+        return basic_module
+    if hasattr(basic_module, "title"):
+        return EnhancedModule(title=basic_module.title, description=basic_module.description, submodules=[])
+    return EnhancedModule(
+        title=basic_module.get("title", f"Module {idx+1}"),
+        description=basic_module.get("description", "No description"),
+        submodules=[],
+    )
+
+
+async def plan_and_develop_submodules(state: LearningPathState) -> Dict[str, Any]:
+    # Local import: the resources node module imports the graph_nodes package
+    from backend.core.graph_nodes.resources import generate_topic_resources, initialize_resource_generation
+
+    basic_modules = state.get("modules")
+    if not basic_modules:
+        logger.warning("No basic modules available from create_learning_path")
+        return {"enhanced_modules": [], "submodule_batches": [], "developed_submodules": [],
+                "steps": ["No basic modules available"]}
+
+    parallel_count = state.get("parallel_count", 2)
+    submodule_parallel_count = max(1, state.get("submodule_parallel_count", 2) or 1)
+    quiz_generation_enabled = state.get("quiz_generation_enabled", True)
+    progress_callback = state.get("progress_callback")
+    start_time = time.time()
+
+    context = get_generation_context()
+    thread_id = context.task_id if context is not None else None
+    restored_modules = await load_progress(thread_id, _MODULES_SCOPE) if thread_id else {}
+    restored_submodules = await load_progress(thread_id, _SUBMODULES_SCOPE) if thread_id else {}
+    if restored_modules or restored_submodules:
+        logger.info(
+            f"Restored {len(restored_modules)} planned modules and {len(restored_submodules)} finished submodules "
+            f"of an interrupted run"
+        )
+
+    logger.info(
+        f"Pipelined submodule processing: planning {len(basic_modules)} modules with parallelism {parallel_count}, "
+        f"developing submodules with {submodule_parallel_count} workers"
+    )
+    if progress_callback:
+        await progress_callback(
+            f"Planning {len(basic_modules)} modules and developing their submodules as soon as each is planned...",
+            phase="submodule_planning",
+            phase_progress=0.0,
+            overall_progress=0.55,
+            action="started",
+        )
+
+    # The course outline grows as modules are planned; submodule prompts read it from this state
+    enhanced_modules: List[EnhancedModule] = [_outline_module(idx, module) for idx, module in enumerate(basic_modules)]
+    work_state = dict(
+        state,
+        enhanced_modules=enhanced_modules,
+        quiz_generation_enabled=quiz_generation_enabled,
+        quiz_questions_by_submodule={},
+        quiz_generation_in_progress={},
+        quiz_generation_errors={},
+    )
+
+    async def topic_resources() -> Dict[str, Any]:
+        try:
+            return await generate_topic_resources(dict(work_state, enhanced_modules=list(enhanced_modules)))
+        except Exception as e:
+            logger.exception(f"Background topic resource generation failed: {e}")
+            return {"topic_resources": []}
+
+    topic_task = asyncio.create_task(topic_resources())
+
+    queue: "asyncio.PriorityQueue[tuple]" = asyncio.PriorityQueue()
+    submodules_in_process: Dict[str, Any] = {}
+    counts = {"planned_modules": 0, "queued": 0, "done": 0, "success": 0, "error": 0}
+    planning_sem = asyncio.Semaphore(parallel_count)
+
+    async def plan_module(idx: int, basic_module) -> None:
+        result = restored_modules.get(str(idx))
+        if not isinstance(result, EnhancedModule):
+            async with planning_sem:
+                try:
+                    result = await plan_and_research_module_submodules(work_state, idx, basic_module)
+                except Exception as e:
+                    result = e
+            if isinstance(result, EnhancedModule) and thread_id:
+                await save_progress(thread_id, _MODULES_SCOPE, str(idx), result)
+        module = planned_module_or_fallback(idx, basic_module, result)
+        enhanced_modules[idx] = module
+        counts["planned_modules"] += 1
+        for sub_id in range(len(module.submodules)):
+            key = f"{idx}:{sub_id}"
+            counts["queued"] += 1
+            restored = restored_submodules.get(key)
+            if isinstance(restored, dict) and restored.get("status") in ["completed", "error"]:
+                submodules_in_process[key] = restored
+                counts["done"] += 1
+                counts["success" if restored.get("status") == "completed" else "error"] += 1
+                continue
+            submodules_in_process[key] = {"status": "queued"}
+            queue.put_nowait(submodule_priority(idx, sub_id, len(module.submodules)) + (sub_id,))
+        logger.info(f"Module {idx+1} planned with {len(module.submodules)} submodules; queued for development")
+
+    async def worker() -> None:
+        while True:
+            _, module_id, sub_id = await queue.get()
+            if sub_id < 0:
+                return
+            module = enhanced_modules[module_id]
+            submodule = module.submodules[sub_id]
+            submodules_in_process[f"{module_id}:{sub_id}"] = {"status": "processing"}
+            try:
+                result = await process_single_submodule(work_state, module_id, sub_id, module, submodule)
+            except Exception as e:
+                logger.error(f"Task error: {str(e)}")
+                result = {"status": "error", "module_id": module_id, "sub_id": sub_id, "error": str(e)}
+
+            submodules_in_process[f"{module_id}:{sub_id}"] = result
+            if thread_id:
+                await save_progress(thread_id, _SUBMODULES_SCOPE, f"{module_id}:{sub_id}", result)
+            counts["done"] += 1
+            if result.get("status") == "completed":
+                counts["success"] += 1
+            else:
+                counts["error"] += 1
+
+            if progress_callback:
+                # The total is only known once every module is planned
+                planning_done = counts["planned_modules"] == len(basic_modules)
+                fraction = counts["done"] / max(1, counts["queued"]) if planning_done else 0.0
+                await progress_callback(
+                    f"Completed {counts['done']}/{counts['queued']} submodules planned so far "
+                    f"({counts['planned_modules']}/{len(basic_modules)} modules planned)",
+                    phase="content_development",
+                    phase_progress=fraction,
+                    overall_progress=0.6 + (fraction * 0.35),
+                    preview_data={
+                        "processed_submodules": [
+                            {
+                                "module_title": module.title,
+                                "submodule_title": submodule.title,
+                                "status": result.get("status"),
+                            }
+                        ]
+                    },
+                    action="processing",
+                )
+
+    workers = [asyncio.create_task(worker()) for _ in range(submodule_parallel_count)]
+    try:
+        await asyncio.gather(*(plan_module(idx, module) for idx, module in enumerate(basic_modules)))
+
+        preview_modules, total_submodules = planned_modules_preview(enhanced_modules)
+        if progress_callback:
+            await progress_callback(
+                f"Planned {total_submodules} submodules across {len(enhanced_modules)} modules (with research)",
+                phase="submodule_planning",
+                phase_progress=1.0,
+                overall_progress=0.6,
+                preview_data={
+                    "type": "all_submodules_planned",
+                    "data": {
+                        "modules": preview_modules,
+                        "total_submodules_planned": total_submodules,
+                    },
+                },
+                action="completed",
+            )
+
+        for _ in workers:
+            queue.put_nowait(_STOP)
+        await asyncio.gather(*workers)
+        topic_update = await topic_task
+    finally:
+        for task in workers + [topic_task]:
+            if not task.done():
+                task.cancel()
+
+    # Same order and batches the phased flow would have produced
+    order = sorted(
+        ((module_id, sub_id) for module_id, module in enumerate(enhanced_modules) for sub_id in range(len(module.submodules))),
+        key=lambda pair: submodule_priority(pair[0], pair[1], len(enhanced_modules[pair[0]].submodules)),
+    )
+    submodule_batches = batch_items(order, submodule_parallel_count)
+    developed_submodules = []
+    for module_id, sub_id in order:
+        developed = build_developed_submodule(enhanced_modules, module_id, sub_id, submodules_in_process)
+        if developed is not None:
+            developed_submodules.append(developed)
+
+    resource_tracking = await initialize_resource_generation(dict(state, enhanced_modules=enhanced_modules, steps=[]))
+    elapsed_time = time.time() - start_time
+
+    logger.info(
+        f"Pipelined submodule processing finished in {elapsed_time:.2f}s: {counts['success']} successful, "
+        f"{counts['error']} failed across {len(enhanced_modules)} modules"
+    )
+    if progress_callback:
+        await progress_callback(
+            f"Completed all {len(order)} submodules in {elapsed_time:.2f} seconds ({counts['error']} failed)",
+            phase="content_development",
+            phase_progress=1.0,
+            overall_progress=0.95,
+            action="completed",
+        )
+
+    update: Dict[str, Any] = {
+        "enhanced_modules": enhanced_modules,
+        "module_resources_in_process": resource_tracking.get("module_resources_in_process", {}),
+        "submodule_resources_in_process": resource_tracking.get("submodule_resources_in_process", {}),
+        "submodule_batches": submodule_batches,
+        "current_submodule_batch_index": len(submodule_batches),
+        "submodules_in_process": submodules_in_process,
+        "developed_submodules": developed_submodules,
+        "quiz_generation_enabled": quiz_generation_enabled,
+        "quiz_questions_by_submodule": work_state["quiz_questions_by_submodule"],
+        "quiz_generation_in_progress": work_state["quiz_generation_in_progress"],
+        "quiz_generation_errors": work_state["quiz_generation_errors"],
+    }
+    for key in ("topic_resources", "topic_resource_query", "topic_resource_search_results"):
+        if key in topic_update:
+            update[key] = topic_update[key]
+    update.setdefault("topic_resources", [])
+    update["steps"] = [
+        f"Planned {len(enhanced_modules)} modules and developed {counts['success']} submodules in a pipeline "
+        f"({parallel_count} planners, {submodule_parallel_count} submodule workers)"
+    ]
+    return update
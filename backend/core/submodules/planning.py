@@ -81,9 +81,10 @@ async def plan_and_research_module_submodules(
             planning_context_parts.append(f"### Source: {url} (Title: {title})")
 
             content_snippet = ""
-            if res.scraped_content:
+            scraped_content = await res.aget_content()
+            if scraped_content:
                 content_snippet = (
-                    f"Scraped Content Snippet:\n{escape_curly_braces(res.scraped_content)[:1000]}"
+                    f"Scraped Content Snippet:\n{escape_curly_braces(scraped_content)[:1000]}"
                 )
             elif res.search_snippet:
                 error_info = f" (Scraping failed: {escape_curly_braces(res.scrape_error or 'Unknown error')})"
@@ -265,6 +266,67 @@ async def plan_module_submodules(
         raise
 
 
+def planned_module_or_fallback(idx: int, basic_module, result) -> EnhancedModule:
+    """The planned module, or the basic module without submodules if planning failed."""
+    if isinstance(result, EnhancedModule):
+        return result
+    module_title = (
+        basic_module.title
+        if hasattr(basic_module, "title")
+        else basic_module.get("title", f"Module {idx+1}")
+    )
+    module_desc = (
+        basic_module.description
+        if hasattr(basic_module, "description")
+        else basic_module.get("description", "No description")
+    )
+    if isinstance(result, Exception):
+        logging.error(
+            f"Error processing module {idx+1} ('{module_title}'): {str(result)}"
+        )
+    else:
+        logging.error(
+            f"Unexpected result type for module {idx+1} ('{module_title}'): {type(result)}"
+        )
+    return EnhancedModule(title=module_title, description=module_desc, submodules=[])
+
+
+def planned_modules_preview(processed_modules) -> tuple:
+    """Progress preview of planned modules and the total number of submodules."""
+    preview_modules = []
+    total_submodules = 0
+
+    for module in processed_modules:
+        if isinstance(module, EnhancedModule):
+            submodule_previews = []
+            if hasattr(module, "submodules") and module.submodules:
+                for submodule in module.submodules:
+                    sub_title = getattr(submodule, "title", "Untitled Submodule")
+                    sub_desc = getattr(submodule, "description", "")
+                    submodule_previews.append(
+                        {
+                            "title": sub_title,
+                            "description": sub_desc[:100] + "..."
+                            if len(sub_desc) > 100
+                            else sub_desc,
+                        }
+                    )
+                    total_submodules += 1
+
+            preview_modules.append(
+                {"title": getattr(module, "title", "Untitled Module"), "submodules": submodule_previews}
+            )
+        else:
+            preview_modules.append(
+                {
+                    "title": getattr(module, "title", "Error Processing Module"),
+                    "submodules": [],
+                }
+            )
+
+    return preview_modules, total_submodules
+
+
 async def plan_submodules(state: LearningPathState) -> Dict[str, Any]:
     logging.info(
         "Planning submodules for each module in parallel with structural research"
@@ -300,76 +362,11 @@ async def plan_submodules(state: LearningPathState) -> Dict[str, Any]:
 
     enhanced_modules_results = await asyncio.gather(*tasks, return_exceptions=True)
 
-    processed_modules = []
-
-    for idx, result in enumerate(enhanced_modules_results):
-        if isinstance(result, Exception):
-            module_title = (
-                basic_modules[idx].title
-                if hasattr(basic_modules[idx], "title")
-                else basic_modules[idx].get("title", f"Module {idx+1}")
-            )
-            module_desc = (
-                basic_modules[idx].description
-                if hasattr(basic_modules[idx], "description")
-                else basic_modules[idx].get("description", "No description")
-            )
-            logging.error(
-                f"Error processing module {idx+1} ('{module_title}'): {str(result)}"
-            )
-            processed_modules.append(
-                EnhancedModule(title=module_title, description=module_desc, submodules=[])
-            )
-        elif isinstance(result, EnhancedModule):
-            processed_modules.append(result)
-        else:
-            module_title = (
-                basic_modules[idx].title
-                if hasattr(basic_modules[idx], "title")
-                else basic_modules[idx].get("title", f"Module {idx+1}")
-            )
-            module_desc = (
-                basic_modules[idx].description
-                if hasattr(basic_modules[idx], "description")
-                else basic_modules[idx].get("description", "No description")
-            )
-            logging.error(
-                f"Unexpected result type for module {idx+1} ('{module_title}'): {type(result)}"
-            )
-            processed_modules.append(
-                EnhancedModule(title=module_title, description=module_desc, submodules=[])
-            )
-
-    preview_modules = []
-    total_submodules = 0
-
-    for module in processed_modules:
-        if isinstance(module, EnhancedModule):
-            submodule_previews = []
-            if hasattr(module, "submodules") and module.submodules:
-                for submodule in module.submodules:
-                    sub_title = getattr(submodule, "title", "Untitled Submodule")
-                    sub_desc = getattr(submodule, "description", "")
-                    submodule_previews.append(
-                        {
-                            "title": sub_title,
-                            "description": sub_desc[:100] + "..."
-                            if len(sub_desc) > 100
-                            else sub_desc,
-                        }
-                    )
-                    total_submodules += 1
-
-            preview_modules.append(
-                {"title": getattr(module, "title", "Untitled Module"), "submodules": submodule_previews}
-            )
-        else:
-            preview_modules.append(
-                {
-                    "title": getattr(module, "title", "Error Processing Module"),
-                    "submodules": [],
-                }
-            )
+    processed_modules = [
+        planned_module_or_fallback(idx, basic_modules[idx], result)
+        for idx, result in enumerate(enhanced_modules_results)
+    ]
+    preview_modules, total_submodules = planned_modules_preview(processed_modules)
 
     if progress_callback:
         await progress_callback(
@@ -15,7 +15,10 @@ from backend.tasks.credit_tasks import grant_monthly_credits # Import the task
 env_path = Path(__file__).parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
-from backend.core.graph_builder import build_graph
+from backend.core.graph_builder import GENERATION_GRAPH_VARIANT, get_compiled_graph
+from backend.core.checkpointing import get_checkpoint_values, runtime_state
+from backend.core.generation_context import generation_scope
+from backend.core.generation_profile import profiling_config
 from backend.models.models import LearningPathState
 from backend.config.log_config import setup_logging, log_debug_data, log_info_data, get_log_level
 from backend.services.key_provider import KeyProvider, GoogleKeyProvider, PerplexityKeyProvider, BraveKeyProvider
@@ -73,26 +76,51 @@ async def shutdown_event():
     logger.info("APScheduler shut down.")
 
 # Define a function to run the graph
-async def run_graph(initial_state):
+async def run_graph(initial_state, task_id: Optional[str] = None, config: Optional[Dict[str, Any]] = None,
+                    graph_variant: Optional[str] = None, runtime_values: Optional[Dict[str, Any]] = None):
     """
     Run the workflow graph with the provided initial state.
     
+    The run is checkpointed under ``task_id``; passing ``initial_state=None`` resumes
+    that task's checkpointed run from its last completed node.
+    
     Args:
-        initial_state: The initial state for the graph
+        initial_state: The initial state for the graph, or None to resume the run of task_id
+        task_id: Optional generation task id used to scope per-generation resources
+        config: Optional LangGraph run config (e.g. callbacks used by the benchmarks)
+        graph_variant: Optional graph variant ("default" or "pipelined"); GENERATION_GRAPH_VARIANT if omitted
+            (a resumed run uses the variant recorded in its checkpoint)
+        runtime_values: Progress callback, key providers and user of a resumed run (never checkpointed)
         
     Returns:
         The final result after graph execution
     """
+    topic = initial_state["user_topic"] if initial_state is not None else None
     try:
-        graph = build_graph()
-        result = await graph.ainvoke(initial_state)
+        if initial_state is None:
+            checkpoint = get_checkpoint_values(task_id, channels=("user_topic",)) if task_id else None
+            if checkpoint is None:
+                raise ValueError(f"No checkpoint to resume for task {task_id}")
+            topic = checkpoint["values"].get("user_topic")
+            graph_variant = graph_variant or checkpoint["metadata"].get("graph_variant")
+            logger.info(f"Resuming checkpointed generation {task_id} for topic: {topic}")
+        graph_variant = graph_variant or GENERATION_GRAPH_VARIANT
+        graph = get_compiled_graph(graph_variant)
+        async with generation_scope(task_id) as context:
+            # The profiling callback must be created inside the scope that owns the profile
+            run_config = dict(profiling_config(config) or {})
+            # Checkpoints are keyed by task; the variant is recorded so a resume runs the same graph
+            run_config["configurable"] = dict(run_config.get("configurable") or {}, thread_id=context.task_id)
+            run_config["metadata"] = dict(run_config.get("metadata") or {}, graph_variant=graph_variant)
+            with runtime_state(initial_state if initial_state is not None else (runtime_values or {})):
+                result = await graph.ainvoke(initial_state, config=run_config)
         logger.info(f"Graph execution completed successfully")
         
         # Format the output
         formatted_output = result.get("final_learning_path", {})
         if not formatted_output:
             formatted_output = {
-                "topic": initial_state["user_topic"],
+                "topic": topic,
                 "modules": result.get("modules", []),
                 "execution_steps": result.get("steps", [])
             }
@@ -105,14 +133,12 @@ async def run_graph(initial_state):
     except Exception as e:
         logger.exception(f"Error in graph execution: {str(e)}")
         return {
-            "topic": initial_state["user_topic"],
+            "topic": topic,
             "modules": [],
             "execution_steps": [f"Error: {str(e)}"]
         }
 
-# Decora la función de generación con @traceable para trazar el flujo completo
-@traceable
-async def generate_learning_path(
+def build_initial_state(
     topic: str,
     parallel_count: int = 2,
     search_parallel_count: int = 3,
@@ -124,32 +150,17 @@ async def generate_learning_path(
     desired_submodule_count: Optional[int] = None,
     language: str = "en",
     explanation_style: str = "standard",
-    user: Optional[Any] = None  # Add user parameter for model selection
+    user: Optional[Any] = None,
 ) -> Dict[str, Any]:
     """
-    Asynchronous interface for course generation.
+    Build the initial graph state for a course generation.
+    
+    Arguments are those of generate_learning_path; missing key providers default
+    to the environment.
     
-    Args:
-        topic: The topic to generate a course for
-        parallel_count: Number of modules to process in parallel
-        search_parallel_count: Number of search queries to process in parallel
-        submodule_parallel_count: Number of submodules to process in parallel
-        progress_callback: Callback function for progress updates
-        google_key_provider: Provider for Google API key
-        brave_key_provider: Provider for Brave Search API key
-        desired_module_count: Desired number of modules
-        desired_submodule_count: Desired number of submodules per module
-        language: ISO language code for content generation (e.g., 'en', 'es')
-        explanation_style: Style for content explanations (e.g., 'standard', 'simple')
-        user: Optional user parameter for model selection
-        
     Returns:
-        Dictionary with the course data
+        The initial LearningPathState dictionary
     """
-    logger.info(f"Generating course for topic: {topic} with {parallel_count} parallel modules, " +
-                f"{submodule_parallel_count} parallel submodules, {search_parallel_count} parallel searches, " +
-                f"and language: {language}")
-    
     # Create default key providers if none provided
     if not google_key_provider:
         google_key_provider = GoogleKeyProvider()
@@ -199,8 +210,98 @@ async def generate_learning_path(
         "max_image_search_attempts": 3,
     }
     
+    return initial_state
+
+# Decora la función de generación con @traceable para trazar el flujo completo
+@traceable
+async def generate_learning_path(
+    topic: str,
+    parallel_count: int = 2,
+    search_parallel_count: int = 3,
+    submodule_parallel_count: int = 2,
+    progress_callback = None,
+    google_key_provider: Optional[GoogleKeyProvider] = None,
+    brave_key_provider: Optional[BraveKeyProvider] = None,
+    desired_module_count: Optional[int] = None,
+    desired_submodule_count: Optional[int] = None,
+    language: str = "en",
+    explanation_style: str = "standard",
+    user: Optional[Any] = None,  # Add user parameter for model selection
+    task_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Asynchronous interface for course generation.
+    
+    Args:
+        topic: The topic to generate a course for
+        parallel_count: Number of modules to process in parallel
+        search_parallel_count: Number of search queries to process in parallel
+        submodule_parallel_count: Number of submodules to process in parallel
+        progress_callback: Callback function for progress updates
+        google_key_provider: Provider for Google API key
+        brave_key_provider: Provider for Brave Search API key
+        desired_module_count: Desired number of modules
+        desired_submodule_count: Desired number of submodules per module
+        language: ISO language code for content generation (e.g., 'en', 'es')
+        explanation_style: Style for content explanations (e.g., 'standard', 'simple')
+        user: Optional user parameter for model selection
+        task_id: Optional generation task id (scopes per-generation caches and stats)
+        
+    Returns:
+        Dictionary with the course data
+    """
+    logger.info(f"Generating course for topic: {topic} with {parallel_count} parallel modules, " +
+                f"{submodule_parallel_count} parallel submodules, {search_parallel_count} parallel searches, " +
+                f"and language: {language}")
+    
+    initial_state = build_initial_state(
+        topic,
+        parallel_count=parallel_count,
+        search_parallel_count=search_parallel_count,
+        submodule_parallel_count=submodule_parallel_count,
+        progress_callback=progress_callback,
+        google_key_provider=google_key_provider,
+        brave_key_provider=brave_key_provider,
+        desired_module_count=desired_module_count,
+        desired_submodule_count=desired_submodule_count,
+        language=language,
+        explanation_style=explanation_style,
+        user=user,
+    )
+    
     # Configure and run the graph
-    return await run_graph(initial_state)
+    return await run_graph(initial_state, task_id=task_id)
+
+async def resume_learning_path(
+    task_id: str,
+    progress_callback = None,
+    google_key_provider: Optional[GoogleKeyProvider] = None,
+    brave_key_provider: Optional[BraveKeyProvider] = None,
+    user: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Resume an interrupted course generation from its last checkpoint.
+    
+    The topic, counts and everything generated so far come from the checkpoint;
+    only the runtime objects, which are never checkpointed, are provided here.
+    
+    Args:
+        task_id: Generation task id the run was checkpointed under
+        progress_callback: Callback function for progress updates
+        google_key_provider: Provider for Google API key (environment if omitted)
+        brave_key_provider: Provider for Brave Search API key (environment if omitted)
+        user: Optional user parameter for model selection
+        
+    Returns:
+        Dictionary with the course data
+    """
+    runtime_values = {
+        "progress_callback": progress_callback,
+        "google_key_provider": google_key_provider or GoogleKeyProvider(),
+        "brave_key_provider": brave_key_provider or BraveKeyProvider(),
+        "user": user,
+    }
+    return await run_graph(None, task_id=task_id, runtime_values=runtime_values)
 
 def build_learning_path(
     topic: str,
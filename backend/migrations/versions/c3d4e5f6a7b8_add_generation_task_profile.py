@@ -0,0 +1,27 @@
+"""add_generation_task_profile
+
+Revision ID: c3d4e5f6a7b8
+Revises: a1b2c3d4e5f6
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c3d4e5f6a7b8'
+down_revision = 'a1b2c3d4e5f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'generation_tasks',
+        sa.Column('profile', sa.JSON(), nullable=True,
+                  comment='Per-node/per-chain timeline recorded during generation'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('generation_tasks', 'profile')
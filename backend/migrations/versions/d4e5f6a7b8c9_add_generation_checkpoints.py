@@ -0,0 +1,76 @@
+"""add_generation_checkpoints
+
+Revision ID: d4e5f6a7b8c9
+Revises: c3d4e5f6a7b8
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd4e5f6a7b8c9'
+down_revision = 'c3d4e5f6a7b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'generation_checkpoints',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('thread_id', sa.String(), nullable=False),
+        sa.Column('checkpoint_ns', sa.String(), nullable=False),
+        sa.Column('checkpoint_id', sa.String(), nullable=False),
+        sa.Column('parent_checkpoint_id', sa.String(), nullable=True),
+        sa.Column('checkpoint_type', sa.String(), nullable=False),
+        sa.Column('checkpoint', sa.LargeBinary(), nullable=False,
+                  comment='Serialized checkpoint without channel values'),
+        sa.Column('metadata_type', sa.String(), nullable=False),
+        sa.Column('checkpoint_metadata', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.UniqueConstraint('thread_id', 'checkpoint_ns', 'checkpoint_id', name='uq_generation_checkpoint'),
+    )
+    op.create_index('ix_generation_checkpoints_id', 'generation_checkpoints', ['id'])
+    op.create_index('idx_generation_checkpoint_created_at', 'generation_checkpoints', ['created_at'])
+
+    op.create_table(
+        'generation_checkpoint_blobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('thread_id', sa.String(), nullable=False),
+        sa.Column('checkpoint_ns', sa.String(), nullable=False),
+        sa.Column('channel', sa.String(), nullable=False),
+        sa.Column('version', sa.String(), nullable=False),
+        sa.Column('value_type', sa.String(), nullable=False),
+        sa.Column('value', sa.LargeBinary(), nullable=True),
+        sa.UniqueConstraint('thread_id', 'checkpoint_ns', 'channel', 'version', name='uq_generation_checkpoint_blob'),
+    )
+    op.create_index('ix_generation_checkpoint_blobs_id', 'generation_checkpoint_blobs', ['id'])
+
+    op.create_table(
+        'generation_checkpoint_writes',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('thread_id', sa.String(), nullable=False),
+        sa.Column('checkpoint_ns', sa.String(), nullable=False),
+        sa.Column('checkpoint_id', sa.String(), nullable=False),
+        sa.Column('task_id', sa.String(), nullable=False,
+                  comment='LangGraph task (node run) id, not the GenerationTask id'),
+        sa.Column('task_path', sa.String(), nullable=False),
+        sa.Column('idx', sa.Integer(), nullable=False),
+        sa.Column('channel', sa.String(), nullable=False),
+        sa.Column('value_type', sa.String(), nullable=False),
+        sa.Column('value', sa.LargeBinary(), nullable=True),
+        sa.UniqueConstraint('thread_id', 'checkpoint_ns', 'checkpoint_id', 'task_id', 'idx',
+                            name='uq_generation_checkpoint_write'),
+    )
+    op.create_index('ix_generation_checkpoint_writes_id', 'generation_checkpoint_writes', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_generation_checkpoint_writes_id', table_name='generation_checkpoint_writes')
+    op.drop_table('generation_checkpoint_writes')
+    op.drop_index('ix_generation_checkpoint_blobs_id', table_name='generation_checkpoint_blobs')
+    op.drop_table('generation_checkpoint_blobs')
+    op.drop_index('idx_generation_checkpoint_created_at', table_name='generation_checkpoints')
+    op.drop_index('ix_generation_checkpoints_id', table_name='generation_checkpoints')
+    op.drop_table('generation_checkpoints')
@@ -3,7 +3,7 @@ import bcrypt
 import os
 import secrets
 from datetime import datetime, timedelta
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, JSON, func, Index, UniqueConstraint
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, JSON, LargeBinary, func, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from backend.config.database import Base
 
@@ -216,6 +216,7 @@ class GenerationTask(Base):
     request_topic = Column(String, nullable=False)
     error_message = Column(Text, nullable=True)
     history_entry_id = Column(Integer, ForeignKey("learning_paths.id", ondelete="SET NULL"), nullable=True, index=True)
+    profile = Column(JSON, nullable=True, comment="Per-node/per-chain timeline recorded during generation")
     
     user = relationship("User")
     history_entry = relationship("LearningPath")
@@ -230,6 +231,62 @@ class GenerationTask(Base):
     )
 
 
+# Generation graph checkpoints (see backend.core.checkpointing); thread_id is the GenerationTask.task_id
+class GenerationCheckpoint(Base):
+    __tablename__ = "generation_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    thread_id = Column(String, nullable=False)
+    checkpoint_ns = Column(String, nullable=False, default="")
+    checkpoint_id = Column(String, nullable=False)
+    parent_checkpoint_id = Column(String, nullable=True)
+    checkpoint_type = Column(String, nullable=False)
+    checkpoint = Column(LargeBinary, nullable=False, comment="Serialized checkpoint without channel values")
+    metadata_type = Column(String, nullable=False)
+    checkpoint_metadata = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint(thread_id, checkpoint_ns, checkpoint_id, name='uq_generation_checkpoint'),
+        Index('idx_generation_checkpoint_created_at', created_at),
+    )
+
+
+class GenerationCheckpointBlob(Base):
+    __tablename__ = "generation_checkpoint_blobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    thread_id = Column(String, nullable=False)
+    checkpoint_ns = Column(String, nullable=False, default="")
+    channel = Column(String, nullable=False)
+    version = Column(String, nullable=False)
+    value_type = Column(String, nullable=False)
+    value = Column(LargeBinary, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint(thread_id, checkpoint_ns, channel, version, name='uq_generation_checkpoint_blob'),
+    )
+
+
+class GenerationCheckpointWrite(Base):
+    __tablename__ = "generation_checkpoint_writes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    thread_id = Column(String, nullable=False)
+    checkpoint_ns = Column(String, nullable=False, default="")
+    checkpoint_id = Column(String, nullable=False)
+    task_id = Column(String, nullable=False, comment="LangGraph task (node run) id, not the GenerationTask id")
+    task_path = Column(String, nullable=False, default="")
+    idx = Column(Integer, nullable=False)
+    channel = Column(String, nullable=False)
+    value_type = Column(String, nullable=False)
+    value = Column(LargeBinary, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, name='uq_generation_checkpoint_write'),
+    )
+
+
 # New Model for Tracking User Progress in Courses
 class LearningPathProgress(Base):
     __tablename__ = "learning_path_progress"
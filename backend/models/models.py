@@ -142,8 +142,23 @@ class ScrapedResult(BaseModel):
     url: str = Field(..., description="URL of the scraped page")
     search_snippet: Optional[str] = Field(default=None, description="Original snippet from search result (e.g., Brave)")
     scraped_content: Optional[str] = Field(default=None, description="Cleaned textual content scraped from the URL")
+    content_ref: Optional[str] = Field(default=None, description="Handle of the scraped content in the generation's content blob store")
     scrape_error: Optional[str] = Field(default=None, description="Error message if scraping failed for this URL")
 
+    def get_content(self) -> Optional[str]:
+        """Scraped content, read from the content blob store when only a handle is kept."""
+        if self.scraped_content or not self.content_ref:
+            return self.scraped_content
+        from backend.core.blob_store import resolve_content
+        return resolve_content(self.content_ref)
+
+    async def aget_content(self) -> Optional[str]:
+        """``get_content`` for async code: blobs spilled to disk are read in a worker thread."""
+        if self.scraped_content or not self.content_ref:
+            return self.scraped_content
+        from backend.core.blob_store import aresolve_content
+        return await aresolve_content(self.content_ref)
+
 class GoogleSearchMetadata(BaseModel):
     """Metadata from Google Search native grounding"""
     grounding_chunks: List[Dict[str, Any]] = Field(default_factory=list, description="Google Search grounding chunks with web sources")
@@ -264,6 +279,7 @@ class LearningPathState(TypedDict):
     research_knowledge_gaps: Optional[List[str]]  # Identified knowledge gaps
     research_confidence_score: Optional[float]  # Confidence in current research (0.0-1.0)
     refinement_queries: Optional[List[SearchQuery]]  # Queries generated to address gaps
+    research_cache: Optional[Dict[str, Any]]  # Research cache lookup: status (hit/stale/miss/disabled), key, timing
     # Content evaluation loop control (following Google pattern for content refinement)
     content_search_queries: Annotated[List[SearchQuery], operator.add]  # Accumulative content search queries
     content_search_results: Annotated[List[SearchServiceResult], operator.add]  # Accumulative content search results
@@ -452,4 +452,158 @@ async def get_user_transactions(
         total=total,
         page=page,
         per_page=per_page
-    ) 
\ No newline at end of file
+    ) 
+
+@router.get("/scraping/stats")
+async def get_scraping_stats(
+    admin: User = Depends(get_admin_user)
+):
+    """
+    Get runtime statistics for the scraping pipeline (scrape cache, extraction engine, HTTP pools,
+    Brave rate limiter and result cache, per-generation URL and near-duplicate content dedup,
+    scraped-content blob store).
+    Only accessible by admin users.
+    """
+    from backend.services.scrape_cache import get_scrape_cache
+    from backend.services.extraction import get_extraction_engine
+    from backend.services.http_clients import http_client_stats
+    from backend.services.rate_limiter import get_brave_rate_limiter
+    from backend.services.url_registry import url_registry_totals
+    from backend.services.search_cache import get_brave_result_cache
+    from backend.services.domain_health import get_domain_health_registry
+    from backend.services.near_duplicates import near_duplicate_totals
+    from backend.core.blob_store import content_blob_totals
+
+    scrape_cache = get_scrape_cache()
+    brave_cache = get_brave_result_cache()
+    domain_registry = get_domain_health_registry()
+
+    logger.info(f"Admin user {admin.email} fetched scraping statistics")
+
+    return {
+        "scrapeCache": scrape_cache.stats() if scrape_cache else {"enabled": False},
+        "extraction": get_extraction_engine().metrics(),
+        "httpClients": http_client_stats(),
+        "braveRateLimiter": get_brave_rate_limiter().stats(),
+        "urlDedup": url_registry_totals(),
+        "braveResultCache": brave_cache.stats() if brave_cache else {"enabled": False},
+        "domainHealth": domain_registry.summary() if domain_registry else {"enabled": False},
+        "nearDuplicates": near_duplicate_totals(),
+        "contentBlobs": content_blob_totals(),
+    }
+
+
+@router.get("/scraping/domains")
+async def get_scraping_domains(
+    limit: int = Query(50, ge=1, le=500),
+    sort_by: str = Query("time_spent_seconds", regex="^(time_spent_seconds|failures|requests|skipped|avg_latency_ms)$"),
+    state: Optional[str] = Query(None, regex="^(closed|open|half_open)$"),
+    admin: User = Depends(get_admin_user)
+):
+    """
+    List per-domain scrape health (success rate, latency, error classes, circuit state),
+    sorted by the time each domain has cost us. Only accessible by admin users.
+    """
+    from backend.services.domain_health import get_domain_health_registry
+
+    registry = get_domain_health_registry()
+    if registry is None:
+        return {"enabled": False, "domains": []}
+
+    logger.info(f"Admin user {admin.email} fetched scraping domain health")
+
+    return {"enabled": True, **registry.summary(), "domains": registry.snapshot(limit=limit, sort_by=sort_by, state=state)}
+
+
+@router.delete("/scraping/domains/{domain}")
+async def reset_scraping_domain(
+    domain: str,
+    admin: User = Depends(get_admin_user)
+):
+    """
+    Forget the health record (and close the circuit) for a domain.
+    Only accessible by admin users.
+    """
+    from backend.services.domain_health import domain_of, get_domain_health_registry
+
+    # Entries are keyed the way the scraper records them (lower-cased, no leading "www.")
+    domain = domain_of(f"http://{domain}")
+    registry = get_domain_health_registry()
+    if registry is None or not domain or not registry.reset(domain):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Domain not tracked")
+
+    logger.info(f"Admin user {admin.email} reset scraping domain health for {domain}")
+
+    return {"domain": domain, "reset": True}
+
+
+@router.get("/llm/stats")
+async def get_llm_stats(
+    admin: User = Depends(get_admin_user)
+):
+    """
+    Get runtime statistics for LLM clients (client pool reuse, response cache,
+    concurrency governor limits and queue waits, per-call-site parse retries,
+    research context packing savings).
+    Only accessible by admin users.
+    """
+    from backend.services.llm_pool import llm_pool_stats
+    from backend.services.llm_cache import llm_cache_stats
+    from backend.services.llm_governor import get_llm_governor
+    from backend.services.llm_metrics import llm_call_stats
+    from backend.core.submodules.context_packer import context_packing_stats
+
+    governor = get_llm_governor()
+
+    logger.info(f"Admin user {admin.email} fetched LLM statistics")
+
+    return {
+        "clientPool": llm_pool_stats(),
+        "responseCache": llm_cache_stats(),
+        "governor": governor.stats() if governor else {"enabled": False},
+        "calls": llm_call_stats(),
+        "contextPacking": context_packing_stats(),
+    }
+
+
+@router.get("/generation/profiles")
+async def get_generation_profile_summary(
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_admin_user)
+):
+    """
+    Summarise the recorded profiles of the most recent generation tasks: overall and
+    per-node p50/p95 durations, runs, LLM calls and tokens per generation.
+    Only accessible by admin users.
+    """
+    from backend.models.auth_models import GenerationTask
+    from backend.core.generation_profile import summarize_profiles
+
+    rows = (
+        db.query(GenerationTask.profile)
+        .filter(GenerationTask.profile.isnot(None))
+        .order_by(desc(GenerationTask.created_at))
+        .limit(limit)
+        .all()
+    )
+
+    logger.info(f"Admin user {admin.email} fetched generation profile summary")
+
+    return {"limit": limit, **summarize_profiles(row.profile for row in rows)}
+
+
+@router.get("/generation/research-cache")
+async def get_research_cache_stats(
+    admin: User = Depends(get_admin_user)
+):
+    """
+    Get statistics for the cross-user research cache: hits (fresh and refined stale
+    entries), misses, hit rate and research time saved.
+    Only accessible by admin users.
+    """
+    from backend.services.research_cache import research_cache_stats
+
+    logger.info(f"Admin user {admin.email} fetched research cache statistics")
+
+    return research_cache_stats()
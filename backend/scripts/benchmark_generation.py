@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+"""
+End-to-end generation benchmark with offline stand-in providers.
+
+Runs the full course-generation graph N times against the fake Gemini model in
+backend.benchmarks.fake_llm and the local Brave/fixture server in
+backend.benchmarks.fake_search, then reports per-node timing, wall time and
+peak memory. No API keys or network access are needed, so the effect of
+parallel_count and the other parallelism settings can be measured directly.
+
+Response, search, scrape and research caches are disabled unless --keep-caches is given,
+image enrichment (Wikimedia) is skipped unless --images is given, and file
+logging is turned off. The Brave rate limiter stays active (set
+BRAVE_RATE_PER_SECOND to lift it).
+
+Usage: python backend/scripts/benchmark_generation.py [--runs 3] [--concurrency 1]
+       [--parallel-count 2] [--submodule-parallel-count 2] [--llm-latency-ms 800] [--json out.json]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tracemalloc
+from collections import Counter, defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from backend.benchmarks.fake_llm import FakeLLMProfile, fake_chat_model_factory
+from backend.benchmarks.fake_search import FakeSearchProfile, FakeSearchServer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Collects wall time and LLM calls per graph node from LangChain callbacks."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.started = {}
+        self.durations = defaultdict(list)
+        self.llm_calls = Counter()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # Runnables inside a node inherit its metadata; only the node's own run has the node's name
+        if node and kwargs.get("name") == node:
+            self.started[run_id] = (node, time.perf_counter())
+
+    def _finish(self, run_id):
+        entry = self.started.pop(run_id, None)
+        if entry:
+            node, started = entry
+            self.durations[node].append(time.perf_counter() - started)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node:
+            self.llm_calls[node] += 1
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=3, help="Number of generations")
+    parser.add_argument("--concurrency", type=int, default=1, help="Generations running at the same time")
+    parser.add_argument("--topic", default="Introduction to distributed systems")
+    parser.add_argument("--parallel-count", type=int, default=2)
+    parser.add_argument("--search-parallel-count", type=int, default=3)
+    parser.add_argument("--submodule-parallel-count", type=int, default=2)
+    parser.add_argument("--graph-variant", default="default", help="Graph variant to run (default | pipelined)")
+    parser.add_argument("--list-length", type=int, default=3, help="Items per generated list (modules, submodules, ...)")
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0, help="Median time to first token")
+    parser.add_argument("--llm-latency-sigma", type=float, default=0.35, help="Log-normal spread of the latency")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=150.0)
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0, help="Fraction of calls failing with 429")
+    parser.add_argument("--llm-malformed-rate", type=float, default=0.0, help="Fraction of JSON responses truncated")
+    parser.add_argument("--llm-text-words", type=int, default=600, help="Words in free-text responses")
+    parser.add_argument("--search-latency-ms", type=float, default=300.0)
+    parser.add_argument("--page-latency-ms", type=float, default=150.0)
+    parser.add_argument("--page-error-rate", type=float, default=0.05)
+    parser.add_argument("--page-words", type=int, default=1500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep-caches", action="store_true", help="Leave response/search/scrape/research caches as configured")
+    parser.add_argument("--images", action="store_true", help="Keep image enrichment (calls Wikimedia)")
+    parser.add_argument("--checkpoints", metavar="SQLITE_FILE",
+                        help="Checkpoint the generations into this SQLite file (disabled by default)")
+    parser.add_argument("--trace-memory", action="store_true", help="Also report the Python heap peak (tracemalloc, slower)")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--json", dest="json_path", help="Write the results to this file as JSON")
+    return parser.parse_args()
+
+
+def configure_environment(args, endpoint):
+    """Environment for the backend modules; must run before they are imported."""
+    # Well-formed placeholders: the key providers still validate the format
+    os.environ["GOOGLE_API_KEY"] = "AIza" + "OfflineBenchmark".ljust(35, "0")
+    os.environ["BRAVE_API_KEY"] = "offline-benchmark"
+    os.environ["BRAVE_SEARCH_ENDPOINT"] = endpoint
+    os.environ["LOG_FILE"] = ""
+    os.environ["LOG_LEVEL"] = args.log_level
+    os.environ["LANGCHAIN_TRACING_V2"] = "false"
+    os.environ["LANGSMITH_TRACING"] = "false"
+    os.environ["GENERATION_CHECKPOINTS_ENABLED"] = "true" if args.checkpoints else "false"
+    if args.checkpoints:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.checkpoints)}"
+    if not args.keep_caches:
+        for name in ("LLM_CACHE_ENABLED", "BRAVE_CACHE_ENABLED", "SCRAPE_CACHE_ENABLED", "RESEARCH_CACHE_ENABLED"):
+            os.environ[name] = "false"
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def discard_progress(message, **kwargs):
+    """Progress callback like the API's, without the streaming."""
+
+
+async def run_generation(index, args, semaphore):
+    from backend.main import build_initial_state, run_graph
+    from backend.core.checkpointing import delete_checkpoints
+
+    task_id = f"benchmark-{index}"
+    if args.checkpoints:
+        # A thread left by an earlier benchmark would be continued instead of started afresh
+        delete_checkpoints(task_id)
+    async with semaphore:
+        state = build_initial_state(
+            args.topic,
+            parallel_count=args.parallel_count,
+            search_parallel_count=args.search_parallel_count,
+            submodule_parallel_count=args.submodule_parallel_count,
+            progress_callback=discard_progress,
+        )
+        if not args.images:
+            state["images_enrichment_enabled"] = False
+            state["enhanced_image_search_enabled"] = False
+        timer = NodeTimer()
+        started = time.perf_counter()
+        result = await run_graph(state, task_id=task_id, config={"callbacks": [timer]},
+                                 graph_variant=args.graph_variant)
+        wall = time.perf_counter() - started
+    modules = result.get("modules") or []
+    print(f"  generation {index + 1}: {wall:.2f}s, {len(modules)} modules", flush=True)
+    return {"wall": wall, "ok": bool(modules), "timer": timer}
+
+
+def summarize(runs, elapsed, llm_calls, search_stats, heap_peak):
+    nodes = defaultdict(lambda: {"runs": 0, "total": 0.0, "max": 0.0, "llm_calls": 0})
+    for run in runs:
+        timer = run["timer"]
+        for node, durations in timer.durations.items():
+            nodes[node]["runs"] += len(durations)
+            nodes[node]["total"] += sum(durations)
+            nodes[node]["max"] = max(nodes[node]["max"], max(durations))
+        for node, calls in timer.llm_calls.items():
+            nodes[node]["llm_calls"] += calls
+    walls = [run["wall"] for run in runs]
+    return {
+        "generations": len(runs),
+        "succeeded": sum(1 for run in runs if run["ok"]),
+        "elapsed_seconds": elapsed,
+        "generation_seconds": {
+            "mean": sum(walls) / len(walls) if walls else 0.0,
+            "min": min(walls, default=0.0),
+            "max": max(walls, default=0.0),
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "python_heap_peak_mb": heap_peak / (1024 * 1024) if heap_peak is not None else None,
+        "llm_calls": llm_calls,
+        "search": search_stats,
+        "nodes": {
+            node: dict(stats, mean=stats["total"] / stats["runs"] if stats["runs"] else 0.0)
+            for node, stats in sorted(nodes.items(), key=lambda item: -item[1]["total"])
+        },
+    }
+
+
+def print_report(summary, args):
+    generation = summary["generation_seconds"]
+    print()
+    print(f"Generations: {summary['succeeded']}/{summary['generations']} succeeded, concurrency {args.concurrency}, "
+          f"parallel_count={args.parallel_count}, submodule_parallel_count={args.submodule_parallel_count}, "
+          f"search_parallel_count={args.search_parallel_count}, graph variant {args.graph_variant}")
+    print(f"Wall time: {summary['elapsed_seconds']:.2f}s total; per generation mean {generation['mean']:.2f}s, "
+          f"min {generation['min']:.2f}s, max {generation['max']:.2f}s")
+    memory = f"Peak memory: RSS {summary['peak_rss_mb']:.1f} MB" if summary["peak_rss_mb"] is not None else "Peak memory: RSS n/a"
+    if summary["python_heap_peak_mb"] is not None:
+        memory += f", Python heap {summary['python_heap_peak_mb']:.1f} MB"
+    print(memory)
+    search = summary["search"]
+    print(f"LLM calls: {summary['llm_calls']}; searches: {search['searches']}; "
+          f"pages served: {search['pages']} ({search['page_errors']} errors, {search['hosts']} hosts)")
+    print()
+    print(f"{'node':<40} {'runs':>5} {'total s':>9} {'mean s':>8} {'max s':>8} {'llm calls':>10}")
+    for node, stats in summary["nodes"].items():
+        print(f"{node:<40} {stats['runs']:>5} {stats['total']:>9.2f} {stats['mean']:>8.2f} "
+              f"{stats['max']:>8.2f} {stats['llm_calls']:>10}")
+
+
+async def main():
+    args = parse_args()
+    server = FakeSearchServer(FakeSearchProfile(
+        search_latency_ms=args.search_latency_ms,
+        page_latency_ms=args.page_latency_ms,
+        page_words=args.page_words,
+        page_error_rate=args.page_error_rate,
+        seed=args.seed,
+    ))
+    endpoint = await server.start()
+    configure_environment(args, endpoint)
+
+    from backend.services import services
+    from backend.services.http_clients import close_http_clients
+    if args.checkpoints:
+        from backend.config.database import Base, engine
+        from backend.models.auth_models import GenerationCheckpoint, GenerationCheckpointBlob, GenerationCheckpointWrite
+        checkpoint_models = (GenerationCheckpoint, GenerationCheckpointBlob, GenerationCheckpointWrite)
+        Base.metadata.create_all(engine, tables=[model.__table__ for model in checkpoint_models])
+
+    factory = fake_chat_model_factory(FakeLLMProfile(
+        latency_ms=args.llm_latency_ms,
+        latency_sigma=args.llm_latency_sigma,
+        tokens_per_second=args.llm_tokens_per_second,
+        rate_limit_rate=args.llm_rate_limit_rate,
+        malformed_rate=args.llm_malformed_rate,
+        list_length=args.list_length,
+        text_words=args.llm_text_words,
+        seed=args.seed,
+    ))
+    services.set_chat_model_override(factory)
+
+    if args.trace_memory:
+        tracemalloc.start()
+    print(f"Running {args.runs} generations of '{args.topic}' (search endpoint {endpoint})", flush=True)
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+    started = time.perf_counter()
+    try:
+        runs = await asyncio.gather(*(run_generation(i, args, semaphore) for i in range(args.runs)))
+    finally:
+        elapsed = time.perf_counter() - started
+        services.set_chat_model_override(None)
+        await close_http_clients()
+        await server.stop()
+    heap_peak = tracemalloc.get_traced_memory()[1] if args.trace_memory else None
+
+    llm_calls = sum(model.calls for model in factory.models.values())
+    summary = summarize(runs, elapsed, llm_calls, server.stats(), heap_peak)
+    print_report(summary, args)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(dict(summary, settings=vars(args)), f, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: JSON extraction from large LLM responses.
+
+Compares the previous regex-based extractor with the linear scanner in
+backend.utils.json_extract on synthetic 50-200 KB responses.
+
+Usage: python backend/scripts/benchmark_json_extraction.py [--repeat 5]
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.utils.json_extract import extract_json_from_markdown
+
+
+def legacy_extract_json_from_markdown(text):
+    """The regex-based extractor used before the linear scanner."""
+    try:
+        return json.loads(text.strip())
+    except json.JSONDecodeError:
+        pass
+    for match in re.findall(r'```(?:json)?\s*([\s\S]*?)\s*```', text):
+        try:
+            return json.loads(match.strip())
+        except json.JSONDecodeError:
+            continue
+    for match in re.findall(r'(\{[\s\S]*\})', text):
+        try:
+            return json.loads(match.strip())
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def make_payload(size):
+    """A JSON object of roughly ``size`` characters, shaped like submodule content."""
+    sections = []
+    while len(json.dumps(sections)) < size:
+        n = len(sections)
+        sections.append({"title": f"Section {n}", "content": f"Body of section {n} with {{braces}} and \"quotes\". " * 8})
+    return {"sections": sections}
+
+
+def cases(size):
+    payload = json.dumps(make_payload(size))
+    prose = "Some explanation with a {placeholder} and [notes]. " * 20
+    return {
+        "json after prose": f"Here is the result:\n{payload}\nLet me know if you need changes.",
+        "braces in trailing prose": f"Here is the result:\n{payload}\n{prose}",
+        "truncated json": payload[: len(payload) // 2],
+        "json + run of '{'": payload + "\n" + "{" * (size // 20),
+    }
+
+
+def bench(func, text, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(text)
+        best = min(best, time.perf_counter() - started)
+    return best, result is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'case':<30} {'size':>8} {'legacy ms':>10} {'found':>6} {'scanner ms':>11} {'found':>6} {'speedup':>8}")
+    for size in (50_000, 100_000, 200_000):
+        for name, text in cases(size).items():
+            legacy_time, legacy_found = bench(legacy_extract_json_from_markdown, text, args.repeat)
+            new_time, new_found = bench(extract_json_from_markdown, text, args.repeat)
+            print(
+                f"{name:<30} {len(text) // 1000:>6}KB {legacy_time * 1000:>10.2f} {str(legacy_found):>6} "
+                f"{new_time * 1000:>11.2f} {str(new_found):>6} {legacy_time / new_time:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
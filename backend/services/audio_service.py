@@ -239,10 +239,10 @@ async def generate_submodule_audio(
     scrape_timeout = int(os.environ.get("SCRAPE_TIMEOUT", 10))
     if resource_urls:
         logger.info(f"Scraping {len(resource_urls)} resources for submodule audio script...")
-        import aiohttp
-        async with aiohttp.ClientSession() as session:
-            scrape_tasks = [_scrape_single_url(session, url, scrape_timeout) for url in resource_urls]
-            scrape_results = await asyncio.gather(*scrape_tasks, return_exceptions=True)
+        from backend.services.http_clients import get_http_session
+        session = await get_http_session("scraping")
+        scrape_tasks = [_scrape_single_url(session, url, scrape_timeout) for url in resource_urls]
+        scrape_results = await asyncio.gather(*scrape_tasks, return_exceptions=True)
 
         for i, result in enumerate(scrape_results):
             url = resource_urls[i]
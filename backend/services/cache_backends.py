@@ -0,0 +1,226 @@
+"""
+Small key/value caches with TTL and pluggable storage.
+
+Used for caches whose values are JSON-serialisable (search results, LLM
+responses, ...). Every cache has a namespace so several caches can share one
+SQLite file or Redis database.
+
+Backends:
+- memory: per-process LRU dictionary
+- sqlite: local file, survives restarts, shared by workers on one host
+- redis: shared by every worker and host using REDIS_URL
+
+Provides:
+- CacheBackend: common async interface with hit/miss counters
+- MemoryCacheBackend / SQLiteCacheBackend / RedisCacheBackend
+- create_cache_backend: build a backend from a name ("auto" picks Redis when REDIS_URL is set, else SQLite)
+"""
+from __future__ import annotations
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CACHE_SQLITE_PATH = os.environ.get(
+    "CACHE_SQLITE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "cache.db"),
+)
+CACHE_MEMORY_MAX_ENTRIES = int(os.environ.get("CACHE_MEMORY_MAX_ENTRIES", "10000"))
+
+
+class CacheBackend(ABC):
+    """Async TTL cache interface. Errors in a backend are logged and treated as misses."""
+
+    backend = "none"
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._stats = {"hits": 0, "misses": 0, "sets": 0, "errors": 0}
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            value = await self._get(key)
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Cache '{self.namespace}' ({self.backend}) read failed: {e}")
+            value = None
+        self._stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl_seconds: int) -> None:
+        try:
+            await self._set(key, value, ttl_seconds)
+            self._stats["sets"] += 1
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Cache '{self.namespace}' ({self.backend}) write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "backend": self.backend,
+            "namespace": self.namespace,
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+    @abstractmethod
+    async def _get(self, key: str) -> Optional[Any]:
+        """Stored value for ``key``, or None if it is missing or expired."""
+
+    @abstractmethod
+    async def _set(self, key: str, value: Any, ttl_seconds: int) -> None:
+        """Store ``value`` under ``key`` for ``ttl_seconds``."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU cache with per-entry expiry."""
+
+    backend = "memory"
+
+    def __init__(self, namespace: str, max_entries: int = CACHE_MEMORY_MAX_ENTRIES):
+        super().__init__(namespace)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def _get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def _set(self, key: str, value: Any, ttl_seconds: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """SQLite-backed cache; values are stored as JSON. Blocking calls run in the default executor."""
+
+    backend = "sqlite"
+
+    def __init__(self, namespace: str, path: str = CACHE_SQLITE_PATH):
+        super().__init__(namespace)
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS kv_cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_kv_cache_expires_at ON kv_cache (expires_at)")
+
+    def _get_sync(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM kv_cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                self._conn.execute("DELETE FROM kv_cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+                return None
+        return json.loads(row[0])
+
+    def _set_sync(self, key: str, value: Any, ttl_seconds: int) -> None:
+        payload = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv_cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, payload, now + ttl_seconds),
+            )
+            # Opportunistically purge expired rows so the file does not grow without bound
+            self._conn.execute("DELETE FROM kv_cache WHERE expires_at <= ?", (now,))
+
+    async def _get(self, key: str) -> Optional[Any]:
+        return await asyncio.get_running_loop().run_in_executor(None, self._get_sync, key)
+
+    async def _set(self, key: str, value: Any, ttl_seconds: int) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self._set_sync, key, value, ttl_seconds)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis-backed cache; values are stored as JSON strings with a native TTL."""
+
+    backend = "redis"
+
+    def __init__(self, namespace: str, redis_url: str):
+        super().__init__(namespace)
+        self.redis_url = redis_url
+        # redis.asyncio connections belong to the loop that opened them
+        self._clients: Dict[int, Any] = {}
+
+    def _client(self):
+        import redis.asyncio as redis
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(id(loop))
+        if client is None:
+            client = redis.from_url(self.redis_url, decode_responses=True)
+            self._clients[id(loop)] = client
+        return client
+
+    def _key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    async def _get(self, key: str) -> Optional[Any]:
+        raw = await self._client().get(self._key(key))
+        return json.loads(raw) if raw is not None else None
+
+    async def _set(self, key: str, value: Any, ttl_seconds: int) -> None:
+        await self._client().set(self._key(key), json.dumps(value), ex=max(1, int(ttl_seconds)))
+
+
+def create_cache_backend(namespace: str, backend: str = "auto", redis_url: Optional[str] = None) -> CacheBackend:
+    """
+    Build a cache backend by name.
+
+    "auto" uses Redis when REDIS_URL is set and SQLite otherwise. A SQLite file
+    that cannot be opened falls back to the in-memory backend.
+    """
+    backend = (backend or "auto").lower()
+    redis_url = redis_url if redis_url is not None else os.getenv("REDIS_URL")
+    if backend == "redis" or (backend == "auto" and redis_url):
+        if redis_url:
+            return RedisCacheBackend(namespace, redis_url)
+        logger.warning(f"Redis cache requested for '{namespace}' but REDIS_URL is not set; using SQLite.")
+        backend = "sqlite"
+    if backend in ("sqlite", "auto"):
+        try:
+            return SQLiteCacheBackend(namespace)
+        except Exception as e:
+            logger.error(f"Failed to open SQLite cache at {CACHE_SQLITE_PATH} for '{namespace}': {e}. Using memory cache.")
+    return MemoryCacheBackend(namespace)
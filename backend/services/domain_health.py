@@ -0,0 +1,241 @@
+"""
+Per-domain health tracking with circuit breaking for the scraper.
+
+Some hosts time out, answer 403 or serve encrypted PDFs on every request.
+``DomainHealthRegistry`` records outcome, latency and error class per host
+and opens a circuit for a host after repeated failures, so the scraper skips
+it immediately instead of paying the full scrape timeout. After the cool-down
+one probe request is let through (half-open); success closes the circuit,
+another failure re-opens it with a doubled cool-down. A probe that is cancelled
+or raises is released with ``release_probe``, and a probe that has not reported
+within the base cool-down is replaced by a new one, so a lost probe never
+leaves a host half-open for good.
+
+State is kept per process.
+
+Provides:
+- DomainHealthRegistry: the registry
+- domain_of: host key for a URL
+- get_domain_health_registry: process-wide registry (None when disabled)
+"""
+from __future__ import annotations
+
+import os
+import time
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DOMAIN_HEALTH_ENABLED = os.environ.get("DOMAIN_HEALTH_ENABLED", "true").lower() == "true"
+# Consecutive failures that open a host's circuit
+DOMAIN_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("DOMAIN_CIRCUIT_FAILURE_THRESHOLD", "3"))
+DOMAIN_CIRCUIT_COOLDOWN_SECONDS = float(os.environ.get("DOMAIN_CIRCUIT_COOLDOWN_SECONDS", "600"))
+DOMAIN_CIRCUIT_MAX_COOLDOWN_SECONDS = float(os.environ.get("DOMAIN_CIRCUIT_MAX_COOLDOWN_SECONDS", str(6 * 60 * 60)))
+# Upper bound on tracked hosts; the least recently seen are forgotten first
+DOMAIN_HEALTH_MAX_HOSTS = int(os.environ.get("DOMAIN_HEALTH_MAX_HOSTS", "5000"))
+
+# Error classes that say something about the host rather than the specific URL
+CIRCUIT_ERROR_CLASSES = {"timeout", "network", "http_403", "http_429", "http_5xx", "encrypted_pdf"}
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def domain_of(url: str) -> str:
+    """Lower-cased host of ``url`` without a leading ``www.``."""
+    try:
+        host = (urlsplit(url).hostname or "").lower()
+    except ValueError:
+        return ""
+    return host[4:] if host.startswith("www.") else host
+
+
+@dataclass
+class DomainStats:
+    """Counters and circuit state for a single host."""
+    requests: int = 0
+    successes: int = 0
+    failures: int = 0
+    skipped: int = 0
+    consecutive_failures: int = 0
+    total_seconds: float = 0.0
+    ewma_latency: Optional[float] = None
+    errors: Counter = field(default_factory=Counter)
+    state: str = CLOSED
+    open_until: float = 0.0
+    probe_deadline: float = 0.0
+    cooldown: float = 0.0
+    last_seen: float = 0.0
+
+    def as_dict(self, host: str, now: float) -> Dict[str, Any]:
+        return {
+            "domain": host,
+            "state": self.state,
+            "requests": self.requests,
+            "successes": self.successes,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "success_rate": round(self.successes / self.requests, 3) if self.requests else None,
+            "consecutive_failures": self.consecutive_failures,
+            "avg_latency_ms": round(self.ewma_latency * 1000) if self.ewma_latency is not None else None,
+            "time_spent_seconds": round(self.total_seconds, 2),
+            "errors": dict(self.errors),
+            "reopens_in_seconds": round(self.open_until - now, 1) if self.state == OPEN else None,
+        }
+
+
+class DomainHealthRegistry:
+    """Thread-safe per-host health registry with a circuit breaker per host."""
+
+    def __init__(
+        self,
+        failure_threshold: int = DOMAIN_CIRCUIT_FAILURE_THRESHOLD,
+        cooldown_seconds: float = DOMAIN_CIRCUIT_COOLDOWN_SECONDS,
+        max_cooldown_seconds: float = DOMAIN_CIRCUIT_MAX_COOLDOWN_SECONDS,
+        max_hosts: int = DOMAIN_HEALTH_MAX_HOSTS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self.max_hosts = max_hosts
+        self._hosts: Dict[str, DomainStats] = {}
+        self._lock = threading.Lock()
+
+    def _stats_for(self, host: str, now: float) -> DomainStats:
+        stats = self._hosts.get(host)
+        if stats is None:
+            if len(self._hosts) >= self.max_hosts:
+                oldest = min(self._hosts, key=lambda h: self._hosts[h].last_seen)
+                del self._hosts[oldest]
+            stats = DomainStats()
+            self._hosts[host] = stats
+        stats.last_seen = now
+        return stats
+
+    def allow(self, host: str) -> bool:
+        """
+        Whether a request to ``host`` should be attempted.
+
+        An open circuit whose cool-down has elapsed moves to half-open and lets exactly
+        one probe through; further requests are skipped until that probe is recorded,
+        or until ``cooldown_seconds`` pass without a result and another probe is let through.
+        """
+        if not host:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            stats = self._hosts.get(host)
+            if stats is None or stats.state == CLOSED:
+                return True
+            if stats.state == OPEN and now >= stats.open_until:
+                stats.state = HALF_OPEN
+                stats.probe_deadline = now + self.cooldown_seconds
+                logger.info(f"Domain circuit half-open for {host}; sending a probe request")
+                return True
+            if stats.state == HALF_OPEN and now >= stats.probe_deadline:
+                stats.probe_deadline = now + self.cooldown_seconds
+                logger.info(f"Probe for {host} did not report within {self.cooldown_seconds:.0f}s; sending another")
+                return True
+            stats.skipped += 1
+            return False
+
+    def release_probe(self, host: str) -> None:
+        """
+        Give up a probe that ended without an outcome (cancelled or raised).
+
+        The circuit returns to open with its cool-down already elapsed, so the next
+        request becomes the new probe. No-op unless the host is half-open.
+        """
+        if not host:
+            return
+        with self._lock:
+            stats = self._hosts.get(host)
+            if stats is not None and stats.state == HALF_OPEN:
+                stats.state = OPEN
+                stats.open_until = time.monotonic()
+                logger.debug(f"Probe for {host} ended without a result; circuit back to open")
+
+    def record(self, host: str, success: bool, latency: float, error_class: Optional[str] = None) -> None:
+        """Record the outcome of a request to ``host``."""
+        if not host:
+            return
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats_for(host, now)
+            stats.requests += 1
+            stats.total_seconds += latency
+            stats.ewma_latency = latency if stats.ewma_latency is None else 0.8 * stats.ewma_latency + 0.2 * latency
+            if error_class:
+                stats.errors[error_class] += 1
+
+            if success or error_class not in CIRCUIT_ERROR_CLASSES:
+                if success:
+                    stats.successes += 1
+                else:
+                    stats.failures += 1
+                stats.consecutive_failures = 0
+                if stats.state != CLOSED:
+                    logger.info(f"Domain circuit closed for {host}")
+                stats.state = CLOSED
+                stats.cooldown = 0.0
+                return
+
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            if stats.state == HALF_OPEN or stats.consecutive_failures >= self.failure_threshold:
+                stats.cooldown = (
+                    min(self.max_cooldown_seconds, stats.cooldown * 2) if stats.cooldown else self.cooldown_seconds
+                )
+                stats.state = OPEN
+                stats.open_until = now + stats.cooldown
+                logger.warning(
+                    f"Domain circuit opened for {host} for {stats.cooldown:.0f}s after "
+                    f"{stats.consecutive_failures} consecutive failures (last: {error_class})"
+                )
+
+    def reset(self, host: Optional[str] = None) -> bool:
+        """Forget one host (or all hosts when ``host`` is None). Returns False for unknown hosts."""
+        with self._lock:
+            if host is None:
+                self._hosts.clear()
+                return True
+            return self._hosts.pop(host, None) is not None
+
+    def snapshot(self, limit: int = 50, sort_by: str = "time_spent_seconds", state: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-host statistics sorted descending by ``sort_by``, optionally filtered by circuit state."""
+        now = time.monotonic()
+        with self._lock:
+            rows = [s.as_dict(host, now) for host, s in self._hosts.items() if state is None or s.state == state]
+        rows.sort(key=lambda row: row.get(sort_by) or 0, reverse=True)
+        return rows[:limit]
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            states = Counter(s.state for s in self._hosts.values())
+            return {
+                "tracked_domains": len(self._hosts),
+                "open_circuits": states.get(OPEN, 0),
+                "half_open_circuits": states.get(HALF_OPEN, 0),
+                "skipped_requests": sum(s.skipped for s in self._hosts.values()),
+            }
+
+
+_domain_health_registry: Optional[DomainHealthRegistry] = None
+_domain_health_lock = threading.Lock()
+
+
+def get_domain_health_registry() -> Optional[DomainHealthRegistry]:
+    """Return the process-wide registry, or None when DOMAIN_HEALTH_ENABLED is false."""
+    global _domain_health_registry
+    if not DOMAIN_HEALTH_ENABLED:
+        return None
+    if _domain_health_registry is None:
+        with _domain_health_lock:
+            if _domain_health_registry is None:
+                _domain_health_registry = DomainHealthRegistry()
+    return _domain_health_registry
@@ -0,0 +1,575 @@
+"""
+CPU-bound content extraction for scraped pages.
+
+HTML (trafilatura / BeautifulSoup) and PDF (PyMuPDF) extraction are pure
+functions that run in a bounded ``ProcessPoolExecutor`` so that parsing large
+documents never blocks the API event loop and scales across cores.
+
+Provides:
+- extract_html_text: synchronous HTML -> cleaned text extraction
+- extract_pdf_text: synchronous PDF -> cleaned text extraction (page and character budget)
+- extract_pdf_page_range / pdf_page_count: building blocks for splitting large PDFs across workers
+- ExtractionTimeoutError: raised when a job exceeds its time budget
+- ExtractionEngine: bounded executor wrapper with per-job timeout and queue metrics
+- get_extraction_engine: factory returning the process-wide engine
+"""
+from __future__ import annotations
+
+import io
+import os
+import re
+import time
+import asyncio
+import logging
+import weakref
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, Executor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple, Dict, Any, Callable, List
+
+import fitz
+import trafilatura
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+# Minimum content length threshold for Trafilatura fallback
+TRAFILATURA_MIN_LENGTH_FALLBACK = 100
+# Percentage of page height to consider as header/footer margin in PDF
+PDF_HEADER_MARGIN_PERCENT = 0.10 # 10%
+PDF_FOOTER_MARGIN_PERCENT = 0.10 # 10%
+
+# PDF page budget: stop after this many pages or once the character budget is reached
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", "200"))
+# Matches MAX_SCRAPE_LENGTH in services.py; text beyond it would be truncated anyway
+PDF_MAX_CHARS = int(os.environ.get("PDF_MAX_CHARS", "100000"))
+# PDFs at least this large (bytes and pages) are split into page ranges across workers
+PDF_PARALLEL_MIN_BYTES = int(os.environ.get("PDF_PARALLEL_MIN_BYTES", str(1024 * 1024)))
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", "40"))
+# Smallest page range handed to a single worker
+PDF_MIN_PAGES_PER_JOB = int(os.environ.get("PDF_MIN_PAGES_PER_JOB", "10"))
+
+# Engine configuration
+# "process" (default) uses a ProcessPoolExecutor, "thread" a ThreadPoolExecutor,
+# "inline" runs extraction directly on the event loop with no timeout (debugging only)
+EXTRACTION_BACKEND = os.environ.get("EXTRACTION_BACKEND", "process").lower()
+EXTRACTION_WORKERS = int(os.environ.get("EXTRACTION_WORKERS", str(max(1, min(4, os.cpu_count() or 1)))))
+EXTRACTION_JOB_TIMEOUT_SECONDS = float(os.environ.get("EXTRACTION_JOB_TIMEOUT_SECONDS", "30"))
+# Jobs allowed to wait for a free worker before callers are held back
+EXTRACTION_MAX_QUEUE_DEPTH = int(os.environ.get("EXTRACTION_MAX_QUEUE_DEPTH", "32"))
+EXTRACTION_MP_START_METHOD = os.environ.get("EXTRACTION_MP_START_METHOD", "spawn")
+
+
+def _clean_extracted_text(text: str) -> str:
+    """Normalise whitespace around newlines and collapse blank lines."""
+    clean_text = re.sub(r'[ \t]*\n[ \t]*', '\n', text)
+    return re.sub(r'\n{3,}', '\n\n', clean_text).strip()
+
+
+def extract_html_text(html_content: str, source_url: str) -> Tuple[Optional[str], Optional[str], str]:
+    """Extract cleaned text from an HTML document.
+
+    Uses Trafilatura first and falls back to a BeautifulSoup main-content
+    heuristic when Trafilatura yields too little text.
+
+    Designed to be run in a process pool.
+
+    Args:
+        html_content: The decoded HTML document.
+        source_url: The original URL for logging context.
+
+    Returns:
+        A tuple (clean_text, error_message, extraction_method_used).
+        clean_text is None or empty when nothing could be extracted.
+    """
+    extraction_method_used = "trafilatura" # Default assumption
+    clean_text: Optional[str] = None
+    error_message: Optional[str] = None
+
+    # Attempt extraction with Trafilatura first
+    extracted_text = trafilatura.extract(
+        html_content,
+        include_comments=False, # Don't include comments
+        include_tables=True,    # Include table content if relevant
+        # favor_recall=True,    # Consider if more content is desired at risk of noise
+    )
+
+    # Check if Trafilatura result is usable
+    if extracted_text and len(extracted_text) >= TRAFILATURA_MIN_LENGTH_FALLBACK:
+        clean_text = extracted_text
+        logger.debug(f"Using Trafilatura extracted content for {source_url}")
+    else:
+        # Fallback to BeautifulSoup method if Trafilatura failed or got too little
+        extraction_method_used = "beautifulsoup_fallback"
+        logger.warning(f"Trafilatura yielded insufficient content (<{TRAFILATURA_MIN_LENGTH_FALLBACK} chars) for {source_url}. Falling back to BeautifulSoup.")
+        soup = BeautifulSoup(html_content, 'lxml') # Use lxml parser
+        # Remove common noise tags more aggressively
+        for tag in soup(['script', 'style', 'nav', 'footer', 'aside', 'header', 'form', 'button', 'input', 'textarea', 'select', 'option', 'label', 'iframe', 'noscript', 'figure', 'figcaption']):
+            tag.decompose()
+
+        # Find main content areas (add more selectors if needed)
+        main_content = soup.find('main') or \
+                       soup.find('article') or \
+                       soup.find('div', role='main') or \
+                       soup.find('div', id='content') or \
+                       soup.find('div', class_=re.compile(r'\b(content|main|body|article)\b', re.I)) # More flexible class search
+
+        target_element = main_content if main_content else soup.find('body')
+
+        if target_element:
+            clean_text = target_element.get_text(separator='\n', strip=True)
+        else:
+            # Extremely unlikely fallback
+            logger.error(f"Could not find body or main content element for HTML fallback: {source_url}")
+            clean_text = None # Mark as failure
+            error_message = "HTML parsing failed: No body/main element found"
+
+    # Apply final cleaning steps to text from either method
+    if clean_text:
+        clean_text = _clean_extracted_text(clean_text)
+
+    return clean_text, error_message, extraction_method_used
+
+
+def _extract_page_text(page: "fitz.Page") -> Tuple[str, str]:
+    """Extract one page in a single pass.
+
+    Uses block analysis (header/footer filtering, reading-order sort) and falls
+    back to plain page text for this page only when block analysis finds nothing.
+
+    Returns:
+        (page_text, method) where method is "block_analysis" or "page_text_fallback".
+    """
+    page_rect = page.rect
+    page_height = page_rect.height
+    header_limit = page_rect.y0 + page_height * PDF_HEADER_MARGIN_PERCENT
+    footer_limit = page_rect.y1 - page_height * PDF_FOOTER_MARGIN_PERCENT
+
+    blocks = page.get_text("blocks", sort=False) # Get blocks with coordinates, no initial sort
+
+    # Filter headers/footers and empty blocks
+    filtered_blocks = [
+        b for b in blocks
+        if b[1] >= header_limit and b[3] <= footer_limit and b[4].strip() # y0>=header, y1<=footer, text exists
+    ]
+    if filtered_blocks:
+        # Sort by reading order (top-to-bottom, left-to-right)
+        filtered_blocks.sort(key=lambda b: (b[1], b[0])) # Sort by y0, then x0
+        return "\n".join(b[4].strip() for b in filtered_blocks), "block_analysis"
+
+    return page.get_text("text", sort=True).strip(), "page_text_fallback"
+
+
+def _extract_pages(doc: "fitz.Document", start: int, end: int, max_chars: int, source_url: str) -> List[str]:
+    """Extract pages ``[start, end)`` of an open document, stopping once ``max_chars`` is reached."""
+    page_texts: List[str] = []
+    total_chars = 0
+    for page_num in range(start, end):
+        try:
+            page_text, _ = _extract_page_text(doc.load_page(page_num))
+        except Exception as page_err:
+            logger.error(f"Error extracting page {page_num+1} of PDF {source_url}: {page_err}", exc_info=False)
+            continue
+        if page_text:
+            page_texts.append(page_text)
+            total_chars += len(page_text)
+            if total_chars >= max_chars:
+                logger.debug(f"PDF character budget ({max_chars}) reached at page {page_num+1} for {source_url}")
+                break
+    return page_texts
+
+
+def _open_pdf(pdf_bytes: bytes, source_url: str) -> "fitz.Document":
+    doc = fitz.open(stream=io.BytesIO(pdf_bytes), filetype="pdf")
+    if doc.is_encrypted:
+        doc.close()
+        logger.warning(f"Skipping encrypted PDF: {source_url}")
+        raise ValueError("PDF is encrypted")
+    return doc
+
+
+def pdf_page_count(pdf_bytes: bytes, source_url: str) -> int:
+    """Return the number of pages of a PDF.
+
+    Designed to be run in a process pool.
+
+    Raises:
+        ValueError: If the PDF is encrypted.
+        fitz.fitz.FileDataError: If the PDF data is corrupted or invalid.
+    """
+    with _open_pdf(pdf_bytes, source_url) as doc:
+        return len(doc)
+
+
+def extract_pdf_page_range(pdf_bytes: bytes, source_url: str, start: int, end: int, max_chars: int = PDF_MAX_CHARS) -> List[str]:
+    """Extract the text of pages ``[start, end)`` of a PDF, one string per non-empty page.
+
+    Used to split large documents across the process pool.
+
+    Designed to be run in a process pool.
+    """
+    try:
+        with _open_pdf(pdf_bytes, source_url) as doc:
+            return _extract_pages(doc, start, min(end, len(doc)), max_chars, source_url)
+    except (fitz.fitz.FileDataError, ValueError) as e:
+        logger.error(f"Failed to process PDF {source_url}: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during PDF processing for {source_url}: {type(e).__name__} - {e}", exc_info=True)
+        raise RuntimeError(f"Unexpected error during PDF processing: {type(e).__name__}") from e
+
+
+def join_pdf_pages(page_texts: List[str]) -> str:
+    """Join extracted pages with blank lines and clean the result."""
+    all_text_content = "\n\n".join(page_texts) # Join pages with double newline
+    return _clean_extracted_text(all_text_content) if all_text_content else ""
+
+
+def extract_pdf_text(
+    pdf_bytes: bytes,
+    source_url: str,
+    max_pages: int = PDF_MAX_PAGES,
+    max_chars: int = PDF_MAX_CHARS,
+) -> str:
+    """Extract text from PDF bytes using PyMuPDF block analysis.
+
+    Reads each page once: block analysis filters headers/footers and sorts blocks
+    by reading order, and pages where it finds nothing fall back to simple page
+    text. Stops after ``max_pages`` pages or once ``max_chars`` characters have
+    been collected.
+
+    Designed to be run in a process pool.
+
+    Args:
+        pdf_bytes: The byte content of the PDF file.
+        source_url: The original URL for logging context.
+        max_pages: Maximum number of pages to read.
+        max_chars: Character budget; extraction stops once it is reached.
+
+    Returns:
+        The extracted and cleaned text content.
+
+    Raises:
+        ValueError: If the PDF is encrypted.
+        fitz.fitz.FileDataError: If the PDF data is corrupted or invalid.
+        RuntimeError: For other PyMuPDF or general exceptions during processing.
+    """
+    logger.debug(f"Starting PDF text extraction for {source_url}")
+    page_texts = extract_pdf_page_range(pdf_bytes, source_url, 0, max_pages, max_chars)
+    clean_text = join_pdf_pages(page_texts)
+    if clean_text:
+        logger.debug(f"Successfully extracted text from PDF ({len(page_texts)} pages): {source_url}")
+    else:
+        logger.warning(f"No text could be extracted from PDF {source_url} using any method.")
+    return clean_text
+
+
+class ExtractionTimeoutError(Exception):
+    """Raised when an extraction job does not finish within its time budget."""
+
+
+class ExtractionEngine:
+    """
+    Bounded executor for CPU-heavy extraction jobs.
+
+    Jobs are admitted through a semaphore sized ``max_workers + max_queue_depth``
+    (callers beyond that are held back), and an admitted job is only submitted once
+    one of ``max_workers`` worker slots is free, so jobs queue in the event loop
+    rather than inside the pool. Each job is bounded by ``job_timeout`` seconds,
+    counted from submission, so time spent waiting for a worker never counts.
+
+    A job that times out or whose caller is cancelled cannot be interrupted in a
+    thread, so its worker slot stays taken until the job actually finishes. With
+    the process backend a timed-out job's pool is restarted instead, which kills
+    the stuck worker (other jobs running on that pool are retried once).
+
+    The "inline" backend runs jobs on the event loop itself, without a timeout;
+    it exists for debugging only.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = EXTRACTION_WORKERS,
+        job_timeout: float = EXTRACTION_JOB_TIMEOUT_SECONDS,
+        max_queue_depth: int = EXTRACTION_MAX_QUEUE_DEPTH,
+        backend: str = EXTRACTION_BACKEND,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.job_timeout = job_timeout
+        self.max_queue_depth = max(0, max_queue_depth)
+        self.backend = backend
+        if backend == "inline":
+            logger.warning("Extraction engine uses the inline backend: jobs block the event loop and have no timeout")
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+        # Semaphores are bound to an event loop: (admission, worker slots) per loop, dropped with the loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[asyncio.Semaphore, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._metrics_lock = threading.Lock()
+        self._waiting = 0
+        self._queued = 0
+        self._in_flight = 0
+        self._peak_queue_depth = 0
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "timeouts": 0, "pool_restarts": 0}
+        self._job_seconds: Dict[str, float] = {}
+        self._job_counts: Dict[str, int] = {}
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self.backend == "inline":
+            return None
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    if self.backend == "thread":
+                        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="extraction")
+                    else:
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.max_workers,
+                            mp_context=multiprocessing.get_context(EXTRACTION_MP_START_METHOD),
+                        )
+                    logger.info(f"Extraction engine started ({self.backend}, {self.max_workers} workers)")
+        return self._executor
+
+    def _reset_executor(self, broken: Optional[Executor] = None, terminate: bool = False) -> None:
+        """
+        Drop the executor (only if it is still ``broken``, when given) so the next job starts a new one.
+
+        With ``terminate`` the worker processes are killed, which is the only way to stop
+        a job that is already running.
+        """
+        with self._executor_lock:
+            executor = self._executor
+            if executor is None or (broken is not None and executor is not broken):
+                return
+            processes = list((getattr(executor, "_processes", None) or {}).values()) if terminate else []
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    def _get_semaphores(self) -> Tuple[asyncio.Semaphore, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        semaphores = self._semaphores.get(loop)
+        if semaphores is None:
+            semaphores = (asyncio.Semaphore(self.max_workers + self.max_queue_depth), asyncio.Semaphore(self.max_workers))
+            self._semaphores[loop] = semaphores
+        return semaphores
+
+    def _queue_depth_locked(self) -> int:
+        return self._waiting + self._queued
+
+    async def _submit_and_wait(self, executor: Executor, func: Callable, args: tuple, job: List[Future]) -> Any:
+        future = executor.submit(func, *args)
+        job[0] = future
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.job_timeout)
+
+    def _release_worker(self, loop: asyncio.AbstractEventLoop, worker_slots: asyncio.Semaphore) -> None:
+        with self._metrics_lock:
+            self._in_flight -= 1
+        try:
+            loop.call_soon_threadsafe(worker_slots.release)
+        except RuntimeError:
+            # The loop is closed; its semaphores went with it
+            pass
+
+    def _abandon(self, future: Optional[Future], executor: Optional[Executor], timed_out: bool,
+                 worker_slots: asyncio.Semaphore) -> bool:
+        """
+        Deal with a job whose caller stopped waiting. Returns True if its worker slot can be released now.
+
+        A job that has not started is cancelled. A running job's slot is held until the job ends,
+        except for timed-out process jobs, whose pool is restarted to kill the stuck worker.
+        """
+        if future is None or future.done() or future.cancel():
+            return True
+        if timed_out and isinstance(executor, ProcessPoolExecutor):
+            logger.warning("Restarting the extraction process pool to stop a timed-out job")
+            self._reset_executor(broken=executor, terminate=True)
+            with self._metrics_lock:
+                self._counters["pool_restarts"] += 1
+            return True
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: self._release_worker(loop, worker_slots))
+        return False
+
+    async def run(self, kind: str, func: Callable, *args) -> Any:
+        """
+        Run ``func(*args)`` on the engine's executor.
+
+        Args:
+            kind: Job label used for metrics (e.g. "html", "pdf").
+            func: A picklable top-level function.
+            *args: Arguments passed to ``func``.
+
+        Returns:
+            The function's return value.
+
+        Raises:
+            ExtractionTimeoutError: If the job exceeds ``job_timeout``.
+            Exception: Any exception raised by ``func``.
+        """
+        with self._metrics_lock:
+            self._waiting += 1
+            self._peak_queue_depth = max(self._peak_queue_depth, self._queue_depth_locked())
+        admission, worker_slots = self._get_semaphores()
+        try:
+            await admission.acquire()
+        finally:
+            with self._metrics_lock:
+                self._waiting -= 1
+
+        try:
+            with self._metrics_lock:
+                self._queued += 1
+                self._peak_queue_depth = max(self._peak_queue_depth, self._queue_depth_locked())
+            try:
+                await worker_slots.acquire()
+            finally:
+                with self._metrics_lock:
+                    self._queued -= 1
+            return await self._run_in_worker_slot(kind, func, args, worker_slots)
+        finally:
+            admission.release()
+
+    async def _run_in_worker_slot(self, kind: str, func: Callable, args: tuple, worker_slots: asyncio.Semaphore) -> Any:
+        start = time.monotonic()
+        with self._metrics_lock:
+            self._in_flight += 1
+            self._counters["submitted"] += 1
+        release_slot = True
+        executor = None
+        job: List[Optional[Future]] = [None]
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                result = func(*args)
+            else:
+                try:
+                    result = await self._submit_and_wait(executor, func, args, job)
+                except BrokenProcessPool:
+                    logger.error("Extraction process pool is broken, restarting it and retrying job once")
+                    self._reset_executor(broken=executor)
+                    executor = self._get_executor()
+                    result = await self._submit_and_wait(executor, func, args, job)
+            with self._metrics_lock:
+                self._counters["completed"] += 1
+            return result
+        except asyncio.TimeoutError:
+            with self._metrics_lock:
+                self._counters["timeouts"] += 1
+            release_slot = self._abandon(job[0], executor, True, worker_slots)
+            raise ExtractionTimeoutError(f"{kind} extraction timed out after {self.job_timeout}s")
+        except asyncio.CancelledError:
+            release_slot = self._abandon(job[0], executor, False, worker_slots)
+            raise
+        except Exception:
+            with self._metrics_lock:
+                self._counters["failed"] += 1
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            with self._metrics_lock:
+                self._job_seconds[kind] = self._job_seconds.get(kind, 0.0) + elapsed
+                self._job_counts[kind] = self._job_counts.get(kind, 0) + 1
+                if release_slot:
+                    self._in_flight -= 1
+            if release_slot:
+                worker_slots.release()
+
+    async def extract_html(self, html_content: str, source_url: str) -> Tuple[Optional[str], Optional[str], str]:
+        """Run ``extract_html_text`` on the engine."""
+        return await self.run("html", extract_html_text, html_content, source_url)
+
+    async def extract_pdf(self, pdf_bytes: bytes, source_url: str) -> str:
+        """
+        Extract PDF text on the engine.
+
+        Small documents run as one ``extract_pdf_text`` job. Large ones (at least
+        PDF_PARALLEL_MIN_BYTES and PDF_PARALLEL_MIN_PAGES) are split into page ranges
+        that run on separate workers; ranges are consumed in page order and the
+        remaining ones are cancelled once the character budget is met.
+        """
+        if self.backend == "inline" or self.max_workers < 2 or len(pdf_bytes) < PDF_PARALLEL_MIN_BYTES:
+            return await self.run("pdf", extract_pdf_text, pdf_bytes, source_url)
+
+        page_count = min(await self.run("pdf_plan", pdf_page_count, pdf_bytes, source_url), PDF_MAX_PAGES)
+        if page_count < PDF_PARALLEL_MIN_PAGES:
+            return await self.run("pdf", extract_pdf_text, pdf_bytes, source_url)
+
+        jobs = max(1, min(self.max_workers, page_count // max(1, PDF_MIN_PAGES_PER_JOB)))
+        pages_per_job = -(-page_count // jobs)  # ceil division
+        ranges = [(start, min(start + pages_per_job, page_count)) for start in range(0, page_count, pages_per_job)]
+        logger.debug(f"Splitting {page_count}-page PDF {source_url} into {len(ranges)} page ranges")
+
+        tasks = [
+            asyncio.ensure_future(self.run("pdf_range", extract_pdf_page_range, pdf_bytes, source_url, start, end))
+            for start, end in ranges
+        ]
+        page_texts: List[str] = []
+        total_chars = 0
+        try:
+            for task in tasks:
+                for page_text in await task:
+                    page_texts.append(page_text)
+                    total_chars += len(page_text)
+                    if total_chars >= PDF_MAX_CHARS:
+                        break
+                if total_chars >= PDF_MAX_CHARS:
+                    break
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return join_pdf_pages(page_texts)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return queue depth, throughput and per-kind timing metrics."""
+        with self._metrics_lock:
+            return {
+                "backend": self.backend,
+                "max_workers": self.max_workers,
+                "max_queue_depth": self.max_queue_depth,
+                "job_timeout_seconds": self.job_timeout,
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "queued": self._queued,
+                "queue_depth": self._queue_depth_locked(),
+                "peak_queue_depth": self._peak_queue_depth,
+                **self._counters,
+                "avg_job_seconds": {
+                    kind: round(self._job_seconds[kind] / self._job_counts[kind], 4)
+                    for kind in self._job_counts if self._job_counts[kind]
+                },
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the underlying executor."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+                logger.info("Extraction engine shut down")
+
+
+_extraction_engine: Optional[ExtractionEngine] = None
+_extraction_engine_lock = threading.Lock()
+
+
+def get_extraction_engine() -> ExtractionEngine:
+    """Return the process-wide extraction engine, creating it on first use."""
+    global _extraction_engine
+    if _extraction_engine is None:
+        with _extraction_engine_lock:
+            if _extraction_engine is None:
+                _extraction_engine = ExtractionEngine()
+    return _extraction_engine
+
+
+def shutdown_extraction_engine() -> None:
+    """Shut down the process-wide extraction engine if it was started."""
+    if _extraction_engine is not None:
+        _extraction_engine.shutdown()
@@ -0,0 +1,140 @@
+"""
+Shared, pooled HTTP clients for outbound requests.
+
+A single course generation issues hundreds of requests (Brave Search,
+scraping, Wikimedia, ...). Creating a fresh client per call pays a new TCP
+and TLS handshake every time. This module keeps long-lived, named clients
+with per-host connection limits, keep-alive and DNS caching, and closes
+them on application shutdown.
+
+Clients are bound to the event loop that created them, so the registry keeps
+one set per loop (scripts and tests that call ``asyncio.run`` repeatedly get
+fresh clients automatically).
+
+Provides:
+- get_http_session: shared ``aiohttp.ClientSession`` by name
+- get_httpx_client: shared ``httpx.AsyncClient`` by name
+- close_http_clients: close every client owned by the running loop
+- http_client_stats: summary of open clients
+"""
+from __future__ import annotations
+
+import os
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+import aiohttp
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+HTTP_POOL_LIMIT = int(os.environ.get("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.environ.get("HTTP_POOL_LIMIT_PER_HOST", "8"))
+HTTP_DNS_CACHE_TTL_SECONDS = int(os.environ.get("HTTP_DNS_CACHE_TTL_SECONDS", "300"))
+HTTP_KEEPALIVE_SECONDS = float(os.environ.get("HTTP_KEEPALIVE_SECONDS", "30"))
+
+# (loop id, client name) -> (loop, client)
+_aiohttp_sessions: Dict[Tuple[int, str], Tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession]] = {}
+_httpx_clients: Dict[Tuple[int, str], Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+
+def _prune_dead_loops() -> None:
+    """Forget clients whose event loop has been closed."""
+    for registry in (_aiohttp_sessions, _httpx_clients):
+        for key in [k for k, (loop, _) in registry.items() if loop.is_closed()]:
+            registry.pop(key, None)
+
+
+async def get_http_session(name: str = "default") -> aiohttp.ClientSession:
+    """
+    Return the shared aiohttp session registered under ``name`` for the running loop.
+
+    Callers must NOT close the returned session; it is closed by ``close_http_clients``.
+
+    Args:
+        name: Logical client name (e.g. "scraping", "brave"). Each name gets its own
+              connection pool so one workload cannot starve another.
+
+    Returns:
+        An open ``aiohttp.ClientSession``.
+    """
+    loop = asyncio.get_running_loop()
+    key = (id(loop), name)
+    entry = _aiohttp_sessions.get(key)
+    if entry is not None and entry[0] is loop and not entry[1].closed:
+        return entry[1]
+
+    _prune_dead_loops()
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        use_dns_cache=True,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL_SECONDS,
+        keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+    )
+    session = aiohttp.ClientSession(connector=connector)
+    _aiohttp_sessions[key] = (loop, session)
+    logger.debug(f"Created shared aiohttp session '{name}'")
+    return session
+
+
+async def get_httpx_client(name: str = "default", headers: Optional[Dict[str, str]] = None) -> httpx.AsyncClient:
+    """
+    Return the shared httpx client registered under ``name`` for the running loop.
+
+    ``headers`` are applied only when the client is first created; use a distinct
+    ``name`` for clients that need different default headers.
+
+    Callers must NOT close the returned client; it is closed by ``close_http_clients``.
+    """
+    loop = asyncio.get_running_loop()
+    key = (id(loop), name)
+    entry = _httpx_clients.get(key)
+    if entry is not None and entry[0] is loop and not entry[1].is_closed:
+        return entry[1]
+
+    _prune_dead_loops()
+    client = httpx.AsyncClient(
+        headers=headers,
+        limits=httpx.Limits(
+            max_connections=HTTP_POOL_LIMIT,
+            max_keepalive_connections=HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+        ),
+    )
+    _httpx_clients[key] = (loop, client)
+    logger.debug(f"Created shared httpx client '{name}'")
+    return client
+
+
+async def close_http_clients() -> None:
+    """Close every shared client created on the running loop."""
+    loop = asyncio.get_running_loop()
+    for key in [k for k, (owner, _) in _aiohttp_sessions.items() if owner is loop]:
+        _, session = _aiohttp_sessions.pop(key)
+        try:
+            await session.close()
+        except Exception as e:
+            logger.warning(f"Error closing aiohttp session '{key[1]}': {e}")
+    for key in [k for k, (owner, _) in _httpx_clients.items() if owner is loop]:
+        _, client = _httpx_clients.pop(key)
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing httpx client '{key[1]}': {e}")
+    _prune_dead_loops()
+    logger.info("Shared HTTP clients closed")
+
+
+def http_client_stats() -> Dict[str, Any]:
+    """Return the names of open shared clients and pool configuration."""
+    return {
+        "aiohttp_sessions": sorted(name for (_, name), (_, s) in _aiohttp_sessions.items() if not s.closed),
+        "httpx_clients": sorted(name for (_, name), (_, c) in _httpx_clients.items() if not c.is_closed),
+        "limit": HTTP_POOL_LIMIT,
+        "limit_per_host": HTTP_POOL_LIMIT_PER_HOST,
+        "dns_cache_ttl_seconds": HTTP_DNS_CACHE_TTL_SECONDS,
+        "keepalive_seconds": HTTP_KEEPALIVE_SECONDS,
+    }
@@ -4,6 +4,8 @@ from typing import Any, Dict, List, Optional
 
 import httpx
 
+from backend.services.http_clients import get_httpx_client
+
 logger = logging.getLogger("image_service.wikimedia")
 
 WIKIMEDIA_API_URL = "https://commons.wikimedia.org/w/api.php"
@@ -133,13 +135,13 @@ async def search_wikimedia_images(
         "uselang": language,
     }
 
-    async with httpx.AsyncClient(headers={"User-Agent": WIKIMEDIA_USER_AGENT}) as client:
-        data = await _fetch_json(client, params, timeout_seconds)
-        if not data:
-            return []
-        results = _filter_and_map_results(data)
-        # Limit to requested count
-        return results[: max(0, count)]
+    client = await get_httpx_client("wikimedia", headers={"User-Agent": WIKIMEDIA_USER_AGENT})
+    data = await _fetch_json(client, params, timeout_seconds)
+    if not data:
+        return []
+    results = _filter_and_map_results(data)
+    # Limit to requested count
+    return results[: max(0, count)]
 
 
 async def search_best_image(
@@ -0,0 +1,114 @@
+"""
+Content-addressed cache for LLM responses produced by ``run_chain``.
+
+The cache stores the raw text returned by the model, keyed on a hash of the
+model name, temperature, rendered prompt messages and output parser type.
+Parsing still runs on cached text, so a cached answer goes through exactly the
+same validation as a fresh one. Responses are only stored once they parsed
+successfully.
+
+Caching is opt-in (LLM_CACHE_ENABLED) and can be limited to specific call
+sites (LLM_CACHE_CALL_SITES), where a call site is "<module>.<function>" of the
+``run_chain`` caller, e.g. "evaluation.evaluate_submodule_content".
+
+Provides:
+- llm_cache_key: hash of the inputs that determine a response
+- call_site_enabled: whether caching applies to a call site
+- get_llm_response_cache: process-wide cache backend (None when disabled)
+- record_llm_cache_event / llm_cache_stats: per-call-site counters
+"""
+from __future__ import annotations
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional
+
+from backend.services.cache_backends import CacheBackend, create_cache_backend
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "false").lower() == "true"
+# auto (Redis when REDIS_URL is set, otherwise SQLite) | sqlite | redis | memory
+LLM_CACHE_BACKEND = os.environ.get("LLM_CACHE_BACKEND", "auto")
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", str(60 * 60 * 24 * 7)))
+# Comma-separated call sites to cache ("*" for all); LLM_CACHE_DISABLED_CALL_SITES wins over it
+LLM_CACHE_CALL_SITES = {s.strip() for s in os.environ.get("LLM_CACHE_CALL_SITES", "*").split(",") if s.strip()}
+LLM_CACHE_DISABLED_CALL_SITES = {
+    s.strip() for s in os.environ.get("LLM_CACHE_DISABLED_CALL_SITES", "").split(",") if s.strip()
+}
+
+# Bump when the cached payload or key format changes
+_KEY_VERSION = "v1"
+
+
+def parser_signature(parser: Any) -> str:
+    """Parser class plus, for Pydantic parsers, the target model name."""
+    target = getattr(parser, "pydantic_object", None)
+    name = type(parser).__name__
+    return f"{name}:{target.__name__}" if target is not None else name
+
+
+def llm_cache_key(model: str, temperature: Optional[float], messages: Iterable[Any], parser: Any) -> str:
+    """Hash of everything that determines a response: model, temperature, rendered prompt and parser."""
+    rendered = [(getattr(m, "type", "text"), getattr(m, "content", str(m))) for m in messages]
+    payload = json.dumps(
+        [_KEY_VERSION, model, temperature, rendered, parser_signature(parser)],
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def call_site_enabled(call_site: str) -> bool:
+    if call_site in LLM_CACHE_DISABLED_CALL_SITES:
+        return False
+    return "*" in LLM_CACHE_CALL_SITES or call_site in LLM_CACHE_CALL_SITES
+
+
+_llm_response_cache: Optional[CacheBackend] = None
+_llm_response_cache_lock = threading.Lock()
+
+
+def get_llm_response_cache() -> Optional[CacheBackend]:
+    """Return the LLM response cache, or None when LLM_CACHE_ENABLED is false."""
+    global _llm_response_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _llm_response_cache is None:
+        with _llm_response_cache_lock:
+            if _llm_response_cache is None:
+                _llm_response_cache = create_cache_backend("llm_responses", LLM_CACHE_BACKEND)
+                logger.info(f"LLM response cache initialized ({_llm_response_cache.backend}, ttl={LLM_CACHE_TTL_SECONDS}s)")
+    return _llm_response_cache
+
+
+_site_counters: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0, "stores": 0, "rejected": 0})
+_site_counters_lock = threading.Lock()
+
+
+def record_llm_cache_event(call_site: str, event: str) -> None:
+    """Count a cache event ("hits", "misses", "stores" or "rejected") for a call site."""
+    with _site_counters_lock:
+        _site_counters[call_site][event] += 1
+
+
+def llm_cache_stats() -> Dict[str, Any]:
+    """Global and per-call-site cache counters."""
+    with _site_counters_lock:
+        sites = {site: dict(counts) for site, counts in _site_counters.items()}
+    hits = sum(c["hits"] for c in sites.values())
+    lookups = hits + sum(c["misses"] for c in sites.values())
+    return {
+        "enabled": LLM_CACHE_ENABLED,
+        "backend": _llm_response_cache.backend if _llm_response_cache else None,
+        "ttl_seconds": LLM_CACHE_TTL_SECONDS,
+        "hits": hits,
+        "lookups": lookups,
+        "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        "call_sites": sites,
+    }
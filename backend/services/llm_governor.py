@@ -0,0 +1,386 @@
+"""
+Process-wide concurrency governor for LLM calls.
+
+Every generation fans out with its own ``parallel_count`` settings, so the
+number of in-flight Gemini calls grows with the number of users and ends in
+429 storms. ``LLMGovernor`` puts one adaptive concurrency limit in front of
+each model:
+
+- AIMD: a 429 halves the limit and every successful call raises it by 1/limit,
+  i.e. about one slot per "window" of calls. With LLM_GOVERNOR_LATENCY_BACKOFF,
+  a latency spike (a call much slower than the running average of its call
+  site) also lowers it by a fifth; short and long prompts are tracked apart.
+- Fair queueing: callers that have to wait are queued per task id (the active
+  generation) and slots are handed out round-robin across tasks, so one large
+  course cannot starve the others.
+- Optional Redis coordination: a 429 seen by one worker is published to Redis
+  and makes every other worker back off too.
+
+Provides:
+- ModelLimiter: adaptive limit and fair queue for one model
+- LLMGovernor: limiters per model, ``slot`` context manager
+- is_rate_limit_error: whether an exception is a provider throttle
+- get_llm_governor: process-wide governor (None when disabled)
+"""
+from __future__ import annotations
+
+import os
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from backend.core.generation_context import get_generation_context
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+LLM_GOVERNOR_ENABLED = os.environ.get("LLM_GOVERNOR_ENABLED", "true").lower() == "true"
+LLM_GOVERNOR_INITIAL_CONCURRENCY = float(os.environ.get("LLM_GOVERNOR_INITIAL_CONCURRENCY", "8"))
+LLM_GOVERNOR_MIN_CONCURRENCY = int(os.environ.get("LLM_GOVERNOR_MIN_CONCURRENCY", "1"))
+LLM_GOVERNOR_MAX_CONCURRENCY = int(os.environ.get("LLM_GOVERNOR_MAX_CONCURRENCY", "32"))
+# Also back off on latency spikes, not only on 429s (off by default: latency varies a lot with prompt size)
+LLM_GOVERNOR_LATENCY_BACKOFF = os.environ.get("LLM_GOVERNOR_LATENCY_BACKOFF", "false").lower() == "true"
+# A call slower than this multiple of its call site's average latency counts as a spike
+LLM_GOVERNOR_LATENCY_SPIKE_FACTOR = float(os.environ.get("LLM_GOVERNOR_LATENCY_SPIKE_FACTOR", "3.0"))
+# memory | redis | auto (redis when REDIS_URL is set); redis shares 429 back-off signals between workers
+LLM_GOVERNOR_BACKEND = os.environ.get("LLM_GOVERNOR_BACKEND", "auto").lower()
+LLM_GOVERNOR_REDIS_SYNC_SECONDS = float(os.environ.get("LLM_GOVERNOR_REDIS_SYNC_SECONDS", "2"))
+LLM_GOVERNOR_REDIS_PREFIX = os.environ.get("LLM_GOVERNOR_REDIS_PREFIX", "llm_governor")
+
+# AIMD tuning
+_THROTTLE_DECREASE_FACTOR = 0.5
+_SPIKE_DECREASE_FACTOR = 0.8
+# Latency samples needed before spikes are detected
+_MIN_LATENCY_SAMPLES = 10
+# Minimum seconds between two decreases, so a burst of 429s from calls that were
+# already in flight only counts once
+_DECREASE_COOLDOWN_SECONDS = 2.0
+_WAIT_SAMPLES = 512
+
+_DEFAULT_TASK = "default"
+_DEFAULT_SITE = "default"
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether ``error`` is a provider throttle (HTTP 429 / RESOURCE_EXHAUSTED / quota)."""
+    text = str(error)
+    return "429" in text or "RESOURCE_EXHAUSTED" in text or "quota" in text.lower()
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ModelLimiter:
+    """
+    Adaptive concurrency limit with a per-task round-robin wait queue.
+
+    State is guarded by a thread lock and waiters are woken through their own
+    loop, so callers on different event loops can share one limiter.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        initial: float = LLM_GOVERNOR_INITIAL_CONCURRENCY,
+        min_limit: int = LLM_GOVERNOR_MIN_CONCURRENCY,
+        max_limit: int = LLM_GOVERNOR_MAX_CONCURRENCY,
+        spike_factor: float = LLM_GOVERNOR_LATENCY_SPIKE_FACTOR,
+        latency_backoff: bool = LLM_GOVERNOR_LATENCY_BACKOFF,
+    ):
+        self.model = model
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.spike_factor = spike_factor
+        self.latency_backoff = latency_backoff
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial)))
+        self.in_flight = 0
+        self._waiters: "OrderedDict[str, Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_decrease = 0.0
+        self._latency_ewma: Optional[float] = None
+        # Call site -> (latency EWMA, samples); spikes are judged against the caller's own average
+        self._site_latency: Dict[str, Tuple[float, int]] = {}
+        self._waits: Deque[float] = deque(maxlen=_WAIT_SAMPLES)
+        self._stats = {"acquired": 0, "queued": 0, "throttled": 0, "latency_spikes": 0, "errors": 0}
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    def queued(self) -> int:
+        return sum(len(q) for q in self._waiters.values())
+
+    async def acquire(self, task_id: str = _DEFAULT_TASK) -> float:
+        """Wait for a slot and return the time spent queued."""
+        with self._lock:
+            if self.in_flight < self.current_limit and not self._waiters:
+                self.in_flight += 1
+                self._record_wait(0.0)
+                return 0.0
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            entry = (loop, future)
+            self._waiters.setdefault(task_id, deque()).append(entry)
+            self._stats["queued"] += 1
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                queue = self._waiters.get(task_id)
+                if queue is not None and entry in queue:
+                    queue.remove(entry)
+                    if not queue:
+                        del self._waiters[task_id]
+                else:
+                    # The slot was granted just before the cancellation; hand it on
+                    self.in_flight -= 1
+                    self._dispatch_locked()
+            raise
+        waited = time.monotonic() - started
+        with self._lock:
+            self._record_wait(waited)
+        return waited
+
+    def release(self, latency: float, outcome: str = "ok", call_site: str = _DEFAULT_SITE) -> None:
+        """
+        Return a slot and adapt the limit.
+
+        ``outcome`` is "ok", "throttled" (429) or "error" (other failures, which
+        do not change the limit). ``call_site`` selects the latency average a
+        spike is measured against.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if outcome == "throttled":
+                self._stats["throttled"] += 1
+                self._decrease_locked(_THROTTLE_DECREASE_FACTOR, now, "429 from provider")
+            elif outcome == "ok":
+                site_ewma, samples = self._site_latency.get(call_site, (latency, 0))
+                if (
+                    self.latency_backoff
+                    and samples >= _MIN_LATENCY_SAMPLES
+                    and latency > site_ewma * self.spike_factor
+                ):
+                    self._stats["latency_spikes"] += 1
+                    self._decrease_locked(
+                        _SPIKE_DECREASE_FACTOR, now,
+                        f"latency spike at {call_site} ({latency:.1f}s vs {site_ewma:.1f}s avg)",
+                    )
+                else:
+                    self.limit = min(float(self.max_limit), self.limit + 1.0 / max(self.limit, 1.0))
+                self._site_latency[call_site] = (0.9 * site_ewma + 0.1 * latency if samples else latency, samples + 1)
+                ewma = self._latency_ewma
+                self._latency_ewma = latency if ewma is None else 0.9 * ewma + 0.1 * latency
+            else:
+                self._stats["errors"] += 1
+            self._dispatch_locked()
+
+    def throttle(self, reason: str) -> None:
+        """Apply a 429 back-off that was observed elsewhere (e.g. by another worker)."""
+        with self._lock:
+            self._decrease_locked(_THROTTLE_DECREASE_FACTOR, time.monotonic(), reason)
+
+    def _decrease_locked(self, factor: float, now: float, reason: str) -> None:
+        if now - self._last_decrease < _DECREASE_COOLDOWN_SECONDS:
+            return
+        self._last_decrease = now
+        previous = self.limit
+        self.limit = max(float(self.min_limit), self.limit * factor)
+        logger.warning(f"LLM concurrency for {self.model} lowered {previous:.1f} -> {self.limit:.1f}: {reason}")
+
+    def _dispatch_locked(self) -> None:
+        """Grant free slots to waiters, one task at a time in round-robin order."""
+        while self.in_flight < self.current_limit and self._waiters:
+            task_id, queue = next(iter(self._waiters.items()))
+            loop, future = queue.popleft()
+            if queue:
+                self._waiters.move_to_end(task_id)
+            else:
+                del self._waiters[task_id]
+            if future.done():
+                continue
+            self.in_flight += 1
+            loop.call_soon_threadsafe(_wake, future)
+
+    def _record_wait(self, waited: float) -> None:
+        self._stats["acquired"] += 1
+        self._waits.append(waited)
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            acquired = self._stats["acquired"]
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "queued": self.queued(),
+                "queued_by_task": {task: len(q) for task, q in self._waiters.items()},
+                **self._stats,
+                "avg_wait_ms": round(self._total_wait / acquired * 1000, 1) if acquired else 0.0,
+                "p95_wait_ms": round(waits[int(0.95 * (len(waits) - 1))] * 1000, 1) if waits else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 1),
+                "avg_latency_ms": round(self._latency_ewma * 1000) if self._latency_ewma is not None else None,
+            }
+
+
+class _RedisThrottleSignal:
+    """
+    Shares 429 back-off between workers through one Redis key per model.
+
+    A worker that is throttled writes "<timestamp>:<worker id>"; the others poll
+    the key at most every LLM_GOVERNOR_REDIS_SYNC_SECONDS and back off when they
+    see a newer signal from another worker. Redis errors are logged and ignored.
+    """
+
+    def __init__(self, redis_url: str):
+        self.redis_url = redis_url
+        self.worker_id = uuid.uuid4().hex[:12]
+        # redis.asyncio connections belong to the loop that opened them
+        self._clients: Dict[int, Any] = {}
+        self._last_sync: Dict[str, float] = {}
+        self._last_seen: Dict[str, float] = {}
+
+    def _client(self):
+        import redis.asyncio as redis
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(id(loop))
+        if client is None:
+            client = redis.from_url(self.redis_url, decode_responses=True)
+            self._clients[id(loop)] = client
+        return client
+
+    def _key(self, model: str) -> str:
+        return f"{LLM_GOVERNOR_REDIS_PREFIX}:{model}:throttled"
+
+    async def publish(self, model: str) -> None:
+        now = time.time()
+        self._last_seen[model] = now
+        try:
+            await self._client().set(self._key(model), f"{now}:{self.worker_id}", ex=300)
+        except Exception as e:
+            logger.debug(f"Failed to publish LLM throttle signal to Redis: {e}")
+
+    async def sync(self, limiter: ModelLimiter) -> None:
+        now = time.monotonic()
+        if now - self._last_sync.get(limiter.model, 0.0) < LLM_GOVERNOR_REDIS_SYNC_SECONDS:
+            return
+        self._last_sync[limiter.model] = now
+        try:
+            raw = await self._client().get(self._key(limiter.model))
+        except Exception as e:
+            logger.debug(f"Failed to read LLM throttle signal from Redis: {e}")
+            return
+        if not raw:
+            return
+        stamp, _, worker = raw.partition(":")
+        try:
+            seen_at = float(stamp)
+        except ValueError:
+            return
+        if worker != self.worker_id and seen_at > self._last_seen.get(limiter.model, 0.0):
+            self._last_seen[limiter.model] = seen_at
+            limiter.throttle(f"429 reported by worker {worker}")
+
+
+class LLMGovernor:
+    """Adaptive concurrency limiters keyed by model name."""
+
+    def __init__(self, redis_url: Optional[str] = None, **limiter_kwargs: Any):
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self._lock = threading.Lock()
+        self._limiter_kwargs = limiter_kwargs
+        self._signal = _RedisThrottleSignal(redis_url) if redis_url else None
+
+    @property
+    def backend(self) -> str:
+        return "redis" if self._signal else "memory"
+
+    def limiter(self, model: str) -> ModelLimiter:
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.get(model)
+                if limiter is None:
+                    limiter = ModelLimiter(model, **self._limiter_kwargs)
+                    self._limiters[model] = limiter
+        return limiter
+
+    @asynccontextmanager
+    async def slot(
+        self, model: str, task_id: Optional[str] = None, call_site: str = _DEFAULT_SITE
+    ) -> AsyncIterator[float]:
+        """
+        Hold one concurrency slot for ``model`` while the block runs; yields the queue wait.
+
+        ``task_id`` defaults to the active generation, so waiting callers are
+        served fairly across generations. ``call_site`` groups calls of similar
+        size for latency spike detection.
+        """
+        if task_id is None:
+            context = get_generation_context()
+            task_id = context.task_id if context else _DEFAULT_TASK
+        limiter = self.limiter(model)
+        if self._signal:
+            await self._signal.sync(limiter)
+        waited = await limiter.acquire(task_id)
+        started = time.monotonic()
+        outcome = "error"
+        try:
+            yield waited
+            outcome = "ok"
+        except BaseException as e:
+            if isinstance(e, Exception) and is_rate_limit_error(e):
+                outcome = "throttled"
+            raise
+        finally:
+            limiter.release(time.monotonic() - started, outcome, call_site)
+            if outcome == "throttled" and self._signal:
+                await self._signal.publish(model)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {
+            "enabled": True,
+            "backend": self.backend,
+            "models": {model: limiter.stats() for model, limiter in limiters.items()},
+        }
+
+
+_llm_governor: Optional[LLMGovernor] = None
+_llm_governor_lock = threading.Lock()
+
+
+def get_llm_governor() -> Optional[LLMGovernor]:
+    """Return the process-wide governor, or None when LLM_GOVERNOR_ENABLED is false."""
+    global _llm_governor
+    if not LLM_GOVERNOR_ENABLED:
+        return None
+    if _llm_governor is None:
+        with _llm_governor_lock:
+            if _llm_governor is None:
+                redis_url = os.getenv("REDIS_URL")
+                use_redis = LLM_GOVERNOR_BACKEND == "redis" or (LLM_GOVERNOR_BACKEND == "auto" and redis_url)
+                if use_redis and not redis_url:
+                    logger.warning("Redis LLM governor requested but REDIS_URL is not set; using in-process limits.")
+                _llm_governor = LLMGovernor(redis_url=redis_url if use_redis else None)
+                logger.info(
+                    f"LLM governor: backend={_llm_governor.backend}, initial={LLM_GOVERNOR_INITIAL_CONCURRENCY}, "
+                    f"min={LLM_GOVERNOR_MIN_CONCURRENCY}, max={LLM_GOVERNOR_MAX_CONCURRENCY}, "
+                    f"latency backoff={'on' if LLM_GOVERNOR_LATENCY_BACKOFF else 'off'}"
+                )
+    return _llm_governor
@@ -0,0 +1,49 @@
+"""
+Per-call-site counters for ``run_chain``.
+
+A call site is "<module>.<function>" of the ``run_chain`` caller. The counters
+show how often each site needs extra LLM round trips to get parseable output,
+and how often the native structured-output path is used or falls back.
+
+Provides:
+- record_llm_call_event: increment a counter for a call site
+- llm_call_stats: counters plus derived parse-retry rates and the schemas using text parsing only
+"""
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from typing import Any, Dict
+
+from backend.services.structured_output import disabled_schemas
+
+# calls: run_chain invocations
+# structured: calls answered by native structured output
+# structured_fallbacks: structured calls that fell back to text parsing
+# parse_retries: extra LLM calls made because the output could not be parsed
+# parse_failures: calls that gave up because the output could not be parsed
+_EVENTS = ("calls", "structured", "structured_fallbacks", "parse_retries", "parse_failures")
+
+_counters: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(_EVENTS, 0))
+_counters_lock = threading.Lock()
+
+
+def record_llm_call_event(call_site: str, event: str, count: int = 1) -> None:
+    with _counters_lock:
+        _counters[call_site][event] += count
+
+
+def llm_call_stats() -> Dict[str, Any]:
+    """
+    Totals and per-call-site counters with their parse-retry rate (extra calls per call),
+    plus the schemas whose structured output is disabled.
+    """
+    with _counters_lock:
+        sites = {site: dict(counts) for site, counts in _counters.items()}
+    totals = dict.fromkeys(_EVENTS, 0)
+    for counts in sites.values():
+        for event in _EVENTS:
+            totals[event] += counts[event]
+        counts["parse_retry_rate"] = round(counts["parse_retries"] / counts["calls"], 3) if counts["calls"] else 0.0
+    totals["parse_retry_rate"] = round(totals["parse_retries"] / totals["calls"], 3) if totals["calls"] else 0.0
+    return {"totals": totals, "call_sites": sites, "disabled_schemas": disabled_schemas()}
@@ -0,0 +1,117 @@
+"""
+Pool of reusable Gemini clients.
+
+``get_llm`` and friends used to build a new ``ChatGoogleGenerativeAI`` (and the
+Grounding / native search paths a new ``genai.Client``) for every prompt, so a
+single course created hundreds of clients and HTTP transports. This module
+keeps them in a bounded LRU pool keyed on API key, model and temperature.
+
+The async transports inside these clients belong to the event loop that first
+used them, so the running loop is part of the key.
+
+Provides:
+- ClientPool: bounded, thread-safe LRU of lazily created clients
+- get_chat_model: pooled ``ChatGoogleGenerativeAI``
+- get_genai_client: pooled ``google.genai.Client``
+- llm_pool_stats: hit/miss/eviction counters
+"""
+from __future__ import annotations
+
+import os
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+LLM_POOL_MAX_SIZE = int(os.environ.get("LLM_POOL_MAX_SIZE", "64"))
+
+
+def _key_id(api_key: str) -> str:
+    """Hash API keys so raw keys are never held in pool keys or logs."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def _loop_id() -> Optional[int]:
+    try:
+        return id(asyncio.get_running_loop())
+    except RuntimeError:
+        return None
+
+
+class ClientPool:
+    """Bounded LRU of clients created on first use by a factory."""
+
+    def __init__(self, name: str, max_size: int = LLM_POOL_MAX_SIZE):
+        self.name = name
+        self.max_size = max(1, max_size)
+        self._clients: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the client for ``key``, building it with ``factory`` if needed."""
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self._stats["hits"] += 1
+                return client
+        # Build outside the lock; a concurrent builder for the same key simply loses the race
+        client = factory()
+        with self._lock:
+            existing = self._clients.get(key)
+            if existing is not None:
+                self._stats["hits"] += 1
+                return existing
+            self._clients[key] = client
+            self._stats["misses"] += 1
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+                self._stats["evictions"] += 1
+        logger.debug(f"{self.name} pool created client for {key[:-1] if isinstance(key, tuple) else key}")
+        return client
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._clients), "max_size": self.max_size, **self._stats}
+
+
+_chat_models = ClientPool("ChatGoogleGenerativeAI")
+_genai_clients = ClientPool("genai.Client")
+
+
+def get_chat_model(model: str, temperature: float, google_api_key: str, **kwargs: Any) -> ChatGoogleGenerativeAI:
+    """
+    Return a pooled ``ChatGoogleGenerativeAI``.
+
+    Extra keyword arguments are passed to the constructor and become part of the key.
+    Callers must not mutate the returned instance; use ``bind`` / ``with_structured_output``,
+    which return new runnables.
+    """
+    key = (model, float(temperature), _key_id(google_api_key), tuple(sorted(kwargs.items())), _loop_id())
+    return _chat_models.get(
+        key,
+        lambda: ChatGoogleGenerativeAI(model=model, temperature=temperature, google_api_key=google_api_key, **kwargs),
+    )
+
+
+def get_genai_client(api_key: str) -> Any:
+    """Return a pooled ``google.genai.Client`` for ``api_key``."""
+    from google import genai
+
+    return _genai_clients.get((_key_id(api_key), _loop_id()), lambda: genai.Client(api_key=api_key))
+
+
+def llm_pool_stats() -> Dict[str, Any]:
+    return {"chat_models": _chat_models.stats(), "genai_clients": _genai_clients.stats()}
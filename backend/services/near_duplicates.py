@@ -0,0 +1,225 @@
+"""
+Generation-scoped near-duplicate detection for scraped pages.
+
+Related queries keep returning mirrored articles, syndicated copies and the
+same page under different URLs. ``NearDuplicateIndex`` fingerprints scraped
+content with a 64-bit SimHash over word shingles and groups pages whose
+fingerprints differ in at most NEAR_DUP_MAX_HAMMING bits. Fingerprints are
+split into bands so a lookup only compares candidates that share a band
+(with a threshold below the number of bands, near duplicates always share
+at least one band exactly).
+
+``collapse_near_duplicates`` is applied by the context builders before search
+results are rendered into prompts: of every group of near duplicates only the
+best-ranked copy is kept.
+
+Provides:
+- simhash: 64-bit SimHash of a text
+- NearDuplicateIndex: per-generation fingerprint clusters
+- get_near_duplicate_index: index of the active generation
+- collapse_near_duplicates: drop lower-ranked copies from search results
+- near_duplicate_totals: process-wide counters from finished generations
+"""
+from __future__ import annotations
+
+import os
+import re
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.core.generation_context import get_generation_context
+from backend.services.url_registry import normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+NEAR_DUP_ENABLED = os.environ.get("NEAR_DUP_ENABLED", "true").lower() == "true"
+# Maximum differing fingerprint bits for two pages to count as near duplicates (must be < 4)
+NEAR_DUP_MAX_HAMMING = int(os.environ.get("NEAR_DUP_MAX_HAMMING", "3"))
+# Pages shorter than this are never collapsed; their fingerprints are too noisy
+NEAR_DUP_MIN_CHARS = int(os.environ.get("NEAR_DUP_MIN_CHARS", "500"))
+NEAR_DUP_SHINGLE_WORDS = 4
+# Upper bound on shingles hashed per page (about 300 KB of text)
+NEAR_DUP_MAX_SHINGLES = 50000
+
+_RESOURCE_NAME = "near_duplicate_index"
+_BANDS = 4
+_BAND_BITS = 64 // _BANDS
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+# Odd multipliers that give each word position of a shingle its own weight
+_POSITION_MULTIPLIERS = np.array(
+    [0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93], dtype=np.uint64
+)[:NEAR_DUP_SHINGLE_WORDS]
+
+
+@lru_cache(maxsize=200000)
+def _word_id(word: str) -> int:
+    # hash() is salted per process, which made fingerprints (and near-duplicate decisions) vary between runs
+    return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _word_ids(words: Sequence[str]) -> np.ndarray:
+    """Stable 64-bit id per word."""
+    return np.fromiter((_word_id(word) for word in words), dtype=np.uint64, count=len(words))
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """SplitMix64 finaliser, so every bit of a shingle hash depends on every word."""
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over overlapping word shingles of ``text``."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < NEAR_DUP_SHINGLE_WORDS:
+        words = words + [""] * (NEAR_DUP_SHINGLE_WORDS - len(words))
+    count = min(len(words) - NEAR_DUP_SHINGLE_WORDS + 1, NEAR_DUP_MAX_SHINGLES)
+    ids = _word_ids(words[:count + NEAR_DUP_SHINGLE_WORDS - 1])
+    hashes = np.zeros(count, dtype=np.uint64)
+    for position, multiplier in enumerate(_POSITION_MULTIPLIERS):
+        hashes ^= _mix64(ids[position:position + count] * multiplier)
+    hashes = _mix64(hashes)
+    bits = np.unpackbits(hashes.view(np.uint8)).reshape(count, 64)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 > count
+    return int.from_bytes(np.packbits(votes).tobytes(), "little")
+
+
+def _bands(fingerprint: int) -> List[Tuple[int, int]]:
+    mask = (1 << _BAND_BITS) - 1
+    return [(band, (fingerprint >> (band * _BAND_BITS)) & mask) for band in range(_BANDS)]
+
+
+class NearDuplicateIndex:
+    """Clusters of near-identical page contents seen during one generation."""
+
+    def __init__(self, max_hamming: int = NEAR_DUP_MAX_HAMMING):
+        self.max_hamming = min(max_hamming, _BANDS - 1)
+        self._fingerprints: List[int] = []
+        self._cluster_of: List[int] = []
+        self._band_index: Dict[Tuple[int, int], List[int]] = {}
+        # (url, content length) -> cluster id, so each page is fingerprinted once per generation
+        self._seen: Dict[Tuple[str, int], int] = {}
+        self._stats = {"pages": 0, "clusters": 0, "collapsed": 0, "chars_removed": 0}
+
+    def cluster_for(self, url: str, content: str) -> int:
+        """Cluster id for a page; near duplicates of an earlier page share its id."""
+        key = (normalize_url(url), len(content))
+        cluster = self._seen.get(key)
+        if cluster is not None:
+            return cluster
+        fingerprint = simhash(content)
+        cluster = self._find(fingerprint)
+        if cluster is None:
+            cluster = self._stats["clusters"]
+            self._stats["clusters"] += 1
+        entry = len(self._fingerprints)
+        self._fingerprints.append(fingerprint)
+        self._cluster_of.append(cluster)
+        for band in _bands(fingerprint):
+            self._band_index.setdefault(band, []).append(entry)
+        self._seen[key] = cluster
+        self._stats["pages"] += 1
+        return cluster
+
+    def _find(self, fingerprint: int) -> Optional[int]:
+        for band in _bands(fingerprint):
+            for entry in self._band_index.get(band, ()):
+                if bin(self._fingerprints[entry] ^ fingerprint).count("1") <= self.max_hamming:
+                    return self._cluster_of[entry]
+        return None
+
+    def record_collapsed(self, count: int, chars: int) -> None:
+        self._stats["collapsed"] += count
+        self._stats["chars_removed"] += chars
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats)
+
+
+_totals = {"generations": 0, "pages": 0, "clusters": 0, "collapsed": 0, "chars_removed": 0}
+_totals_lock = threading.Lock()
+
+
+def _record_generation(task_id: str, index: NearDuplicateIndex) -> None:
+    stats = index.stats()
+    with _totals_lock:
+        _totals["generations"] += 1
+        for name in ("pages", "clusters", "collapsed", "chars_removed"):
+            _totals[name] += stats[name]
+    if stats["collapsed"]:
+        logger.info(
+            f"Generation {task_id}: collapsed {stats['collapsed']} near-duplicate results "
+            f"({stats['chars_removed']} chars) across {stats['pages']} pages"
+        )
+
+
+def get_near_duplicate_index() -> Optional[NearDuplicateIndex]:
+    """Return the index of the active generation, creating it on first use."""
+    context = get_generation_context()
+    if context is None:
+        return None
+
+    def factory() -> NearDuplicateIndex:
+        index = NearDuplicateIndex()
+        context.add_close_callback(lambda: _record_generation(context.task_id, index))
+        return index
+
+    return context.get_or_create(_RESOURCE_NAME, factory)
+
+
+def collapse_near_duplicates(search_results: Sequence[Any]) -> List[Any]:
+    """
+    Remove lower-ranked near-duplicate pages from ``search_results``.
+
+    Rank is the position of a result within its query's results (earlier queries
+    win ties, then longer content). Results without scraped content, and pages
+    shorter than NEAR_DUP_MIN_CHARS, are always kept. Returns new
+    ``SearchServiceResult`` objects; the inputs are not modified.
+    """
+    if not NEAR_DUP_ENABLED or not search_results:
+        return list(search_results or [])
+    index = get_near_duplicate_index() or NearDuplicateIndex()
+
+    best: Dict[int, Tuple[Tuple[int, int, int], Tuple[int, int]]] = {}
+    for group_no, group in enumerate(search_results):
+        for position, item in enumerate(group.results):
+            content = item.get_content()
+            if not content or len(content) < NEAR_DUP_MIN_CHARS:
+                continue
+            cluster = index.cluster_for(item.url, content)
+            rank = (position, group_no, -len(content))
+            if cluster not in best or rank < best[cluster][0]:
+                best[cluster] = (rank, (group_no, position))
+
+    keep = {location for _, location in best.values()}
+    collapsed = 0
+    chars = 0
+    deduplicated = []
+    for group_no, group in enumerate(search_results):
+        kept = []
+        for position, item in enumerate(group.results):
+            content = item.get_content()
+            if content and len(content) >= NEAR_DUP_MIN_CHARS and (group_no, position) not in keep:
+                collapsed += 1
+                chars += len(content)
+                continue
+            kept.append(item)
+        deduplicated.append(group.model_copy(update={"results": kept}) if len(kept) != len(group.results) else group)
+
+    if collapsed:
+        index.record_collapsed(collapsed, chars)
+        logger.debug(f"Collapsed {collapsed} near-duplicate search results ({chars} chars)")
+    return deduplicated
+
+
+def near_duplicate_totals() -> Dict[str, Any]:
+    """Counters summed over all finished generations in this process."""
+    with _totals_lock:
+        return dict(_totals)
@@ -0,0 +1,394 @@
+"""
+Async token-bucket rate limiting for outbound API calls (Brave Search).
+
+Each API key gets its own bucket. Rate and burst default to the limiter's
+settings and can be overridden per key (BRAVE_RATE_KEY_LIMITS), e.g. for a
+paid-plan key next to free ones. Callers
+``await acquire(key)`` before a request; the bucket reserves a token and
+sleeps for as long as needed, so concurrent callers are served in order
+without polling. Rates adapt to the provider: a 429 halves the key's rate
+(and honours ``Retry-After``), successful calls slowly raise it back to the
+configured ceiling (AIMD).
+
+Two backends are available:
+- memory: state lives in the current process
+- redis: state lives in Redis and is updated atomically by Lua scripts, so
+  every uvicorn worker shares the same budget per key
+
+Provides:
+- RateLimiter: common interface
+- InMemoryRateLimiter / RedisRateLimiter: backends
+- parse_key_limits: per-key (rate, burst) overrides from JSON
+- get_brave_rate_limiter: process-wide limiter for Brave Search
+"""
+from __future__ import annotations
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+# memory | redis | auto (redis when REDIS_URL is set)
+BRAVE_RATE_LIMIT_BACKEND = os.environ.get("BRAVE_RATE_LIMIT_BACKEND", "auto").lower()
+# Requests per second allowed per Brave API key (the free plan allows 1/s)
+BRAVE_RATE_PER_SECOND = float(os.environ.get("BRAVE_RATE_PER_SECOND", "0.95"))
+# Tokens that may be spent back-to-back after an idle period
+BRAVE_RATE_BURST = float(os.environ.get("BRAVE_RATE_BURST", "1"))
+# Lower bound for the adaptive rate after repeated 429 responses
+BRAVE_RATE_MIN_PER_SECOND = float(os.environ.get("BRAVE_RATE_MIN_PER_SECOND", "0.2"))
+# Per-key overrides as JSON: {"<key id>": {"rate": 20, "burst": 5}}. The key id is the
+# first 16 hex chars of the key's SHA-256, as listed under "keys" in the limiter stats
+BRAVE_RATE_KEY_LIMITS = os.environ.get("BRAVE_RATE_KEY_LIMITS", "")
+RATE_LIMIT_REDIS_PREFIX = os.environ.get("RATE_LIMIT_REDIS_PREFIX", "ratelimit")
+
+# AIMD tuning: multiplicative decrease on 429, additive increase per successful call
+_DECREASE_FACTOR = 0.5
+_INCREASE_FRACTION = 0.05
+
+
+def _key_id(api_key: str) -> str:
+    """Stable, non-reversible identifier for an API key (never store or log raw keys)."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def parse_key_limits(raw: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Parse per-key limits from JSON: ``{"<key id>": {"rate": r, "burst": b}}`` or ``{"<key id>": [r, b]}``.
+
+    Invalid input is logged and ignored; a missing burst defaults to 1.
+    """
+    if not raw or not raw.strip():
+        return {}
+    try:
+        data = json.loads(raw)
+        limits = {}
+        for key_id, value in data.items():
+            if isinstance(value, dict):
+                rate, burst = value["rate"], value.get("burst", 1)
+            else:
+                rate, burst = value
+            limits[str(key_id)] = (float(rate), float(burst))
+        return limits
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        logger.error(f"Ignoring invalid per-key rate limits: {e}")
+        return {}
+
+
+class RateLimiter(ABC):
+    """Interface shared by the limiter backends."""
+
+    backend = "none"
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: float,
+        min_rate: float,
+        key_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+    ):
+        self.name = name
+        self.max_rate = rate
+        self.burst = max(1.0, burst)
+        self.min_rate = min(min_rate, rate)
+        self.key_limits = dict(key_limits or {})
+        self._stats = {"acquired": 0, "throttled": 0, "total_wait_seconds": 0.0}
+
+    def limits_for(self, key_id: str) -> Tuple[float, float]:
+        """(rate, burst) of a key: its override if configured, else the limiter defaults."""
+        rate, burst = self.key_limits.get(key_id, (self.max_rate, self.burst))
+        return rate, max(1.0, burst)
+
+    @abstractmethod
+    async def acquire(self, api_key: str) -> float:
+        """Wait until a request for ``api_key`` may be sent. Returns the seconds waited."""
+
+    @abstractmethod
+    async def on_throttled(self, api_key: str, retry_after: Optional[float] = None) -> None:
+        """Record a 429 for ``api_key``: lower its rate and pause it for ``retry_after`` seconds."""
+
+    @abstractmethod
+    async def on_success(self, api_key: str) -> None:
+        """Record a successful call for ``api_key`` so its rate can recover."""
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "name": self.name,
+            "max_rate": self.max_rate,
+            "burst": self.burst,
+            "min_rate": self.min_rate,
+            "key_overrides": len(self.key_limits),
+            **self._stats,
+            "total_wait_seconds": round(self._stats["total_wait_seconds"], 3),
+        }
+
+    async def _sleep(self, wait: float) -> float:
+        self._stats["acquired"] += 1
+        if wait > 0:
+            self._stats["total_wait_seconds"] += wait
+            logger.info(f"Rate limiting {self.name}. Waiting {wait:.2f} seconds...")
+            await asyncio.sleep(wait)
+        return max(0.0, wait)
+
+
+@dataclass
+class _Bucket:
+    max_rate: float
+    burst: float
+    rate: float
+    tokens: float
+    # Time the token count refers to; set in the future while the key is paused after a 429
+    updated: float
+    throttled: int = field(default=0)
+
+
+class InMemoryRateLimiter(RateLimiter):
+    """
+    Token bucket kept in process memory.
+
+    Tokens may go negative: each caller reserves its token immediately and sleeps
+    off the debt, which keeps callers FIFO without a wake-up loop. A 429 moves the
+    bucket's reference time into the future, pausing the key. A threading lock
+    guards the buckets because callers may run on different event loops.
+    """
+
+    backend = "memory"
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: float,
+        min_rate: float,
+        key_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+    ):
+        super().__init__(name, rate, burst, min_rate, key_limits)
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, key_id: str, now: float) -> _Bucket:
+        bucket = self._buckets.get(key_id)
+        if bucket is None:
+            max_rate, burst = self.limits_for(key_id)
+            bucket = _Bucket(max_rate=max_rate, burst=burst, rate=max_rate, tokens=burst, updated=now)
+            self._buckets[key_id] = bucket
+        return bucket
+
+    def reserve(self, api_key: str) -> float:
+        """Reserve one token and return how long the caller must wait before using it."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(_key_id(api_key), now)
+            if now > bucket.updated:
+                bucket.tokens = min(bucket.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+                bucket.updated = now
+            bucket.tokens -= 1.0
+            debt = -bucket.tokens / bucket.rate if bucket.tokens < 0 else 0.0
+            return max(0.0, bucket.updated - now) + debt
+
+    async def acquire(self, api_key: str) -> float:
+        return await self._sleep(self.reserve(api_key))
+
+    async def on_throttled(self, api_key: str, retry_after: Optional[float] = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(_key_id(api_key), now)
+            bucket.rate = max(min(self.min_rate, bucket.max_rate), bucket.rate * _DECREASE_FACTOR)
+            bucket.throttled += 1
+            pause = retry_after if retry_after and retry_after > 0 else 1.0 / bucket.rate
+            # No tokens accrue during the pause; one is available when it ends
+            bucket.updated = max(bucket.updated, now + pause)
+            bucket.tokens = min(bucket.tokens, 0.0) + 1.0
+            self._stats["throttled"] += 1
+            logger.warning(f"{self.name} returned 429; rate for key {_key_id(api_key)} lowered to {bucket.rate:.2f}/s")
+
+    async def on_success(self, api_key: str) -> None:
+        with self._lock:
+            bucket = self._buckets.get(_key_id(api_key))
+            if bucket is not None and bucket.rate < bucket.max_rate:
+                bucket.rate = min(bucket.max_rate, bucket.rate + bucket.max_rate * _INCREASE_FRACTION)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            keys = {
+                key_id: {"rate": round(b.rate, 3), "max_rate": b.max_rate, "burst": b.burst, "throttled": b.throttled}
+                for key_id, b in self._buckets.items()
+            }
+        return {**super().stats(), "keys": keys}
+
+
+# Reserve one token. Uses the Redis clock so workers on different hosts agree.
+# KEYS[1] bucket hash; ARGV: max_rate, burst
+# Returns the wait in milliseconds.
+_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local max_rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated', 'rate')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+local rate = tonumber(state[3]) or max_rate
+if now > updated then
+  tokens = math.min(burst, tokens + (now - updated) * rate)
+  updated = now
+end
+tokens = tokens - 1
+local wait = math.max(0, updated - now)
+if tokens < 0 then wait = wait - tokens / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(updated), 'rate', tostring(rate))
+redis.call('EXPIRE', KEYS[1], 3600)
+return math.floor(wait * 1000)
+"""
+
+# KEYS[1] bucket hash; ARGV: max_rate, min_rate, factor, retry_after (0 = none)
+_THROTTLE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate = tonumber(redis.call('HGET', KEYS[1], 'rate')) or tonumber(ARGV[1])
+rate = math.max(tonumber(ARGV[2]), rate * tonumber(ARGV[3]))
+local pause = tonumber(ARGV[4])
+if pause <= 0 then pause = 1 / rate end
+local updated = math.max(tonumber(redis.call('HGET', KEYS[1], 'updated')) or 0, now + pause)
+local tokens = math.min(tonumber(redis.call('HGET', KEYS[1], 'tokens')) or 0, 0) + 1
+redis.call('HSET', KEYS[1], 'rate', tostring(rate), 'tokens', tostring(tokens), 'updated', tostring(updated))
+redis.call('HINCRBY', KEYS[1], 'throttled', 1)
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(rate)
+"""
+
+# KEYS[1] bucket hash; ARGV: max_rate, step
+_RECOVER_SCRIPT = """
+local rate = tonumber(redis.call('HGET', KEYS[1], 'rate'))
+if rate and rate < tonumber(ARGV[1]) then
+  redis.call('HSET', KEYS[1], 'rate', tostring(math.min(tonumber(ARGV[1]), rate + tonumber(ARGV[2]))))
+end
+return 1
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """
+    Token bucket shared across processes through Redis.
+
+    Falls back to an in-process bucket if Redis is unreachable so a Redis outage
+    degrades to per-worker limiting instead of failing searches.
+    """
+
+    backend = "redis"
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: float,
+        min_rate: float,
+        redis_url: str,
+        key_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+    ):
+        super().__init__(name, rate, burst, min_rate, key_limits)
+        self.redis_url = redis_url
+        self._fallback = InMemoryRateLimiter(name, rate, burst, min_rate, key_limits)
+        # redis.asyncio connections belong to the loop that opened them
+        self._clients: Dict[int, Any] = {}
+
+    def _client(self):
+        import redis.asyncio as redis
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(id(loop))
+        if client is None:
+            client = redis.from_url(self.redis_url, decode_responses=True)
+            self._clients[id(loop)] = client
+        return client
+
+    def _redis_key(self, api_key: str) -> str:
+        return f"{RATE_LIMIT_REDIS_PREFIX}:{self.name}:{_key_id(api_key)}"
+
+    async def acquire(self, api_key: str) -> float:
+        max_rate, burst = self.limits_for(_key_id(api_key))
+        try:
+            wait_ms = await self._client().eval(
+                _ACQUIRE_SCRIPT, 1, self._redis_key(api_key), max_rate, burst
+            )
+            wait = int(wait_ms) / 1000.0
+        except Exception as e:
+            logger.warning(f"Redis rate limiter unavailable ({e}); using in-process limiting for {self.name}")
+            wait = self._fallback.reserve(api_key)
+        return await self._sleep(wait)
+
+    async def on_throttled(self, api_key: str, retry_after: Optional[float] = None) -> None:
+        self._stats["throttled"] += 1
+        max_rate, _ = self.limits_for(_key_id(api_key))
+        try:
+            new_rate = await self._client().eval(
+                _THROTTLE_SCRIPT, 1, self._redis_key(api_key),
+                max_rate, min(self.min_rate, max_rate), _DECREASE_FACTOR, retry_after or 0,
+            )
+            logger.warning(f"{self.name} returned 429; shared rate for key {_key_id(api_key)} lowered to {float(new_rate):.2f}/s")
+        except Exception as e:
+            logger.warning(f"Failed to record 429 in Redis rate limiter: {e}")
+            await self._fallback.on_throttled(api_key, retry_after)
+
+    async def on_success(self, api_key: str) -> None:
+        max_rate, _ = self.limits_for(_key_id(api_key))
+        try:
+            await self._client().eval(
+                _RECOVER_SCRIPT, 1, self._redis_key(api_key), max_rate, max_rate * _INCREASE_FRACTION
+            )
+        except Exception as e:
+            logger.debug(f"Failed to record success in Redis rate limiter: {e}")
+
+
+def create_rate_limiter(
+    name: str,
+    rate: float,
+    burst: float,
+    min_rate: float,
+    backend: str = "auto",
+    redis_url: Optional[str] = None,
+    key_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+) -> RateLimiter:
+    """Build a limiter for ``backend`` ("memory", "redis" or "auto")."""
+    redis_url = redis_url if redis_url is not None else os.getenv("REDIS_URL")
+    if backend == "redis" or (backend == "auto" and redis_url):
+        if redis_url:
+            return RedisRateLimiter(name, rate, burst, min_rate, redis_url, key_limits)
+        logger.warning(f"Redis rate limiting requested for {name} but REDIS_URL is not set; using in-process limiting.")
+    return InMemoryRateLimiter(name, rate, burst, min_rate, key_limits)
+
+
+_brave_rate_limiter: Optional[RateLimiter] = None
+_brave_rate_limiter_lock = threading.Lock()
+
+
+def get_brave_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter for Brave Search calls."""
+    global _brave_rate_limiter
+    if _brave_rate_limiter is None:
+        with _brave_rate_limiter_lock:
+            if _brave_rate_limiter is None:
+                _brave_rate_limiter = create_rate_limiter(
+                    "brave",
+                    BRAVE_RATE_PER_SECOND,
+                    BRAVE_RATE_BURST,
+                    BRAVE_RATE_MIN_PER_SECOND,
+                    backend=BRAVE_RATE_LIMIT_BACKEND,
+                    key_limits=parse_key_limits(BRAVE_RATE_KEY_LIMITS),
+                )
+                logger.info(
+                    f"Brave rate limiter: backend={_brave_rate_limiter.backend}, "
+                    f"rate={BRAVE_RATE_PER_SECOND}/s, burst={BRAVE_RATE_BURST}, "
+                    f"{len(_brave_rate_limiter.key_limits)} per-key override(s)"
+                )
+    return _brave_rate_limiter
@@ -0,0 +1,175 @@
+"""
+Cross-user cache of the research phase for popular topics.
+
+Every generation normally runs ``generate_search_queries``, ``execute_web_searches``
+and the research evaluation loop before ``create_learning_path``. Once that
+research is judged sufficient, its queries, search results (with the scraped
+text inline, trimmed to RESEARCH_CACHE_MAX_CHARS_PER_RESULT and to
+RESEARCH_CACHE_MAX_ENTRY_CHARS per entry) and evaluation are stored under a fingerprint of the topic plus
+the content language, search language and search provider. A later generation
+on the same topic reuses them and goes straight to course creation.
+
+Freshness:
+- entries younger than RESEARCH_CACHE_REFRESH_HOURS are used as they are
+- older entries get one incremental refinement pass (refinement queries,
+  searches and a re-evaluation) and are stored again if still sufficient
+- entries expire from the backend after RESEARCH_CACHE_TTL_HOURS
+
+Provides:
+- topic_fingerprint: case-, accent- and whitespace-normalised form of a topic
+- research_cache_key: cache key for a topic, languages and search provider
+- get_research_cache: process-wide cache backend (None when disabled)
+- build_research_entry / load_research_entry: (de)serialise a research set
+- record_research_cache_event / research_cache_stats: hit rates and time saved
+"""
+from __future__ import annotations
+
+import os
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from typing import Any, Dict, Optional
+
+from backend.models.models import SearchQuery, SearchServiceResult
+from backend.services.cache_backends import CacheBackend, create_cache_backend
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+RESEARCH_CACHE_ENABLED = os.environ.get("RESEARCH_CACHE_ENABLED", "true").lower() == "true"
+# auto (Redis when REDIS_URL is set, otherwise SQLite) | sqlite | redis | memory
+RESEARCH_CACHE_BACKEND = os.environ.get("RESEARCH_CACHE_BACKEND", "auto")
+RESEARCH_CACHE_TTL_HOURS = float(os.environ.get("RESEARCH_CACHE_TTL_HOURS", "72"))
+# Entries older than this get one incremental refinement pass before reuse
+RESEARCH_CACHE_REFRESH_HOURS = float(os.environ.get("RESEARCH_CACHE_REFRESH_HOURS", "24"))
+# Search result groups kept per entry (refresh passes append new ones)
+RESEARCH_CACHE_MAX_SEARCHES = int(os.environ.get("RESEARCH_CACHE_MAX_SEARCHES", "24"))
+# Scraped text kept per result, and in total per entry (the per-result share shrinks to fit)
+RESEARCH_CACHE_MAX_CHARS_PER_RESULT = int(os.environ.get("RESEARCH_CACHE_MAX_CHARS_PER_RESULT", "8000"))
+RESEARCH_CACHE_MAX_ENTRY_CHARS = int(os.environ.get("RESEARCH_CACHE_MAX_ENTRY_CHARS", "400000"))
+
+# Bump when the cached payload or key format changes
+_KEY_VERSION = "v2"
+
+
+def topic_fingerprint(topic: str) -> str:
+    """
+    Case-, accent- and whitespace-insensitive form of ``topic``.
+
+    Symbols and word order are kept: "C", "C++" and "C#" are different topics,
+    and so are "Machine Learning for Biology" and "Biology for Machine Learning".
+    """
+    decomposed = unicodedata.normalize("NFKD", topic.casefold())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.split())
+
+
+def research_cache_key(topic: str, language: Optional[str], search_language: Optional[str], provider: str) -> str:
+    """Cache key for a topic; languages and search provider are part of the key."""
+    raw = "|".join([
+        _KEY_VERSION,
+        (language or "en").lower(),
+        (search_language or "en").lower(),
+        provider,
+        topic_fingerprint(topic),
+    ])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+_research_cache: Optional[CacheBackend] = None
+_research_cache_lock = threading.Lock()
+
+
+def get_research_cache() -> Optional[CacheBackend]:
+    """Return the research cache, or None when RESEARCH_CACHE_ENABLED is false."""
+    global _research_cache
+    if not RESEARCH_CACHE_ENABLED:
+        return None
+    if _research_cache is None:
+        with _research_cache_lock:
+            if _research_cache is None:
+                _research_cache = create_cache_backend("research", RESEARCH_CACHE_BACKEND)
+                logger.info(
+                    f"Research cache initialized ({_research_cache.backend}, ttl={RESEARCH_CACHE_TTL_HOURS}h, "
+                    f"refresh after {RESEARCH_CACHE_REFRESH_HOURS}h)"
+                )
+    return _research_cache
+
+
+def _result_payload(result: SearchServiceResult, max_chars: int) -> Dict[str, Any]:
+    # Handles only resolve inside the generation that made them; the cache needs the text itself
+    payload = result.model_dump()
+    for item, data in zip(result.results, payload["results"]):
+        content = item.get_content()
+        data["scraped_content"] = content[:max_chars] if content else content
+        data["content_ref"] = None
+    return payload
+
+
+def build_research_entry(state: Dict[str, Any], research_seconds: float) -> Dict[str, Any]:
+    """
+    JSON-serialisable research set of ``state`` (queries, results and evaluation).
+
+    Scraped text is trimmed so an entry stays within RESEARCH_CACHE_MAX_ENTRY_CHARS.
+    """
+    queries = list(state.get("search_queries") or [])[-RESEARCH_CACHE_MAX_SEARCHES:]
+    results = list(state.get("search_results") or [])[-RESEARCH_CACHE_MAX_SEARCHES:]
+    pages = sum(1 for result in results for item in result.results if item.scraped_content or item.content_ref)
+    max_chars = min(RESEARCH_CACHE_MAX_CHARS_PER_RESULT, RESEARCH_CACHE_MAX_ENTRY_CHARS // max(1, pages))
+    return {
+        "topic": state.get("user_topic"),
+        "stored_at": time.time(),
+        "research_seconds": round(research_seconds, 3),
+        "search_queries": [query.model_dump() for query in queries],
+        "search_results": [_result_payload(result, max_chars) for result in results],
+        "research_knowledge_gaps": list(state.get("research_knowledge_gaps") or []),
+        "research_confidence_score": state.get("research_confidence_score") or 0.0,
+    }
+
+
+def load_research_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Queries and results of a cached entry as models."""
+    return {
+        "search_queries": [SearchQuery(**data) for data in entry.get("search_queries", [])],
+        "search_results": [SearchServiceResult(**data) for data in entry.get("search_results", [])],
+    }
+
+
+def entry_age_hours(entry: Dict[str, Any]) -> float:
+    return max(0.0, time.time() - float(entry.get("stored_at", 0))) / 3600
+
+
+_stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "stores": 0, "errors": 0, "time_saved_seconds": 0.0}
+_stats_lock = threading.Lock()
+
+
+def record_research_cache_event(event: str, time_saved_seconds: float = 0.0) -> None:
+    """
+    Count a cache event and the research time it saved.
+
+    Events: "hits", "stale_hits" (reused after a refinement pass), "misses",
+    "refreshes" (refinement pass of a stale hit finished), "stores" and "errors".
+    """
+    with _stats_lock:
+        _stats[event] += 1
+        _stats["time_saved_seconds"] += max(0.0, time_saved_seconds)
+
+
+def research_cache_stats() -> Dict[str, Any]:
+    """Hit rate and research time saved by the cache in this process."""
+    with _stats_lock:
+        stats = dict(_stats)
+    reused = stats["hits"] + stats["stale_hits"]
+    lookups = reused + stats["misses"]
+    return {
+        "enabled": RESEARCH_CACHE_ENABLED,
+        "backend": _research_cache.stats() if _research_cache else None,
+        "ttl_hours": RESEARCH_CACHE_TTL_HOURS,
+        "refresh_hours": RESEARCH_CACHE_REFRESH_HOURS,
+        **stats,
+        "time_saved_seconds": round(stats["time_saved_seconds"], 1),
+        "lookups": lookups,
+        "hit_rate": round(reused / lookups, 3) if lookups else 0.0,
+    }
@@ -0,0 +1,251 @@
+"""
+Persistent scrape cache for web and PDF content.
+
+Stores the cleaned text produced by ``_scrape_single_url`` in a local SQLite
+database keyed on the resolved URL, together with the HTTP validators
+(ETag / Last-Modified) needed to revalidate stale entries with conditional
+requests. A ``304 Not Modified`` answer lets the scraper reuse the stored
+text without downloading or re-extracting the page.
+
+Provides:
+- CachedPage: a single cache entry
+- ScrapeCache: SQLite-backed store with TTL and size-based LRU eviction
+- get_scrape_cache: factory returning the process-wide cache (or None if disabled)
+"""
+from __future__ import annotations
+
+import os
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+SCRAPE_CACHE_ENABLED = os.environ.get("SCRAPE_CACHE_ENABLED", "true").lower() == "true"
+SCRAPE_CACHE_PATH = os.environ.get(
+    "SCRAPE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "scrape_cache.db"),
+)
+# Entries younger than the TTL are served without contacting the origin
+SCRAPE_CACHE_TTL_SECONDS = int(os.environ.get("SCRAPE_CACHE_TTL_SECONDS", str(60 * 60 * 24)))
+# Stale entries older than this are dropped instead of revalidated
+SCRAPE_CACHE_MAX_AGE_SECONDS = int(os.environ.get("SCRAPE_CACHE_MAX_AGE_SECONDS", str(60 * 60 * 24 * 30)))
+# Total size budget for cached content; least recently used entries are evicted first
+SCRAPE_CACHE_MAX_BYTES = int(os.environ.get("SCRAPE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+@dataclass
+class CachedPage:
+    """A cached scrape result for a single URL."""
+    url: str
+    content: str
+    content_type: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def is_fresh(self, ttl_seconds: int = SCRAPE_CACHE_TTL_SECONDS) -> bool:
+        """Whether the entry can be served without revalidation."""
+        return (time.time() - self.fetched_at) < ttl_seconds
+
+    def can_revalidate(self) -> bool:
+        """Whether the entry carries validators usable in a conditional request."""
+        return bool(self.etag or self.last_modified)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers for revalidation."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ScrapeCache:
+    """
+    SQLite-backed scrape cache with TTL and size-based LRU eviction.
+
+    All public methods are thread-safe. The ``a*`` coroutine variants run the
+    blocking SQLite calls in the default executor so they never stall the
+    event loop.
+    """
+
+    def __init__(
+        self,
+        path: str = SCRAPE_CACHE_PATH,
+        ttl_seconds: int = SCRAPE_CACHE_TTL_SECONDS,
+        max_age_seconds: int = SCRAPE_CACHE_MAX_AGE_SECONDS,
+        max_bytes: int = SCRAPE_CACHE_MAX_BYTES,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale": 0, "revalidated": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scrape_cache (
+                url TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                content_type TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_accessed REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_scrape_cache_last_accessed ON scrape_cache (last_accessed)")
+
+    # --- Synchronous API ---
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Return the cached entry for ``url`` or None. Expired entries are deleted."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, content, content_type, etag, last_modified, fetched_at FROM scrape_cache WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            page = CachedPage(*row)
+            if now - page.fetched_at >= self.max_age_seconds:
+                self._conn.execute("DELETE FROM scrape_cache WHERE url = ?", (url,))
+                self._stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE scrape_cache SET last_accessed = ? WHERE url = ?", (now, url))
+            if page.is_fresh(self.ttl_seconds):
+                self._stats["hits"] += 1
+            else:
+                self._stats["stale"] += 1
+            return page
+
+    def put(
+        self,
+        url: str,
+        content: str,
+        content_type: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """Store (or replace) the cleaned content for ``url`` and enforce the size budget."""
+        now = time.time()
+        size = len(content.encode("utf-8"))
+        if size > self.max_bytes:
+            logger.debug(f"Not caching {url}: {size} bytes exceeds cache budget")
+            return
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO scrape_cache
+                    (url, content, content_type, etag, last_modified, fetched_at, last_accessed, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (url, content, content_type, etag, last_modified, now, now, size),
+            )
+            self._stats["stores"] += 1
+            self._evict_locked()
+
+    def mark_revalidated(self, url: str) -> None:
+        """Refresh the fetch time of an entry after the origin answered 304 Not Modified."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE scrape_cache SET fetched_at = ?, last_accessed = ? WHERE url = ?",
+                (now, now, url),
+            )
+            self._stats["revalidated"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size of the cache."""
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM scrape_cache"
+            ).fetchone()
+            return {**self._stats, "entries": entries, "bytes": total_bytes, "max_bytes": self.max_bytes}
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM scrape_cache")
+
+    def _evict_locked(self) -> None:
+        """Delete least recently used entries until the cache fits in ``max_bytes``. Caller holds the lock."""
+        (total_bytes,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM scrape_cache").fetchone()
+        if total_bytes <= self.max_bytes:
+            return
+        excess = total_bytes - self.max_bytes
+        freed = 0
+        victims = []
+        for url, size in self._conn.execute("SELECT url, size FROM scrape_cache ORDER BY last_accessed ASC"):
+            victims.append((url,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM scrape_cache WHERE url = ?", victims)
+        self._stats["evictions"] += len(victims)
+        logger.debug(f"Scrape cache evicted {len(victims)} entries ({freed} bytes)")
+
+    # --- Async wrappers ---
+
+    async def aget(self, url: str) -> Optional[CachedPage]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, url)
+
+    async def aput(
+        self,
+        url: str,
+        content: str,
+        content_type: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.put, url, content, content_type, etag, last_modified
+        )
+
+    async def amark_revalidated(self, url: str) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.mark_revalidated, url)
+
+
+_scrape_cache: Optional[ScrapeCache] = None
+_scrape_cache_lock = threading.Lock()
+_scrape_cache_failed = False
+
+
+def get_scrape_cache() -> Optional[ScrapeCache]:
+    """
+    Return the process-wide scrape cache, creating it on first use.
+
+    Returns None when caching is disabled via SCRAPE_CACHE_ENABLED or when the
+    database cannot be opened; scraping then proceeds uncached.
+    """
+    global _scrape_cache, _scrape_cache_failed
+    if not SCRAPE_CACHE_ENABLED or _scrape_cache_failed:
+        return None
+    if _scrape_cache is None:
+        with _scrape_cache_lock:
+            if _scrape_cache is None:
+                try:
+                    _scrape_cache = ScrapeCache()
+                    logger.info(f"Scrape cache initialized at {SCRAPE_CACHE_PATH}")
+                except Exception as e:
+                    _scrape_cache_failed = True
+                    logger.error(f"Failed to initialize scrape cache at {SCRAPE_CACHE_PATH}: {e}. Scraping will be uncached.")
+                    return None
+    return _scrape_cache
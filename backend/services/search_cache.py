@@ -0,0 +1,61 @@
+"""
+Cache of raw Brave Search results keyed by normalised query.
+
+Similar topics and the query generators produce many near-identical keyword
+strings. Serving them from this cache skips both the Brave rate-limiter wait
+and the HTTP round-trip. Only the result list (title, link, snippet) is cached;
+scraping still runs and has its own caches.
+
+Provides:
+- normalize_query: case-folded, whitespace-collapsed query text
+- search_cache_key: cache key for a query, language and result count
+- get_brave_result_cache: process-wide cache backend (None when disabled)
+"""
+from __future__ import annotations
+
+import os
+import re
+import hashlib
+import logging
+import threading
+from typing import Optional
+
+from backend.services.cache_backends import CacheBackend, create_cache_backend
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+BRAVE_CACHE_ENABLED = os.environ.get("BRAVE_CACHE_ENABLED", "true").lower() == "true"
+# auto (Redis when REDIS_URL is set, otherwise SQLite) | sqlite | redis | memory
+BRAVE_CACHE_BACKEND = os.environ.get("BRAVE_CACHE_BACKEND", "auto")
+BRAVE_CACHE_TTL_SECONDS = int(os.environ.get("BRAVE_CACHE_TTL_SECONDS", str(60 * 60 * 24)))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold and collapse whitespace so trivially different queries share an entry."""
+    return _WHITESPACE_RE.sub(" ", query.casefold()).strip()
+
+
+def search_cache_key(query: str, language: Optional[str], count: int) -> str:
+    """Cache key for a Brave query; language and result count are part of the key."""
+    raw = f"{(language or 'any').lower()}|{count}|{normalize_query(query)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+_brave_result_cache: Optional[CacheBackend] = None
+_brave_result_cache_lock = threading.Lock()
+
+
+def get_brave_result_cache() -> Optional[CacheBackend]:
+    """Return the Brave result cache, or None when BRAVE_CACHE_ENABLED is false."""
+    global _brave_result_cache
+    if not BRAVE_CACHE_ENABLED:
+        return None
+    if _brave_result_cache is None:
+        with _brave_result_cache_lock:
+            if _brave_result_cache is None:
+                _brave_result_cache = create_cache_backend("brave_search", BRAVE_CACHE_BACKEND)
+                logger.info(f"Brave result cache initialized ({_brave_result_cache.backend}, ttl={BRAVE_CACHE_TTL_SECONDS}s)")
+    return _brave_result_cache
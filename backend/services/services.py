@@ -3,17 +3,13 @@ import logging
 import re
 import asyncio
 import aiohttp
-import io # Added for BytesIO
 import fitz # Added for PyMuPDF
 import json # Added for parsing Brave response
-import threading # Added for thread-safe rate limiting
-import time # Added for thread-safe rate limiting
+import time
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import AIMessage
-from typing import Optional, Union, Tuple, Any, Dict, List
-from bs4 import BeautifulSoup
-import trafilatura # Added for HTML extraction
+from typing import Optional, Union, Tuple, Any, Callable, Dict, List
 
 # Import official Google GenAI SDK for Grounding with Google Search
 try:
@@ -46,6 +42,16 @@ except ImportError:
 
 # Import models directly for runtime use
 from backend.models.models import SearchServiceResult, ScrapedResult, GoogleSearchMetadata, LearningPathState
+from backend.services.scrape_cache import get_scrape_cache
+from backend.services.llm_pool import get_chat_model, get_genai_client
+from backend.services.extraction import get_extraction_engine, ExtractionTimeoutError
+from backend.services.http_clients import get_http_session
+from backend.services.rate_limiter import get_brave_rate_limiter
+from backend.services.url_registry import get_url_registry
+from backend.services.domain_health import get_domain_health_registry, domain_of
+from backend.services.search_cache import get_brave_result_cache, search_cache_key, BRAVE_CACHE_TTL_SECONDS
+from backend.core.generation_profile import record_search, record_scrape_bytes
+from backend.core.blob_store import externalize_search_result
 
 # Import key provider for type hints but with proper import protection
 from typing import TYPE_CHECKING
@@ -65,123 +71,47 @@ logger = logging.getLogger(__name__)
 SEARCH_SERVICE = "brave" # Updated from "tavily"
 # Maximum characters to extract from scraped content (HTML or PDF)
 MAX_SCRAPE_LENGTH = 100000
-# Minimum content length threshold for Trafilatura fallback
-TRAFILATURA_MIN_LENGTH_FALLBACK = 100
-# Percentage of page height to consider as header/footer margin in PDF
-PDF_HEADER_MARGIN_PERCENT = 0.10 # 10%
-PDF_FOOTER_MARGIN_PERCENT = 0.10 # 10%
+# HTML/PDF extraction thresholds live in backend.services.extraction
 
 # --- New Constants for Scraping Enhancement ---
 TARGET_SUCCESSFUL_SCRAPES = 3 # Desired minimum number of successful scrapes
 FETCH_BUFFER = 3 # How many extra results to fetch beyond max_results
+# Return as soon as enough pages scraped successfully and cancel the slower ones
+SCRAPE_EARLY_EXIT = os.environ.get("SCRAPE_EARLY_EXIT", "true").lower() == "true"
+# Download budgets per content type. HTML beyond the budget is truncated, larger PDFs are skipped.
+SCRAPE_MAX_HTML_BYTES = int(os.environ.get("SCRAPE_MAX_HTML_BYTES", str(2 * 1024 * 1024)))
+SCRAPE_MAX_PDF_BYTES = int(os.environ.get("SCRAPE_MAX_PDF_BYTES", str(15 * 1024 * 1024)))
+SCRAPE_STREAM_CHUNK_BYTES = int(os.environ.get("SCRAPE_STREAM_CHUNK_BYTES", str(64 * 1024)))
+# Content types that do not say what the body is; these are sniffed from the first chunk
+_GENERIC_CONTENT_TYPES = ("", "application/octet-stream", "binary/octet-stream", "application/download", "application/x-download")
 # --- End New Constants ---
 
-# Shared rate limiter for Brave Search API (1 call per second)
-# brave_search_rate_limiter = aiolimiter.AsyncLimiter(1, 1) # Removed
+# Brave Search calls are throttled per API key by backend.services.rate_limiter
+# (in-process or Redis-backed token bucket, configured via BRAVE_RATE_* env vars)
+BRAVE_MAX_THROTTLE_RETRIES = int(os.environ.get("BRAVE_MAX_THROTTLE_RETRIES", "1"))
+# Brave web search endpoint; pointed at a local stand-in server by the offline benchmarks
+BRAVE_SEARCH_ENDPOINT = os.environ.get("BRAVE_SEARCH_ENDPOINT", "https://api.search.brave.com/res/v1/web/search")
 
-# Thread-safe rate limiter components for Brave Search
-_brave_search_lock = threading.Lock()
-_last_brave_call_time = 0.0
+# Factory(model, temperature) replacing Gemini chat models, installed by the offline benchmarks
+_chat_model_override: Optional[Callable[[str, float], Any]] = None
 
-# --- Start of Modified PDF Helper Function ---
-def _extract_pdf_text_sync(pdf_bytes: bytes, source_url: str) -> str:
-    """Synchronous helper to extract text from PDF bytes using PyMuPDF block analysis.
 
-    Attempts to extract text by analyzing blocks, filtering headers/footers,
-    and sorting blocks by reading order. Falls back to simple page text extraction if
-    block analysis fails or yields no content.
-
-    Designed to be run in a thread executor.
-
-    Args:
-        pdf_bytes: The byte content of the PDF file.
-        source_url: The original URL for logging context.
-
-    Returns:
-        The extracted and cleaned text content.
+def set_chat_model_override(factory: Optional[Callable[[str, float], Any]]) -> None:
+    """
+    Serve every get_llm* chat model from ``factory(model, temperature)`` instead of Gemini.
 
-    Raises:
-        ValueError: If the PDF is encrypted.
-        fitz.fitz.FileDataError: If the PDF data is corrupted or invalid.
-        RuntimeError: For other PyMuPDF or general exceptions during processing.
+    Used by backend/benchmarks to run the graph offline; pass None to restore Gemini.
+    API keys are still resolved, so key provider behaviour is unchanged.
     """
-    logger.debug(f"Starting PDF block analysis text extraction for {source_url}")
-    all_text_content = ""
-    extraction_method_used = "block_analysis" # Track method
+    global _chat_model_override
+    _chat_model_override = factory
 
-    try:
-        with fitz.open(stream=io.BytesIO(pdf_bytes), filetype="pdf") as doc:
-            if doc.is_encrypted:
-                logger.warning(f"Skipping encrypted PDF: {source_url}")
-                raise ValueError("PDF is encrypted")
-
-            page_texts = []
-            for page_num in range(len(doc)):
-                page_text_blocks = []
-                try:
-                    page = doc.load_page(page_num)
-                    page_rect = page.rect
-                    page_height = page_rect.height
-                    header_limit = page_rect.y0 + page_height * PDF_HEADER_MARGIN_PERCENT
-                    footer_limit = page_rect.y1 - page_height * PDF_FOOTER_MARGIN_PERCENT
-
-                    blocks = page.get_text("blocks", sort=False) # Get blocks with coordinates, no initial sort
-
-                    # Filter headers/footers and empty blocks
-                    filtered_blocks = [
-                        b for b in blocks
-                        if b[1] >= header_limit and b[3] <= footer_limit and b[4].strip() # y0>=header, y1<=footer, text exists
-                    ]
-
-                    # Sort by reading order (top-to-bottom, left-to-right)
-                    filtered_blocks.sort(key=lambda b: (b[1], b[0])) # Sort by y0, then x0
-
-                    page_text_blocks = [b[4].strip() for b in filtered_blocks] # Extract text
-
-                    if page_text_blocks:
-                        page_texts.append("\n".join(page_text_blocks)) # Join blocks with single newline
-
-                except Exception as page_err:
-                    logger.error(f"Error processing blocks on page {page_num+1} of PDF {source_url}: {page_err}", exc_info=False)
-                    # For now, continue processing other pages.
-
-            if page_texts:
-                 all_text_content = "\n\n".join(page_texts) # Join pages with double newline
-
-            # --- Fallback to simple page text extraction if block analysis yielded nothing ---
-            if not all_text_content.strip():
-                logger.warning(f"PDF block analysis yielded no text for {source_url}. Falling back to simple page extraction.")
-                extraction_method_used = "page_text_fallback"
-                all_text_fallback = []
-                for page_num in range(len(doc)):
-                     try:
-                         page = doc.load_page(page_num)
-                         page_text = page.get_text("text", sort=True).strip() # Simple text extraction
-                         if page_text:
-                             all_text_fallback.append(page_text)
-                     except Exception as page_err:
-                         logger.error(f"Error during fallback text extraction on page {page_num+1} of PDF {source_url}: {page_err}", exc_info=False)
-                all_text_content = "\n\n".join(all_text_fallback)
-
-            # --- Final Cleaning (Applied regardless of method) ---
-            if all_text_content:
-                # Corrected regex substitutions
-                clean_text = re.sub(r'[ \t]*\n[ \t]*', '\n', all_text_content)
-                clean_text = re.sub(r'\n{3,}', '\n\n', clean_text).strip()
-                logger.debug(f"Successfully extracted text from PDF ({extraction_method_used}): {source_url}")
-                return clean_text
-            else:
-                 logger.warning(f"No text could be extracted from PDF {source_url} using any method.")
-                 return "" # Return empty string if no content found
 
-    except (fitz.fitz.FileDataError, ValueError) as e:
-        logger.error(f"Failed to process PDF {source_url}: {e}")
-        raise
-    except Exception as e:
-        logger.error(f"Unexpected error during PDF processing for {source_url}: {type(e).__name__} - {e}", exc_info=True)
-        raise RuntimeError(f"Unexpected error during PDF processing: {type(e).__name__}") from e
+def _chat_model(model: str, temperature: float, google_api_key: str):
+    if _chat_model_override is not None:
+        return _chat_model_override(model, temperature)
+    return get_chat_model(model=model, temperature=temperature, google_api_key=google_api_key)
 
-# --- End of Modified PDF Helper Function ---
 
 
 async def get_llm(key_provider=None, user=None):
@@ -193,7 +123,7 @@ async def get_llm(key_provider=None, user=None):
         user: User object for model selection (optional for backward compatibility)
         
     Returns:
-        Initialized ChatGoogleGenerativeAI instance
+        Pooled ChatGoogleGenerativeAI instance (shared across calls, see backend.services.llm_pool)
     """
     google_api_key = None
     
@@ -225,11 +155,7 @@ async def get_llm(key_provider=None, user=None):
     model = _get_model_for_user(user)
     
     try:
-        return ChatGoogleGenerativeAI(
-            model=model,
-            temperature=0.2,
-            google_api_key=google_api_key,
-        )
+        return _chat_model(model, 0.2, google_api_key)
     except Exception as e:
         logger.error(f"Error initializing ChatGoogleGenerativeAI: {str(e)}")
         raise
@@ -244,7 +170,7 @@ async def get_llm_for_evaluation(key_provider=None, user=None):
         user: User object (optional, not used for model selection in evaluations)
 
     Returns:
-        Initialized ChatGoogleGenerativeAI instance with gemini-3.1-flash-lite
+        Pooled ChatGoogleGenerativeAI instance with gemini-3.1-flash-lite
     """
     google_api_key = None
     
@@ -276,11 +202,7 @@ async def get_llm_for_evaluation(key_provider=None, user=None):
     logger.info(f"Using {model} for evaluation (user: {getattr(user, 'email', 'unknown')})")
 
     try:
-        return ChatGoogleGenerativeAI(
-            model=model,
-            temperature=0.2,
-            google_api_key=google_api_key,
-        )
+        return _chat_model(model, 0.2, google_api_key)
     except Exception as e:
         logger.error(f"Error initializing ChatGoogleGenerativeAI for evaluation: {str(e)}")
         raise
@@ -322,11 +244,7 @@ async def get_llm_flash_lite(key_provider=None, user=None):
     logger.info(f"Using {model} for curiosity generation (user: {getattr(user, 'email', 'unknown')})")
 
     try:
-        return ChatGoogleGenerativeAI(
-            model=model,
-            temperature=0.3,
-            google_api_key=google_api_key,
-        )
+        return _chat_model(model, 0.3, google_api_key)
     except Exception as e:
         logger.error(f"Error initializing ChatGoogleGenerativeAI for flash-lite: {str(e)}")
         raise
@@ -432,8 +350,8 @@ async def get_llm_with_search(key_provider=None, user=None) -> Union['GroundedGe
         # Determine model based on user
         model = _get_model_for_user(user)
         
-        # Create Google GenAI client with grounding
-        client = genai.Client(api_key=google_api_key)
+        # Reuse a pooled Google GenAI client for grounding
+        client = get_genai_client(google_api_key)
         google_search_tool = Tool(google_search=GoogleSearch())
         
         logger.info(f"Initializing grounded LLM for premium user {getattr(user, 'email', 'unknown')} with model {model}")
@@ -967,8 +885,8 @@ class GoogleNativeSearchService:
             # Determine model based on user
             model = _get_model_for_user(user)
             
-            # Create Google GenAI client
-            client = genai.Client(api_key=google_api_key)
+            # Reuse a pooled Google GenAI client
+            client = get_genai_client(google_api_key)
             
             # Create optimized search prompt
             search_prompt = f"""Conduct a comprehensive research search about: {query}
@@ -1144,38 +1062,38 @@ Search Query: {query}"""
                 self.logger.warning(f"Failed to create scraping child run: {e}")
         
         processed_results = []
-        async with aiohttp.ClientSession() as session:
-            sem = asyncio.Semaphore(3)
-
-            async def bounded_scrape(url_info: Dict):
-                async with sem:
-                    url = url_info['url']
-                    title = url_info.get('title', 'No Title')
-                    content, error, final_url = await _scrape_single_url(session, url, timeout=scrape_timeout)
-                    return ScrapedResult(
-                        title=title,
-                        url=final_url,
-                        search_snippet="Source found via Google Search grounding.",
-                        scraped_content=content,
-                        scrape_error=error
-                    )
+        session = await get_http_session("scraping")
+        sem = asyncio.Semaphore(3)
+
+        async def bounded_scrape(url_info: Dict):
+            async with sem:
+                url = url_info['url']
+                title = url_info.get('title', 'No Title')
+                content, error, final_url = await _scrape_single_url(session, url, timeout=scrape_timeout)
+                return ScrapedResult(
+                    title=title,
+                    url=final_url,
+                    search_snippet="Source found via Google Search grounding.",
+                    scraped_content=content,
+                    scrape_error=error
+                )
 
-            tasks = [bounded_scrape(info) for info in urls_info]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            for i, res in enumerate(results):
-                if isinstance(res, Exception):
-                    url_info = urls_info[i]
-                    processed_results.append(ScrapedResult(
-                        title=url_info.get('title', 'No Title'),
-                        url=url_info['url'],
-                        scrape_error=f"Scraping task failed: {str(res)}"
-                    ))
-                else:
-                    processed_results.append(res)
+        tasks = [bounded_scrape(info) for info in urls_info]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        for i, res in enumerate(results):
+            if isinstance(res, Exception):
+                url_info = urls_info[i]
+                processed_results.append(ScrapedResult(
+                    title=url_info.get('title', 'No Title'),
+                    url=url_info['url'],
+                    scrape_error=f"Scraping task failed: {str(res)}"
+                ))
+            else:
+                processed_results.append(res)
         
+        successful_scrapes = sum(1 for r in processed_results if not r.scrape_error)
         if scraping_run:
-            successful_scrapes = sum(1 for r in processed_results if not r.scrape_error)
             scraping_run.end(outputs={"successful_scrapes": successful_scrapes, "failed_scrapes": len(processed_results) - successful_scrapes})
             await asyncio.get_event_loop().run_in_executor(None, scraping_run.patch)
 
@@ -1287,6 +1205,7 @@ class BraveSearchService:
         brave_key_provider=None,
         max_results: int = 5,
         scrape_timeout: int = 10,
+        search_language: Optional[str] = None,
         **kwargs
     ) -> 'SearchServiceResult':
         """
@@ -1297,6 +1216,7 @@ class BraveSearchService:
             brave_key_provider: Provider for Brave Search API key
             max_results: Maximum number of search results
             scrape_timeout: Timeout for scraping operations
+            search_language: Language the query is written in (used to tag cached results)
             **kwargs: Additional configuration parameters
             
         Returns:
@@ -1317,7 +1237,8 @@ class BraveSearchService:
                 query=query,
                 brave_key_provider=brave_key_provider,
                 max_results=max_results,
-                scrape_timeout=scrape_timeout
+                scrape_timeout=scrape_timeout,
+                search_language=search_language
             )
             
             # Ensure is_native_google_search is set to False for Brave results
@@ -1431,7 +1352,8 @@ class SearchServiceRouter:
             query=query,
             brave_key_provider=brave_key_provider,
             max_results=search_config.get('max_results', 5),
-            scrape_timeout=search_config.get('scrape_timeout', 10)
+            scrape_timeout=search_config.get('scrape_timeout', 10),
+            search_language=state.get('search_language')
         )
     
     @staticmethod
@@ -1470,9 +1392,13 @@ async def execute_search_with_router(
         langsmith_extra: Additional metadata for LangSmith tracing
         
     Returns:
-        SearchServiceResult from the appropriate search service
+        SearchServiceResult from the appropriate search service. During a generation,
+        long scraped texts are replaced by ``content_ref`` handles (see blob_store).
     """
-    return await _search_router.execute_search(state, query, search_config, langsmith_extra)
+    record_search()
+    result = await _search_router.execute_search(state, query, search_config, langsmith_extra)
+    # Keep only content handles in the graph state; the text lives in the generation's blob store
+    return await externalize_search_result(result)
 
 def _is_google_redirect_url(url: str) -> bool:
     """Check if URL is a Google redirect URL that needs to be resolved."""
@@ -1530,12 +1456,131 @@ async def _resolve_google_redirect_url(session: aiohttp.ClientSession, redirect_
         return redirect_url, f"Unexpected error resolving redirect: {type(e).__name__}"
 
 # --- Start of Modified _scrape_single_url ---
+def _declared_content_kind(content_type: str) -> Optional[str]:
+    """Map a Content-Type header to "pdf", "html", "unknown" (needs sniffing) or None (unsupported)."""
+    mime = content_type.split(";", 1)[0].strip()
+    if mime == "application/pdf":
+        return "pdf"
+    if mime in ("text/html", "application/xhtml+xml"):
+        return "html"
+    if mime in _GENERIC_CONTENT_TYPES:
+        return "unknown"
+    return None
+
+
+def _sniff_content_kind(first_chunk: bytes, declared_kind: str) -> Optional[str]:
+    """Detect the real body type from its first bytes, falling back to the declared kind."""
+    head = first_chunk[:1024].lstrip()
+    if head.startswith(b"%PDF-"):
+        return "pdf"
+    lowered = head.lower()
+    if lowered.startswith((b"<!doctype html", b"<html", b"<?xml", b"<head", b"<body", b"<!--")):
+        return "html"
+    # Trust an explicit HTML/PDF header when the signature is inconclusive
+    return declared_kind if declared_kind in ("html", "pdf") else None
+
+
+async def _read_body_capped(response: aiohttp.ClientResponse, declared_kind: str) -> Tuple[Optional[str], bytes, bool]:
+    """
+    Stream a response body without ever buffering more than the budget for its type.
+
+    The first chunk decides the content kind. Unsupported bodies are abandoned after
+    that chunk; bodies larger than the budget are cut at the budget.
+
+    Returns:
+        (kind, body, truncated) where kind is "pdf", "html" or None (unsupported).
+    """
+    first_chunk = await response.content.read(SCRAPE_STREAM_CHUNK_BYTES)
+    kind = _sniff_content_kind(first_chunk, declared_kind)
+    if kind is None:
+        response.close()
+        return None, b"", False
+
+    max_bytes = SCRAPE_MAX_PDF_BYTES if kind == "pdf" else SCRAPE_MAX_HTML_BYTES
+    buffer = bytearray(first_chunk[:max_bytes])
+    truncated = len(first_chunk) > max_bytes
+    while not truncated:
+        chunk = await response.content.read(SCRAPE_STREAM_CHUNK_BYTES)
+        if not chunk:
+            break
+        remaining = max_bytes - len(buffer)
+        if len(chunk) > remaining:
+            buffer.extend(chunk[:remaining])
+            truncated = True
+        else:
+            buffer.extend(chunk)
+    if truncated:
+        # Stop the transfer instead of draining the rest of the body
+        response.close()
+    return kind, bytes(buffer), truncated
+
+
+def _decode_html_body(body: bytes, charset: Optional[str]) -> str:
+    """Decode an HTML body using the response charset, tolerating bad bytes."""
+    try:
+        return body.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+def _classify_scrape_error(error: Optional[str]) -> Optional[str]:
+    """Map a scrape error message to a coarse error class for domain health tracking."""
+    if not error:
+        return "empty"
+    if error.startswith("Scrape timed out") or "extraction timed out" in error:
+        return "timeout"
+    if error.startswith("HTTP error: "):
+        status_code = error[len("HTTP error: "):].split(" ", 1)[0]
+        if status_code in ("403", "429"):
+            return f"http_{status_code}"
+        return "http_5xx" if status_code.startswith("5") else "http_4xx"
+    if error.startswith("Scraping client error"):
+        return "network"
+    if error == "Skipped: PDF is encrypted":
+        return "encrypted_pdf"
+    if error.startswith("Skipped"):
+        return "skipped"
+    return "extraction"
+
+
+def _is_reusable_scrape(outcome: Tuple[Optional[str], Optional[str], str]) -> bool:
+    """
+    Keep permanent failures for the rest of the generation.
+
+    Successful scrapes are not kept: their text is large and repeats are served by the
+    persistent scrape cache. Timeouts and network errors are retried.
+    """
+    content, error, _ = outcome
+    if content:
+        return False
+    return bool(error) and not error.startswith(("Scrape timed out", "Scraping client error", "Unexpected scraping error"))
+
+
 async def _scrape_single_url(session: aiohttp.ClientSession, url: str, timeout: int) -> Tuple[Optional[str], Optional[str], str]:
+    """Scrape a URL, sharing one fetch per URL within the running generation.
+
+    Inside a generation (see backend.core.generation_context) concurrent requests for
+    the same URL join a single in-flight fetch, and permanent failures are not retried.
+    Outside a generation this is a plain call to ``_fetch_and_extract_url``.
+    """
+    registry = get_url_registry(should_cache=_is_reusable_scrape)
+    if registry is None:
+        return await _fetch_and_extract_url(session, url, timeout)
+    return await registry.fetch(url, lambda: _fetch_and_extract_url(session, url, timeout))
+
+
+async def _fetch_and_extract_url(session: aiohttp.ClientSession, url: str, timeout: int) -> Tuple[Optional[str], Optional[str], str]:
     """Scrapes cleaned textual content from a single URL (HTML or PDF) and resolves redirects.
 
     Prioritizes using Trafilatura for HTML and block analysis for PDF, with fallbacks.
     Cleans the content THEN truncates to MAX_SCRAPE_LENGTH.
     Now includes Google redirect URL resolution.
+    Results are served from the persistent scrape cache when fresh; stale entries are
+    revalidated with a conditional request so a 304 skips download and extraction.
+    Bodies are streamed under a per-type byte budget (SCRAPE_MAX_HTML_BYTES /
+    SCRAPE_MAX_PDF_BYTES) and the content type is sniffed from the first chunk.
+    Hosts whose domain circuit is open (see backend.services.domain_health) are skipped
+    immediately, so the buffered search results fill their place without waiting.
 
     Args:
         session: The aiohttp client session.
@@ -1549,8 +1594,6 @@ async def _scrape_single_url(session: aiohttp.ClientSession, url: str, timeout:
         error_message contains details if scraping or processing failed.
     """
     headers = {'User-Agent': 'Mozilla/5.0 (compatible; LearniBot/1.0; +https://learni.com/bot)'} # Example Bot UA
-    clean_text: Optional[str] = None
-    error_message: Optional[str] = None
     
     # Resolve Google redirect URLs first
     actual_url = url
@@ -1565,28 +1608,110 @@ async def _scrape_single_url(session: aiohttp.ClientSession, url: str, timeout:
             actual_url = resolved_url
             logger.info(f"Successfully resolved Google redirect: {url} -> {actual_url}")
 
+    # Serve from the scrape cache when possible
+    scrape_cache = get_scrape_cache()
+    cached_page = None
+    if scrape_cache:
+        try:
+            cached_page = await scrape_cache.aget(actual_url)
+        except Exception as cache_err:
+            logger.warning(f"Scrape cache lookup failed for {actual_url}: {cache_err}")
+            cached_page = None
+        if cached_page and cached_page.is_fresh(scrape_cache.ttl_seconds):
+            logger.debug(f"Scrape cache hit for {actual_url}")
+            return cached_page.content, None, actual_url
+        if cached_page and cached_page.can_revalidate():
+            headers.update(cached_page.conditional_headers())
+            logger.debug(f"Revalidating stale scrape cache entry for {actual_url}")
+
+    # Skip hosts whose circuit is open instead of paying the full timeout again
+    domain_registry = get_domain_health_registry()
+    host = domain_of(actual_url)
+    if domain_registry and not domain_registry.allow(host):
+        if cached_page:
+            logger.debug(f"Domain circuit open for {host}; serving stale cached content for {actual_url}")
+            return cached_page.content, None, actual_url
+        logger.info(f"Skipping {actual_url}: domain circuit open for {host}")
+        return None, f"Skipped: domain circuit open ({host})", actual_url
+
+    fetch_started = time.monotonic()
+    outcome = None
+    try:
+        outcome = await _download_and_extract(session, url, actual_url, timeout, headers, scrape_cache, cached_page)
+        return outcome
+    finally:
+        if domain_registry:
+            if outcome is None:
+                # Cancelled (early exit, last waiter gone) or raised: says nothing about the host,
+                # but a half-open probe must not stay outstanding
+                domain_registry.release_probe(host)
+            else:
+                content, error, _ = outcome
+                domain_registry.record(
+                    host,
+                    success=bool(content),
+                    latency=time.monotonic() - fetch_started,
+                    error_class=None if content else _classify_scrape_error(error),
+                )
+
+
+async def _download_and_extract(
+    session: aiohttp.ClientSession,
+    url: str,
+    actual_url: str,
+    timeout: int,
+    headers: Dict[str, str],
+    scrape_cache: Optional[Any],
+    cached_page: Optional[Any],
+) -> Tuple[Optional[str], Optional[str], str]:
+    """Download ``actual_url`` and extract its text. Network half of ``_fetch_and_extract_url``."""
+    clean_text: Optional[str] = None
+    error_message: Optional[str] = None
+
     try:
         logger.debug(f"Attempting to scrape URL: {actual_url}")
         timeout_obj = aiohttp.ClientTimeout(total=timeout)
         async with session.get(actual_url, timeout=timeout_obj, headers=headers, ssl=False) as response:
+            if response.status == 304 and cached_page:
+                logger.debug(f"Origin returned 304 Not Modified, reusing cached content for {actual_url}")
+                try:
+                    await scrape_cache.amark_revalidated(actual_url)
+                except Exception as cache_err:
+                    logger.warning(f"Failed to refresh scrape cache entry for {actual_url}: {cache_err}")
+                return cached_page.content, None, actual_url
             response.raise_for_status()
             content_type = response.headers.get("Content-Type", "").lower()
-            
+
+            # --- Streaming download under the per-type byte budget ---
+            declared_kind = _declared_content_kind(content_type)
+            if declared_kind is None:
+                logger.warning(f"Skipping unsupported content type '{content_type}' for URL: {url}")
+                return None, f"Skipped: Unsupported content type ({content_type})", actual_url
+            if declared_kind == "pdf" and response.content_length and response.content_length > SCRAPE_MAX_PDF_BYTES:
+                logger.warning(f"Skipping PDF {url}: Content-Length {response.content_length} exceeds {SCRAPE_MAX_PDF_BYTES} bytes")
+                return None, f"Skipped: PDF larger than {SCRAPE_MAX_PDF_BYTES} bytes", actual_url
+
+            content_kind, body, body_truncated = await _read_body_capped(response, declared_kind)
+            record_scrape_bytes(len(body))
+            if content_kind == "pdf" and body_truncated:
+                # A partial PDF cannot be parsed, so abort instead of extracting garbage
+                logger.warning(f"Aborted PDF download for {url}: body exceeds {SCRAPE_MAX_PDF_BYTES} bytes")
+                return None, f"Skipped: PDF larger than {SCRAPE_MAX_PDF_BYTES} bytes", actual_url
+            if content_kind == "html" and body_truncated:
+                logger.debug(f"HTML body for {url} truncated at {SCRAPE_MAX_HTML_BYTES} bytes")
+
             # --- PDF Handling ---
-            if "application/pdf" in content_type:
-                logger.debug(f"Detected PDF content type for: {url}")
+            if content_kind == "pdf":
+                logger.debug(f"Detected PDF content for: {url}")
                 extraction_method_used = "pdf_block_analysis" # Default assumption
                 try:
-                    pdf_bytes = await response.read()
+                    pdf_bytes = body
                     if not pdf_bytes:
                         logger.warning(f"Received empty response body for PDF: {url}")
                         return None, "Received empty PDF content", actual_url
 
-                    loop = asyncio.get_running_loop()
-                    clean_text = await loop.run_in_executor(
-                        None, _extract_pdf_text_sync, pdf_bytes, url
-                    )
-                    # _extract_pdf_text_sync now returns empty string if no content, not None
+                    clean_text = await get_extraction_engine().extract_pdf(pdf_bytes, url)
+                    # extract_pdf_text returns empty string if no content, not None
                     if not clean_text:
                          logger.warning(f"PDF extraction yielded no content for {url}")
                          error_message = "No text content extracted from PDF"
@@ -1599,6 +1724,11 @@ async def _scrape_single_url(session: aiohttp.ClientSession, url: str, timeout:
                     clean_text = None
                     error_message = "Skipped: PDF is encrypted"
                     extraction_method_used = "pdf_error_encrypted"
+                except ExtractionTimeoutError as timeout_err:
+                    logger.warning(f"PDF extraction timed out for {url}: {timeout_err}")
+                    clean_text = None
+                    error_message = f"PDF extraction timed out after {get_extraction_engine().job_timeout}s"
+                    extraction_method_used = "pdf_error_timeout"
                 except (fitz.fitz.FileDataError, RuntimeError) as pdf_err: # Specific processing errors
                     logger.error(f"PDF processing failed for {url}: {pdf_err}")
                     clean_text = None
@@ -1614,68 +1744,34 @@ async def _scrape_single_url(session: aiohttp.ClientSession, url: str, timeout:
                     extraction_method_used = "pdf_error_unknown"
 
             # --- HTML Handling ---
-            elif "text/html" in content_type:
-                logger.debug(f"Detected HTML content type for: {url}")
+            elif content_kind == "html":
+                logger.debug(f"Detected HTML content for: {url}")
                 extraction_method_used = "trafilatura" # Default assumption
                 try:
-                    html_content = await response.text()
-
-                    # Attempt extraction with Trafilatura first
-                    extracted_text = trafilatura.extract(
-                        html_content,
-                        include_comments=False, # Don't include comments
-                        include_tables=True,    # Include table content if relevant
-                        # favor_recall=True,    # Consider if more content is desired at risk of noise
-                    )
+                    html_content = _decode_html_body(body, response.charset)
 
-                    # Check if Trafilatura result is usable
-                    if extracted_text and len(extracted_text) >= TRAFILATURA_MIN_LENGTH_FALLBACK:
-                        clean_text = extracted_text
-                        logger.debug(f"Using Trafilatura extracted content for {url}")
-                    else:
-                        # Fallback to BeautifulSoup method if Trafilatura failed or got too little
-                        extraction_method_used = "beautifulsoup_fallback"
-                        logger.warning(f"Trafilatura yielded insufficient content (<{TRAFILATURA_MIN_LENGTH_FALLBACK} chars) for {url}. Falling back to BeautifulSoup.")
-                        soup = BeautifulSoup(html_content, 'lxml') # Use lxml parser
-                        # Remove common noise tags more aggressively
-                        for tag in soup(['script', 'style', 'nav', 'footer', 'aside', 'header', 'form', 'button', 'input', 'textarea', 'select', 'option', 'label', 'iframe', 'noscript', 'figure', 'figcaption']):
-                            tag.decompose()
-
-                        # Find main content areas (add more selectors if needed)
-                        main_content = soup.find('main') or \
-                                       soup.find('article') or \
-                                       soup.find('div', role='main') or \
-                                       soup.find('div', id='content') or \
-                                       soup.find('div', class_=re.compile(r'\b(content|main|body|article)\b', re.I)) # More flexible class search
-
-                        target_element = main_content if main_content else soup.find('body')
-
-                        if target_element:
-                            clean_text = target_element.get_text(separator='\n', strip=True)
-                        else:
-                            # Extremely unlikely fallback
-                            logger.error(f"Could not find body or main content element for HTML fallback: {url}")
-                            clean_text = None # Mark as failure
-                            error_message = "HTML parsing failed: No body/main element found"
+                    # Trafilatura with BeautifulSoup fallback runs off the event loop
+                    clean_text, error_message, extraction_method_used = await get_extraction_engine().extract_html(html_content, url)
 
-                    # Apply final cleaning steps to text from either method
                     if clean_text:
-                        # Corrected regex substitutions
-                        clean_text = re.sub(r'[ \t]*\n[ \t]*', '\n', clean_text)
-                        clean_text = re.sub(r'\n{3,}', '\n\n', clean_text).strip()
                         logger.info(f"Successfully extracted text from HTML ({extraction_method_used}): {url}")
                         error_message = None # Reset error on success
                     elif not error_message: # If clean_text became None/empty without an explicit error set
                          logger.warning(f"HTML processing ({extraction_method_used}) resulted in empty content for {url}")
                          error_message = "No text content extracted from HTML"
 
+                except ExtractionTimeoutError as timeout_err:
+                    logger.warning(f"HTML extraction timed out for {url}: {timeout_err}")
+                    clean_text = None
+                    error_message = f"HTML extraction timed out after {get_extraction_engine().job_timeout}s"
+                    extraction_method_used = "html_error_timeout"
                 except Exception as html_err:
                     logger.error(f"Error processing HTML content ({extraction_method_used}) for {url}: {type(html_err).__name__} - {html_err}", exc_info=True)
                     clean_text = None
                     error_message = f"Error processing HTML: {type(html_err).__name__}"
                     extraction_method_used = "html_error_unknown"
 
-            # --- Other Content Types ---
+            # --- Other Content Types (detected from the first chunk) ---
             else:
                 logger.warning(f"Skipping unsupported content type '{content_type}' for URL: {url}")
                 clean_text = None
@@ -1691,6 +1787,19 @@ async def _scrape_single_url(session: aiohttp.ClientSession, url: str, timeout:
                 if not error_message: # Avoid overwriting specific errors
                      error_message = "No text content found after cleaning"
 
+            # Store successful extractions with their validators for later revalidation
+            if scrape_cache and clean_text and not error_message:
+                try:
+                    await scrape_cache.aput(
+                        actual_url,
+                        clean_text,
+                        content_type,
+                        etag=response.headers.get("ETag"),
+                        last_modified=response.headers.get("Last-Modified"),
+                    )
+                except Exception as cache_err:
+                    logger.warning(f"Failed to store {actual_url} in scrape cache: {cache_err}")
+
             # Return the cleaned (and possibly truncated) text
             return clean_text, error_message, actual_url
 
@@ -1709,19 +1818,114 @@ async def _scrape_single_url(session: aiohttp.ClientSession, url: str, timeout:
 # --- End of Modified _scrape_single_url ---
 
 
+async def _scrape_until_enough(
+    session: aiohttp.ClientSession,
+    urls: List[str],
+    scrape_timeout: int,
+    needed: int,
+) -> Dict[str, Any]:
+    """
+    Scrape ``urls`` concurrently, consuming results in completion order.
+
+    Once ``needed`` scrapes have returned content the remaining tasks are cancelled,
+    so latency tracks the k-th fastest host instead of the slowest one. Cancelled
+    URLs are reported as failures so their search snippets can still be used.
+
+    Returns:
+        Mapping of original URL to the outcome of ``_scrape_single_url`` (a tuple)
+        or the exception raised by its task.
+    """
+    tasks = {
+        asyncio.create_task(_scrape_single_url(session, url, scrape_timeout), name=f"scrape_{url}"): url
+        for url in urls
+    }
+    outcomes: Dict[str, Any] = {}
+    pending = set(tasks)
+    successes = 0
+    try:
+        while pending and successes < needed:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                url = tasks[task]
+                try:
+                    outcome = task.result()
+                except BaseException as e:  # includes CancelledError of the child task
+                    outcomes[url] = e
+                    continue
+                outcomes[url] = outcome
+                if isinstance(outcome, tuple) and len(outcome) == 3 and outcome[0]:
+                    successes += 1
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    if pending:
+        logger.debug(f"Early exit after {successes} successful scrapes; cancelled {len(pending)} slower scrape tasks.")
+        for task in pending:
+            outcomes[tasks[task]] = (None, "Scraping cancelled: enough results already collected", tasks[task])
+    return outcomes
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds; HTTP-date values are ignored."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+async def _brave_web_search(api_key: str, params: Dict[str, Any], timeout: int = 15) -> Dict[str, Any]:
+    """
+    Call the Brave web search endpoint under the shared per-key rate limiter.
+
+    A 429 lowers the key's rate in the limiter and the call is retried up to
+    BRAVE_MAX_THROTTLE_RETRIES times; other HTTP errors raise immediately.
+    """
+    limiter = get_brave_rate_limiter()
+    session = await get_http_session("brave")
+    headers = {"X-Subscription-Token": api_key, "Accept": "application/json"}
+    for attempt in range(BRAVE_MAX_THROTTLE_RETRIES + 1):
+        await limiter.acquire(api_key)
+        logger.debug(f"Invoking Brave search: '{params.get('q')}' (attempt {attempt + 1})")
+        async with session.get(
+            BRAVE_SEARCH_ENDPOINT,
+            headers=headers,
+            params=params,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as resp:
+            if resp.status == 429:
+                await limiter.on_throttled(api_key, _parse_retry_after(resp.headers.get("Retry-After")))
+                if attempt < BRAVE_MAX_THROTTLE_RETRIES:
+                    continue
+            if not resp.ok:
+                raise Exception(f"HTTP error {resp.status}")
+            await limiter.on_success(api_key)
+            return await resp.json()
+    raise Exception("HTTP error 429")
+
+
 async def perform_search_and_scrape(
     query: str,
     brave_key_provider: 'BraveKeyProvider', # Renamed provider
     max_results: int = 5,
-    scrape_timeout: int = 10
+    scrape_timeout: int = 10,
+    search_language: Optional[str] = None
 ) -> 'SearchServiceResult':
     """Performs Brave search and scrapes results concurrently. # Updated docstring
 
+    Brave result lists are cached by normalised query (see backend.services.search_cache);
+    a cache hit skips the rate limiter and the Brave request.
+
     Args:
         query: The search query.
         brave_key_provider: The key provider instance for Brave Search. # Updated docstring
         max_results: Maximum number of search results to retrieve from Brave. # Updated docstring
         scrape_timeout: Timeout in seconds for each scrape request.
+        search_language: Language the query is written in; part of the cache key.
 
     Returns:
         A SearchServiceResult object containing the query, scraped results,
@@ -1737,52 +1941,27 @@ async def perform_search_and_scrape(
         fetch_count = max_results + FETCH_BUFFER
         logger.debug(f"Requesting {fetch_count} search results (max_results={max_results}, buffer={FETCH_BUFFER}) for query: '{query}'")
 
-        # --- Thread-safe Rate Limiting ---
-        global _last_brave_call_time
-        required_delay = 0.0
-        wait_until_time = 0.0
-
-        logger.debug(f"Acquiring thread lock for Brave search rate limit check: '{query}'")
-        with _brave_search_lock:
-            current_time = time.monotonic()
-            wait_until_time = max(current_time, _last_brave_call_time + 1.05)
-            required_delay = wait_until_time - current_time
-            _last_brave_call_time = wait_until_time
-            logger.debug(f"Rate limit: Current time: {current_time:.2f}, Last scheduled: {_last_brave_call_time:.2f}, Wait until: {wait_until_time:.2f}, Delay: {required_delay:.2f}s. Lock released.")
-        # --- Lock is released ---
-
-        if required_delay > 0:
-            logger.info(f"Rate limiting Brave search. Waiting {required_delay:.2f} seconds...")
-            await asyncio.sleep(required_delay)
-
         # --- Direct Brave API call via aiohttp (bypasses langchain-community wrapper
         #     which hardcodes extra_snippets=True, causing HTTP 422 on current Brave API) ---
-        logger.debug(f"Rate limit wait complete. Invoking Brave search: '{query}'")
+        result_cache = get_brave_result_cache()
+        cache_key = search_cache_key(query, search_language, fetch_count)
+        brave_results_list = await result_cache.get(cache_key) if result_cache else None
         try:
-            brave_headers = {
-                "X-Subscription-Token": api_key,
-                "Accept": "application/json",
-            }
-            brave_params = {"q": query, "count": fetch_count}
-            async with aiohttp.ClientSession() as brave_session:
-                async with brave_session.get(
-                    "https://api.search.brave.com/res/v1/web/search",
-                    headers=brave_headers,
-                    params=brave_params,
-                    timeout=aiohttp.ClientTimeout(total=15),
-                ) as brave_resp:
-                    if not brave_resp.ok:
-                        raise Exception(f"HTTP error {brave_resp.status}")
-                    brave_data = await brave_resp.json()
-            raw_results = brave_data.get("web", {}).get("results", [])
-            brave_results_list = [
-                {
-                    "title": r.get("title", ""),
-                    "link": r.get("url", ""),
-                    "snippet": r.get("description", ""),
-                }
-                for r in raw_results
-            ]
+            if brave_results_list is not None:
+                logger.debug(f"Brave result cache hit for: '{query}'")
+            else:
+                brave_data = await _brave_web_search(api_key, {"q": query, "count": fetch_count})
+                raw_results = brave_data.get("web", {}).get("results", [])
+                brave_results_list = [
+                    {
+                        "title": r.get("title", ""),
+                        "link": r.get("url", ""),
+                        "snippet": r.get("description", ""),
+                    }
+                    for r in raw_results
+                ]
+                if result_cache and brave_results_list:
+                    await result_cache.set(cache_key, brave_results_list, BRAVE_CACHE_TTL_SECONDS)
         except Exception as invoke_err:
             logger.error(f"Error during Brave search for '{query}': {invoke_err}", exc_info=True)
             service_result.search_provider_error = f"Invoke Error: {str(invoke_err)}"
@@ -1819,7 +1998,18 @@ async def perform_search_and_scrape(
         logger.debug(f"Prepared {len(urls_to_scrape)} unique URLs for scraping.")
         scraped_data_map = {}
 
-        async with aiohttp.ClientSession() as session:
+        session = await get_http_session("scraping")
+        if SCRAPE_EARLY_EXIT:
+            # Only the first min(TARGET_SUCCESSFUL_SCRAPES, max_results) successes are kept below,
+            # so there is no point waiting for the slower hosts once we have them.
+            needed = min(TARGET_SUCCESSFUL_SCRAPES, max_results)
+            logger.debug(f"Scraping {len(urls_to_scrape)} URLs in completion order (early exit after {needed} successes).")
+            outcomes_by_url = await _scrape_until_enough(session, urls_to_scrape, scrape_timeout, needed)
+            scrape_tasks = [(url, None) for url in urls_to_scrape]
+            scrape_results_tuples = [
+                outcomes_by_url.get(url, (None, "Scraping task result missing", url)) for url in urls_to_scrape
+            ]
+        else:
             for url in urls_to_scrape:
                 task = asyncio.create_task(
                     _scrape_single_url(session, url, scrape_timeout),
@@ -1829,22 +2019,22 @@ async def perform_search_and_scrape(
 
             logger.debug(f"Gathering results for {len(scrape_tasks)} scraping tasks.")
             scrape_results_tuples = await asyncio.gather(*(task for _, task in scrape_tasks), return_exceptions=True)
-            logger.debug(f"Completed gathering scrape results.")
-
-            for i, (url, _) in enumerate(scrape_tasks):
-                scrape_outcome = scrape_results_tuples[i]
-                if isinstance(scrape_outcome, Exception):
-                    if isinstance(scrape_outcome, asyncio.CancelledError):
-                        logger.warning(f"Scraping task for {url} was cancelled.")
-                        scraped_data_map[url] = (None, "Scraping task cancelled", url)
-                    else:
-                        logger.error(f"Gather caught exception for scrape task {url}: {scrape_outcome}", exc_info=isinstance(scrape_outcome, Exception))
-                        scraped_data_map[url] = (None, f"Gather error: {type(scrape_outcome).__name__}", url)
-                elif isinstance(scrape_outcome, tuple) and len(scrape_outcome) == 3:
-                    scraped_data_map[url] = scrape_outcome
+        logger.debug(f"Completed gathering scrape results.")
+
+        for i, (url, _) in enumerate(scrape_tasks):
+            scrape_outcome = scrape_results_tuples[i]
+            if isinstance(scrape_outcome, BaseException):
+                if isinstance(scrape_outcome, asyncio.CancelledError):
+                    logger.warning(f"Scraping task for {url} was cancelled.")
+                    scraped_data_map[url] = (None, "Scraping task cancelled", url)
                 else:
-                    logger.error(f"Unexpected scrape outcome type for {url}: {type(scrape_outcome)} - {scrape_outcome}")
-                    scraped_data_map[url] = (None, f"Unexpected scrape result type: {type(scrape_outcome).__name__}", url)
+                    logger.error(f"Gather caught exception for scrape task {url}: {scrape_outcome}", exc_info=isinstance(scrape_outcome, Exception))
+                    scraped_data_map[url] = (None, f"Gather error: {type(scrape_outcome).__name__}", url)
+            elif isinstance(scrape_outcome, tuple) and len(scrape_outcome) == 3:
+                scraped_data_map[url] = scrape_outcome
+            else:
+                logger.error(f"Unexpected scrape outcome type for {url}: {type(scrape_outcome)} - {scrape_outcome}")
+                scraped_data_map[url] = (None, f"Unexpected scrape result type: {type(scrape_outcome).__name__}", url)
 
         # --- Start Prioritization Logic ---
         successful_scrapes = []
@@ -2010,20 +2200,23 @@ async def validate_brave_key(api_key: str) -> Tuple[bool, Optional[str]]: # Rena
     # No standard prefix check for Brave keys based on docs
 
     try:
-        # Minimal direct call to Brave Search API to validate the key
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                "https://api.search.brave.com/res/v1/web/search",
-                headers={"X-Subscription-Token": api_key, "Accept": "application/json"},
-                params={"q": "test", "count": 1},
-                timeout=aiohttp.ClientTimeout(total=10),
-            ) as resp:
-                if resp.status == 401:
-                    return False, "API key error: Unauthorized. The Brave Search API key is likely invalid or revoked."
-                if resp.status == 429:
-                    return False, "API key error: Rate limit exceeded."
-                if not resp.ok:
-                    return False, f"API key validation returned HTTP {resp.status}."
+        # Minimal direct call to Brave Search API to validate the key (counts against the key's rate)
+        limiter = get_brave_rate_limiter()
+        await limiter.acquire(api_key)
+        session = await get_http_session("brave")
+        async with session.get(
+            BRAVE_SEARCH_ENDPOINT,
+            headers={"X-Subscription-Token": api_key, "Accept": "application/json"},
+            params={"q": "test", "count": 1},
+            timeout=aiohttp.ClientTimeout(total=10),
+        ) as resp:
+            if resp.status == 401:
+                return False, "API key error: Unauthorized. The Brave Search API key is likely invalid or revoked."
+            if resp.status == 429:
+                await limiter.on_throttled(api_key, _parse_retry_after(resp.headers.get("Retry-After")))
+                return False, "API key error: Rate limit exceeded."
+            if not resp.ok:
+                return False, f"API key validation returned HTTP {resp.status}."
         return True, None
     except aiohttp.ClientConnectorError:
         return False, "Network error during API key validation. Check connectivity."
@@ -0,0 +1,87 @@
+"""
+Native structured output for ``run_chain``.
+
+For Pydantic parsers the schema is passed to Gemini's JSON-schema response
+mode, so the model returns JSON that already matches the parser and the
+markdown extraction / format-fix retry prompts are not needed. Schemas the API
+rejects, or whose responses fail to validate several times in a row, are
+remembered and go straight to the text-parsing path afterwards; a validated
+response resets the count. Transient errors (timeouts,
+connection resets, 5xx, 429) are not held against the schema; run_chain retries
+them like any other call.
+
+Provides:
+- structured_output_enabled: whether a call site may use native structured output
+- schema_supported / mark_schema_failure / mark_schema_success: per-schema fallback bookkeeping
+- disabled_schemas: schemas currently sent through text parsing only
+- SchemaRejectedError / is_schema_rejection: errors that mean the schema itself was refused
+"""
+from __future__ import annotations
+
+import os
+import logging
+import threading
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+LLM_STRUCTURED_OUTPUT_ENABLED = os.environ.get("LLM_STRUCTURED_OUTPUT_ENABLED", "true").lower() == "true"
+# Comma-separated call sites ("<module>.<function>") that always use text parsing
+LLM_STRUCTURED_OUTPUT_DISABLED_CALL_SITES = {
+    s.strip() for s in os.environ.get("LLM_STRUCTURED_OUTPUT_DISABLED_CALL_SITES", "").split(",") if s.strip()
+}
+# Consecutive schema rejections or unvalidated responses after which a schema is sent through text parsing only
+LLM_STRUCTURED_OUTPUT_MAX_FAILURES = int(os.environ.get("LLM_STRUCTURED_OUTPUT_MAX_FAILURES", "3"))
+
+# Provider error fragments that point at the response schema rather than at the request or the service
+_SCHEMA_ERROR_MARKERS = ("schema", "response_mime_type", "json mode", "function declaration")
+
+_schema_failures: Dict[str, int] = {}
+_schema_failures_lock = threading.Lock()
+
+
+class SchemaRejectedError(Exception):
+    """The structured-output request could not be built for the schema."""
+
+
+def is_schema_rejection(error: BaseException) -> bool:
+    """Whether ``error`` means the schema was refused (locally, or by the provider with a 400)."""
+    if isinstance(error, SchemaRejectedError):
+        return True
+    text = str(error).lower()
+    is_bad_request = "400" in text or "invalid_argument" in text or "invalid argument" in text
+    return is_bad_request and any(marker in text for marker in _SCHEMA_ERROR_MARKERS)
+
+
+def structured_output_enabled(call_site: str) -> bool:
+    return LLM_STRUCTURED_OUTPUT_ENABLED and call_site not in LLM_STRUCTURED_OUTPUT_DISABLED_CALL_SITES
+
+
+def schema_supported(schema_name: str) -> bool:
+    return _schema_failures.get(schema_name, 0) < LLM_STRUCTURED_OUTPUT_MAX_FAILURES
+
+
+def mark_schema_failure(schema_name: str, error: Exception) -> None:
+    """
+    Count a schema rejection or a response that did not validate.
+
+    After LLM_STRUCTURED_OUTPUT_MAX_FAILURES of them in a row the schema uses text parsing only.
+    """
+    with _schema_failures_lock:
+        failures = _schema_failures.get(schema_name, 0) + 1
+        _schema_failures[schema_name] = failures
+    if failures == LLM_STRUCTURED_OUTPUT_MAX_FAILURES:
+        logger.warning(f"Structured output disabled for schema {schema_name} after {failures} failures: {error}")
+
+
+def mark_schema_success(schema_name: str) -> None:
+    """Reset the failure count after a response that validated."""
+    if schema_name in _schema_failures:
+        with _schema_failures_lock:
+            _schema_failures.pop(schema_name, None)
+
+
+def disabled_schemas() -> List[str]:
+    with _schema_failures_lock:
+        return sorted(name for name, failures in _schema_failures.items() if failures >= LLM_STRUCTURED_OUTPUT_MAX_FAILURES)
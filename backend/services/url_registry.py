@@ -0,0 +1,146 @@
+"""
+Generation-scoped single-flight deduplication for URL scraping.
+
+Initial research, refinement searches, module planning and per-submodule
+research frequently surface the same links. Within one generation, the
+``UrlFetchRegistry`` makes concurrent requests for a URL share a single
+in-flight fetch. Finished fetches are only kept when ``should_cache`` accepts
+them, so scraped page text is not pinned for the whole generation; later
+repeats of a successful scrape are served by the persistent scrape cache.
+
+Provides:
+- UrlFetchRegistry: single-flight map of URL -> fetch
+- get_url_registry: registry of the active generation (None outside a generation)
+- url_registry_totals: process-wide counters aggregated from finished generations
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from urllib.parse import urlsplit, urlunsplit
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from backend.core.generation_context import get_generation_context
+
+logger = logging.getLogger(__name__)
+
+_RESOURCE_NAME = "url_fetch_registry"
+
+
+def normalize_url(url: str) -> str:
+    """Canonical registry key: lowercase scheme and host, fragment dropped."""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+class _Flight:
+    """A shared fetch and the number of callers currently waiting on it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class UrlFetchRegistry:
+    """
+    Single-flight registry for one generation.
+
+    The fetch runs in its own task and callers await it through ``asyncio.shield``,
+    so one caller being cancelled (e.g. by early-exit scraping) does not abort the
+    fetch for the others. When every waiter has gone the fetch is cancelled and
+    forgotten, so a later request starts a fresh one.
+
+    ``should_cache`` decides whether a finished result is kept for reuse; results
+    it rejects (the default) are dropped once the in-flight waiters have received
+    them. Keep only small results here: a retained flight lives until the generation ends.
+    """
+
+    def __init__(self, should_cache: Optional[Callable[[Any], bool]] = None):
+        self._flights: Dict[str, _Flight] = {}
+        self._should_cache = should_cache or (lambda result: False)
+        self._stats = {"requests": 0, "fetches": 0, "joined_in_flight": 0, "reused_completed": 0}
+
+    async def fetch(self, url: str, fetcher: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result for ``url``, running ``fetcher`` only if no fetch exists yet."""
+        key = normalize_url(url)
+        self._stats["requests"] += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            self._stats["fetches"] += 1
+            flight = _Flight(asyncio.create_task(fetcher(), name=f"single_flight_{key}"))
+            flight.task.add_done_callback(lambda task, key=key: self._on_done(key, task))
+            self._flights[key] = flight
+        elif flight.task.done():
+            self._stats["reused_completed"] += 1
+        else:
+            self._stats["joined_in_flight"] += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+                self._flights.pop(key, None)
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _on_done(self, key: str, task: asyncio.Task) -> None:
+        flight = self._flights.get(key)
+        if flight is None or flight.task is not task:
+            return
+        if task.cancelled() or task.exception() is not None or not self._should_cache(task.result()):
+            self._flights.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Request counters and the share of requests served without a new fetch."""
+        requests = self._stats["requests"]
+        saved = requests - self._stats["fetches"]
+        return {**self._stats, "saved_fetches": saved, "hit_rate": round(saved / requests, 3) if requests else 0.0}
+
+
+_totals = {"generations": 0, "requests": 0, "fetches": 0, "joined_in_flight": 0, "reused_completed": 0}
+_totals_lock = threading.Lock()
+
+
+def _record_generation(task_id: str, registry: UrlFetchRegistry) -> None:
+    stats = registry.stats()
+    with _totals_lock:
+        _totals["generations"] += 1
+        for name in ("requests", "fetches", "joined_in_flight", "reused_completed"):
+            _totals[name] += stats[name]
+    logger.info(
+        f"Generation {task_id}: URL dedup served {stats['saved_fetches']}/{stats['requests']} "
+        f"scrape requests without a new fetch (hit rate {stats['hit_rate']:.0%})"
+    )
+
+
+def get_url_registry(should_cache: Optional[Callable[[Any], bool]] = None) -> Optional[UrlFetchRegistry]:
+    """Return the registry of the active generation, creating it on first use."""
+    context = get_generation_context()
+    if context is None:
+        return None
+
+    def factory() -> UrlFetchRegistry:
+        registry = UrlFetchRegistry(should_cache)
+        context.add_close_callback(lambda: _record_generation(context.task_id, registry))
+        return registry
+
+    return context.get_or_create(_RESOURCE_NAME, factory)
+
+
+def url_registry_totals() -> Dict[str, Any]:
+    """Counters summed over all finished generations in this process."""
+    with _totals_lock:
+        totals = dict(_totals)
+    saved = totals["requests"] - totals["fetches"]
+    totals["saved_fetches"] = saved
+    totals["hit_rate"] = round(saved / totals["requests"], 3) if totals["requests"] else 0.0
+    return totals
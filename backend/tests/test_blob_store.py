@@ -0,0 +1,150 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from backend.core import blob_store, checkpointing
+from backend.core.blob_store import (
+    ContentBlobStore, content_ref, externalize_search_result, get_content_blob_store, preload_contents,
+)
+from backend.core.generation_context import generation_scope
+from backend.models.models import ScrapedResult, SearchServiceResult
+
+PAGE = "Graph search explores nodes level by level. " * 100
+OTHER_PAGE = "Dynamic programming stores overlapping subproblems. " * 100
+
+
+@pytest.fixture
+def blob_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "CONTENT_BLOB_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(checkpointing, "get_checkpointer", lambda: None)
+    return tmp_path
+
+
+def _result(query, *pages):
+    return SearchServiceResult(
+        query=query,
+        results=[ScrapedResult(url=f"https://example.com/{i}", scraped_content=page) for i, page in enumerate(pages)],
+    )
+
+
+def test_state_keeps_handles_and_identical_pages_are_stored_once(blob_dir):
+    original = _result("q1", PAGE, "short snippet-sized page")
+
+    async def run():
+        async with generation_scope("task-1"):
+            first = await externalize_search_result(original)
+            second = await externalize_search_result(_result("q2", PAGE, OTHER_PAGE))
+            texts = [item.get_content() for item in first.results + second.results]
+            return first, texts, get_content_blob_store().stats()
+
+    first, texts, stats = asyncio.run(run())
+    assert first.results[0].scraped_content is None
+    assert first.results[0].content_ref == content_ref(PAGE)
+    assert first.results[1].scraped_content == "short snippet-sized page"
+    assert original.results[0].scraped_content == PAGE
+    assert texts == [PAGE, "short snippet-sized page", PAGE, OTHER_PAGE]
+    assert stats["blobs"] == 2 and stats["dedup_hits"] == 1
+    # Without checkpoints nothing outlives the generation
+    assert not os.path.exists(blob_dir / "task-1")
+
+
+def test_results_are_untouched_outside_a_generation(blob_dir):
+    result = _result("q", PAGE)
+    assert asyncio.run(externalize_search_result(result)) is result
+
+
+def test_least_recently_used_blobs_spill_to_disk(tmp_path):
+    store = ContentBlobStore(str(tmp_path / "spill"), memory_budget_chars=len(PAGE) + 10)
+    first = store.put(PAGE)
+    second = store.put(OTHER_PAGE)
+    assert store.stats()["spilled"] == 1
+    assert store.stats()["memory_chars"] == len(OTHER_PAGE)
+    assert store.get(first) == PAGE
+    assert store.get(second) == OTHER_PAGE
+    assert store.stats()["disk_reads"] == 2
+    store.close(remove_files=True)
+    assert not os.path.exists(tmp_path / "spill")
+
+
+def test_handles_resolve_in_a_resumed_generation(blob_dir, monkeypatch):
+    monkeypatch.setattr(checkpointing, "get_checkpointer", lambda: object())
+    handles = []
+
+    async def interrupted_run():
+        async with generation_scope("task-2"):
+            handles.append((await externalize_search_result(_result("q", PAGE))).results[0])
+            await asyncio.sleep(60)
+
+    async def first_run():
+        task = asyncio.ensure_future(interrupted_run())
+        while not handles:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def resumed_run(item):
+        async with generation_scope("task-2"):
+            return item.get_content()
+
+    # A cancelled run (e.g. a shutdown) keeps its blobs for the resume
+    asyncio.run(first_run())
+    assert os.path.exists(blob_dir / "task-2")
+
+    # The handle survives serialization into a checkpoint and back
+    item = ScrapedResult(**handles[0].model_dump())
+    assert asyncio.run(resumed_run(item)) == PAGE
+    # The resumed run finished, so nothing is left to resume
+    assert not os.path.exists(blob_dir / "task-2")
+
+
+def test_finished_and_failed_runs_remove_their_blobs(blob_dir, monkeypatch):
+    monkeypatch.setattr(checkpointing, "get_checkpointer", lambda: object())
+
+    async def run(task_id, fail):
+        async with generation_scope(task_id):
+            await externalize_search_result(_result("q", PAGE))
+            assert os.path.exists(blob_dir / task_id)
+            if fail:
+                raise RuntimeError("node failed")
+
+    asyncio.run(run("task-3", fail=False))
+    with pytest.raises(RuntimeError):
+        asyncio.run(run("task-4", fail=True))
+    assert not os.path.exists(blob_dir / "task-3")
+    assert not os.path.exists(blob_dir / "task-4")
+
+
+def test_disk_io_runs_off_the_event_loop(blob_dir, monkeypatch):
+    monkeypatch.setattr(blob_store, "CONTENT_BLOB_STORE_MEMORY_MB", (len(OTHER_PAGE) + 10) / (1024 * 1024))
+    io_threads = []
+    write_file, get = ContentBlobStore._write_file, ContentBlobStore.get
+
+    def recording_write(self, ref, text):
+        io_threads.append(threading.get_ident())
+        return write_file(self, ref, text)
+
+    def recording_get(self, ref):
+        io_threads.append(threading.get_ident())
+        return get(self, ref)
+
+    monkeypatch.setattr(ContentBlobStore, "_write_file", recording_write)
+    monkeypatch.setattr(ContentBlobStore, "get", recording_get)
+
+    async def run():
+        async with generation_scope("task-5"):
+            result = await externalize_search_result(_result("q", PAGE, OTHER_PAGE))
+            store = get_content_blob_store()
+            first, second = result.results
+            # The first page was spilled to make room for the second
+            assert store.cached(first.content_ref) is None
+            text = await first.aget_content()
+            await preload_contents([result])
+            assert store.cached(second.content_ref) == OTHER_PAGE
+            return text, store.stats(), threading.get_ident()
+
+    text, stats, loop_thread = asyncio.run(run())
+    assert text == PAGE
+    assert stats["spilled"] == 2 and stats["disk_reads"] == 2
+    assert len(io_threads) == 4 and loop_thread not in io_threads
@@ -0,0 +1,217 @@
+import asyncio
+import json
+import operator
+from datetime import datetime, timedelta
+from typing import Annotated, Any, List, TypedDict
+
+import pytest
+from langgraph.graph import END, START, StateGraph
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.pool import StaticPool
+
+from backend.config.database import Base
+from backend.core import checkpointing
+from backend.models.auth_models import (
+    GenerationCheckpoint, GenerationCheckpointBlob, GenerationCheckpointWrite, GenerationTaskStatus,
+)
+from backend.models.models import SearchQuery
+
+
+class _State(TypedDict, total=False):
+    user_topic: str
+    progress_callback: Any
+    queries: List[SearchQuery]
+    steps: Annotated[List[str], operator.add]
+
+
+@pytest.fixture
+def saver():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    tables = [model.__table__ for model in (GenerationCheckpoint, GenerationCheckpointBlob, GenerationCheckpointWrite)]
+    Base.metadata.create_all(engine, tables=tables)
+    return checkpointing.SQLAlchemyCheckpointSaver(sessionmaker(bind=engine))
+
+
+def _graph(saver, calls, fail_on=None):
+    async def plan(state):
+        calls.append("plan")
+        await state["progress_callback"]("plan")
+        return {"queries": [SearchQuery(keywords=state["user_topic"], rationale="r")], "steps": ["plan"]}
+
+    async def develop(state):
+        calls.append("develop")
+        if fail_on == "develop":
+            raise RuntimeError("process restarted")
+        await state["progress_callback"]("develop")
+        return {"steps": [f"developed {state['queries'][0].keywords}"]}
+
+    graph = StateGraph(_State)
+    graph.add_node("plan", plan)
+    graph.add_node("develop", develop)
+    graph.add_edge(START, "plan")
+    graph.add_edge("plan", "develop")
+    graph.add_edge("develop", END)
+    return graph.compile(checkpointer=saver)
+
+
+def _run(graph, state, runtime, thread_id="task-1"):
+    async def run():
+        with checkpointing.runtime_state(runtime):
+            return await graph.ainvoke(state, config={"configurable": {"thread_id": thread_id}})
+    return asyncio.run(run())
+
+
+def test_interrupted_run_resumes_from_last_completed_node(saver):
+    calls, messages = [], []
+
+    async def progress(message):
+        messages.append(message)
+
+    state = {"user_topic": "graphs", "progress_callback": progress, "steps": []}
+    with pytest.raises(RuntimeError):
+        _run(_graph(saver, calls, fail_on="develop"), state, state)
+    assert checkpointing.has_checkpoint("task-1", saver=saver)
+
+    # A new process: fresh graph and callback, no input state
+    async def new_progress(message):
+        messages.append(f"resumed {message}")
+
+    result = _run(_graph(saver, calls), None, {"progress_callback": new_progress})
+    assert calls == ["plan", "develop", "develop"]
+    assert messages == ["plan", "resumed develop"]
+    assert result["steps"] == ["plan", "developed graphs"]
+    assert isinstance(result["queries"][0], SearchQuery)
+
+
+def test_runtime_values_are_never_stored(saver):
+    async def progress(message):
+        pass
+
+    state = {"user_topic": "graphs", "progress_callback": progress, "steps": []}
+    _run(_graph(saver, []), state, state)
+
+    db = saver.session_factory()
+    try:
+        channels = {row.channel for row in db.query(GenerationCheckpointBlob).all()}
+        channels |= {row.channel for row in db.query(GenerationCheckpointWrite).all()}
+    finally:
+        db.close()
+    assert "progress_callback" not in channels
+    stored = checkpointing.get_checkpoint_values("task-1", saver=saver)
+    assert stored["values"]["steps"] == ["plan", "developed graphs"]
+    assert "progress_callback" not in stored["values"]
+
+
+def test_prune_deletes_only_expired_threads(saver):
+    async def progress(message):
+        pass
+
+    state = {"user_topic": "graphs", "progress_callback": progress, "steps": []}
+    _run(_graph(saver, []), state, state, thread_id="old")
+    _run(_graph(saver, []), state, state, thread_id="new")
+    db = saver.session_factory()
+    try:
+        db.query(GenerationCheckpoint).filter(GenerationCheckpoint.thread_id == "old").update(
+            {"created_at": datetime.utcnow() - timedelta(hours=48)}
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    assert checkpointing.prune_checkpoints(retention_hours=24, saver=saver) == 1
+    assert not checkpointing.has_checkpoint("old", saver=saver)
+    assert checkpointing.has_checkpoint("new", saver=saver)
+
+
+def test_cancelled_task_is_left_running_only_with_a_checkpoint(saver, monkeypatch):
+    monkeypatch.setattr(checkpointing, "get_checkpointer", lambda: saver)
+
+    async def progress(message):
+        pass
+
+    state = {"user_topic": "graphs", "progress_callback": progress, "steps": []}
+    _run(_graph(saver, []), state, state)
+
+    assert checkpointing.cancelled_task_outcome("task-1") == (None, None)
+    status, error = checkpointing.cancelled_task_outcome("task-2")
+    assert status == GenerationTaskStatus.FAILED
+    assert json.loads(error)["type"] == "cancelled"
+
+
+def test_cancelled_generation_task_stays_resumable(monkeypatch):
+    # The payments router builds its Stripe client when the API module is imported
+    monkeypatch.setenv("STRIPE_SECRET_KEY", "sk_test")
+    monkeypatch.setenv("STRIPE_WEBHOOK_SECRET", "whsec_test")
+    try:
+        from backend import api
+    except (ImportError, OSError) as e:
+        # WeasyPrint needs native libraries (pango) that may not be installed
+        pytest.skip(f"API app cannot be imported: {e}")
+    from backend.models.auth_models import GenerationTask, LearningPath, User
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    tables = [model.__table__ for model in (
+        User, LearningPath, GenerationTask, GenerationCheckpoint, GenerationCheckpointBlob, GenerationCheckpointWrite,
+    )]
+    with engine.begin() as conn:
+        # Tables only: the auth models declare some indexes twice, which SQLite rejects
+        for table in tables:
+            conn.execute(CreateTable(table))
+    session_factory = sessionmaker(bind=engine)
+    saver = checkpointing.SQLAlchemyCheckpointSaver(session_factory)
+    db = session_factory()
+    user = User(email="user@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    db.add(GenerationTask(task_id="task-1", user_id=user.id, status=GenerationTaskStatus.RUNNING, request_topic="graphs"))
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    async def no_redis():
+        return None
+
+    async def no_event(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(api, "SessionLocal", session_factory)
+    monkeypatch.setattr(api, "get_redis_client", no_redis)
+    monkeypatch.setattr(api, "save_progress_event", no_event)
+    monkeypatch.setattr(checkpointing, "get_checkpointer", lambda: saver)
+
+    async def run():
+        developing = asyncio.Event()
+
+        async def hang(message):
+            if message == "develop":
+                developing.set()
+                await asyncio.Event().wait()
+
+        async def resume_learning_path(task_id, **kwargs):
+            state = {"user_topic": "graphs", "progress_callback": hang, "steps": []}
+            with checkpointing.runtime_state(state):
+                return await _graph(saver, []).ainvoke(state, config={"configurable": {"thread_id": task_id}})
+
+        monkeypatch.setattr(api, "resume_learning_path", resume_learning_path)
+        task = asyncio.create_task(api.generate_learning_path_task(
+            task_id="task-1", topic="graphs", googleKeyProvider=object(), braveKeyProvider=object(),
+            user_id=user_id, resume=True,
+        ))
+        await developing.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+
+    db = session_factory()
+    try:
+        row = db.query(GenerationTask).filter(GenerationTask.task_id == "task-1").one()
+        assert row.status == GenerationTaskStatus.RUNNING
+        assert row.ended_at is None
+    finally:
+        db.close()
+    assert checkpointing.has_checkpoint("task-1", saver=saver)
+    assert "task-1" not in api.active_generations
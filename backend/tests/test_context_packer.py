@@ -0,0 +1,57 @@
+import backend.core.graph_nodes  # noqa: F401  (context_builders is only importable after the graph package)
+from backend.core.submodules.context_builders import build_enhanced_search_context
+from backend.core.submodules.context_packer import BM25, focus_terms, pack_search_results, split_passages, tokenize
+from backend.models.models import ScrapedResult, SearchServiceResult, Submodule
+
+SUBMODULE = Submodule(
+    title="Binary search trees",
+    description="How binary search trees store ordered keys",
+    key_components=["insertion", "tree rotation"],
+)
+
+RELEVANT = "A binary search tree keeps keys ordered. Insertion walks down the tree and a rotation rebalances it."
+FILLER = "Cookies and privacy policy. Subscribe to our newsletter for weekly updates on many unrelated things."
+
+
+def _results(*pages):
+    return [
+        SearchServiceResult(
+            query="binary search tree insertion",
+            results=[ScrapedResult(title=f"Page {i}", url=f"https://example.com/{i}", scraped_content=page) for i, page in enumerate(pages)],
+        )
+    ]
+
+
+def test_split_passages_merges_short_and_splits_long_paragraphs():
+    text = "One.\n\nTwo.\n\n" + "Long sentence here. " * 200
+    passages = split_passages(text, target_chars=200)
+    assert passages[0] == "One.\n\nTwo."
+    assert all(len(p) <= 400 for p in passages)
+    assert "".join(passages[1:]).replace(" ", "") == ("Long sentence here. " * 200).replace(" ", "")
+
+
+def test_bm25_prefers_passages_matching_the_focus():
+    docs = [tokenize(RELEVANT), tokenize(FILLER)]
+    index = BM25(docs)
+    query = focus_terms(SUBMODULE)
+    assert index.score(0, query) > index.score(1, query) == 0
+
+
+def test_pack_keeps_best_passages_within_budget_and_drops_duplicates():
+    page_a = "\n\n".join([FILLER * 13, RELEVANT, FILLER * 13])
+    page_b = "\n\n".join([RELEVANT, FILLER * 13])
+    packed = pack_search_results(_results(page_a, page_b), focus=SUBMODULE, token_budget=60)
+
+    kept = [p for group in packed.groups for source in group.sources for p in source.passages]
+    assert kept == [RELEVANT]
+    assert packed.duplicates_dropped == 1
+    assert packed.tokens_used <= 60 < packed.tokens_available
+    assert packed.tokens_saved == packed.tokens_available - packed.tokens_used
+
+
+def test_build_context_uses_packer_only_with_a_focus():
+    results = _results("\n\n".join([RELEVANT, FILLER * 13]))
+    packed = build_enhanced_search_context(results, focus=SUBMODULE, token_budget=60)
+    full = build_enhanced_search_context(results)
+    assert "Most Relevant Excerpts" in packed and "Cookies" not in packed
+    assert "Cookies" in full and len(full) > len(packed)
@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+from backend.services import services
+from backend.services.domain_health import DomainHealthRegistry, domain_of
+
+
+def test_circuit_opens_after_consecutive_failures_and_recovers():
+    registry = DomainHealthRegistry(failure_threshold=2, cooldown_seconds=0.05, max_cooldown_seconds=1)
+    host = domain_of("https://www.slow.example/article")
+    assert host == "slow.example"
+
+    registry.record(host, success=False, latency=10, error_class="timeout")
+    assert registry.allow(host)
+    registry.record(host, success=False, latency=10, error_class="timeout")
+    assert not registry.allow(host)
+
+    time.sleep(0.06)
+    assert registry.allow(host)  # half-open probe
+    assert not registry.allow(host)  # only one probe at a time
+    registry.record(host, success=False, latency=10, error_class="http_403")
+    assert not registry.allow(host)
+    row = registry.snapshot()[0]
+    assert row["state"] == "open" and row["skipped"] == 3
+    assert row["errors"] == {"timeout": 2, "http_403": 1}
+
+    time.sleep(0.11)  # cool-down doubled to 0.1s
+    assert registry.allow(host)
+    registry.record(host, success=True, latency=0.2)
+    assert registry.snapshot()[0]["state"] == "closed"
+
+
+def test_url_specific_errors_do_not_trip_circuit():
+    registry = DomainHealthRegistry(failure_threshold=1)
+    registry.record("docs.example", success=False, latency=0.1, error_class="http_4xx")
+    assert registry.allow("docs.example")
+
+
+def test_scraper_skips_open_domains(monkeypatch):
+    registry = DomainHealthRegistry(failure_threshold=1, cooldown_seconds=60)
+    registry.record("blocked.example", success=False, latency=10, error_class="timeout")
+    monkeypatch.setattr(services, "get_domain_health_registry", lambda: registry)
+    monkeypatch.setattr(services, "get_scrape_cache", lambda: None)
+
+    content, error, url = asyncio.run(services._fetch_and_extract_url(None, "https://blocked.example/page", 10))
+    assert content is None and error.startswith("Skipped: domain circuit open")
+
+
+def test_error_classification():
+    assert services._classify_scrape_error("Scrape timed out after 10s") == "timeout"
+    assert services._classify_scrape_error("HTTP error: 403 (Forbidden)") == "http_403"
+    assert services._classify_scrape_error("HTTP error: 503 (Service Unavailable)") == "http_5xx"
+    assert services._classify_scrape_error("HTTP error: 404 (Not Found)") == "http_4xx"
+    assert services._classify_scrape_error("Skipped: PDF is encrypted") == "encrypted_pdf"
+
+
+def test_cancelled_probe_does_not_leave_host_half_open(monkeypatch):
+    registry = DomainHealthRegistry(failure_threshold=1, cooldown_seconds=0.05)
+    registry.record("flaky.example", success=False, latency=10, error_class="timeout")
+    monkeypatch.setattr(services, "get_domain_health_registry", lambda: registry)
+    monkeypatch.setattr(services, "get_scrape_cache", lambda: None)
+    started = asyncio.Event()
+
+    async def hanging_download(*args):
+        started.set()
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(services, "_download_and_extract", hanging_download)
+
+    async def run():
+        time.sleep(0.06)
+        probe = asyncio.create_task(services._fetch_and_extract_url(None, "https://flaky.example/a", 10))
+        await started.wait()
+        assert not registry.allow("flaky.example")  # probe outstanding
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+
+    asyncio.run(run())
+    assert registry.allow("flaky.example")  # the next request becomes the new probe
+    registry.record("flaky.example", success=True, latency=0.1)
+    assert registry.snapshot()[0]["state"] == "closed"
+
+
+def test_half_open_probe_that_never_reports_is_replaced():
+    registry = DomainHealthRegistry(failure_threshold=1, cooldown_seconds=0.05)
+    registry.record("silent.example", success=False, latency=10, error_class="timeout")
+    time.sleep(0.06)
+    assert registry.allow("silent.example")
+    assert not registry.allow("silent.example")
+    time.sleep(0.06)
+    assert registry.allow("silent.example")
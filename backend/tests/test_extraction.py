@@ -0,0 +1,160 @@
+import asyncio
+import gc
+import time
+
+import fitz
+import pytest
+
+from backend.services import extraction
+from backend.services.extraction import (
+    ExtractionEngine,
+    ExtractionTimeoutError,
+    extract_html_text,
+    extract_pdf_text,
+)
+
+
+ARTICLE_HTML = (
+    "<html><head><script>var x = 1;</script></head><body><nav>menu</nav><article>"
+    + "".join(f"<p>Paragraph {i} explains an important idea in detail.</p>" for i in range(30))
+    + "</article></body></html>"
+)
+
+
+def _make_pdf(pages, y=300):
+    doc = fitz.open()
+    for text in pages:
+        page = doc.new_page()
+        page.insert_text((72, y), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _slow_job(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def test_extract_html_text_returns_clean_article():
+    text, error, method = extract_html_text(ARTICLE_HTML, "https://example.com")
+    assert error is None
+    assert "Paragraph 0 explains" in text
+    assert "var x" not in text
+    assert "\n\n\n" not in text
+
+
+def test_extract_pdf_text_reads_all_pages():
+    text = extract_pdf_text(_make_pdf(["First page body", "Second page body"]), "https://example.com/a.pdf")
+    assert "First page body" in text and "Second page body" in text
+
+
+def test_extract_pdf_text_respects_page_and_char_budget():
+    pdf_bytes = _make_pdf([f"Page number {i} text" for i in range(10)])
+    assert "Page number 3" not in extract_pdf_text(pdf_bytes, "https://example.com/a.pdf", max_pages=3)
+    budgeted = extract_pdf_text(pdf_bytes, "https://example.com/a.pdf", max_chars=30)
+    assert "Page number 1 text" in budgeted and "Page number 2" not in budgeted
+
+
+def test_extract_pdf_text_falls_back_per_page():
+    # Text inside the header margin is dropped by block analysis, so that page uses plain text
+    header_only = _make_pdf(["Only header text"], y=40)
+    assert extract_pdf_text(header_only, "https://example.com/a.pdf") == "Only header text"
+
+
+def test_engine_splits_large_pdfs_into_page_ranges(monkeypatch):
+    monkeypatch.setattr(extraction, "PDF_PARALLEL_MIN_BYTES", 0)
+    monkeypatch.setattr(extraction, "PDF_PARALLEL_MIN_PAGES", 4)
+    monkeypatch.setattr(extraction, "PDF_MIN_PAGES_PER_JOB", 2)
+    pdf_bytes = _make_pdf([f"Range page {i}" for i in range(8)])
+    engine = ExtractionEngine(max_workers=3, job_timeout=30, backend="thread")
+    try:
+        text = asyncio.run(engine.extract_pdf(pdf_bytes, "https://example.com/big.pdf"))
+    finally:
+        engine.shutdown(wait=True)
+    assert text == "\n\n".join(f"Range page {i}" for i in range(8))
+    assert engine.metrics()["completed"] == 4  # one planning job + three page ranges
+
+
+def test_process_engine_runs_html_and_pdf_jobs():
+    engine = ExtractionEngine(max_workers=2, job_timeout=60, backend="process")
+    pdf_bytes = _make_pdf(["Pooled PDF text"])
+
+    async def run():
+        return await asyncio.gather(
+            engine.extract_html(ARTICLE_HTML, "https://example.com"),
+            engine.extract_pdf(pdf_bytes, "https://example.com/a.pdf"),
+        )
+
+    try:
+        (html_text, _, _), pdf_text = asyncio.run(run())
+    finally:
+        engine.shutdown(wait=True)
+    assert "Paragraph 5" in html_text
+    assert "Pooled PDF text" in pdf_text
+    metrics = engine.metrics()
+    assert metrics["completed"] == 2 and metrics["in_flight"] == 0
+
+
+def test_engine_times_out_slow_jobs():
+    engine = ExtractionEngine(max_workers=1, job_timeout=0.1, backend="thread")
+    try:
+        with pytest.raises(ExtractionTimeoutError):
+            asyncio.run(engine.run("slow", _slow_job, 0.3))
+    finally:
+        engine.shutdown(wait=True)
+    assert engine.metrics()["timeouts"] == 1
+
+
+def test_engine_bounds_admission_to_workers_plus_queue():
+    engine = ExtractionEngine(max_workers=1, job_timeout=5, max_queue_depth=0, backend="thread")
+
+    async def run():
+        return await asyncio.gather(*(engine.run("fast", _slow_job, 0.05) for _ in range(3)))
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        engine.shutdown(wait=True)
+    assert results == [0.05, 0.05, 0.05]
+    metrics = engine.metrics()
+    assert metrics["completed"] == 3
+    assert metrics["peak_queue_depth"] == 2
+    assert metrics["waiting"] == 0
+
+
+def test_engine_propagates_job_errors():
+    engine = ExtractionEngine(backend="inline")
+    with pytest.raises(Exception):
+        asyncio.run(engine.extract_pdf(b"not a pdf", "https://example.com/broken.pdf"))
+    assert engine.metrics()["failed"] == 1
+
+
+def test_timed_out_thread_job_keeps_its_worker_slot():
+    engine = ExtractionEngine(max_workers=1, job_timeout=0.3, backend="thread")
+
+    async def run():
+        with pytest.raises(ExtractionTimeoutError):
+            await engine.run("slow", _slow_job, 0.8)
+        # The stuck job still occupies the only worker
+        assert engine.metrics()["in_flight"] == 1
+        # The next job waits for the worker instead of timing out behind the stuck one
+        return await engine.run("fast", _slow_job, 0.01)
+
+    try:
+        assert asyncio.run(run()) == 0.01
+    finally:
+        engine.shutdown(wait=True)
+    metrics = engine.metrics()
+    assert metrics["timeouts"] == 1 and metrics["completed"] == 1 and metrics["in_flight"] == 0
+
+
+def test_semaphores_are_dropped_with_their_event_loop():
+    engine = ExtractionEngine(max_workers=1, backend="thread")
+    try:
+        for _ in range(3):
+            asyncio.run(engine.run("fast", _slow_job, 0))
+    finally:
+        engine.shutdown(wait=True)
+    gc.collect()
+    assert len(engine._semaphores) == 0
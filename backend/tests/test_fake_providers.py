@@ -0,0 +1,96 @@
+import asyncio
+import random
+
+import aiohttp
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from backend.benchmarks.fake_llm import FakeLLMProfile, fake_chat_model_factory, instance_from_schema
+from backend.benchmarks.fake_search import FakeSearchProfile, FakeSearchServer
+from backend.core.graph_nodes import helpers
+from backend.models.models import (
+    ContentEvaluation,
+    EngagementQuestionList,
+    EnhancedModuleList,
+    QuizQuestionList,
+    SearchQueryList,
+)
+from backend.services import services
+
+MODELS = [ContentEvaluation, EngagementQuestionList, EnhancedModuleList, QuizQuestionList, SearchQueryList]
+PROMPT = ChatPromptTemplate.from_template("Plan a course about {topic}.\n\n{format_instructions}")
+
+
+def _fake_model(**profile):
+    return fake_chat_model_factory(FakeLLMProfile(latency_ms=1, tokens_per_second=1e9, **profile))("gemini-test", 0.2)
+
+
+def test_instances_validate_against_model_schemas():
+    for model in MODELS:
+        for seed in range(5):
+            value = instance_from_schema(model.model_json_schema(), random.Random(seed), FakeLLMProfile())
+            model.model_validate(value)
+
+
+def test_prompt_schema_and_structured_output_paths():
+    llm = _fake_model()
+
+    async def run():
+        for model in MODELS:
+            parser = PydanticOutputParser(pydantic_object=model)
+            params = {"topic": "graphs", "format_instructions": parser.get_format_instructions()}
+            assert isinstance(await (PROMPT | llm | parser).ainvoke(params), model)
+            assert isinstance(await llm.with_structured_output(model, method="json_schema").ainvoke("hi"), model)
+        return (await llm.ainvoke("Write the lesson.")).content
+
+    text = asyncio.run(run())
+    assert text.startswith("## ")
+    assert llm.calls == 2 * len(MODELS) + 1
+
+
+def test_rate_limit_errors_are_retried_by_run_chain():
+    llm = _fake_model(rate_limit_rate=0.5, seed=3)
+    parser = PydanticOutputParser(pydantic_object=SearchQueryList)
+
+    async def get_llm():
+        return llm
+
+    result = asyncio.run(helpers.run_chain(
+        PROMPT, get_llm, parser,
+        {"topic": "graphs", "format_instructions": parser.get_format_instructions()},
+        max_retries=10, initial_retry_delay=0.001,
+    ))
+    assert isinstance(result, SearchQueryList)
+
+
+def test_chat_model_override_serves_get_llm(monkeypatch):
+    factory = fake_chat_model_factory(FakeLLMProfile())
+    monkeypatch.setattr(services, "_chat_model_override", None)
+    services.set_chat_model_override(factory)
+    try:
+        llm = asyncio.run(services.get_llm_for_evaluation(key_provider="AIza" + "x" * 35))
+    finally:
+        services.set_chat_model_override(None)
+    assert llm is factory.models[("gemini-3.1-flash-lite", 0.2)]
+
+
+def test_fake_search_server_serves_results_and_pages():
+    server = FakeSearchServer(FakeSearchProfile(search_latency_ms=1, page_latency_ms=1, page_error_rate=0, hosts=2))
+
+    async def run():
+        endpoint = await server.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(endpoint, params={"q": "graph theory", "count": 5}) as resp:
+                    results = (await resp.json())["web"]["results"]
+                async with session.get(results[0]["url"]) as resp:
+                    page = await resp.text()
+        finally:
+            await server.stop()
+        return results, page
+
+    results, page = asyncio.run(run())
+    assert len(results) == 5
+    assert {"title", "url", "description"} <= set(results[0])
+    assert "<article>" in page and page.count("<p>") > 3
+    assert server.stats()["searches"] == 1 and server.stats()["pages"] == 1
@@ -0,0 +1,120 @@
+import asyncio
+
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+from backend.benchmarks.fake_llm import FakeLLMProfile, fake_chat_model_factory
+from backend.core import generation_profile
+from backend.core.generation_context import generation_scope
+from backend.core.generation_profile import (
+    get_task_profile,
+    profiled_node,
+    profiling_config,
+    record_scrape_bytes,
+    record_search,
+    summarize_profiles,
+)
+from backend.core.graph_nodes import helpers
+from backend.models.models import SearchQueryList
+
+PROMPT = ChatPromptTemplate.from_template("Plan searches about {topic}.\n\n{format_instructions}")
+
+
+def test_node_spans_credit_chains_searches_and_scrapes():
+    llm = fake_chat_model_factory(FakeLLMProfile(latency_ms=1, tokens_per_second=1e9))("gemini-test", 0.2)
+    parser = PydanticOutputParser(pydantic_object=SearchQueryList)
+
+    async def get_llm():
+        return llm
+
+    async def scrape():
+        record_scrape_bytes(100)
+
+    async def plan(state):
+        record_search()
+        await asyncio.gather(*(asyncio.create_task(scrape()) for _ in range(2)))
+        queries = await helpers.run_chain(
+            PROMPT, get_llm, parser,
+            {"topic": "graphs", "format_instructions": parser.get_format_instructions()},
+            call_site="test.plan",
+        )
+        return {"queries": queries}
+
+    async def run():
+        async with generation_scope("profile-task"):
+            # Like run_graph: the node runs as a runnable whose config carries the profiling callback
+            await RunnableLambda(profiled_node("plan", plan)).ainvoke({}, config=profiling_config())
+            return get_task_profile("profile-task")
+
+    live = asyncio.run(run())
+    assert not live["finished"]
+    profile = get_task_profile("profile-task")
+    assert profile["finished"]
+
+    (node,) = profile["nodes"]
+    (chain,) = profile["chains"]
+    assert node["name"] == "plan" and node["status"] == "ok"
+    assert chain["name"] == "test.plan" and chain["node"] == "plan"
+    assert node["searches"] == 1 and node["scrape_bytes"] == 200
+    assert chain["llm_calls"] >= 1 and node["llm_calls"] == chain["llm_calls"]
+    assert chain["prompt_chars"] > 0 and chain["completion_chars"] > 0
+    assert profile["totals"]["llm_calls"] == node["llm_calls"]
+    assert node["start"] <= chain["start"] <= chain["end"] <= node["end"]
+
+
+def test_spans_outside_a_generation_are_no_ops():
+    async def node(state):
+        record_search()
+        return {"ok": True}
+
+    assert asyncio.run(profiled_node("idle", node)({})) == {"ok": True}
+    assert profiling_config({"callbacks": []}) == {"callbacks": []}
+
+
+def test_failed_node_span_is_marked_error():
+    async def broken(state):
+        raise ValueError("boom")
+
+    async def run():
+        async with generation_scope("profile-error"):
+            try:
+                await profiled_node("broken", broken)({})
+            except ValueError:
+                pass
+
+    asyncio.run(run())
+    assert get_task_profile("profile-error")["nodes"][0]["status"] == "error"
+
+
+def test_finished_profiles_are_bounded(monkeypatch):
+    monkeypatch.setattr(generation_profile, "GENERATION_PROFILE_RECENT", 2)
+
+    async def run(task_id):
+        async with generation_scope(task_id):
+            generation_profile.get_generation_profile()
+
+    for i in range(3):
+        asyncio.run(run(f"bounded-{i}"))
+    assert get_task_profile("bounded-0") is None
+    assert get_task_profile("bounded-2")["finished"]
+
+
+def test_summarize_profiles_percentiles_per_generation():
+    def profile(seconds):
+        return {
+            "duration_seconds": seconds * 2,
+            "nodes": [
+                {"name": "research", "duration": seconds / 2, "llm_calls": 1, "input_tokens": 10, "output_tokens": 5},
+                {"name": "research", "duration": seconds / 2, "llm_calls": 1, "input_tokens": 10, "output_tokens": 5},
+                {"name": "outline", "duration": 1.0, "llm_calls": 1},
+            ],
+        }
+
+    summary = summarize_profiles([profile(s) for s in range(1, 21)] + [None])
+    assert summary["tasks"] == 20
+    research = summary["nodes"]["research"]
+    assert research["p50_seconds"] == 10.0 and research["p95_seconds"] == 19.0 and research["max_seconds"] == 20.0
+    assert research["avg_runs"] == 2 and research["avg_llm_calls"] == 2 and research["avg_tokens"] == 30
+    assert list(summary["nodes"]) == ["research", "outline"]
+    assert summary["p95_seconds"] == 38.0
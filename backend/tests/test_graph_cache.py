@@ -0,0 +1,30 @@
+import pytest
+
+from backend.core import graph_builder
+
+
+def test_compiled_graph_is_shared(monkeypatch):
+    builds = []
+
+    def builder(checkpointer=None):
+        builds.append(1)
+        return object()
+
+    monkeypatch.setitem(graph_builder._GRAPH_BUILDERS, "test", builder)
+    monkeypatch.setattr(graph_builder, "_compiled_graphs", {})
+    first = graph_builder.get_compiled_graph("test")
+    assert graph_builder.get_compiled_graph("test") is first
+    assert len(builds) == 1
+
+
+def test_unknown_variant_is_rejected():
+    with pytest.raises(ValueError):
+        graph_builder.get_compiled_graph("no-such-variant")
+
+
+def test_warm_up_compiles_and_preloads(monkeypatch):
+    monkeypatch.setattr(graph_builder, "_compiled_graphs", {})
+    timings = graph_builder.warm_up_graph()
+    assert "default" in graph_builder._compiled_graphs
+    assert timings["prompts"] > 0 and timings["parsers"] > 0
+    assert graph_builder.get_compiled_graph() is graph_builder._compiled_graphs["default"]
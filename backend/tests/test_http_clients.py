@@ -0,0 +1,36 @@
+import asyncio
+
+from backend.services.http_clients import (
+    close_http_clients,
+    get_http_session,
+    get_httpx_client,
+    http_client_stats,
+)
+
+
+def test_sessions_are_shared_per_name_and_closed_on_shutdown():
+    async def run():
+        first = await get_http_session("scraping")
+        again = await get_http_session("scraping")
+        other = await get_http_session("brave")
+        client = await get_httpx_client("wikimedia", headers={"User-Agent": "test"})
+        assert first is again and first is not other
+        assert client.headers["User-Agent"] == "test"
+        stats = http_client_stats()
+        assert stats["aiohttp_sessions"] == ["brave", "scraping"]
+        assert stats["httpx_clients"] == ["wikimedia"]
+        await close_http_clients()
+        assert first.closed and client.is_closed
+        return http_client_stats()
+
+    stats = asyncio.run(run())
+    assert stats["aiohttp_sessions"] == [] and stats["httpx_clients"] == []
+
+
+def test_new_loop_gets_fresh_session():
+    async def grab():
+        return await get_http_session("scraping")
+
+    first = asyncio.run(grab())
+    second = asyncio.run(grab())
+    assert first is not second
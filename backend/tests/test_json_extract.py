@@ -0,0 +1,45 @@
+import time
+
+from backend.utils.json_extract import extract_json_from_markdown, iter_json_candidates
+
+
+def test_direct_and_fenced_json():
+    assert extract_json_from_markdown(' {"a": 1} ') == {"a": 1}
+    assert extract_json_from_markdown('Here you go:\n```json\n{"a": [1, 2]}\n```\nDone.') == {"a": [1, 2]}
+    assert extract_json_from_markdown("```\n[1, 2]\n```") == [1, 2]
+
+
+def test_embedded_object_with_braces_in_surrounding_prose():
+    text = 'Result: {"title": "Sets {and} maps", "n": 2} -- use {placeholder} next time.'
+    assert extract_json_from_markdown(text) == {"title": "Sets {and} maps", "n": 2}
+
+
+def test_strings_with_escaped_quotes_and_brackets():
+    text = 'The answer is {"q": "He said \\"}]\\" loudly", "ok": true} as requested.'
+    assert extract_json_from_markdown(text) == {"q": 'He said "}]" loudly', "ok": True}
+
+
+def test_quotes_in_prose_do_not_hide_json():
+    assert extract_json_from_markdown('Here is the "result": {"a": 1}') == {"a": 1}
+
+
+def test_candidates_are_largest_first_and_nested_one_level():
+    text = 'x {"outer": {"inner": [1]}} y [2]'
+    spans = [text[s:e] for s, e in iter_json_candidates(text)]
+    assert spans == ['{"outer": {"inner": [1]}}', '{"inner": [1]}', "[2]"]
+
+
+def test_falls_back_to_inner_object_when_outer_span_is_not_json():
+    assert extract_json_from_markdown('{note: see {"a": 1}}') == {"a": 1}
+
+
+def test_unparseable_text_returns_none():
+    assert extract_json_from_markdown("no json here {at all") is None
+    assert extract_json_from_markdown("") is None
+
+
+def test_unbalanced_braces_stay_linear():
+    text = "{" * 200_000
+    started = time.perf_counter()
+    assert extract_json_from_markdown(text) is None
+    assert time.perf_counter() - started < 2.0
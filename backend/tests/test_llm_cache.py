@@ -0,0 +1,96 @@
+import asyncio
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.output_parsers import PydanticOutputParser, StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel
+
+from backend.core.graph_nodes import helpers
+from backend.services import llm_cache
+from backend.services.cache_backends import MemoryCacheBackend
+from backend.services.llm_cache import llm_cache_key
+
+
+class FakeGemini(FakeListChatModel):
+    model: str = "fake-gemini"
+    temperature: float = 0.2
+
+
+class Topic(BaseModel):
+    title: str
+
+
+PROMPT = ChatPromptTemplate.from_template("Name a module about {topic}.")
+
+
+def _enable_cache(monkeypatch, sites="*"):
+    monkeypatch.setattr(helpers, "ChatGoogleGenerativeAI", FakeGemini)
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_CALL_SITES", {sites})
+    monkeypatch.setattr(llm_cache, "_llm_response_cache", MemoryCacheBackend("test"))
+    monkeypatch.setattr(llm_cache, "_site_counters", type(llm_cache._site_counters)(llm_cache._site_counters.default_factory))
+
+
+def test_key_depends_on_model_temperature_prompt_and_parser():
+    messages = PROMPT.format_messages(topic="graphs")
+    base = llm_cache_key("m", 0.2, messages, StrOutputParser())
+    assert base == llm_cache_key("m", 0.2, PROMPT.format_messages(topic="graphs"), StrOutputParser())
+    assert base != llm_cache_key("m2", 0.2, messages, StrOutputParser())
+    assert base != llm_cache_key("m", 0.3, messages, StrOutputParser())
+    assert base != llm_cache_key("m", 0.2, PROMPT.format_messages(topic="trees"), StrOutputParser())
+    assert base != llm_cache_key("m", 0.2, messages, PydanticOutputParser(pydantic_object=Topic))
+
+
+def test_run_chain_serves_repeated_prompt_from_cache(monkeypatch):
+    _enable_cache(monkeypatch)
+    llm = FakeGemini(responses=['{"title": "Graph basics"}', '{"title": "Other"}'])
+    parser = PydanticOutputParser(pydantic_object=Topic)
+
+    async def run():
+        first = await helpers.run_chain(PROMPT, lambda: llm, parser, {"topic": "graphs"}, call_site="test.topic")
+        second = await helpers.run_chain(PROMPT, lambda: llm, parser, {"topic": "graphs"}, call_site="test.topic")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.title == second.title == "Graph basics"
+    assert llm.i == 1
+    assert llm_cache.llm_cache_stats()["call_sites"]["test.topic"] == {"hits": 1, "misses": 1, "stores": 1, "rejected": 0}
+
+
+def test_cache_only_applies_to_enabled_call_sites(monkeypatch):
+    _enable_cache(monkeypatch, sites="test.cached")
+    llm = FakeGemini(responses=["one", "two"])
+
+    async def run():
+        return [
+            await helpers.run_chain(PROMPT, lambda: llm, StrOutputParser(), {"topic": "graphs"}, call_site="test.other")
+            for _ in range(2)
+        ]
+
+    assert asyncio.run(run()) == ["one", "two"]
+    assert "test.other" not in llm_cache.llm_cache_stats()["call_sites"]
+
+
+def test_default_call_site_is_the_caller(monkeypatch):
+    _enable_cache(monkeypatch)
+    llm = FakeGemini(responses=["one"])
+
+    async def summarize():
+        return await helpers.run_chain(PROMPT, lambda: llm, StrOutputParser(), {"topic": "graphs"})
+
+    asyncio.run(summarize())
+    assert "test_llm_cache.summarize" in llm_cache.llm_cache_stats()["call_sites"]
+
+
+def test_unparseable_cached_entry_falls_back_to_llm(monkeypatch):
+    _enable_cache(monkeypatch)
+    llm = FakeGemini(responses=['{"title": "Fresh"}'])
+    parser = PydanticOutputParser(pydantic_object=Topic)
+    key = helpers._response_cache_key(PROMPT, llm, parser, {"topic": "graphs"})
+
+    async def run():
+        await llm_cache._llm_response_cache.set(key, '{"name": "old schema"}', 60)
+        return await helpers.run_chain(PROMPT, lambda: llm, parser, {"topic": "graphs"}, call_site="test.topic")
+
+    assert asyncio.run(run()).title == "Fresh"
+    assert llm_cache.llm_cache_stats()["call_sites"]["test.topic"]["rejected"] == 1
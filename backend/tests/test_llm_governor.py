@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from backend.services import llm_governor
+from backend.services.llm_governor import LLMGovernor, ModelLimiter, is_rate_limit_error
+
+
+def test_limit_halves_on_throttle_and_recovers_additively(monkeypatch):
+    monkeypatch.setattr(llm_governor, "_DECREASE_COOLDOWN_SECONDS", 0.0)
+    limiter = ModelLimiter("m", initial=8, min_limit=1, max_limit=10)
+
+    async def run():
+        await limiter.acquire()
+        limiter.release(1.0, "throttled")
+        assert limiter.limit == 4
+        for _ in range(4):
+            await limiter.acquire()
+            limiter.release(1.0, "ok")
+
+    asyncio.run(run())
+    assert 4.9 < limiter.limit < 5.0
+    assert limiter.stats()["throttled"] == 1
+
+
+def test_burst_of_throttles_counts_once():
+    limiter = ModelLimiter("m", initial=8)
+    limiter.in_flight = 3
+    for _ in range(3):
+        limiter.release(1.0, "throttled")
+    assert limiter.limit == 4
+
+
+def test_latency_spike_lowers_limit(monkeypatch):
+    monkeypatch.setattr(llm_governor, "_MIN_LATENCY_SAMPLES", 2)
+    limiter = ModelLimiter("m", initial=10, max_limit=10, spike_factor=3.0, latency_backoff=True)
+    limiter.in_flight = 3
+    limiter.release(1.0)
+    limiter.release(1.0)
+    limiter.release(10.0)
+    assert limiter.limit == 8
+    assert limiter.stats()["latency_spikes"] == 1
+
+
+def test_slow_call_sites_are_not_spikes(monkeypatch):
+    monkeypatch.setattr(llm_governor, "_MIN_LATENCY_SAMPLES", 2)
+    limiter = ModelLimiter("m", initial=5, max_limit=10, spike_factor=3.0, latency_backoff=True)
+    limiter.in_flight = 6
+    for site, latency in [("queries", 1.0), ("queries", 1.0), ("content", 20.0), ("content", 20.0), ("queries", 1.0), ("content", 25.0)]:
+        limiter.release(latency, "ok", site)
+    assert limiter.stats()["latency_spikes"] == 0
+    assert limiter.limit > 5
+
+
+def test_latency_backoff_is_off_by_default(monkeypatch):
+    monkeypatch.setattr(llm_governor, "_MIN_LATENCY_SAMPLES", 2)
+    limiter = ModelLimiter("m", initial=10, max_limit=10, spike_factor=3.0)
+    limiter.in_flight = 3
+    for latency in (1.0, 1.0, 10.0):
+        limiter.release(latency)
+    assert limiter.limit == 10
+    assert limiter.stats()["latency_spikes"] == 0
+
+
+def test_waiters_are_served_round_robin_across_tasks():
+    limiter = ModelLimiter("m", initial=1, min_limit=1, max_limit=1)
+    order = []
+
+    async def call(task_id, label):
+        await limiter.acquire(task_id)
+        order.append(label)
+        await asyncio.sleep(0)
+        limiter.release(0.01)
+
+    async def run():
+        await limiter.acquire("busy")
+        calls = [asyncio.create_task(call("a", f"a{i}")) for i in range(3)]
+        calls.append(asyncio.create_task(call("b", "b0")))
+        await asyncio.sleep(0)
+        assert limiter.stats()["queued_by_task"] == {"a": 3, "b": 1}
+        limiter.release(0.01)
+        await asyncio.gather(*calls)
+
+    asyncio.run(run())
+    assert order == ["a0", "b0", "a1", "a2"]
+    assert limiter.in_flight == 0
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    limiter = ModelLimiter("m", initial=1, min_limit=1, max_limit=1)
+
+    async def run():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release(0.01)
+        assert await limiter.acquire() == 0.0
+
+    asyncio.run(run())
+    assert limiter.queued() == 0 and limiter.in_flight == 1
+
+
+def test_slot_classifies_rate_limit_errors():
+    governor = LLMGovernor(initial=4)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            async with governor.slot("gemini", task_id="t"):
+                raise RuntimeError("429 RESOURCE_EXHAUSTED")
+        async with governor.slot("gemini", task_id="t"):
+            pass
+
+    asyncio.run(run())
+    stats = governor.stats()["models"]["gemini"]
+    assert stats["throttled"] == 1 and stats["in_flight"] == 0 and stats["acquired"] == 2
+    assert is_rate_limit_error(Exception("Quota exceeded")) and not is_rate_limit_error(Exception("timeout"))
@@ -0,0 +1,37 @@
+import asyncio
+
+from backend.services import llm_pool
+from backend.services.llm_pool import ClientPool, get_chat_model
+
+
+def test_pool_reuses_and_evicts_least_recently_used():
+    pool = ClientPool("test", max_size=2)
+    created = []
+
+    def factory(name):
+        return lambda: created.append(name) or object()
+
+    a = pool.get("a", factory("a"))
+    assert pool.get("a", factory("a")) is a
+    pool.get("b", factory("b"))
+    pool.get("a", factory("a"))
+    pool.get("c", factory("c"))  # evicts "b"
+    pool.get("b", factory("b"))
+    assert created == ["a", "b", "c", "b"]
+    assert pool.stats() == {"size": 2, "max_size": 2, "hits": 2, "misses": 4, "evictions": 2}
+
+
+def test_chat_models_keyed_on_model_temperature_and_key(monkeypatch):
+    monkeypatch.setattr(llm_pool, "_chat_models", ClientPool("test"))
+
+    async def run():
+        first = get_chat_model("gemini-3.1-flash-lite", 0.2, "key-1")
+        same = get_chat_model("gemini-3.1-flash-lite", 0.2, "key-1")
+        other_temp = get_chat_model("gemini-3.1-flash-lite", 0.3, "key-1")
+        other_key = get_chat_model("gemini-3.1-flash-lite", 0.2, "key-2")
+        return first, same, other_temp, other_key
+
+    first, same, other_temp, other_key = asyncio.run(run())
+    assert first is same
+    assert first is not other_temp and first is not other_key
+    assert first.temperature == 0.2 and other_temp.temperature == 0.3
@@ -0,0 +1,68 @@
+import asyncio
+import random
+
+from backend.core.generation_context import generation_scope
+from backend.models.models import ScrapedResult, SearchServiceResult
+from backend.services import near_duplicates
+from backend.services.near_duplicates import NearDuplicateIndex, collapse_near_duplicates, get_near_duplicate_index, simhash
+
+# Own generator: background threads of other modules may draw from the global one during collection
+_rng = random.Random(7)
+VOCAB = [f"word{i}" for i in range(3000)]
+ARTICLE = " ".join(_rng.choices(VOCAB, k=1500))
+OTHER_ARTICLE = " ".join(_rng.choices(VOCAB, k=1500))
+# Syndicated copy: same article with a different header and footer
+MIRROR = "Republished from Example News. " + ARTICLE + " Share this story on social media."
+
+
+def _hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def test_simhash_is_close_for_mirrors_and_far_for_different_pages():
+    assert _hamming(simhash(ARTICLE), simhash(MIRROR)) <= 3
+    assert _hamming(simhash(ARTICLE), simhash(OTHER_ARTICLE)) > 10
+
+
+def test_index_clusters_near_duplicates():
+    index = NearDuplicateIndex()
+    first = index.cluster_for("https://a.example/post", ARTICLE)
+    assert index.cluster_for("https://mirror.example/copy", MIRROR) == first
+    assert index.cluster_for("https://b.example/other", OTHER_ARTICLE) != first
+    assert index.stats()["clusters"] == 2
+
+
+def test_collapse_keeps_best_ranked_copy_and_short_results():
+    results = [
+        SearchServiceResult(query="q1", results=[
+            ScrapedResult(url="https://b.example/other", scraped_content=OTHER_ARTICLE),
+            ScrapedResult(url="https://mirror.example/copy", scraped_content=MIRROR),
+        ]),
+        SearchServiceResult(query="q2", results=[
+            ScrapedResult(url="https://a.example/post", scraped_content=ARTICLE),
+            ScrapedResult(url="https://snippet.example", search_snippet="short snippet"),
+        ]),
+    ]
+    collapsed = collapse_near_duplicates(results)
+    assert [r.url for r in collapsed[0].results] == ["https://b.example/other"]
+    assert [r.url for r in collapsed[1].results] == ["https://a.example/post", "https://snippet.example"]
+    assert len(results[0].results) == 2  # inputs untouched
+
+
+def test_index_is_scoped_to_the_generation(monkeypatch):
+    monkeypatch.setattr(near_duplicates, "_totals", dict.fromkeys(near_duplicates._totals, 0))
+    results = [SearchServiceResult(query="q", results=[
+        ScrapedResult(url="https://a.example/post", scraped_content=ARTICLE),
+        ScrapedResult(url="https://mirror.example/copy", scraped_content=MIRROR),
+    ])]
+
+    async def run():
+        async with generation_scope("gen-1"):
+            collapse_near_duplicates(results)
+            collapse_near_duplicates(results)
+            assert get_near_duplicate_index().stats()["pages"] == 2
+        assert get_near_duplicate_index() is None
+
+    asyncio.run(run())
+    totals = near_duplicates.near_duplicate_totals()
+    assert totals["generations"] == 1 and totals["collapsed"] == 2
@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import backend.core.graph_nodes  # noqa: F401  (submodule modules must be imported through the graph_nodes package)
+from backend.config.database import Base
+from backend.core import checkpointing
+from backend.core.generation_context import generation_scope
+from backend.core.graph_nodes import resources
+from backend.core.submodules import pipelined
+from backend.models.auth_models import GenerationCheckpoint, GenerationCheckpointBlob, GenerationCheckpointWrite
+from backend.models.models import EnhancedModule, Module, Submodule
+
+
+def test_submodules_start_while_other_modules_are_planned(monkeypatch):
+    plan_delays = {0: 0.01, 1: 0.3, 2: 0.02}
+    events = {}
+
+    async def fake_plan(state, module_id, module):
+        await asyncio.sleep(plan_delays[module_id])
+        events[f"planned-{module_id}"] = time.perf_counter()
+        if module_id == 2:
+            raise RuntimeError("planning failed")
+        return EnhancedModule(
+            title=module.title,
+            description=module.description,
+            submodules=[Submodule(title=f"Sub {module_id}.{s}", description="d") for s in range(2)],
+        )
+
+    async def fake_process(state, module_id, sub_id, module, submodule):
+        events.setdefault(f"started-{module_id}", time.perf_counter())
+        await asyncio.sleep(0.01)
+        return {"status": "completed", "module_id": module_id, "sub_id": sub_id, "content": "text"}
+
+    async def fake_topic_resources(state):
+        return {"topic_resources": ["topic"], "topic_resource_query": None, "topic_resource_search_results": []}
+
+    monkeypatch.setattr(pipelined, "plan_and_research_module_submodules", fake_plan)
+    monkeypatch.setattr(pipelined, "process_single_submodule", fake_process)
+    monkeypatch.setattr(resources, "generate_topic_resources", fake_topic_resources)
+
+    state = {
+        "user_topic": "graphs",
+        "modules": [Module(title=f"Module {i}", description="d") for i in range(3)],
+        "parallel_count": 3,
+        "submodule_parallel_count": 2,
+    }
+    update = asyncio.run(pipelined.plan_and_develop_submodules(state))
+
+    # Module 0's submodules were developed while module 1 was still being planned
+    assert events["started-0"] < events["planned-1"]
+    assert [len(m.submodules) for m in update["enhanced_modules"]] == [2, 2, 0]
+    assert update["enhanced_modules"][2].title == "Module 2"
+    assert [(s.module_id, s.submodule_id) for s in update["developed_submodules"]] == [(0, 0), (1, 0), (0, 1), (1, 1)]
+    assert update["submodule_batches"] == [[(0, 0), (1, 0)], [(0, 1), (1, 1)]]
+    assert update["current_submodule_batch_index"] == 2
+    assert update["topic_resources"] == ["topic"]
+    assert set(update["submodule_resources_in_process"]) == {"0_0", "0_1", "1_0", "1_1"}
+
+
+def test_resumed_pipeline_keeps_planned_modules_and_finished_submodules(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    tables = [model.__table__ for model in (GenerationCheckpoint, GenerationCheckpointBlob, GenerationCheckpointWrite)]
+    Base.metadata.create_all(engine, tables=tables)
+    saver = checkpointing.SQLAlchemyCheckpointSaver(sessionmaker(bind=engine))
+    monkeypatch.setattr(checkpointing, "get_checkpointer", lambda: saver)
+
+    planned, processed = [], []
+    hang_on = {(1, 1)}
+
+    async def fake_plan(state, module_id, module):
+        planned.append(module_id)
+        return EnhancedModule(
+            title=module.title,
+            description=module.description,
+            submodules=[Submodule(title=f"Sub {module_id}.{s}", description="d") for s in range(2)],
+        )
+
+    async def fake_process(state, module_id, sub_id, module, submodule):
+        processed.append((module_id, sub_id))
+        if (module_id, sub_id) in hang_on:
+            await asyncio.Event().wait()
+        return {"status": "completed", "module_id": module_id, "sub_id": sub_id, "content": f"text {module_id}.{sub_id}"}
+
+    async def fake_topic_resources(state):
+        return {"topic_resources": []}
+
+    monkeypatch.setattr(pipelined, "plan_and_research_module_submodules", fake_plan)
+    monkeypatch.setattr(pipelined, "process_single_submodule", fake_process)
+    monkeypatch.setattr(resources, "generate_topic_resources", fake_topic_resources)
+
+    state = {
+        "user_topic": "graphs",
+        "modules": [Module(title=f"Module {i}", description="d") for i in range(2)],
+        "parallel_count": 2,
+        "submodule_parallel_count": 2,
+    }
+
+    async def run():
+        async with generation_scope("task-1"):
+            return await pipelined.plan_and_develop_submodules(state)
+
+    async def interrupted_run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(run(), timeout=0.5)
+
+    asyncio.run(interrupted_run())
+    assert sorted(planned) == [0, 1] and len(processed) == 4
+
+    planned.clear()
+    processed.clear()
+    hang_on.clear()
+    update = asyncio.run(run())
+
+    assert planned == []
+    assert processed == [(1, 1)]
+    assert [s.content for s in update["developed_submodules"]] == ["text 0.0", "text 1.0", "text 0.1", "text 1.1"]
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.services.rate_limiter import InMemoryRateLimiter, RateLimiter, _key_id, create_rate_limiter, parse_key_limits
+
+
+def test_bucket_spaces_calls_after_burst():
+    limiter = InMemoryRateLimiter("test", rate=20, burst=2, min_rate=1)
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(4):
+            await limiter.acquire("key-a")
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(run())
+    # Two calls are free (burst), the remaining two wait 1/20 s each
+    assert 0.08 <= elapsed < 0.5
+    assert limiter.stats()["acquired"] == 4
+
+
+def test_keys_have_independent_buckets():
+    limiter = InMemoryRateLimiter("test", rate=1, burst=1, min_rate=0.5)
+    assert limiter.reserve("key-a") == 0
+    assert limiter.reserve("key-b") == 0
+    assert limiter.reserve("key-a") > 0.9
+
+
+def test_throttle_halves_rate_pauses_and_recovers():
+    limiter = InMemoryRateLimiter("test", rate=10, burst=1, min_rate=1)
+
+    async def run():
+        await limiter.on_throttled("key-a", retry_after=0.5)
+
+    asyncio.run(run())
+    wait = limiter.reserve("key-a")
+    assert 0.4 < wait <= 0.5
+    key_stats = next(iter(limiter.stats()["keys"].values()))
+    assert key_stats == {"rate": 5.0, "max_rate": 10, "burst": 1.0, "throttled": 1}
+
+    for _ in range(20):
+        asyncio.run(limiter.on_success("key-a"))
+    assert next(iter(limiter.stats()["keys"].values()))["rate"] == 10
+
+
+def test_keys_get_their_own_rate_and_burst():
+    key_limits = parse_key_limits('{"%s": {"rate": 100, "burst": 3}}' % _key_id("paid-key"))
+    limiter = InMemoryRateLimiter("test", rate=1, burst=1, min_rate=0.5, key_limits=key_limits)
+    # The paid key has a burst of three and refills at 100/s; the default key waits a second
+    assert [limiter.reserve("paid-key") for _ in range(3)] == [0, 0, 0]
+    assert 0 < limiter.reserve("paid-key") <= 0.01
+    assert limiter.reserve("free-key") == 0
+    assert limiter.reserve("free-key") > 0.9
+    assert limiter.limits_for(_key_id("paid-key")) == (100.0, 3.0)
+    assert limiter.limits_for(_key_id("free-key")) == (1, 1.0)
+
+
+def test_invalid_key_limits_are_ignored():
+    assert parse_key_limits("") == {}
+    assert parse_key_limits("not json") == {}
+    assert parse_key_limits('{"abc": [2, 4]}') == {"abc": (2.0, 4.0)}
+
+
+def test_factory_falls_back_to_memory_without_redis_url():
+    assert create_rate_limiter("test", 1, 1, 0.5, backend="redis", redis_url="").backend == "memory"
+    assert create_rate_limiter("test", 1, 1, 0.5, backend="auto", redis_url="redis://localhost:6379").backend == "redis"
+
+
+def test_backend_missing_a_method_cannot_be_built():
+    class NoRecovery(RateLimiter):
+        async def acquire(self, api_key):
+            return 0.0
+
+        async def on_throttled(self, api_key, retry_after=None):
+            pass
+
+    with pytest.raises(TypeError):
+        NoRecovery("test", 1, 1, 0.5)
@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.core import blob_store, checkpointing
+from backend.core.blob_store import externalize_search_result
+from backend.core.generation_context import generation_scope
+from backend.core.graph_nodes import research_reuse as nodes
+from backend.models.models import ScrapedResult, SearchQuery, SearchServiceResult
+from backend.services.cache_backends import MemoryCacheBackend
+from backend.services import research_cache
+from backend.services.research_cache import build_research_entry, research_cache_key, research_cache_stats, topic_fingerprint
+
+PAGE = "The Spanish Civil War began in July 1936. " * 100
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = MemoryCacheBackend("research")
+    monkeypatch.setattr(nodes, "get_research_cache", lambda: cache)
+    monkeypatch.setattr(blob_store, "CONTENT_BLOB_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(checkpointing, "get_checkpointer", lambda: None)
+    return cache
+
+
+async def _researched_state(lookup):
+    """State at the end of a research loop that started with ``lookup``."""
+    result = SearchServiceResult(query="spanish civil war causes", results=[
+        ScrapedResult(url="https://example.com/war", title="War", scraped_content=PAGE),
+    ])
+    return {
+        "user_topic": "Spanish Civil War",
+        "search_queries": [SearchQuery(keywords="spanish civil war causes", rationale="overview")],
+        "search_results": [await externalize_search_result(result)],
+        "is_research_sufficient": True,
+        "research_knowledge_gaps": [],
+        "research_confidence_score": 0.9,
+        **lookup,
+    }
+
+
+def _store_then_lookup(cache, age_hours=0.0):
+    async def first_generation():
+        async with generation_scope("first"):
+            lookup = await nodes.lookup_research_cache({"user_topic": "Spanish Civil War", "language": "en"})
+            assert nodes.route_after_research_cache(lookup) == "generate_search_queries"
+            await nodes.store_research_cache(await _researched_state(lookup))
+            return lookup["research_cache"]["key"]
+
+    async def second_generation():
+        async with generation_scope("second"):
+            update = await nodes.lookup_research_cache({"user_topic": " spanish  CIVIL war", "language": "EN"})
+            return update, update.get("search_results", [None])[0].results[0].get_content()
+
+    key = asyncio.run(first_generation())
+    if age_hours:
+        entry = asyncio.run(cache.get(key))
+        entry["stored_at"] = time.time() - age_hours * 3600
+        asyncio.run(cache.set(key, entry, ttl_seconds=3600))
+    return asyncio.run(second_generation())
+
+
+def test_topic_fingerprint_and_key():
+    assert topic_fingerprint("Spanish Civil War") == topic_fingerprint("  spanish\tcivil   WAR ")
+    assert topic_fingerprint("Révolution française") == topic_fingerprint("revolution francaise")
+    key = research_cache_key("Machine Learning", "en", "en", "brave_scraping")
+    assert key == research_cache_key("machine  learning", "EN", None, "brave_scraping")
+    assert key != research_cache_key("Machine Learning", "es", "en", "brave_scraping")
+    assert key != research_cache_key("Machine Learning", "en", "en", "google_native")
+
+
+def test_symbols_and_word_order_make_different_topics():
+    def key(topic):
+        return research_cache_key(topic, "en", "en", "brave_scraping")
+
+    assert len({key("C"), key("C++"), key("C#")}) == 3
+    assert key(".NET") != key("NET")
+    assert key("Machine Learning for Biology") != key("Biology for Machine Learning")
+
+
+def test_fresh_entry_skips_research(cache):
+    hits_before = research_cache_stats()["hits"]
+    update, content = _store_then_lookup(cache)
+    assert nodes.route_after_research_cache(update) == "create_learning_path"
+    assert update["is_research_sufficient"] is True
+    assert [q.keywords for q in update["search_queries"]] == ["spanish civil war causes"]
+    # The cache holds the text itself; the new generation gets its own handle
+    assert update["search_results"][0].results[0].content_ref is not None
+    assert content == PAGE
+    assert research_cache_stats()["hits"] == hits_before + 1
+
+
+def test_stale_entry_gets_one_refinement_pass(cache):
+    update, content = _store_then_lookup(cache, age_hours=30)
+    assert nodes.route_after_research_cache(update) == "generate_refinement_queries"
+    assert update["is_research_sufficient"] is False
+    assert update["research_loop_count"] == update["max_research_loops"] - 1
+    assert update["research_knowledge_gaps"]
+    assert content == PAGE
+
+
+def test_insufficient_research_is_not_cached(cache):
+    async def run():
+        lookup = await nodes.lookup_research_cache({"user_topic": "Obscure topic"})
+        state = dict(await _researched_state(lookup), user_topic="Obscure topic", is_research_sufficient=False)
+        await nodes.store_research_cache(state)
+        return lookup["research_cache"]["key"]
+
+    key = asyncio.run(run())
+    assert asyncio.run(cache.get(key)) is None
+
+
+def test_entries_keep_a_bounded_amount_of_text(cache, monkeypatch):
+    monkeypatch.setattr(research_cache, "RESEARCH_CACHE_MAX_CHARS_PER_RESULT", 1000)
+    monkeypatch.setattr(research_cache, "RESEARCH_CACHE_MAX_ENTRY_CHARS", 1500)
+    state = asyncio.run(_researched_state({}))
+    state["search_results"] = state["search_results"] * 3
+
+    entry = build_research_entry(state, research_seconds=1.0)
+    texts = [item["scraped_content"] for result in entry["search_results"] for item in result["results"]]
+    assert [len(text) for text in texts] == [500, 500, 500]
+    assert texts[0] == PAGE[:500]
@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import aiohttp
+from aiohttp import web
+
+from backend.services import services
+from backend.services.scrape_cache import ScrapeCache
+
+
+HTML_PAGE = "<html><body><article>" + ("<p>Cached paragraph about caching.</p>" * 20) + "</article></body></html>"
+
+
+def test_put_get_and_fresh(tmp_path):
+    cache = ScrapeCache(path=str(tmp_path / "cache.db"), ttl_seconds=60)
+    cache.put("https://example.com/a", "hello", "text/html", etag='"v1"')
+    page = cache.get("https://example.com/a")
+    assert page is not None
+    assert page.content == "hello"
+    assert page.is_fresh(cache.ttl_seconds)
+    assert page.conditional_headers() == {"If-None-Match": '"v1"'}
+    assert cache.get("https://example.com/missing") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["entries"] == 1
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    cache = ScrapeCache(path=str(tmp_path / "cache.db"), ttl_seconds=0, max_age_seconds=0)
+    cache.put("https://example.com/a", "hello", "text/html")
+    assert cache.get("https://example.com/a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction_respects_size_budget(tmp_path):
+    cache = ScrapeCache(path=str(tmp_path / "cache.db"), max_bytes=25)
+    cache.put("https://example.com/old", "x" * 10, "text/html")
+    time.sleep(0.01)
+    cache.put("https://example.com/used", "y" * 10, "text/html")
+    time.sleep(0.01)
+    # Touch the older entry so the second one becomes least recently used
+    cache.get("https://example.com/old")
+    time.sleep(0.01)
+    cache.put("https://example.com/new", "z" * 10, "text/html")
+    assert cache.get("https://example.com/used") is None
+    assert cache.get("https://example.com/old") is not None
+    assert cache.get("https://example.com/new") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_scrape_revalidates_with_conditional_request(tmp_path, monkeypatch):
+    cache = ScrapeCache(path=str(tmp_path / "cache.db"), ttl_seconds=0)
+    monkeypatch.setattr(services, "get_scrape_cache", lambda: cache)
+    requests_seen = []
+
+    async def handler(request):
+        requests_seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.Response(text=HTML_PAGE, content_type="text/html", headers={"ETag": '"v1"'})
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/page", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        url = f"http://127.0.0.1:{port}/page"
+        try:
+            async with aiohttp.ClientSession() as session:
+                first = await services._scrape_single_url(session, url, timeout=5)
+                second = await services._scrape_single_url(session, url, timeout=5)
+        finally:
+            await runner.cleanup()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first[0] and first[1] is None
+    assert second[0] == first[0]
+    assert requests_seen == [None, '"v1"']
+    assert cache.stats()["revalidated"] == 1
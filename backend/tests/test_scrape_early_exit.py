@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+from backend.services import services
+
+
+DELAYS = {
+    "https://a.example": 0.05,
+    "https://b.example": 5.0,
+    "https://c.example": 0.01,
+    "https://d.example": 0.02,
+    "https://e.example": 0.03,
+}
+
+
+async def _fake_scrape(session, url, timeout):
+    await asyncio.sleep(DELAYS[url])
+    if url == "https://d.example":
+        return None, "HTTP error 404", url
+    return f"content of {url}", None, url
+
+
+def test_scrape_until_enough_cancels_stragglers(monkeypatch):
+    monkeypatch.setattr(services, "_scrape_single_url", _fake_scrape)
+
+    start = time.monotonic()
+    outcomes = asyncio.run(services._scrape_until_enough(None, list(DELAYS), 10, needed=3))
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 1.0
+    assert set(outcomes) == set(DELAYS)
+    successes = [url for url in DELAYS if outcomes[url][0]]
+    assert successes == ["https://a.example", "https://c.example", "https://e.example"]
+    assert outcomes["https://d.example"][1] == "HTTP error 404"
+    assert outcomes["https://b.example"][0] is None
+    assert "cancelled" in outcomes["https://b.example"][1]
+
+
+def test_scrape_until_enough_waits_for_all_when_short_of_target(monkeypatch):
+    monkeypatch.setattr(services, "_scrape_single_url", _fake_scrape)
+    urls = ["https://c.example", "https://d.example"]
+
+    outcomes = asyncio.run(services._scrape_until_enough(None, urls, 10, needed=3))
+
+    assert outcomes["https://c.example"][0] == "content of https://c.example"
+    assert outcomes["https://d.example"][1] == "HTTP error 404"
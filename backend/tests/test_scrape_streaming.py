@@ -0,0 +1,76 @@
+import asyncio
+
+import aiohttp
+import fitz
+from aiohttp import web
+
+from backend.services import services
+from backend.services.extraction import ExtractionEngine
+
+
+ARTICLE = "<html><body><article>" + ("<p>Streaming paragraph with useful text.</p>" * 40) + "</article></body></html>"
+
+
+def _make_pdf(text):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 300), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _scrape_all(monkeypatch, routes, paths):
+    engine = ExtractionEngine(backend="inline")
+    monkeypatch.setattr(services, "get_scrape_cache", lambda: None)
+    monkeypatch.setattr(services, "get_extraction_engine", lambda: engine)
+
+    async def run():
+        app = web.Application()
+        for path, handler in routes.items():
+            app.router.add_get(path, handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with aiohttp.ClientSession() as session:
+                return [await services._scrape_single_url(session, f"http://127.0.0.1:{port}{p}", 5) for p in paths]
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def test_streaming_sniffs_generic_types_and_enforces_budgets(monkeypatch):
+    monkeypatch.setattr(services, "SCRAPE_MAX_HTML_BYTES", 1024)
+    monkeypatch.setattr(services, "SCRAPE_MAX_PDF_BYTES", 200_000)
+    monkeypatch.setattr(services, "SCRAPE_STREAM_CHUNK_BYTES", 256)
+    pdf_bytes = _make_pdf("Sniffed PDF body")
+
+    async def html(request):
+        return web.Response(text=ARTICLE, content_type="text/html")
+
+    async def octet_pdf(request):
+        return web.Response(body=pdf_bytes, content_type="application/octet-stream")
+
+    async def big_pdf(request):
+        return web.Response(body=pdf_bytes + b"\0" * 300_000, content_type="application/octet-stream")
+
+    async def image(request):
+        return web.Response(body=b"\x89PNG" + b"\0" * 1000, content_type="image/png")
+
+    routes = {"/html": html, "/octet": octet_pdf, "/big": big_pdf, "/image": image}
+    html_result, pdf_result, big_result, image_result = _scrape_all(
+        monkeypatch, routes, ["/html", "/octet", "/big", "/image"]
+    )
+
+    # HTML is cut at the byte budget but still extracted
+    assert html_result[1] is None
+    assert "Streaming paragraph" in html_result[0]
+    assert len(html_result[0]) < len(ARTICLE)
+    # A PDF served as octet-stream is detected from its signature
+    assert "Sniffed PDF body" in pdf_result[0]
+    # Oversized PDFs are aborted rather than parsed
+    assert big_result[0] is None and "PDF larger than" in big_result[1]
+    assert image_result[0] is None and "Unsupported content type" in image_result[1]
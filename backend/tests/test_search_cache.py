@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from backend.services import services
+from backend.services.cache_backends import CacheBackend, MemoryCacheBackend, SQLiteCacheBackend
+from backend.services.search_cache import normalize_query, search_cache_key
+
+
+class _KeyProvider:
+    async def get_key(self):
+        return "test-key"
+
+
+def test_query_normalization_and_language_tag():
+    assert normalize_query("  Python   ASYNCIO\tbasics ") == "python asyncio basics"
+    assert search_cache_key("Python  asyncio", "en", 8) == search_cache_key("python asyncio", "EN", 8)
+    assert search_cache_key("python asyncio", "en", 8) != search_cache_key("python asyncio", "es", 8)
+
+
+def test_sqlite_backend_round_trip_and_expiry(tmp_path):
+    async def run():
+        cache = SQLiteCacheBackend("test", path=str(tmp_path / "cache.db"))
+        await cache.set("k", [{"title": "t"}], ttl_seconds=60)
+        await cache.set("gone", [1], ttl_seconds=0)
+        return cache, await cache.get("k"), await cache.get("gone")
+
+    cache, value, expired = asyncio.run(run())
+    assert value == [{"title": "t"}]
+    assert expired is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_backend_missing_a_method_cannot_be_built():
+    class ReadOnly(CacheBackend):
+        async def _get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        ReadOnly("test")
+
+
+def test_cache_hit_skips_brave_request(monkeypatch):
+    cache = MemoryCacheBackend("brave_search")
+    brave_calls = []
+
+    async def fake_brave(api_key, params, timeout=15):
+        brave_calls.append(params["q"])
+        return {"web": {"results": [{"title": "Doc", "url": "https://example.com/doc", "description": "snippet"}]}}
+
+    async def fake_scrape(session, url, timeout):
+        return "page text", None, url
+
+    monkeypatch.setattr(services, "get_brave_result_cache", lambda: cache)
+    monkeypatch.setattr(services, "_brave_web_search", fake_brave)
+    monkeypatch.setattr(services, "_scrape_single_url", fake_scrape)
+
+    async def run():
+        first = await services.perform_search_and_scrape("Rust ownership", _KeyProvider(), search_language="en")
+        second = await services.perform_search_and_scrape("rust   OWNERSHIP ", _KeyProvider(), search_language="en")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert brave_calls == ["Rust ownership"]
+    assert [r.url for r in second.results] == [r.url for r in first.results] == ["https://example.com/doc"]
+    assert cache.stats()["hits"] == 1
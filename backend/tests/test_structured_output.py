@@ -0,0 +1,132 @@
+import asyncio
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import PydanticOutputParser, StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+
+from backend.core.graph_nodes import helpers
+from backend.services import llm_metrics, structured_output
+
+
+class Topic(BaseModel):
+    title: str
+
+
+PROMPT = ChatPromptTemplate.from_template("Name a module about {topic}.")
+
+
+class StructuredFake(FakeListChatModel):
+    """Fake chat model whose structured mode returns queued (raw, parsed) pairs."""
+
+    model: str = "fake-gemini"
+    structured_outputs: list = []
+    structured_calls: int = 0
+
+    def with_structured_output(self, schema, method=None, include_raw=False, **kwargs):
+        def respond(_):
+            self.structured_calls += 1
+            output = self.structured_outputs.pop(0)
+            if isinstance(output, Exception):
+                raise output
+            raw, parsed = output
+            return {"raw": AIMessage(content=raw), "parsed": parsed, "parsing_error": None}
+
+        return RunnableLambda(respond)
+
+
+def _setup(monkeypatch):
+    monkeypatch.setattr(helpers, "ChatGoogleGenerativeAI", StructuredFake)
+    monkeypatch.setattr(structured_output, "_schema_failures", {})
+    monkeypatch.setattr(llm_metrics, "_counters", type(llm_metrics._counters)(llm_metrics._counters.default_factory))
+
+
+def _run(llm, parser):
+    return asyncio.run(
+        helpers.run_chain(PROMPT, lambda: llm, parser, {"topic": "graphs"}, initial_retry_delay=0, call_site="test.site")
+    )
+
+
+def test_structured_output_skips_text_parsing(monkeypatch):
+    _setup(monkeypatch)
+    llm = StructuredFake(responses=["unused"], structured_outputs=[('{"title": "Graphs"}', Topic(title="Graphs"))])
+
+    assert _run(llm, PydanticOutputParser(pydantic_object=Topic)).title == "Graphs"
+    assert llm.structured_calls == 1 and llm.i == 0
+    counts = llm_metrics.llm_call_stats()["call_sites"]["test.site"]
+    assert counts["structured"] == 1 and counts["parse_retries"] == 0
+
+
+def test_unvalidated_structured_output_is_parsed_without_another_call(monkeypatch):
+    _setup(monkeypatch)
+    llm = StructuredFake(responses=["unused"], structured_outputs=[('```json\n{"title": "Trees"}\n```', None)])
+
+    assert _run(llm, PydanticOutputParser(pydantic_object=Topic)).title == "Trees"
+    assert llm.i == 0
+    assert llm_metrics.llm_call_stats()["call_sites"]["test.site"]["structured_fallbacks"] == 1
+
+
+def test_schema_falls_back_to_text_parsing_after_repeated_failures(monkeypatch):
+    _setup(monkeypatch)
+    monkeypatch.setattr(structured_output, "LLM_STRUCTURED_OUTPUT_MAX_FAILURES", 1)
+    rejection = ValueError("400 INVALID_ARGUMENT: response_schema contains an unsupported field")
+    llm = StructuredFake(responses=['{"title": "A"}', '{"title": "B"}'], structured_outputs=[rejection])
+    parser = PydanticOutputParser(pydantic_object=Topic)
+
+    assert _run(llm, parser).title == "A"
+    assert _run(llm, parser).title == "B"
+    assert llm.structured_calls == 1
+    assert not structured_output.schema_supported("Topic")
+    assert llm_metrics.llm_call_stats()["disabled_schemas"] == ["Topic"]
+
+
+def test_validated_responses_reset_the_failure_count(monkeypatch):
+    _setup(monkeypatch)
+    monkeypatch.setattr(structured_output, "LLM_STRUCTURED_OUTPUT_MAX_FAILURES", 2)
+    outputs = []
+    for title in ("A", "B", "C"):
+        outputs += [('{"title": "%s"}' % title, None), ('{"title": "%s"}' % title, Topic(title=title))]
+    llm = StructuredFake(responses=["unused"], structured_outputs=outputs)
+    parser = PydanticOutputParser(pydantic_object=Topic)
+
+    assert [_run(llm, parser).title for _ in range(6)] == ["A", "A", "B", "B", "C", "C"]
+    assert llm.structured_calls == 6
+    assert structured_output.schema_supported("Topic")
+    assert llm_metrics.llm_call_stats()["disabled_schemas"] == []
+
+
+def test_transient_errors_are_retried_and_not_held_against_the_schema(monkeypatch):
+    _setup(monkeypatch)
+    monkeypatch.setattr(structured_output, "LLM_STRUCTURED_OUTPUT_MAX_FAILURES", 1)
+    outputs = [ConnectionResetError("api connection reset"), ('{"title": "Graphs"}', Topic(title="Graphs"))]
+    llm = StructuredFake(responses=["unused"], structured_outputs=outputs)
+
+    assert _run(llm, PydanticOutputParser(pydantic_object=Topic)).title == "Graphs"
+    assert llm.structured_calls == 2 and llm.i == 0
+    assert structured_output.schema_supported("Topic")
+
+
+def test_string_parsers_keep_the_text_path(monkeypatch):
+    _setup(monkeypatch)
+    llm = StructuredFake(responses=["plain text"])
+
+    assert _run(llm, StrOutputParser()) == "plain text"
+    assert llm.structured_calls == 0
+
+
+def test_parse_retry_rate_counts_format_fix_calls(monkeypatch):
+    _setup(monkeypatch)
+    monkeypatch.setattr(structured_output, "LLM_STRUCTURED_OUTPUT_ENABLED", False)
+    llm = StructuredFake(responses=["not json", '{"title": "Fixed"}'])
+
+    result = asyncio.run(
+        helpers.run_chain(
+            PROMPT, lambda: llm, PydanticOutputParser(pydantic_object=Topic), {"topic": "graphs"},
+            initial_retry_delay=0, call_site="test.site",
+        )
+    )
+    assert result.title == "Fixed"
+    counts = llm_metrics.llm_call_stats()["call_sites"]["test.site"]
+    assert counts["parse_retries"] == 1 and counts["parse_retry_rate"] == 1.0
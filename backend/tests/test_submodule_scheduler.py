@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import backend.core.graph_nodes  # noqa: F401  (pipeline must be imported through the graph_nodes package)
+from backend.config.database import Base
+from backend.core import checkpointing
+from backend.core.generation_context import generation_scope
+from backend.core.submodules import pipeline
+from backend.models.auth_models import GenerationCheckpoint, GenerationCheckpointBlob, GenerationCheckpointWrite
+from backend.models.models import EnhancedModule, Submodule
+
+
+@pytest.fixture
+def saver():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    tables = [model.__table__ for model in (GenerationCheckpoint, GenerationCheckpointBlob, GenerationCheckpointWrite)]
+    Base.metadata.create_all(engine, tables=tables)
+    return checkpointing.SQLAlchemyCheckpointSaver(sessionmaker(bind=engine))
+
+
+def _modules(sizes):
+    return [
+        EnhancedModule(
+            title=f"Module {m}",
+            description="d",
+            submodules=[Submodule(title=f"Sub {m}.{s}", description="d") for s in range(size)],
+        )
+        for m, size in enumerate(sizes)
+    ]
+
+
+def _run_scheduler(monkeypatch, sizes, parallel, durations, scheduler="streaming"):
+    monkeypatch.setattr(pipeline, "SUBMODULE_SCHEDULER", scheduler)
+    started, running, peak = [], [0], [0]
+
+    async def fake_process(state, module_id, sub_id, module, submodule):
+        started.append((module_id, sub_id))
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(durations.get((module_id, sub_id), 0.01))
+        running[0] -= 1
+        if (module_id, sub_id) == (0, 1):
+            return {"status": "error", "module_id": module_id, "sub_id": sub_id, "error": "boom"}
+        return {"status": "completed", "module_id": module_id, "sub_id": sub_id, "content": "text"}
+
+    monkeypatch.setattr(pipeline, "process_single_submodule", fake_process)
+    events = []
+
+    async def progress(message, **kwargs):
+        events.append(message)
+
+    async def run():
+        state = {
+            "enhanced_modules": _modules(sizes),
+            "submodule_parallel_count": parallel,
+            "progress_callback": progress,
+        }
+        state.update(await pipeline.initialize_submodule_processing(state))
+        steps = 0
+        while pipeline.check_submodule_batch_processing(state) == "continue_processing":
+            state.update(await pipeline.process_submodule_batch(state))
+            steps += 1
+        return state, steps
+
+    state, steps = asyncio.run(run())
+    return state, steps, started, peak[0], events
+
+
+def test_streaming_pool_keeps_slots_busy(monkeypatch):
+    # (0, 0) is slow; with lockstep batches of 2 its partner would wait for it
+    durations = {(0, 0): 0.3}
+    state, steps, started, peak, events = _run_scheduler(monkeypatch, [3, 3], 2, durations)
+
+    assert steps == 1
+    assert peak == 2
+    planned = [pair for batch in state["submodule_batches"] for pair in batch]
+    assert started == planned
+    # Every other submodule finishes while the slow one holds its slot
+    assert [(s.module_id, s.submodule_id) for s in state["developed_submodules"]] == [
+        pair for pair in planned if pair != (0, 1)
+    ]
+    assert sum("Completed" in e and "/6 submodules" in e for e in events) == 6
+
+
+def test_streaming_pool_has_no_step_barrier(monkeypatch):
+    # More submodules and workers than any fixed step; the slow first one never holds up the rest
+    durations = {(0, 0): 0.3}
+    state, steps, started, peak, events = _run_scheduler(monkeypatch, [6, 6], 10, durations)
+    assert steps == 1
+    assert peak == 10
+    assert len(started) == 12
+    assert len(state["developed_submodules"]) == 11
+
+
+def test_resumed_streaming_run_skips_submodules_that_finished(monkeypatch, saver):
+    monkeypatch.setattr(pipeline, "SUBMODULE_SCHEDULER", "streaming")
+    monkeypatch.setattr(checkpointing, "get_checkpointer", lambda: saver)
+    calls = []
+
+    async def interrupted(state, module_id, sub_id, module, submodule):
+        calls.append((module_id, sub_id))
+        if (module_id, sub_id) == (1, 2):
+            await asyncio.sleep(60)
+        await asyncio.sleep(0.01)
+        return {"status": "completed", "module_id": module_id, "sub_id": sub_id, "content": "text"}
+
+    async def resumed(state, module_id, sub_id, module, submodule):
+        calls.append((module_id, sub_id))
+        return {"status": "completed", "module_id": module_id, "sub_id": sub_id, "content": "text"}
+
+    async def run_step(checkpoint, process, cancel_after=None):
+        monkeypatch.setattr(pipeline, "process_single_submodule", process)
+        async with generation_scope("task-1"):
+            task = asyncio.ensure_future(pipeline.process_submodule_batch(dict(checkpoint)))
+            if cancel_after is None:
+                return await task
+            await asyncio.sleep(cancel_after)
+            task.cancel()
+
+    async def run():
+        checkpoint = {"enhanced_modules": _modules([3, 3]), "submodule_parallel_count": 2}
+        checkpoint.update(await pipeline.initialize_submodule_processing(checkpoint))
+        # The process dies while (1, 2) is still running; the state update of the step is lost
+        await run_step(checkpoint, interrupted, cancel_after=0.5)
+        first_run = list(calls)
+        calls.clear()
+        checkpoint["submodules_in_process"] = {}
+        return first_run, await run_step(checkpoint, resumed)
+
+    first_run, update = asyncio.run(run())
+    assert len(first_run) == 6
+    assert calls == [(1, 2)]
+    assert len(update["developed_submodules"]) == 6
+
+
+def test_batch_scheduler_is_still_available(monkeypatch):
+    state, steps, started, peak, events = _run_scheduler(monkeypatch, [2, 2], 2, {}, scheduler="batch")
+    assert steps == len(state["submodule_batches"]) == 2
+    assert len(state["developed_submodules"]) == 3
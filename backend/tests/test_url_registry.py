@@ -0,0 +1,79 @@
+import asyncio
+
+from backend.core.generation_context import generation_scope, get_generation_context
+from backend.services import services
+from backend.services.url_registry import get_url_registry, url_registry_totals
+
+
+def test_concurrent_scrapes_share_one_fetch(monkeypatch):
+    calls = []
+
+    async def fake_fetch(session, url, timeout):
+        calls.append(url)
+        await asyncio.sleep(0.05)
+        return f"content of {url}", None, url
+
+    monkeypatch.setattr(services, "_fetch_and_extract_url", fake_fetch)
+    before = url_registry_totals()
+
+    async def run():
+        async with generation_scope("task-1") as context:
+            first = await asyncio.gather(
+                services._scrape_single_url(None, "https://example.com/a", 5),
+                services._scrape_single_url(None, "https://EXAMPLE.com/a#intro", 5),
+                services._scrape_single_url(None, "https://example.com/b", 5),
+            )
+            # Finished page text is not held by the registry; the scrape cache serves repeats
+            assert not get_url_registry()._flights
+            again = await services._scrape_single_url(None, "https://example.com/a", 5)
+            stats = get_url_registry().stats()
+            assert get_generation_context() is context
+        assert get_generation_context() is None
+        return first, again, stats
+
+    first, again, stats = asyncio.run(run())
+    assert calls == ["https://example.com/a", "https://example.com/b", "https://example.com/a"]
+    assert first[0] == first[1] == again
+    assert stats["requests"] == 4 and stats["fetches"] == 3
+    assert stats["joined_in_flight"] == 1 and stats["reused_completed"] == 0
+    after = url_registry_totals()
+    assert after["generations"] == before["generations"] + 1
+    assert after["saved_fetches"] - before["saved_fetches"] == 1
+
+
+def test_permanent_failures_are_reused_and_cancellation_is_isolated(monkeypatch):
+    calls = []
+
+    async def fake_fetch(session, url, timeout):
+        calls.append(url)
+        if url.endswith("gone"):
+            return None, "HTTP error: 404 Not Found", url
+        if url.endswith("slow"):
+            await asyncio.sleep(0.2)
+            return "slow content", None, url
+        return None, "Scrape timed out after 5s", url
+
+    monkeypatch.setattr(services, "_fetch_and_extract_url", fake_fetch)
+
+    async def run():
+        async with generation_scope("task-2"):
+            await services._scrape_single_url(None, "https://example.com/flaky", 5)
+            await services._scrape_single_url(None, "https://example.com/flaky", 5)
+            await services._scrape_single_url(None, "https://example.com/gone", 5)
+            await services._scrape_single_url(None, "https://example.com/gone", 5)
+
+            impatient = asyncio.create_task(services._scrape_single_url(None, "https://example.com/slow", 5))
+            patient = asyncio.create_task(services._scrape_single_url(None, "https://example.com/slow", 5))
+            await asyncio.sleep(0.05)
+            impatient.cancel()
+            return await patient
+
+    result = asyncio.run(run())
+    assert calls.count("https://example.com/flaky") == 2
+    assert calls.count("https://example.com/gone") == 1
+    assert calls.count("https://example.com/slow") == 1
+    assert result[0] == "slow content"
+
+
+def test_no_registry_outside_generation():
+    assert get_url_registry() is None
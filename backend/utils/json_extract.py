@@ -0,0 +1,133 @@
+"""
+Linear-time extraction of JSON embedded in LLM output.
+
+LLM responses wrap JSON in markdown fences, prose, or both. The previous
+extractor fell back to the greedy regex ``\\{[\\s\\S]*\\}``, which is retried
+from every ``{`` in the text (quadratic when braces are unbalanced) and fails
+outright when prose after the JSON contains another brace.
+
+``iter_json_candidates`` scans the text once, jumping between brackets and
+quotes with a regex and skipping string literals (with their escapes) only
+inside brackets, so quotes in surrounding prose are ignored. It records
+balanced ``{...}`` / ``[...]`` spans at the top level and one level down.
+Each character belongs to at most two candidates, so trying every candidate
+costs O(n) parsing work in total.
+
+Provides:
+- iter_json_candidates: balanced object/array spans, largest first
+- iter_fenced_blocks: contents of markdown code fences
+- extract_json_from_markdown: first JSON value found in direct, fenced or embedded form
+"""
+from __future__ import annotations
+
+import re
+import json
+from typing import Any, Iterator, List, Optional, Tuple
+
+_OPENERS = {"{": "}", "[": "]"}
+# Characters that matter to the scanner; everything between them is skipped in C
+_TOKEN_RE = re.compile(r'[{}\[\]"]')
+# A complete JSON string literal starting at a quote (unrolled loop, linear time)
+_STRING_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+
+
+def iter_json_candidates(text: str) -> Iterator[Tuple[int, int]]:
+    """
+    Yield ``(start, end)`` spans of balanced JSON-looking objects and arrays, largest first.
+
+    Only top-level spans and their direct children are reported. A closing bracket
+    that does not match the innermost opener abandons the current candidate.
+    """
+    spans: List[Tuple[int, int]] = []
+    stack: List[Tuple[str, int]] = []
+    position = 0
+    while True:
+        token = _TOKEN_RE.search(text, position)
+        if token is None:
+            break
+        index = token.start()
+        char = text[index]
+        position = index + 1
+        if char == '"':
+            if stack:
+                string = _STRING_RE.match(text, index)
+                if string is None:
+                    # Unterminated string: nothing after this point can close the candidate
+                    break
+                position = string.end()
+        elif char in _OPENERS:
+            stack.append((_OPENERS[char], index))
+        elif stack:
+            expected, start = stack.pop()
+            if char != expected:
+                stack.clear()
+            elif len(stack) <= 1:
+                spans.append((start, index + 1))
+    spans.sort(key=lambda span: span[0] - span[1])
+    return iter(spans)
+
+
+def iter_fenced_blocks(text: str) -> Iterator[str]:
+    """Yield the contents of ```` ``` ```` fenced blocks (an optional ``json`` tag is dropped)."""
+    position = 0
+    while True:
+        start = text.find("```", position)
+        if start < 0:
+            return
+        body_start = start + 3
+        end = text.find("```", body_start)
+        if end < 0:
+            return
+        body = text[body_start:end]
+        if body[:4].lower() == "json":
+            body = body[4:]
+        yield body.strip()
+        position = end + 3
+
+
+def _loads(candidate: str) -> Optional[Any]:
+    try:
+        return json.loads(candidate)
+    except (json.JSONDecodeError, ValueError):
+        return None
+
+
+def extract_json_from_markdown(text: str) -> Optional[Any]:
+    """
+    Extract JSON from text that might be formatted as markdown code blocks.
+
+    Tries, in order: the whole text, each fenced code block, the span from the
+    first opening to the last closing bracket, and balanced object/array spans
+    in the text (largest first).
+
+    Args:
+        text: The text that may contain markdown-formatted JSON
+
+    Returns:
+        Parsed JSON value or None if extraction failed
+    """
+    if not text:
+        return None
+    stripped = text.strip()
+    result = _loads(stripped)
+    if result is not None:
+        return result
+
+    for block in iter_fenced_blocks(stripped):
+        result = _loads(block)
+        if result is not None:
+            return result
+
+    # Common case: one JSON value between the first opener and the last closer (a single C-speed parse)
+    start = min((i for i in (stripped.find("{"), stripped.find("[")) if i >= 0), default=-1)
+    end = max(stripped.rfind("}"), stripped.rfind("]"))
+    if 0 <= start < end:
+        result = _loads(stripped[start:end + 1])
+        if result is not None:
+            return result
+
+    for start, end in iter_json_candidates(stripped):
+        result = _loads(stripped[start:end])
+        if result is not None:
+            return result
+    return None